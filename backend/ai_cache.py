@@ -0,0 +1,282 @@
+"""
+Mentixy — AI Response Cache
+Persistent cache in front of ai_engine._safe_generate for calls whose answer
+depends only on their inputs: interview prep, salary truth, skill gap,
+roadmaps and code review. "TCS / Software Engineer" interview prep is asked
+thousands of times during drive season; it should cost one Gemini call a week.
+
+Key: sha256(model name + normalized prompt). Normalization collapses
+whitespace, and casefolds for label-only prompts (company, role, city) —
+not for code review, where case is meaningful.
+
+Rows live in ai_response_cache so every worker shares them. A small
+in-process LRU sits in front so hot keys skip the DB round trip; it holds an
+entry for at most MEMORY_TTL_SECONDS, so purges reach other workers quickly.
+Each function has its own TTL; the table is held to AI_CACHE_MAX_ENTRIES by
+evicting least-recently-used rows. Only successfully parsed model replies are
+cached — never fallbacks. Any cache error is logged and treated as a miss.
+
+    with ai_cache.bypass():       # skip the read (a fresh reply still refreshes the row)
+        await generate_interview_prep(...)
+"""
+import asyncio
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, select, update
+
+from database import engine
+import models
+
+Policy = namedtuple("Policy", "ttl casefold")
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# function → how long its answers stay valid, and whether the prompt is case-insensitive
+POLICIES = {
+    "interview_prep": Policy(7 * DAY, True),
+    "salary_truth": Policy(7 * DAY, True),
+    "skill_gap": Policy(DAY, True),
+    "roadmap": Policy(DAY, True),
+    "code_review": Policy(30 * DAY, False),
+    "assessment_narrative": Policy(30 * DAY, False),
+}
+
+ENABLED = os.getenv("AI_CACHE_ENABLED", "1") not in ("0", "false", "False")
+MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "50000"))
+MEMORY_ENTRIES = int(os.getenv("AI_CACHE_MEMORY_ENTRIES", "512"))
+MEMORY_TTL_SECONDS = 300
+TOUCH_SECONDS = 60     # last_used_at is refreshed at most this often per key
+EVICT_EVERY = 100      # writes between eviction passes
+
+# AI_CACHE_TTLS=interview_prep=86400,code_review=604800 overrides the defaults
+for _item in filter(None, os.getenv("AI_CACHE_TTLS", "").split(",")):
+    _name, _, _ttl = _item.partition("=")
+    if _name.strip() in POLICIES and _ttl.strip():
+        POLICIES[_name.strip()] = POLICIES[_name.strip()]._replace(ttl=int(_ttl))
+
+_bypass = contextvars.ContextVar("ai_cache_bypass", default=False)
+_lock = threading.Lock()
+_memory = OrderedDict()   # key → (json text, expires at epoch seconds)
+_stats = {}               # function → counters
+_writes = 0
+_schema_ready = False
+
+_COUNTERS = ("memory_hits", "hits", "misses", "bypassed", "writes", "errors")
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _epoch(dt: datetime) -> float:
+    return (dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def _count(function: str, counter: str, n: int = 1):
+    with _lock:
+        row = _stats.setdefault(function, dict.fromkeys(_COUNTERS, 0))
+        row[counter] += n
+
+
+def normalize_prompt(prompt: str, casefold: bool = True) -> str:
+    text = " ".join(prompt.split())
+    return text.casefold() if casefold else text
+
+
+def make_key(function: str, model: str, prompt: str) -> str:
+    policy = POLICIES[function]
+    raw = f"{model}\0{function}\0{normalize_prompt(prompt, policy.casefold)}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+@contextlib.contextmanager
+def bypass(enabled: bool = True):
+    """Skip cache reads for AI calls made inside this block (this task/context only)."""
+    token = _bypass.set(enabled)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def _ensure_table():
+    global _schema_ready
+    if not _schema_ready:
+        models.AIResponseCache.__table__.create(engine, checkfirst=True)
+        _schema_ready = True
+
+
+# ─── In-process LRU ───
+
+def _memory_get(key: str):
+    with _lock:
+        item = _memory.get(key)
+        if item is None:
+            return None
+        if item[1] <= time.time():
+            del _memory[key]
+            return None
+        _memory.move_to_end(key)
+        return item[0]
+
+
+def _memory_put(key: str, text: str, expires_at: float):
+    with _lock:
+        _memory[key] = (text, min(expires_at, time.time() + MEMORY_TTL_SECONDS))
+        _memory.move_to_end(key)
+        while len(_memory) > MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+
+
+# ─── Table access (sync; called through asyncio.to_thread) ───
+
+def _db_get(key: str):
+    _ensure_table()
+    t = models.AIResponseCache.__table__
+    now = _now()
+    with engine.begin() as conn:
+        row = conn.execute(
+            select(t.c.response, t.c.expires_at, t.c.last_used_at).where(t.c.key == key, t.c.expires_at > now)
+        ).first()
+        if row is None:
+            return None
+        if now.timestamp() - _epoch(row.last_used_at) > TOUCH_SECONDS:
+            conn.execute(update(t).where(t.c.key == key).values(last_used_at=now))
+    return row.response, _epoch(row.expires_at)
+
+
+def _upsert_statement(dialect: str):
+    table = models.AIResponseCache.__table__
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=["key"],
+        set_={c: stmt.excluded[c] for c in ("response", "model", "created_at", "expires_at", "last_used_at")},
+    )
+
+
+def _db_put(row: dict):
+    global _writes
+    _ensure_table()
+    with engine.begin() as conn:
+        conn.execute(_upsert_statement(conn.dialect.name), row)
+    with _lock:
+        _writes += 1
+        due = _writes % EVICT_EVERY == 0
+    if due:
+        evict()
+
+
+def evict() -> int:
+    """Drop expired rows, then least-recently-used ones beyond MAX_ENTRIES. Returns rows removed."""
+    _ensure_table()
+    t = models.AIResponseCache.__table__
+    with engine.begin() as conn:
+        removed = conn.execute(delete(t).where(t.c.expires_at <= _now())).rowcount or 0
+        excess = conn.execute(select(func.count()).select_from(t)).scalar() - MAX_ENTRIES
+        if excess > 0:
+            oldest = select(t.c.key).order_by(t.c.last_used_at).limit(excess).scalar_subquery()
+            removed += conn.execute(delete(t).where(t.c.key.in_(oldest))).rowcount or 0
+    if removed:
+        print(f"[AI Cache] Evicted {removed} entries")
+    return removed
+
+
+# ─── Public API ───
+
+async def get(function: str, model: str, prompt: str):
+    """Cached parsed response, or None (miss, bypassed, disabled or cache error)."""
+    if not ENABLED or function not in POLICIES:
+        return None
+    if _bypass.get():
+        _count(function, "bypassed")
+        return None
+    key = make_key(function, model, prompt)
+    text = _memory_get(key)
+    if text is not None:
+        _count(function, "memory_hits")
+        return json.loads(text)
+    try:
+        found = await asyncio.to_thread(_db_get, key)
+    except Exception as e:
+        _count(function, "errors")
+        print(f"[AI Cache] ⚠️ Read failed: {str(e)[:120]}")
+        return None
+    if found is None:
+        _count(function, "misses")
+        return None
+    response, expires_at = found
+    _memory_put(key, json.dumps(response), expires_at)
+    _count(function, "hits")
+    return response
+
+
+async def put(function: str, model: str, prompt: str, response):
+    """Store a parsed model response under the function's TTL."""
+    if not ENABLED or function not in POLICIES:
+        return
+    key = make_key(function, model, prompt)
+    text = json.dumps(response)
+    if _memory_get(key) == text:
+        return  # another caller of the same coalesced call already stored it
+    now = _now()
+    expires_at = now + timedelta(seconds=POLICIES[function].ttl)
+    _memory_put(key, text, expires_at.timestamp())
+    row = {"key": key, "function": function, "model": model, "response": response,
+           "created_at": now, "expires_at": expires_at, "last_used_at": now}
+    try:
+        await asyncio.to_thread(_db_put, row)
+        _count(function, "writes")
+    except Exception as e:
+        _count(function, "errors")
+        print(f"[AI Cache] ⚠️ Write failed: {str(e)[:120]}")
+
+
+def purge(function: str = None) -> int:
+    """Delete cached responses (all, or one function's). Other workers' memory copies age out."""
+    _ensure_table()
+    t = models.AIResponseCache.__table__
+    stmt = delete(t) if function is None else delete(t).where(t.c.function == function)
+    with engine.begin() as conn:
+        removed = conn.execute(stmt).rowcount or 0
+    with _lock:
+        _memory.clear()
+    return removed
+
+
+def stats() -> dict:
+    """Per-function hit/miss counters for this process, plus overall hit rate."""
+    with _lock:
+        functions = {name: dict(row) for name, row in _stats.items()}
+        memory_entries = len(_memory)
+    for row in functions.values():
+        served = row["memory_hits"] + row["hits"]
+        looked_up = served + row["misses"]
+        row["hit_rate"] = round(served / looked_up, 3) if looked_up else None
+    served = sum(r["memory_hits"] + r["hits"] for r in functions.values())
+    looked_up = served + sum(r["misses"] for r in functions.values())
+    return {
+        "enabled": ENABLED,
+        "max_entries": MAX_ENTRIES,
+        "memory_entries": memory_entries,
+        "ttl_seconds": {name: p.ttl for name, p in POLICIES.items()},
+        "hit_rate": round(served / looked_up, 3) if looked_up else None,
+        "functions": functions,
+    }
+
+
+def reset_stats():
+    with _lock:
+        _stats.clear()
@@ -2,21 +2,49 @@
 Mentixy AI Engine — Gemini-Powered Intelligence Layer
 Covers: Assessment 4D, Career Chat, Skill Gap, Resume ATS, Code Review,
         Job Matching, Roadmap Generation, Interview Prep
+
+Every function is async and goes through the gateway below; sync code calls
+them through run_sync().
 """
 
 import os
+import re
 import json
+import asyncio
+import contextlib
+import threading
+import time
+from collections import deque
 from typing import Optional, List
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+import ai_cache
+import ai_scheduler
+import ai_telemetry
+import chat_memory
+import resume_ats
+
 load_dotenv()
 
 GOOGLE_API_KEY = os.getenv("GEMINI_API_KEY", "") or os.getenv("GOOGLE_API_KEY", "")
 if GOOGLE_API_KEY:
     genai.configure(api_key=GOOGLE_API_KEY)
 
-model = genai.GenerativeModel("gemini-2.0-flash") if GOOGLE_API_KEY else None
+MODEL_NAME = "gemini-2.0-flash"
+model = genai.GenerativeModel(MODEL_NAME) if GOOGLE_API_KEY else None
+
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "8"))
+AI_TIMEOUT_SECONDS = float(os.getenv("AI_TIMEOUT_SECONDS", "30"))
+# Circuit breaker: open after AI_BREAKER_FAILURE_RATE of the last AI_BREAKER_WINDOW
+# upstream calls failed or took over AI_BREAKER_SLOW_SECONDS; probe again after the cooldown
+AI_BREAKER_WINDOW = int(os.getenv("AI_BREAKER_WINDOW", "20"))
+AI_BREAKER_MIN_CALLS = int(os.getenv("AI_BREAKER_MIN_CALLS", "5"))
+AI_BREAKER_FAILURE_RATE = float(os.getenv("AI_BREAKER_FAILURE_RATE", "0.5"))
+AI_BREAKER_SLOW_SECONDS = float(os.getenv("AI_BREAKER_SLOW_SECONDS", "10"))
+AI_BREAKER_COOLDOWN_SECONDS = float(os.getenv("AI_BREAKER_COOLDOWN_SECONDS", "30"))
+# Hedged calls start a second request if the first hasn't answered by then
+AI_HEDGE_AFTER_SECONDS = float(os.getenv("AI_HEDGE_AFTER_SECONDS", "2.5"))
 
 
 def _clean_json(text: str) -> dict:
@@ -28,85 +56,462 @@ def _clean_json(text: str) -> dict:
     return json.loads(text)
 
 
-def _safe_generate(prompt: str, fallback: dict) -> dict:
-    """Safe wrapper for Gemini generation with fallback"""
+# ═══════════════════════════════════════════════════════════════
+# GATEWAY — one event loop, one semaphore for every Gemini call
+# ═══════════════════════════════════════════════════════════════
+
+_END = object()  # end-of-stream marker
+
+
+class CircuitOpen(Exception):
+    """The breaker is open — the call fails fast to its fallback."""
+
+
+class CircuitBreaker:
+    """Closed → open when too many recent upstream calls failed or were slow.
+
+    While open every call is rejected at once. After `cooldown` it half-opens
+    and admits one probe: a good probe closes it, a bad one opens it again.
+    Only touched on the gateway loop, so it needs no lock.
+    """
+
+    def __init__(self, window: int = AI_BREAKER_WINDOW, min_calls: int = AI_BREAKER_MIN_CALLS,
+                 failure_rate: float = AI_BREAKER_FAILURE_RATE, slow_seconds: float = AI_BREAKER_SLOW_SECONDS,
+                 cooldown: float = AI_BREAKER_COOLDOWN_SECONDS):
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_seconds = slow_seconds
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.outcomes = deque(maxlen=window)   # True = good
+        self.opened_at = 0.0
+        self.probing = False
+        self.trips = 0
+        self.rejected = 0
+
+    def admit(self) -> bool:
+        """Raise CircuitOpen, or let the call through; returns whether it is the probe."""
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = "half_open"
+        if self.state == "closed":
+            return False
+        if self.state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        self.rejected += 1
+        raise CircuitOpen(f"circuit {self.state}")
+
+    def record(self, probe: bool, seconds: float, failed: Optional[bool]):
+        """Outcome of an admitted call; failed=None means abandoned early (no verdict)."""
+        if failed is False and seconds >= self.slow_seconds:
+            failed = True
+        if probe:
+            self.probing = False
+            if failed:
+                self._trip("probe failed")
+            elif failed is False:
+                self.state = "closed"
+                self.outcomes.clear()
+                print("[Mentixy AI] Circuit closed — upstream recovered")
+            return
+        if failed is None or self.state != "closed":
+            return  # late results from before a trip don't count
+        self.outcomes.append(not failed)
+        bad = self.outcomes.count(False)
+        if len(self.outcomes) >= self.min_calls and bad / len(self.outcomes) >= self.failure_rate:
+            self._trip(f"{bad}/{len(self.outcomes)} recent calls failed or slow")
+
+    def _trip(self, reason: str):
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self.outcomes.clear()
+        self.trips += 1
+        print(f"[Mentixy AI] Circuit open for {self.cooldown:.0f}s: {reason}")
+
+    def stats(self) -> dict:
+        return {"state": self.state, "trips": self.trips, "rejected": self.rejected,
+                "recent_failures": self.outcomes.count(False), "recent_calls": len(self.outcomes)}
+
+
+class _Attempt:
+    """One admitted upstream call; reports its outcome to the breaker once."""
+    __slots__ = ("breaker", "probe", "started", "settled")
+
+    def __init__(self, breaker: CircuitBreaker, probe: bool):
+        self.breaker = breaker
+        self.probe = probe
+        self.started = time.monotonic()
+        self.settled = False
+
+    def settle(self, failed: Optional[bool] = False):
+        if not self.settled:
+            self.settled = True
+            self.breaker.record(self.probe, time.monotonic() - self.started, failed)
+
+
+class _Flight:
+    """One upstream call and the callers sharing it."""
+    __slots__ = ("task", "ticket", "waiters", "served")
+
+    def __init__(self, task: asyncio.Task, ticket: ai_scheduler.Ticket):
+        self.task = task
+        self.ticket = ticket
+        self.waiters = 0
+        self.served = 0
+
+
+class AIGateway:
+    """Runs generate_content_async on a dedicated event loop thread.
+
+    Slots are handed out on that loop by an ai_scheduler.Scheduler, so the
+    concurrency cap, rate limit and priority order are global no matter which
+    loop or thread the caller is on (uvicorn's loop, a worker thread via
+    run_sync, a test client's portal). Waiting callers hold no worker thread,
+    a timeout bounds queueing + generation, and cancelling the caller cancels
+    the in-flight request.
+
+    Identical prompts in flight at the same time share one upstream call
+    (single-flight): later callers join the first one's task, lifting it to
+    their priority class if it's still queued. The task is cancelled only
+    once every caller has timed out or gone away.
+
+    Every upstream call passes the circuit breaker first, so a degraded
+    upstream costs callers nothing while the breaker is open. Hedged calls
+    (`hedge=True`) send a second request when the first hasn't answered
+    within `hedge_after` and a slot is free, and take whichever lands first.
+    """
+
+    def __init__(self, max_concurrency: int = AI_MAX_CONCURRENCY, timeout: float = AI_TIMEOUT_SECONDS,
+                 breaker: CircuitBreaker = None, hedge_after: float = AI_HEDGE_AFTER_SECONDS,
+                 scheduler: ai_scheduler.Scheduler = None):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.scheduler = scheduler or ai_scheduler.Scheduler(max_concurrency)
+        self.hedge_after = hedge_after
+        self.hedges = 0        # second requests sent
+        self.hedge_wins = 0    # ...that answered first
+        self.in_flight = 0
+        self.waiting = 0
+        self.upstream_calls = 0
+        self.coalesced = 0     # callers that joined an existing call
+        self.max_served = 0    # most callers one upstream call has answered
+        self.thread = None
+        self._loop = None
+        self._flights = {}     # prompt → _Flight (only touched on the gateway loop)
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    self.thread = threading.Thread(target=loop.run_forever, name="ai-gateway", daemon=True)
+                    self.thread.start()
+                    self._loop = loop
+        return self._loop
+
+    @contextlib.asynccontextmanager
+    async def _slot(self, ticket: ai_scheduler.Ticket):
+        self.waiting += 1
+        try:
+            await self.scheduler.acquire(ticket)
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.scheduler.release(ticket)
+
+    @contextlib.asynccontextmanager
+    async def _attempt(self, ticket: ai_scheduler.Ticket):
+        """Breaker admission, then a slot; the breaker hears how the call went."""
+        attempt = _Attempt(self.breaker, self.breaker.admit())
+        try:
+            async with self._slot(ticket):
+                attempt.started = time.monotonic()
+                yield attempt
+        except ai_scheduler.Dropped:
+            attempt.settle(None)  # never reached the upstream
+            raise
+        except asyncio.CancelledError:
+            # Cancelled by timed-out callers (a failure if it was slow) or a won hedge
+            attempt.settle(True if time.monotonic() - attempt.started >= self.breaker.slow_seconds else None)
+            raise
+        except Exception:
+            attempt.settle(True)
+            raise
+        attempt.settle()
+
+    async def _upstream(self, prompt: str, ticket: ai_scheduler.Ticket):
+        async with self._attempt(ticket):
+            return await model.generate_content_async(prompt)
+
+    async def _hedged(self, prompt: str, ticket: ai_scheduler.Ticket):
+        first = asyncio.ensure_future(self._upstream(prompt, ticket))
+        second = None
+        try:
+            done, _ = await asyncio.wait({first}, timeout=self.hedge_after)
+            if done or not self.scheduler.available(ticket.cls) or self.breaker.state != "closed":
+                return await first
+            self.hedges += 1
+            hedge = self.scheduler.ticket(ticket.cls, ticket.user, ticket.deadline)
+            second = asyncio.ensure_future(self._upstream(prompt, hedge))
+            pending = {first, second}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.hedge_wins += 1
+                        return task.result()
+            return first.result()  # both failed: raise the first one's error
+        finally:
+            first.cancel()
+            if second is not None:
+                second.cancel()
+
+    def _land(self, prompt: str, flight: _Flight):
+        if self._flights.get(prompt) is flight:
+            del self._flights[prompt]
+        self.max_served = max(self.max_served, flight.served)
+        if flight.served > 1:
+            print(f"[Mentixy AI] One call served {flight.served} callers")
+
+    async def _call(self, prompt: str, timeout: float, hedge: bool, cls: str, user):
+        flight = self._flights.get(prompt)
+        if flight is None:
+            ticket = self.scheduler.ticket(cls, user, time.monotonic() + timeout)
+            upstream = self._hedged(prompt, ticket) if hedge and self.hedge_after else self._upstream(prompt, ticket)
+            flight = self._flights[prompt] = _Flight(asyncio.ensure_future(upstream), ticket)
+            flight.task.add_done_callback(lambda _: self._land(prompt, flight))
+            self.upstream_calls += 1
+        else:
+            self.coalesced += 1
+            self.scheduler.promote(flight.ticket, cls)
+        flight.waiters += 1
+        flight.served += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(flight.task), timeout)
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                # Nobody is left to answer; new callers start a fresh call
+                if self._flights.get(prompt) is flight:
+                    del self._flights[prompt]
+                flight.task.cancel()
+
+    async def generate(self, prompt: str, timeout: float = None, hedge: bool = False,
+                       cls: str = ai_scheduler.STANDARD, user=None):
+        """Response from the model; raises TimeoutError, CircuitOpen, ai_scheduler.Dropped
+        or the model's exception. `cls` and `user` place the call in the scheduler."""
+        future = asyncio.run_coroutine_threadsafe(
+            self._call(prompt, timeout or self.timeout, hedge, cls, user), self.loop)
+        # Cancelling this await cancels the future, which cancels the task on the gateway loop
+        return await asyncio.wrap_future(future)
+
+    async def stream(self, prompt: str, timeout: float = None, cls: str = ai_scheduler.INTERACTIVE, user=None):
+        """Yield reply text chunks as the model produces them (never coalesced).
+
+        The request runs on the gateway loop and hands chunks to the caller's
+        loop through a queue. `timeout` bounds the wait for each chunk, the
+        first one included; closing the generator cancels the request.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        ticket = self.scheduler.ticket(cls, user, time.monotonic() + (timeout or self.timeout))
+
+        def put(item):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                pass  # caller's loop is gone
+
+        async def produce():
+            try:
+                async with self._attempt(ticket) as attempt:
+                    response = await model.generate_content_async(prompt, stream=True)
+                    async for chunk in response:
+                        attempt.settle()  # the breaker judges streams by their first chunk
+                        if chunk.text:
+                            put(chunk.text)
+                put(_END)
+            except Exception as e:
+                put(e)
+
+        future = asyncio.run_coroutine_threadsafe(produce(), self.loop)
+        try:
+            while True:
+                item = await asyncio.wait_for(queue.get(), timeout or self.timeout)
+                if item is _END:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+
+    def stats(self) -> dict:
+        callers = self.upstream_calls + self.coalesced
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "upstream_calls": self.upstream_calls,
+            "coalesced_callers": self.coalesced,
+            "callers_per_call": round(callers / self.upstream_calls, 2) if self.upstream_calls else None,
+            "max_callers_per_call": self.max_served,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "breaker": self.breaker.stats(),
+            "scheduler": self.scheduler.stats(),
+        }
+
+
+gateway = AIGateway()
+
+
+def _tokens(response, prompt: str, text: str) -> tuple:
+    """(prompt, response) token counts — from usage metadata when the SDK reports it."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None and getattr(usage, "prompt_token_count", None):
+        ai_telemetry.observe_tokens(len(prompt), usage.prompt_token_count)
+        return usage.prompt_token_count, usage.candidates_token_count or 0
+    return ai_telemetry.estimate_tokens(prompt), ai_telemetry.estimate_tokens(text)
+
+
+async def generate_text(prompt: str, timeout: float = None, hedge: bool = False) -> Optional[str]:
+    """Model reply text, or None when there's no model, the circuit is open or the
+    call failed/timed out. `hedge` for latency-critical calls (see AIGateway)."""
     if not model:
-        return fallback
+        ai_telemetry.failed("no_model")
+        return None
+    started = time.perf_counter()
+    cls, user = ai_scheduler.current()
     try:
-        response = model.generate_content(prompt)
-        return _clean_json(response.text)
+        response = await gateway.generate(prompt, timeout, hedge, cls, user)
+        text = response.text.strip()
+        ai_telemetry.model_call((time.perf_counter() - started) * 1000, *_tokens(response, prompt, text))
+        return text
+    except CircuitOpen:
+        ai_telemetry.failed("circuit_open")
+        return None
+    except ai_scheduler.Dropped as e:
+        print(f"[Mentixy AI] {e}")
+        ai_telemetry.failed("dropped")
+        return None
+    except asyncio.TimeoutError:
+        print(f"[Mentixy AI] Timed out after {timeout or gateway.timeout:.0f}s")
+        ai_telemetry.failed("timeout")
     except Exception as e:
         print(f"[Mentixy AI] Error: {e}")
+        ai_telemetry.failed("error")
+    ai_telemetry.model_call((time.perf_counter() - started) * 1000)
+    return None
+
+
+async def _safe_generate(prompt: str, fallback: dict, cache: str = None) -> dict:
+    """Gateway call parsed as JSON, with fallback.
+
+    `cache` names an ai_cache policy; identical prompts are then answered from
+    the response cache, and parsed replies (never fallbacks) are stored.
+    """
+    if cache and model:
+        cached = await ai_cache.get(cache, MODEL_NAME, prompt)
+        if cached is not None:
+            ai_telemetry.cache_hit()
+            return cached
+    text = await generate_text(prompt)
+    if text is None:
         return fallback
+    try:
+        result = _clean_json(text)
+    except (ValueError, IndexError) as e:
+        print(f"[Mentixy AI] Bad JSON: {e}")
+        ai_telemetry.failed("parse_error")
+        return fallback
+    if cache:
+        await ai_cache.put(cache, MODEL_NAME, prompt, result)
+    return result
+
+
+def run_sync(awaitable, timeout: float = None):
+    """Sync shim: run an ai_engine coroutine from sync code (scripts, sync routes).
+
+    Blocks the calling thread until done; async code should just await.
+    """
+    loop = gateway.loop
+    if threading.current_thread() is gateway.thread:
+        raise RuntimeError("run_sync() called on the AI gateway loop — await instead")
+    future = asyncio.run_coroutine_threadsafe(awaitable, loop)
+    try:
+        return future.result(timeout)
+    except BaseException:
+        future.cancel()
+        raise
 
 
 # ═══════════════════════════════════════════════════════════════
-# 1. ASSESSMENT 4D ANALYSIS
+# 1. ASSESSMENT 4D NARRATIVE
 # ═══════════════════════════════════════════════════════════════
 
-def analyze_4d_assessment(answers: list, time_data: list = None) -> dict:
-    """Analyze 4D assessment answers → archetype + career matches"""
-    prompt = f"""You are Mentixy's 4D Career Profiling Engine for Indian students.
+@ai_telemetry.track
+async def write_4d_narrative(result: dict) -> dict:
+    """Narrative for a locally scored 4D profile (assessment_scoring.score_assessment).
 
-Analyze these psychometric answers across 4 dimensions:
-- Analytical (A): Logic, data, patterns, systems thinking
-- Interpersonal (I): Communication, empathy, leadership, teamwork
-- Creative (C): Innovation, design, ideation, artistic expression
-- Systematic (S): Planning, process, organization, execution
+    Only writes text — archetype description, personality summary, advice and a
+    "why" per career; scores, archetype and matches are never changed here.
+    Falls back to the local template text.
+    """
+    careers = [{"slug": c["slug"], "name": c["name"], "match_score": c["match_score"],
+                "driving_dimension": c["driving_dimension"]} for c in result["top_careers"]]
+    prompt = f"""You are Mentixy's 4D Career Profiling Engine for Indian students.
 
-Assessment Answers: {json.dumps(answers, indent=2)}
-{f"Response Times (ms): {json.dumps(time_data)}" if time_data else ""}
+A student's assessment has already been scored (Analytical, Interpersonal, Creative, Systematic; 0-100):
+Dimensions: {json.dumps(result["dimensions"])}
+Archetype: {result["archetype"]["code"]} — {result["archetype"]["name"]}
+Consistency: {result["consistency_score"]}/100
+Career matches (already ranked): {json.dumps(careers)}
 
+Write the narrative only. Do not change any score or ranking.
 Return ONLY raw JSON (no markdown):
 {{
-    "dimensions": {{
-        "analytical": 0-100,
-        "interpersonal": 0-100,
-        "creative": 0-100,
-        "systematic": 0-100
-    }},
-    "dominant_dimension": "analytical|interpersonal|creative|systematic",
-    "archetype": {{
-        "code": "2-letter code like AN, IP, CR, SY, AI, AC, AS, IC, IS, CS",
-        "name": "The Architect / The Connector / The Visionary / etc",
-        "description": "2-3 sentences about this archetype"
-    }},
-    "consistency_score": 0-100,
-    "top_careers": [
-        {{
-            "slug": "software-engineer",
-            "name": "Software Engineer",
-            "match_score": 92,
-            "driving_dimension": "analytical",
-            "why": "1-2 sentence explanation",
-            "salary_p50_lpa": 12,
-            "timeline_months": 6
-        }}
-    ],
+    "archetype_description": "2-3 sentences about this archetype",
     "personality_summary": "2-3 sentence personality description",
-    "advice": "Personalized career advice for Indian market"
+    "advice": "Personalized career advice for Indian market",
+    "why": {{"<career slug>": "1-2 sentence explanation of the match"}}
 }}
 
-Provide exactly 5 career matches sorted by score. Focus on Indian job market.
-Use Indian salary data (LPA). Be honest, not generic."""
+Be honest, not generic."""
 
-    return _safe_generate(prompt, _mock_4d_assessment())
+    fallback = {
+        "archetype_description": result["archetype"]["description"],
+        "personality_summary": result["personality_summary"],
+        "advice": result["advice"],
+        "why": {c["slug"]: c["why"] for c in result["top_careers"]},
+    }
+    narrative = await _safe_generate(prompt, fallback, cache="assessment_narrative")
+    why = narrative.get("why") if isinstance(narrative.get("why"), dict) else {}
+    return {
+        **{k: narrative.get(k) or fallback[k] for k in ("archetype_description", "personality_summary", "advice")},
+        "why": {slug: why.get(slug) or text for slug, text in fallback["why"].items()},
+    }
 
 
 # ═══════════════════════════════════════════════════════════════
 # 2. CAREER CHAT
 # ═══════════════════════════════════════════════════════════════
 
-def career_chat(message: str, context: list = None, user_profile: dict = None) -> str:
-    """AI career counselor chat — Mentixy's conversational advisor"""
-    if not model:
-        return _mock_chat_response(message)
-
+def _chat_prompt(message: str, context: list = None, user_profile: dict = None, summary: str = None) -> str:
+    # Bounded by chat_memory's token budget: the rolling summary, then the newest turns that fit
+    summary, recent = chat_memory.window(context or [], summary)
     history = ""
-    if context:
-        for msg in context[-8:]:
-            role = "User" if msg.get("role") == "user" else "Mentixy"
-            history += f"{role}: {msg.get('content', '')}\n"
+    for msg in recent:
+        role = "User" if msg.get("role") == "user" else "Mentixy"
+        history += f"{role}: {msg.get('content', '')}\n"
 
     profile_context = ""
     if user_profile:
@@ -121,7 +526,7 @@ User Profile:
 - Mentixy Score: {user_profile.get('mentixy_score', 0)}
 """
 
-    prompt = f"""You are Mentixy AI, an expert career guidance counselor for Indian students.
+    return f"""You are Mentixy AI, an expert career guidance counselor for Indian students.
 
 You are NOT generic. You know:
 - Indian salary benchmarks (fresher vs experienced, tier 1 vs tier 2/3 colleges)
@@ -132,6 +537,7 @@ You are NOT generic. You know:
 - Skills that actually get you hired vs resume fillers
 
 {profile_context}
+{("Summary of the earlier conversation:" + chr(10) + summary + chr(10)) if summary else ""}
 {("Conversation history:" + chr(10) + history) if history else ""}
 
 User: {message}
@@ -146,19 +552,81 @@ Rules:
 
 Respond as Mentixy AI:"""
 
-    try:
-        response = model.generate_content(prompt)
-        return response.text.strip()
-    except Exception as e:
-        print(f"[Mentixy AI] Chat error: {e}")
-        return _mock_chat_response(message)
+
+@ai_telemetry.track
+async def career_chat(message: str, context: list = None, user_profile: dict = None, summary: str = None) -> str:
+    """AI career counselor chat — Mentixy's conversational advisor.
+    `context` is the unsummarized history, `summary` the session's rolling summary."""
+    reply = await generate_text(_chat_prompt(message, context, user_profile, summary), hedge=True)
+    return reply or _mock_chat_response(message)
+
+
+@ai_telemetry.track
+async def career_chat_stream(message: str, context: list = None, user_profile: dict = None, summary: str = None):
+    """career_chat, yielded in chunks as Gemini produces them.
+
+    Without a model (or if the call fails before the first chunk) the mock
+    reply is yielded word by word instead; a failure mid-stream ends it early.
+    """
+    sent = False
+    if not model:
+        ai_telemetry.failed("no_model")
+    else:
+        prompt = _chat_prompt(message, context, user_profile, summary)
+        started = time.perf_counter()
+        chunks = []
+        try:
+            async for text in gateway.stream(prompt, user=ai_scheduler.current()[1]):
+                sent = True
+                chunks.append(text)
+                yield text
+        except CircuitOpen:
+            ai_telemetry.failed("circuit_open")
+        except asyncio.TimeoutError:
+            print(f"[Mentixy AI] Stream timed out after {gateway.timeout:.0f}s")
+            ai_telemetry.failed("timeout", fallback=not sent)
+        except Exception as e:
+            print(f"[Mentixy AI] Stream error: {e}")
+            ai_telemetry.failed("error", fallback=not sent)
+        finally:
+            reply = "".join(chunks)
+            ai_telemetry.model_call((time.perf_counter() - started) * 1000,
+                                    ai_telemetry.estimate_tokens(prompt), ai_telemetry.estimate_tokens(reply))
+    if not sent:
+        for word in re.findall(r"\S+\s*", _mock_chat_response(message)):
+            yield word
+
+
+@ai_telemetry.track
+async def summarize_chat(previous: str, turns: list) -> str:
+    """Fold older chat turns into the session's rolling summary (chat_memory).
+    Without a model, an extractive summary of the questions asked."""
+    transcript = "\n".join(
+        f"{'User' if m.get('role') == 'user' else 'Mentixy'}: {m.get('content', '')}" for m in turns)
+    words = int(chat_memory.SUMMARY_TOKENS * 0.7)
+    prompt = f"""You maintain the memory of a career-guidance chat between an Indian student and Mentixy AI.
+
+Summary so far:
+{previous or "(none)"}
+
+New turns to fold in:
+{transcript}
+
+Write the updated summary in at most {words} words, plain text. Keep what the student shared
+about themselves (background, goals, constraints, decisions) and the advice already given.
+Drop greetings and repetition."""
+    text = await generate_text(prompt)
+    if not text:
+        return chat_memory.extractive_summary(previous, turns)
+    return chat_memory.truncate(text, chat_memory.SUMMARY_TOKENS)
 
 
 # ═══════════════════════════════════════════════════════════════
 # 3. SKILL GAP ANALYSIS
 # ═══════════════════════════════════════════════════════════════
 
-def analyze_skill_gap(current_skills: list, target_career: str, user_context: dict = None) -> dict:
+@ai_telemetry.track
+async def analyze_skill_gap(current_skills: list, target_career: str, user_context: dict = None) -> dict:
     """Analyze gap between user's skills and target career"""
     ctx = ""
     if user_context:
@@ -199,33 +667,30 @@ Return ONLY raw JSON:
 Use REAL resources: NPTEL, Coursera, freeCodeCamp, LeetCode, YouTube channels.
 Be realistic with timelines for an Indian student."""
 
-    return _safe_generate(prompt, _mock_skill_gap(current_skills, target_career))
+    return await _safe_generate(prompt, _mock_skill_gap(current_skills, target_career), cache="skill_gap")
 
 
 # ═══════════════════════════════════════════════════════════════
-# 4. RESUME ATS SCORING + SUGGESTIONS
+# 4. RESUME ATS ENRICHMENT
 # ═══════════════════════════════════════════════════════════════
 
-def analyze_resume(resume_data: dict, target_role: str) -> dict:
-    """ATS score + improvement suggestions for resume"""
+@ai_telemetry.track
+async def analyze_resume(resume_data: dict, target_role: str, local_report: dict = None) -> dict:
+    """AI enrichment of the local ATS report (resume_ats.py): better rewrites and
+    tips. Scores stay the local ones; without a model the local report is returned."""
+    report = resume_ats.public(local_report or resume_ats.score_resume(resume_data, target_role))
     prompt = f"""You are Mentixy's Resume ATS Analyzer for Indian job market.
 
 Resume Data: {json.dumps(resume_data)}
 Target Role: {target_role}
+ATS scores (already computed, do not change them): {json.dumps({
+    "ats_score": report["ats_score"], "section_scores": report["section_scores"],
+    "missing_keywords": report["missing_keywords"], "formatting_issues": report["formatting_issues"]})}
 
-Score this resume and provide actionable improvements.
+Write actionable improvements for the weakest sections.
 Return ONLY raw JSON:
 {{
-    "ats_score": 72,
-    "grade": "B+",
     "overall_feedback": "2-sentence summary",
-    "section_scores": {{
-        "summary": {{"score": 70, "feedback": "..."}},
-        "experience": {{"score": 65, "feedback": "..."}},
-        "skills": {{"score": 80, "feedback": "..."}},
-        "education": {{"score": 75, "feedback": "..."}},
-        "projects": {{"score": 60, "feedback": "..."}}
-    }},
     "improvements": [
         {{
             "section": "summary",
@@ -235,22 +700,27 @@ Return ONLY raw JSON:
             "impact_on_score": "+5 to +15 points"
         }}
     ],
-    "missing_keywords": ["keyword1", "keyword2"],
-    "strong_action_verbs": ["Developed", "Implemented"],
-    "formatting_issues": ["issue1"],
     "tips": ["tip1", "tip2"]
 }}
 
 Be tough but constructive. Indian freshers need honest feedback."""
 
-    return _safe_generate(prompt, _mock_resume_suggestions())
+    enriched = await _safe_generate(prompt, {})
+    if not enriched:
+        return report
+    for key in ("overall_feedback", "improvements", "tips"):
+        if enriched.get(key):
+            report[key] = enriched[key]
+    report["engine"] = "local+ai"
+    return report
 
 
 # ═══════════════════════════════════════════════════════════════
 # 5. CODE REVIEW AI
 # ═══════════════════════════════════════════════════════════════
 
-def review_code(code: str, language: str, problem_title: str = "") -> dict:
+@ai_telemetry.track
+async def review_code(code: str, language: str, problem_title: str = "") -> dict:
     """AI code review for coding submissions"""
     prompt = f"""You are Mentixy's Code Review AI, an expert competitive programmer.
 
@@ -281,48 +751,56 @@ Review this code and return ONLY raw JSON:
     "indian_company_relevance": "Which Indian companies ask similar problems"
 }}"""
 
-    return _safe_generate(prompt, _mock_code_review(language))
+    return await _safe_generate(prompt, _mock_code_review(language), cache="code_review")
 
 
 # ═══════════════════════════════════════════════════════════════
-# 6. JOB MATCH SCORING
+# 6. JOB MATCH EXPLANATIONS
 # ═══════════════════════════════════════════════════════════════
 
-def calculate_job_match(user_profile: dict, job_data: dict) -> dict:
-    """Calculate AI match score between user and job"""
-    prompt = f"""You are Mentixy's Job Match Engine.
+@ai_telemetry.track
+async def explain_job_matches(user_profile: dict, matches: list) -> dict:
+    """Explain locally scored matches (job_match.py) — one call for the top-k,
+    scores are given, not re-judged. Returns {job_id: explanation}."""
+    jobs = [{
+        "job_id": m["job"]["id"], "role_title": m["job"]["role_title"], "company_name": m["job"]["company_name"],
+        "match_score": m["match_score"], "matched_skills": m["matched_skills"],
+        "missing_skills": m["missing_skills"], "eligible": m["eligible"], "breakdown": m["breakdown"],
+    } for m in matches]
+    fallback = {j["job_id"]: _mock_job_explanation(j) for j in jobs}
+    if not jobs:
+        return fallback
+
+    prompt = f"""You are Mentixy's Job Match Engine. Match scores were already computed; do not change them.
 
 User Profile: {json.dumps(user_profile)}
-Job Details: {json.dumps(job_data)}
+Scored Jobs: {json.dumps(jobs)}
 
-Calculate match and return ONLY raw JSON:
+For EVERY job, explain the score honestly. Return ONLY raw JSON keyed by job_id:
 {{
-    "match_score": 78,
-    "match_grade": "B+",
-    "strengths": ["matching skill 1", "matching skill 2"],
-    "gaps": ["missing skill 1"],
-    "recommendation": "apply_now|upskill_first|stretch_goal|not_recommended",
-    "honest_assessment": "1-2 sentences on realistic chances",
-    "preparation_tips": ["tip1", "tip2"],
-    "days_to_close_gaps": 30
+    "<job_id>": {{
+        "strengths": ["matching skill 1", "matching skill 2"],
+        "gaps": ["missing skill 1"],
+        "recommendation": "apply_now|upskill_first|stretch_goal|not_recommended",
+        "honest_assessment": "1-2 sentences on realistic chances",
+        "preparation_tips": ["tip1", "tip2"],
+        "days_to_close_gaps": 30
+    }}
 }}"""
 
-    return _safe_generate(prompt, {
-        "match_score": 70, "match_grade": "B",
-        "strengths": ["Problem Solving", "Python"],
-        "gaps": ["System Design experience"],
-        "recommendation": "apply_now",
-        "honest_assessment": "Good foundation. Apply and prepare simultaneously.",
-        "preparation_tips": ["Practice system design", "Review company's tech stack"],
-        "days_to_close_gaps": 30
-    })
+    result = await _safe_generate(prompt, fallback)
+    if not isinstance(result, dict):
+        return fallback
+    return {job_id: result.get(job_id) if isinstance(result.get(job_id), dict) else default
+            for job_id, default in fallback.items()}
 
 
 # ═══════════════════════════════════════════════════════════════
 # 7. ROADMAP GENERATION
 # ═══════════════════════════════════════════════════════════════
 
-def generate_roadmap(target_career: str, current_skills: list, user_context: dict = None) -> dict:
+@ai_telemetry.track
+async def generate_roadmap(target_career: str, current_skills: list, user_context: dict = None) -> dict:
     """Generate personalized learning roadmap"""
     ctx = ""
     if user_context:
@@ -369,15 +847,17 @@ Rules:
 5. Be realistic for Indian students (college schedules, competitive exams)
 6. 3-5 phases, 2-4 milestones per phase"""
 
-    return _safe_generate(prompt, _mock_roadmap(target_career))
+    return await _safe_generate(prompt, _mock_roadmap(target_career), cache="roadmap")
 
 
 # ═══════════════════════════════════════════════════════════════
 # 8. INTERVIEW PREP
 # ═══════════════════════════════════════════════════════════════
 
-def generate_interview_prep(company: str, role: str, round_type: str = "technical") -> dict:
+@ai_telemetry.track
+async def generate_interview_prep(company: str, role: str, round_type: str = "technical") -> dict:
     """Generate interview preparation guide"""
+    company, role = " ".join(company.split()), " ".join(role.split())  # one cache key per pair
     prompt = f"""You are Mentixy's Interview Prep AI, specialized in Indian tech hiring.
 
 Company: {company}
@@ -408,14 +888,15 @@ Generate an interview prep guide. Return ONLY raw JSON:
 
 Use real data about {company}'s interview process in India. Be specific."""
 
-    return _safe_generate(prompt, _mock_interview_prep(company, role))
+    return await _safe_generate(prompt, _mock_interview_prep(company, role), cache="interview_prep")
 
 
 # ═══════════════════════════════════════════════════════════════
 # 9. ROADMAP REROUTING ENGINE (Bible XF-08)
 # ═══════════════════════════════════════════════════════════════
 
-def generate_reroute_options(
+@ai_telemetry.track
+async def generate_reroute_options(
     original_roadmap: dict, completed_milestones: list, missed_milestones: list,
     student_profile: dict, available_hours_per_week: int, target_career: str,
     placement_deadline: str = None
@@ -476,14 +957,15 @@ Return ONLY raw JSON:
 
 Be honest. Don't sugar-coat. India-specific reality."""
 
-    return _safe_generate(prompt, _mock_reroute_options())
+    return await _safe_generate(prompt, _mock_reroute_options())
 
 
 # ═══════════════════════════════════════════════════════════════
 # 10. PARENT REPORT GENERATION (Bible XF-10)
 # ═══════════════════════════════════════════════════════════════
 
-def generate_parent_report(student_profile: dict, weekly_activity: dict) -> dict:
+@ai_telemetry.track
+async def generate_parent_report(student_profile: dict, weekly_activity: dict) -> dict:
     """Generate parent-friendly weekly report (Bible XF-10)"""
     prompt = f"""You are Mentixy's Parent Report Generator. Write for Indian parents.
 
@@ -528,14 +1010,15 @@ RULES:
 3. Use ₹ for all financial references
 4. No tech jargon — parents should understand every word"""
 
-    return _safe_generate(prompt, _mock_parent_report(student_profile))
+    return await _safe_generate(prompt, _mock_parent_report(student_profile))
 
 
 # ═══════════════════════════════════════════════════════════════
 # 11. SALARY TRUTH CHECKER (Bible XF-10)
 # ═══════════════════════════════════════════════════════════════
 
-def check_salary_truth(ctc_lpa: float, role: str, city: str, college_tier: int = 2) -> dict:
+@ai_telemetry.track
+async def check_salary_truth(ctc_lpa: float, role: str, city: str, college_tier: int = 2) -> dict:
     """Help parents understand CTC vs in-hand salary (Bible XF-10)"""
     prompt = f"""You are Mentixy's Salary Truth Engine for Indian parents.
 
@@ -571,14 +1054,15 @@ Break down the REAL take-home salary. Return ONLY raw JSON:
 
 Be BRUTALLY honest. Indian parents need truth, not comfort."""
 
-    return _safe_generate(prompt, _mock_salary_truth(ctc_lpa, city))
+    return await _safe_generate(prompt, _mock_salary_truth(ctc_lpa, city), cache="salary_truth")
 
 
 # ═══════════════════════════════════════════════════════════════
 # 12. SALARY NEGOTIATION SIMULATOR (Bible 05-D)
 # ═══════════════════════════════════════════════════════════════
 
-def salary_negotiation_simulator(
+@ai_telemetry.track
+async def salary_negotiation_simulator(
     company_type: str, role: str, initial_offer_lpa: float,
     budget_ceiling_lpa: float, scenario: str = "campus_placement",
     student_message: str = "", conversation_history: list = None
@@ -623,7 +1107,7 @@ Return JSON:
     "tips": []
 }}
 """
-    return _safe_generate(prompt, {
+    return await _safe_generate(prompt, {
         "recruiter_response": f"Thank you for your interest in the {role} position. We'd like to offer you ₹{initial_offer_lpa} LPA. This is competitive for {company_type} companies in this space.",
         "is_debrief": False,
         "negotiation_stage": "opening",
@@ -636,7 +1120,8 @@ Return JSON:
 # 13. CAREER DAY SIMULATOR (Bible 05-G)
 # ═══════════════════════════════════════════════════════════════
 
-def career_day_simulator(
+@ai_telemetry.track
+async def career_day_simulator(
     career: str, company_type: str = "startup",
     city: str = "Bangalore", level: str = "fresher",
     student_choice: str = "", decision_number: int = 0,
@@ -687,7 +1172,7 @@ For debrief, set is_complete=true and debrief to:
 }}
 """
     if decision_number == 0:
-        return _safe_generate(prompt, {
+        return await _safe_generate(prompt, {
             "narrative": f"You are a {career} at a {company_type} in {city}. It's Monday, 9:07am. Your Slack shows 23 unread messages. Your standup is in 15 minutes but your manager just pinged: 'Can we talk before standup? Something came up over the weekend.' You haven't had coffee yet. Your laptop is loading. What do you prioritize?",
             "decision_prompt": "What do you do?",
             "options": [
@@ -700,7 +1185,7 @@ For debrief, set is_complete=true and debrief to:
             "is_complete": False,
             "debrief": None
         })
-    return _safe_generate(prompt, {
+    return await _safe_generate(prompt, {
         "narrative": "The day continues...",
         "decision_prompt": "What do you do next?",
         "options": ["Option A", "Option B", "Option C"],
@@ -714,7 +1199,8 @@ For debrief, set is_complete=true and debrief to:
 # 14. EMOTION-AWARE INTERVENTION (Bible 05-F)
 # ═══════════════════════════════════════════════════════════════
 
-def emotion_aware_intervention(
+@ai_telemetry.track
+async def emotion_aware_intervention(
     signal_type: str, student_data: dict, positive_history: list = None
 ) -> dict:
     """Triggered by behavioral signals — wellbeing support (Bible 05-F)"""
@@ -757,7 +1243,7 @@ Return JSON:
 }}
 """
     needs_escalation = signal_type in ["hopeless", "worthless", "give_up", "self_harm"]
-    return _safe_generate(prompt, {
+    return await _safe_generate(prompt, {
         "message": f"That sounds genuinely hard. {signal_type.replace('_', ' ').title()} is something almost everyone on this path experiences — it's not a signal you're failing, it's a signal you care about the outcome. You've already hit {milestones} milestones — that's real progress. When you're ready, even opening the app tomorrow counts as showing up.",
         "needs_escalation": needs_escalation,
         "helpline_shown": needs_escalation,
@@ -770,24 +1256,6 @@ Return JSON:
 # ═══════════════════════════════════════════════════════════════
 
 
-def _mock_4d_assessment():
-    return {
-        "dimensions": {"analytical": 78, "interpersonal": 62, "creative": 55, "systematic": 70},
-        "dominant_dimension": "analytical",
-        "archetype": {"code": "AN", "name": "The Architect", "description": "You think in systems and patterns. You enjoy breaking complex problems into structured solutions and optimizing processes."},
-        "consistency_score": 82,
-        "top_careers": [
-            {"slug": "software-engineer", "name": "Software Engineer", "match_score": 92, "driving_dimension": "analytical", "why": "Your analytical skills and systematic approach are perfect for building scalable software systems.", "salary_p50_lpa": 12, "timeline_months": 6},
-            {"slug": "data-scientist", "name": "Data Scientist", "match_score": 87, "driving_dimension": "analytical", "why": "Strong analytical dimension combined with pattern recognition makes this a natural fit.", "salary_p50_lpa": 15, "timeline_months": 8},
-            {"slug": "product-manager", "name": "Product Manager", "match_score": 78, "driving_dimension": "systematic", "why": "Your systematic approach and decent interpersonal skills work well in product management.", "salary_p50_lpa": 18, "timeline_months": 12},
-            {"slug": "devops-engineer", "name": "DevOps Engineer", "match_score": 75, "driving_dimension": "systematic", "why": "Systematic thinking and analytical skills are core to infrastructure and automation.", "salary_p50_lpa": 14, "timeline_months": 6},
-            {"slug": "cybersecurity-analyst", "name": "Cybersecurity Analyst", "match_score": 72, "driving_dimension": "analytical", "why": "Analytical mindset is essential for threat detection and security analysis.", "salary_p50_lpa": 10, "timeline_months": 8},
-        ],
-        "personality_summary": "You show strong analytical thinking with a systematic approach to problem-solving. You prefer structured environments but can adapt when needed.",
-        "advice": "Focus on building deep technical skills in one area rather than spreading thin. For Indian market, DSA + System Design + one specialization (ML/Cloud/Security) will maximize your placement outcomes."
-    }
-
-
 def _mock_chat_response(message: str) -> str:
     msg_lower = message.lower()
     if any(k in msg_lower for k in ["salary", "pay", "ctc", "package"]):
@@ -824,29 +1292,6 @@ def _mock_skill_gap(current_skills: list, target_career: str) -> dict:
     }
 
 
-def _mock_resume_suggestions() -> dict:
-    return {
-        "ats_score": 68,
-        "grade": "C+",
-        "overall_feedback": "Your resume has decent structure but lacks quantified achievements and is missing key ATS keywords.",
-        "section_scores": {
-            "summary": {"score": 60, "feedback": "Add a 2-line professional summary with your target role and key skills"},
-            "experience": {"score": 55, "feedback": "Use 'Developed X using Y, resulting in Z% improvement' format"},
-            "skills": {"score": 75, "feedback": "Good coverage. Group into Technical, Tools, and Soft Skills"},
-            "education": {"score": 80, "feedback": "Include relevant coursework and academic achievements"},
-            "projects": {"score": 65, "feedback": "Add live links and quantify impact (users, performance, etc)"}
-        },
-        "improvements": [
-            {"section": "summary", "priority": "high", "current": "missing", "suggested": "Results-driven Computer Science student with expertise in Python and React. Seeking SDE role to build scalable products.", "impact_on_score": "+10 points"},
-            {"section": "projects", "priority": "high", "current": "Built a todo app", "suggested": "Developed a full-stack task management app using React + Node.js, serving 100+ users with 99.9% uptime", "impact_on_score": "+8 points"},
-        ],
-        "missing_keywords": ["data-driven", "scalable", "collaborative", "optimized", "deployed"],
-        "strong_action_verbs": ["Developed", "Implemented", "Architected", "Optimized", "Automated", "Deployed"],
-        "formatting_issues": ["Keep to 1 page", "Use consistent date format (MMM YYYY)"],
-        "tips": ["Add GitHub and LinkedIn links at top", "List projects before education for freshers", "Use .pdf format for ATS compatibility"]
-    }
-
-
 def _mock_code_review(language: str) -> dict:
     return {
         "overall_quality": "good",
@@ -865,6 +1310,33 @@ def _mock_code_review(language: str) -> dict:
     }
 
 
+def _mock_job_explanation(job: dict) -> dict:
+    score, missing = job["match_score"], job["missing_skills"]
+    if not job["eligible"]:
+        recommendation = "not_recommended"
+    elif score >= 75:
+        recommendation = "apply_now"
+    elif score >= 55:
+        recommendation = "upskill_first"
+    elif score >= 35:
+        recommendation = "stretch_goal"
+    else:
+        recommendation = "not_recommended"
+    if missing:
+        assessment = f"You cover {len(job['matched_skills'])} of the listed skills; {', '.join(missing[:3])} would close the gap."
+    else:
+        assessment = "You already have the listed skills. Apply and prepare for the interview rounds."
+    return {
+        "strengths": job["matched_skills"][:5],
+        "gaps": missing[:5],
+        "recommendation": recommendation,
+        "honest_assessment": assessment if job["eligible"] else "Your graduation year is outside this job's batch window.",
+        "preparation_tips": [f"Build one project using {skill}" for skill in missing[:2]] or
+                            [f"Review {job['company_name']}'s interview pattern"],
+        "days_to_close_gaps": 14 * len(missing),
+    }
+
+
 def _mock_roadmap(target_career: str) -> dict:
     return {
         "total_months": 6,
@@ -0,0 +1,278 @@
+"""
+Mentixy — AI Call Scheduler
+Decides which waiting Gemini call gets the next gateway slot.
+
+    ticket = scheduler.ticket(INTERACTIVE, user_id, deadline)
+    await scheduler.acquire(ticket)        # may raise Dropped
+    try: ...
+    finally: scheduler.release(ticket)
+
+Calls are queued by priority class, picked from the function being served
+(CLASSES; anything unlisted is STANDARD):
+
+  - interactive — a student is waiting on the reply (chat, code review, ...);
+  - standard    — user-started work that runs as a job (roadmaps, resume review);
+  - batch       — reports, reroutes and summaries nobody is watching.
+
+Dispatch is strict priority, round-robin between users within a class, so
+one student's burst can't starve another's single call. Every start spends a
+token from a bucket refilled at AI_RATE_LIMIT_PER_MINUTE (per process: set it
+to the project's Gemini RPM quota divided by the number of processes), and
+AI_INTERACTIVE_RESERVED_SLOTS slots and tokens are only ever given to
+interactive calls, so background work soaks up spare capacity without
+pushing chat latency up. Non-interactive calls that can no longer finish
+before their deadline (measured service time) are dropped rather than spend
+quota on an answer nobody will get.
+
+The scheduler belongs to one event loop (the AI gateway's) and is not
+thread-safe.
+"""
+import asyncio
+import contextvars
+import os
+import time
+from collections import OrderedDict, deque
+
+import ai_telemetry
+
+INTERACTIVE, STANDARD, BATCH = "interactive", "standard", "batch"
+PRIORITY = (INTERACTIVE, STANDARD, BATCH)   # dispatch order
+
+CLASSES = {
+    "career_chat": INTERACTIVE,
+    "career_chat_stream": INTERACTIVE,
+    "review_code": INTERACTIVE,
+    "explain_job_matches": INTERACTIVE,
+    "analyze_skill_gap": INTERACTIVE,
+    "generate_interview_prep": INTERACTIVE,
+    "check_salary_truth": INTERACTIVE,
+    "salary_negotiation_simulator": INTERACTIVE,
+    "career_day_simulator": INTERACTIVE,
+    "emotion_aware_intervention": INTERACTIVE,
+    "generate_roadmap": STANDARD,
+    "analyze_resume": STANDARD,
+    "generate_parent_report": BATCH,
+    "generate_reroute_options": BATCH,
+    "summarize_chat": BATCH,
+    "write_4d_narrative": BATCH,
+}
+
+RATE_LIMIT_PER_MINUTE = float(os.getenv("AI_RATE_LIMIT_PER_MINUTE", "1800"))   # 0 = unlimited
+RESERVED_SLOTS = os.getenv("AI_INTERACTIVE_RESERVED_SLOTS")                     # default: a quarter
+SERVICE_EWMA = 0.2
+WAIT_SAMPLES = 500
+
+_caller: contextvars.ContextVar = contextvars.ContextVar("ai_caller", default=None)
+
+
+class Dropped(Exception):
+    """A queued call was shed: it could not have finished before its deadline."""
+
+
+def set_caller(user_id):
+    """Attribute AI calls made from this context (request, job) to a user."""
+    _caller.set(user_id)
+
+
+def current() -> tuple:
+    """(class, user) for an AI call made from the current context."""
+    return CLASSES.get(ai_telemetry.current_function(), STANDARD), _caller.get()
+
+
+class Ticket:
+    """One call's place in the queue."""
+    __slots__ = ("cls", "user", "deadline", "enqueued", "started", "future")
+
+    def __init__(self, cls: str, user, deadline: float):
+        self.cls = cls
+        self.user = user
+        self.deadline = deadline
+        self.enqueued = None
+        self.started = None
+        self.future = None
+
+
+class _Class:
+    __slots__ = ("users", "dispatched", "dropped", "waits")
+
+    def __init__(self):
+        self.users = OrderedDict()   # user → deque of tickets; front user is served next
+        self.dispatched = 0
+        self.dropped = 0
+        self.waits = deque(maxlen=WAIT_SAMPLES)   # seconds queued
+
+    def __len__(self):
+        return sum(len(q) for q in list(self.users.values()))
+
+    def push(self, ticket: Ticket):
+        self.users.setdefault(ticket.user, deque()).append(ticket)
+
+    def pop(self) -> Ticket:
+        user, queue = next(iter(self.users.items()))
+        ticket = queue.popleft()
+        if queue:
+            self.users.move_to_end(user)
+        else:
+            del self.users[user]
+        return ticket
+
+    def remove(self, ticket: Ticket) -> bool:
+        queue = self.users.get(ticket.user)
+        if queue is None or ticket not in queue:
+            return False
+        queue.remove(ticket)
+        if not queue:
+            del self.users[ticket.user]
+        return True
+
+
+class Scheduler:
+    """Priority classes, per-user fairness, a token-bucket rate limit and
+    deadline-aware shedding in front of `slots` concurrent upstream calls."""
+
+    def __init__(self, slots: int, rate_per_minute: float = RATE_LIMIT_PER_MINUTE,
+                 reserved: int = None, burst: int = None):
+        self.slots = slots
+        if reserved is None:
+            reserved = int(RESERVED_SLOTS) if RESERVED_SLOTS else slots // 4
+        self.reserved = max(0, min(reserved, slots - 1))
+        self.rate = rate_per_minute / 60 if rate_per_minute else None   # tokens per second
+        self.burst = burst or slots
+        self.tokens = float(self.burst)
+        self.in_use = 0
+        self.service_seconds = None   # EWMA of slot hold time
+        self.rate_limited = 0         # dispatches held back for tokens
+        self._refilled = time.monotonic()
+        self._classes = {cls: _Class() for cls in PRIORITY}
+        self._timer = None
+
+    def ticket(self, cls: str, user, deadline: float) -> Ticket:
+        return Ticket(cls if cls in self._classes else STANDARD, user, deadline)
+
+    async def acquire(self, ticket: Ticket):
+        """Wait for a slot; raises Dropped if the call was shed."""
+        ticket.enqueued = time.monotonic()
+        ticket.future = asyncio.get_running_loop().create_future()
+        self._classes[ticket.cls].push(ticket)
+        self._dispatch()
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket.started is not None:
+                self.release(ticket)
+            elif self._classes[ticket.cls].remove(ticket):
+                self._dispatch()   # it may have been what held a lower class back
+            raise
+
+    def release(self, ticket: Ticket):
+        if ticket.started is None:
+            return
+        held = time.monotonic() - ticket.started
+        ticket.started = None
+        self.in_use -= 1
+        self.service_seconds = held if self.service_seconds is None else \
+            self.service_seconds + SERVICE_EWMA * (held - self.service_seconds)
+        self._dispatch()
+
+    def promote(self, ticket: Ticket, cls: str):
+        """Move a queued ticket up to `cls` (an interactive caller joined its call)."""
+        if ticket.started is None and PRIORITY.index(cls) < PRIORITY.index(ticket.cls):
+            if self._classes[ticket.cls].remove(ticket):
+                ticket.cls = cls
+                self._classes[cls].push(ticket)
+                self._dispatch()
+
+    def available(self, cls: str = INTERACTIVE) -> bool:
+        """Could a `cls` call start right now without queueing?"""
+        self._refill(time.monotonic())
+        return not any(self._classes[c] for c in PRIORITY[:PRIORITY.index(cls) + 1]) and self._admits(cls)
+
+    # ─── Dispatch ───
+
+    def _refill(self, now: float):
+        if self.rate is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def _reserve(self, cls: str) -> int:
+        return 0 if cls == INTERACTIVE else self.reserved
+
+    def _tokens_short(self, cls: str) -> float:
+        if self.rate is None:
+            return 0
+        return 1 + min(self._reserve(cls), self.burst - 1) - self.tokens
+
+    def _admits(self, cls: str) -> bool:
+        return self.in_use < self.slots - self._reserve(cls) and self._tokens_short(cls) <= 0
+
+    def _late(self, ticket: Ticket, now: float) -> bool:
+        return ticket.cls != INTERACTIVE and now + (self.service_seconds or 0) > ticket.deadline
+
+    def _dispatch(self):
+        now = time.monotonic()
+        self._refill(now)
+        self._start(now)
+        self._shed(now)   # whatever still has to wait
+
+    def _start(self, now: float):
+        for cls in PRIORITY:
+            queue = self._classes[cls]
+            while queue:
+                if self.in_use >= self.slots - self._reserve(cls):
+                    return   # strict priority: nothing below may pass a blocked class
+                short = self._tokens_short(cls)
+                if short > 0:
+                    self.rate_limited += 1
+                    self._retry_after(short)
+                    return
+                ticket = queue.pop()
+                if ticket.future.done():
+                    continue
+                if self.rate is not None:
+                    self.tokens -= 1
+                self.in_use += 1
+                ticket.started = now
+                queue.dispatched += 1
+                queue.waits.append(now - ticket.enqueued)
+                ticket.future.set_result(None)
+
+    def _shed(self, now: float):
+        for cls in PRIORITY[1:]:
+            queue = self._classes[cls]
+            for ticket in [t for q in queue.users.values() for t in q if self._late(t, now)]:
+                queue.remove(ticket)
+                queue.dropped += 1
+                if not ticket.future.done():
+                    ticket.future.set_exception(Dropped(f"{cls} call shed: deadline passes before a slot frees"))
+
+    def _retry_after(self, tokens_short: float):
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(tokens_short / self.rate, self._tick)
+
+    def _tick(self):
+        self._timer = None
+        self._dispatch()
+
+    def stats(self) -> dict:
+        """Snapshot; safe to call from other threads (reads only)."""
+        classes = {}
+        for cls, queue in self._classes.items():
+            waits = [w * 1000 for w in list(queue.waits)]
+            classes[cls] = {
+                "queued": len(queue),
+                "users_queued": len(queue.users),
+                "dispatched": queue.dispatched,
+                "dropped": queue.dropped,
+                "wait_ms": {"p50": ai_telemetry.percentile(waits, .5), "p95": ai_telemetry.percentile(waits, .95)},
+            }
+        return {
+            "slots": self.slots,
+            "reserved_interactive": self.reserved,
+            "in_use": self.in_use,
+            "rate_per_minute": round(self.rate * 60, 1) if self.rate else None,
+            "tokens": round(min(self.burst, self.tokens + (time.monotonic() - self._refilled) * self.rate), 2)
+                      if self.rate else None,
+            "rate_limited": self.rate_limited,
+            "service_seconds": round(self.service_seconds, 3) if self.service_seconds is not None else None,
+            "classes": classes,
+        }
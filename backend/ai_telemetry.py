@@ -0,0 +1,264 @@
+"""
+Mentixy — AI Call Telemetry
+Per-function latency, token counts, failures and fallback rates for every
+ai_engine entry point, so timeouts and cache policies can be set from data.
+
+    @ai_telemetry.track
+    async def generate_interview_prep(...): ...
+
+`track` opens a call record for the duration of the function, and the gateway
+helpers in ai_engine annotate it: model latency and tokens (generate_text),
+cache hits and JSON parse failures (_safe_generate), timeouts, errors, open
+circuits and missing-model fallbacks. Each function keeps:
+
+  - cumulative counters and a model-latency histogram (Prometheus buckets);
+  - a rolling window of the last AI_TELEMETRY_WINDOW calls, within
+    AI_TELEMETRY_WINDOW_SECONDS, for p50/p95/p99 and the recent fallback rate.
+
+In-process only; /api/admin/perf/ai serves it as JSON or Prometheus text.
+"""
+import bisect
+import contextvars
+import functools
+import inspect
+import math
+import os
+import threading
+import time
+from collections import deque
+
+WINDOW = int(os.getenv("AI_TELEMETRY_WINDOW", "1000"))
+WINDOW_SECONDS = float(os.getenv("AI_TELEMETRY_WINDOW_SECONDS", "900"))
+BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 20000, 30000, 60000)
+FAILURES = ("no_model", "circuit_open", "dropped", "timeout", "error", "parse_error")
+CHARS_PER_TOKEN_RANGE = (2.0, 8.0)
+
+_current: contextvars.ContextVar = contextvars.ContextVar("ai_call", default=None)
+_lock = threading.Lock()
+_functions = {}   # name → _Series
+_chars_per_token = 4.0
+
+
+class Call:
+    """What happened during one tracked call."""
+    __slots__ = ("function", "started", "model_ms", "prompt_tokens", "response_tokens",
+                 "cache_hit", "failure", "fallback")
+
+    def __init__(self, function: str):
+        self.function = function
+        self.started = time.perf_counter()
+        self.model_ms = None
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+        self.cache_hit = False
+        self.failure = None
+        self.fallback = False
+
+
+class _Series:
+    __slots__ = ("counters", "buckets", "model_ms_sum", "recent")
+
+    def __init__(self):
+        self.counters = dict.fromkeys(
+            ("calls", "model_calls", "cache_hits", "fallbacks", "prompt_tokens", "response_tokens") + FAILURES, 0)
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)   # last one is +Inf
+        self.model_ms_sum = 0.0
+        self.recent = deque(maxlen=WINDOW)           # (monotonic ts, total ms, model ms | None, fallback)
+
+
+# ─── Recording ───
+
+def model_call(ms: float, prompt_tokens: int = 0, response_tokens: int = 0):
+    call = _current.get()
+    if call is not None:
+        call.model_ms = (call.model_ms or 0) + ms
+        call.prompt_tokens += prompt_tokens
+        call.response_tokens += response_tokens
+
+
+def cache_hit():
+    call = _current.get()
+    if call is not None:
+        call.cache_hit = True
+
+
+def failed(reason: str, fallback: bool = True):
+    """Record why the model's answer wasn't used (one of FAILURES)."""
+    call = _current.get()
+    if call is not None:
+        call.failure = reason
+        call.fallback = call.fallback or fallback
+
+
+def current_function():
+    """Name of the tracked function running in this context, if any."""
+    call = _current.get()
+    return call.function if call is not None else None
+
+
+def observe_tokens(chars: int, tokens: int):
+    """Calibrate estimate_tokens() from a prompt whose real token count the model reported."""
+    global _chars_per_token
+    if chars > 0 and tokens > 0:
+        measured = min(max(chars / tokens, CHARS_PER_TOKEN_RANGE[0]), CHARS_PER_TOKEN_RANGE[1])
+        with _lock:
+            _chars_per_token += 0.1 * (measured - _chars_per_token)
+
+
+def chars_per_token() -> float:
+    return _chars_per_token
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count from length, at the measured characters-per-token ratio
+    (~4 until the model has reported usage)."""
+    return math.ceil(len(text) / _chars_per_token) if text else 0
+
+
+def _finish(call: Call):
+    total_ms = (time.perf_counter() - call.started) * 1000
+    with _lock:
+        series = _functions.get(call.function)
+        if series is None:
+            series = _functions[call.function] = _Series()
+        c = series.counters
+        c["calls"] += 1
+        c["cache_hits"] += call.cache_hit
+        c["fallbacks"] += call.fallback
+        c["prompt_tokens"] += call.prompt_tokens
+        c["response_tokens"] += call.response_tokens
+        if call.failure:
+            c[call.failure] += 1
+        if call.model_ms is not None:
+            c["model_calls"] += 1
+            series.model_ms_sum += call.model_ms
+            series.buckets[bisect.bisect_left(BUCKETS_MS, call.model_ms)] += 1
+        series.recent.append((time.monotonic(), total_ms, call.model_ms, call.fallback))
+
+
+def track(fn=None, *, name: str = None):
+    """Decorator for ai_engine entry points (coroutines and async generators)."""
+    if fn is None:
+        return lambda f: track(f, name=name)
+    label = name or fn.__name__
+
+    if inspect.isasyncgenfunction(fn):
+        @functools.wraps(fn)
+        async def stream(*args, **kwargs):
+            call = Call(label)
+            gen = fn(*args, **kwargs)
+            try:
+                while True:
+                    # Set only while the generator runs, never across a yield
+                    token = _current.set(call)
+                    try:
+                        item = await gen.__anext__()
+                    except StopAsyncIteration:
+                        return
+                    except Exception:
+                        call.failure = call.failure or "error"
+                        raise
+                    finally:
+                        _current.reset(token)
+                    yield item
+            finally:
+                await gen.aclose()
+                _finish(call)
+        return stream
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        call = Call(label)
+        token = _current.set(call)
+        try:
+            return await fn(*args, **kwargs)
+        except Exception:
+            call.failure = call.failure or "error"
+            raise
+        finally:
+            _current.reset(token)
+            _finish(call)
+    return wrapper
+
+
+# ─── Reporting ───
+
+def percentile(values: list, q: float):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(q * len(values)))], 1)
+
+
+def _window(series: _Series, now: float) -> dict:
+    recent = [r for r in series.recent if now - r[0] <= WINDOW_SECONDS]
+    totals = [r[1] for r in recent]
+    model = [r[2] for r in recent if r[2] is not None]
+    return {
+        "calls": len(recent),
+        "fallback_rate": round(sum(r[3] for r in recent) / len(recent), 3) if recent else None,
+        "latency_ms": {"p50": percentile(totals, .5), "p95": percentile(totals, .95), "p99": percentile(totals, .99)},
+        "model_ms": {"p50": percentile(model, .5), "p95": percentile(model, .95), "p99": percentile(model, .99),
+                     "max": round(max(model), 1) if model else None},
+    }
+
+
+def stats() -> dict:
+    """Per-function counters, cumulative model-latency histogram and the rolling window."""
+    now = time.monotonic()
+    functions = {}
+    with _lock:
+        for name, series in sorted(_functions.items()):
+            c = dict(series.counters)
+            cumulative, running = {}, 0
+            for bound, n in zip(BUCKETS_MS + ("+Inf",), series.buckets):
+                running += n
+                cumulative[str(bound)] = running
+            functions[name] = {
+                **c,
+                "fallback_rate": round(c["fallbacks"] / c["calls"], 3) if c["calls"] else None,
+                "cache_hit_rate": round(c["cache_hits"] / c["calls"], 3) if c["calls"] else None,
+                "avg_model_ms": round(series.model_ms_sum / c["model_calls"], 1) if c["model_calls"] else None,
+                "model_ms_buckets": cumulative,
+                "recent": _window(series, now),
+            }
+    return {"window": WINDOW, "window_seconds": WINDOW_SECONDS,
+            "chars_per_token": round(_chars_per_token, 2), "functions": functions}
+
+
+def prometheus() -> str:
+    """The cumulative series in Prometheus text exposition format."""
+    lines = [
+        "# HELP mentixy_ai_calls_total AI function calls by outcome.",
+        "# TYPE mentixy_ai_calls_total counter",
+    ]
+    with _lock:
+        series = sorted((name, s.counters.copy(), list(s.buckets), s.model_ms_sum) for name, s in _functions.items())
+    for name, c, _, _ in series:
+        lines.append(f'mentixy_ai_calls_total{{function="{name}"}} {c["calls"]}')
+    for metric, help_text, label, keys in (
+        ("fallbacks", "Calls answered with fallback data.", None, {"fallbacks": None}),
+        ("cache_hits", "Calls answered from the AI response cache.", None, {"cache_hits": None}),
+        ("failures", "Model failures by reason.", "reason", {f: f for f in FAILURES}),
+        ("tokens", "Prompt and response tokens.", "kind", {"prompt_tokens": "prompt", "response_tokens": "response"}),
+    ):
+        lines += [f"# HELP mentixy_ai_{metric}_total {help_text}", f"# TYPE mentixy_ai_{metric}_total counter"]
+        for name, c, _, _ in series:
+            for key, value in keys.items():
+                extra = f',{label}="{value}"' if label else ""
+                lines.append(f'mentixy_ai_{metric}_total{{function="{name}"{extra}}} {c[key]}')
+    lines += ["# HELP mentixy_ai_model_latency_ms Model call latency (queueing included).",
+              "# TYPE mentixy_ai_model_latency_ms histogram"]
+    for name, c, buckets, total in series:
+        running = 0
+        for bound, n in zip(BUCKETS_MS + ("+Inf",), buckets):
+            running += n
+            lines.append(f'mentixy_ai_model_latency_ms_bucket{{function="{name}",le="{bound}"}} {running}')
+        lines.append(f'mentixy_ai_model_latency_ms_sum{{function="{name}"}} {round(total, 1)}')
+        lines.append(f'mentixy_ai_model_latency_ms_count{{function="{name}"}} {c["model_calls"]}')
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    with _lock:
+        _functions.clear()
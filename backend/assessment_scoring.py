@@ -0,0 +1,224 @@
+"""
+Mentixy — 4D Assessment Scoring
+Deterministic Analytical / Interpersonal / Creative / Systematic profile from
+assessment answers, and career matches by cosine similarity — computed
+locally in well under a millisecond, so completing an assessment never waits
+on (or fails with) the LLM. The archetype narrative and per-career "why" text
+are filled in afterwards by a background job (ai_engine.write_4d_narrative).
+
+    answers   → one-hot (n × 4) from each selected option's `dimension`
+    weights   → response time: quick, decided answers count a bit more;
+                answers faster than MIN_READ_MS (not read) count half
+    shares    → weights @ one-hot, normalized; score = 50 + 200·(share − ¼), clipped to 0–100
+    matches   → cosine(user shares − ¼, career vector − ¼) against every Career row;
+                match_score = 50 + 50·cosine
+
+Career vectors come from CAREER_VECTORS by slug, falling back to the
+career's category; the career matrix is cached for CAREERS_TTL seconds.
+"""
+import threading
+import time
+
+import numpy as np
+
+import models
+
+DIMENSIONS = ("analytical", "interpersonal", "creative", "systematic")
+OPTION_DIMENSIONS = {"A": "analytical", "B": "interpersonal", "C": "creative", "D": "systematic"}
+MIN_READ_MS = 1500          # faster than this, the question wasn't read
+TIME_WEIGHT_RANGE = (0.7, 1.3)
+CLOSE_SHARE = 0.05          # top two dimensions this close → a blended archetype
+TOP_MATCHES = 5
+CAREERS_TTL = 600
+
+# Share of each dimension (A, I, C, S) a career draws on; rows sum to 1
+CAREER_VECTORS = {
+    "software-engineer": (0.40, 0.10, 0.15, 0.35),
+    "software-developer": (0.40, 0.10, 0.15, 0.35),
+    "data-scientist": (0.50, 0.10, 0.15, 0.25),
+    "ai-ml-engineer": (0.50, 0.05, 0.20, 0.25),
+    "product-manager": (0.25, 0.35, 0.20, 0.20),
+    "devops-engineer": (0.30, 0.10, 0.10, 0.50),
+    "ux-designer": (0.15, 0.30, 0.45, 0.10),
+    "ux-ui-designer": (0.15, 0.30, 0.45, 0.10),
+    "graphic-designer": (0.10, 0.15, 0.60, 0.15),
+    "cybersecurity-analyst": (0.45, 0.05, 0.10, 0.40),
+    "chartered-accountant": (0.35, 0.10, 0.05, 0.50),
+    "digital-marketing-specialist": (0.20, 0.35, 0.35, 0.10),
+    "mechanical-engineer": (0.40, 0.10, 0.20, 0.30),
+    "doctor-mbbs": (0.35, 0.40, 0.05, 0.20),
+    "civil-services": (0.25, 0.35, 0.10, 0.30),
+}
+CATEGORY_VECTORS = {
+    "technology": (0.40, 0.10, 0.15, 0.35),
+    "business": (0.25, 0.35, 0.15, 0.25),
+    "design": (0.10, 0.25, 0.55, 0.10),
+    "finance": (0.35, 0.10, 0.05, 0.50),
+    "marketing": (0.20, 0.35, 0.35, 0.10),
+    "engineering": (0.40, 0.10, 0.20, 0.30),
+    "healthcare": (0.35, 0.40, 0.05, 0.20),
+    "government": (0.25, 0.35, 0.10, 0.30),
+}
+
+# code → (name, description); single dimension, or the top two when they're close
+ARCHETYPES = {
+    "AN": ("The Architect", "You think in systems and patterns, and enjoy breaking complex problems into structured solutions."),
+    "IP": ("The Connector", "You work through people — you read a room, align a team and get the best out of others."),
+    "CR": ("The Visionary", "You generate ideas others haven't considered and care about how things look and feel."),
+    "SY": ("The Strategist", "You bring order to complexity: plans, processes and follow-through are your strength."),
+    "AI": ("The Analyst-Diplomat", "You pair rigorous thinking with the ability to explain it and bring people along."),
+    "AC": ("The Inventor", "You combine deep analysis with creative leaps — the profile of builders and researchers."),
+    "AS": ("The Engineer", "You analyze problems thoroughly and then execute methodically until they're solved."),
+    "IC": ("The Storyteller", "You connect with people and express ideas vividly — natural in product, design and media."),
+    "IS": ("The Organizer", "You coordinate people and plans alike, keeping teams aligned and on schedule."),
+    "CS": ("The Maker", "You turn creative ideas into finished work through steady, disciplined execution."),
+}
+_SINGLE = {"analytical": "AN", "interpersonal": "IP", "creative": "CR", "systematic": "SY"}
+_LETTER = {"analytical": "A", "interpersonal": "I", "creative": "C", "systematic": "S"}
+
+
+# ─── Answers → dimensions ───
+
+def option_dimension(options, selected: str):
+    """Dimension of the selected option: an options entry with `dimension`, else the A–D convention."""
+    key = (selected or "").strip()[:1].upper()
+    for opt in options or []:
+        if isinstance(opt, dict) and str(opt.get("key", "")).upper() == key and opt.get("dimension") in DIMENSIONS:
+            return opt["dimension"]
+    return OPTION_DIMENSIONS.get(key)
+
+
+def time_weights(times_ms: np.ndarray) -> np.ndarray:
+    """Decided (faster than the median) answers weigh more; unread ones half; unknown times 1."""
+    weights = np.ones(len(times_ms))
+    known = times_ms > 0
+    if known.any():
+        median = np.median(times_ms[known])
+        weights[known] = np.clip(np.sqrt(median / times_ms[known]), *TIME_WEIGHT_RANGE)
+        weights[known & (times_ms < MIN_READ_MS)] = 0.5
+    return weights
+
+
+def score_dimensions(dimensions: list, times_ms: list) -> dict:
+    """Dimension per answer (None = unusable) + response times → shares, 0–100 scores, consistency."""
+    idx = np.array([DIMENSIONS.index(d) if d in DIMENSIONS else -1 for d in dimensions], dtype=np.int64)
+    times = np.array([t or 0 for t in times_ms], dtype=np.float64)
+    usable = idx >= 0
+    idx, times = idx[usable], times[usable]
+    if not len(idx):
+        shares = np.full(4, 0.25)
+        return {"shares": shares, "scores": _scores(shares), "consistency": 0, "answered": 0, "avg_time_ms": None}
+
+    onehot = np.eye(4)[idx]
+    weights = time_weights(times)
+    shares = weights @ onehot / weights.sum()
+
+    # Consistency: do the first and second halves of the test point the same way?
+    half = len(idx) // 2
+    if half:
+        first = onehot[:half].mean(axis=0)
+        second = onehot[half:].mean(axis=0)
+        agreement = 1 - 0.5 * np.abs(first - second).sum()
+    else:
+        agreement = 1.0
+    rushed = float(np.mean((times > 0) & (times < MIN_READ_MS)))
+    consistency = round(100 * agreement * (1 - 0.5 * rushed))
+    known = times[times > 0]
+    return {
+        "shares": shares, "scores": _scores(shares), "consistency": consistency, "answered": int(len(idx)),
+        "avg_time_ms": int(known.mean()) if len(known) else None,
+    }
+
+
+def _scores(shares: np.ndarray) -> dict:
+    return {d: int(round(float(np.clip(50 + 200 * (s - 0.25), 0, 100)))) for d, s in zip(DIMENSIONS, shares)}
+
+
+def archetype(shares: np.ndarray) -> dict:
+    order = np.argsort(-shares, kind="stable")
+    top, second = DIMENSIONS[order[0]], DIMENSIONS[order[1]]
+    if shares[order[0]] - shares[order[1]] < CLOSE_SHARE:
+        code = "".join(sorted(_LETTER[top] + _LETTER[second], key="AICS".index))
+    else:
+        code = _SINGLE[top]
+    name, description = ARCHETYPES[code]
+    return {"code": code, "name": name, "description": description}
+
+
+# ─── Careers ───
+
+class CareerMatrix:
+    """Every Career row as a centered, unit-length dimension vector."""
+
+    def __init__(self, careers):
+        self.careers = [{
+            "slug": c.slug, "name": c.title,
+            "salary_p50": (c.salary_range_min + c.salary_range_max) // 2
+            if c.salary_range_min and c.salary_range_max else None,
+        } for c in careers]
+        vectors = np.array([career_vector(c.slug, c.category) for c in careers], dtype=np.float64).reshape(-1, 4)
+        self.centered = vectors - 0.25
+        norms = np.linalg.norm(self.centered, axis=1, keepdims=True)
+        self.unit = np.divide(self.centered, norms, out=np.zeros_like(self.centered), where=norms > 0)
+        self.loaded_at = time.monotonic()
+
+
+def career_vector(slug: str, category: str = None) -> tuple:
+    return CAREER_VECTORS.get(slug) or CATEGORY_VECTORS.get((category or "").lower(), (0.25, 0.25, 0.25, 0.25))
+
+
+_careers = None
+_careers_lock = threading.Lock()
+
+
+def career_matrix(db) -> CareerMatrix:
+    """Cached CareerMatrix (one query when stale)."""
+    global _careers
+    with _careers_lock:
+        if _careers is None or time.monotonic() - _careers.loaded_at > CAREERS_TTL:
+            rows = db.query(models.Career.slug, models.Career.title, models.Career.category,
+                            models.Career.salary_range_min, models.Career.salary_range_max).all()
+            _careers = CareerMatrix(rows)
+        return _careers
+
+
+def match_careers(m: CareerMatrix, shares: np.ndarray, k: int = TOP_MATCHES) -> list:
+    """Top-k careers by cosine similarity to the user's centered shares."""
+    if not m.careers:
+        return []
+    user = shares - 0.25
+    norm = np.linalg.norm(user)
+    cosine = m.unit @ (user / norm) if norm > 0 else np.zeros(len(m.careers))
+    driving = np.argmax(m.centered * user, axis=1)   # dimension contributing most to each match
+    order = np.argsort(-cosine, kind="stable")[:k]
+    return [{
+        **m.careers[i],
+        "match_score": int(round(50 + 50 * float(cosine[i]))),
+        "driving_dimension": DIMENSIONS[driving[i]],
+    } for i in order]
+
+
+# ─── Result ───
+
+def score_assessment(answers: list, questions: dict, careers: CareerMatrix) -> dict:
+    """answers: [{question_id, selected, time_spent_ms}]; questions: {id: options}.
+    Template text stands in until ai_engine.write_4d_narrative replaces it."""
+    dims = [option_dimension(questions.get(a["question_id"]), a["selected"]) for a in answers]
+    scored = score_dimensions(dims, [a.get("time_spent_ms") for a in answers])
+    arch = archetype(scored["shares"])
+    dominant = max(scored["scores"], key=scored["scores"].get)
+    matches = match_careers(careers, scored["shares"])
+    for m in matches:
+        m["why"] = (f"Your {m['driving_dimension']} side ({scored['scores'][m['driving_dimension']]}/100) "
+                    f"is what {m['name']} work draws on most.")
+    return {
+        "dimensions": scored["scores"],
+        "dominant_dimension": dominant,
+        "archetype": arch,
+        "consistency_score": scored["consistency"],
+        "avg_response_time_ms": scored["avg_time_ms"],
+        "top_careers": matches,
+        "personality_summary": f"{arch['name']}: {arch['description']}",
+        "advice": f"Your strongest dimension is {dominant}. Build depth in {matches[0]['name'] if matches else 'one field'} "
+                  f"first, then broaden.",
+    }
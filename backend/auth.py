@@ -2,6 +2,7 @@
 Mentixy — Authentication
 """
 
+import asyncio
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
@@ -9,9 +10,11 @@ from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
 
-from database import get_db
+import ai_scheduler
+from database import get_db, get_async_db
 from models import User
 
 SECRET_KEY = os.getenv("SECRET_KEY", "mentixy-dev-secret-change-me")
@@ -45,11 +48,8 @@ def decode_token(token: str) -> Optional[dict]:
         return None
 
 
-async def get_current_user(
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db)
-) -> Optional[User]:
-    """Get current user from JWT token. Returns None if no token."""
+def _user_id_from_credentials(credentials: Optional[HTTPAuthorizationCredentials]) -> Optional[str]:
+    """Validate the bearer token and return its subject. None if no token."""
     if not credentials:
         return None
 
@@ -63,8 +63,21 @@ async def get_current_user(
     user_id = payload.get("sub")
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    ai_scheduler.set_caller(user_id)  # fair-queue this request's AI calls per student
+    return user_id
+
 
-    user = db.query(User).filter(User.id == user_id).first()
+async def get_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    db: Session = Depends(get_db)
+) -> Optional[User]:
+    """Get current user from JWT token. Returns None if no token.
+    The session is sync, so the lookup runs in a thread, off the event loop."""
+    user_id = _user_id_from_credentials(credentials)
+    if not user_id:
+        return None
+
+    user = await asyncio.to_thread(lambda: db.query(User).filter(User.id == user_id).first())
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
 
@@ -81,3 +94,43 @@ async def require_user(
             detail="Authentication required"
         )
     return user
+
+
+async def require_admin(
+    user: User = Depends(require_user)
+) -> User:
+    """Require an authenticated admin"""
+    if user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return user
+
+
+async def get_current_user_async(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> Optional[User]:
+    """get_current_user for routes on the async session (no threadpool hop)."""
+    user_id = _user_id_from_credentials(credentials)
+    if not user_id:
+        return None
+
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+
+    return user
+
+
+async def require_user_async(
+    user: Optional[User] = Depends(get_current_user_async)
+) -> User:
+    """Require authenticated user (async session)"""
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required"
+        )
+    return user
@@ -0,0 +1,260 @@
+"""
+Mentixy — Autocomplete
+In-memory prefix index behind /api/search/suggest: usernames, skill names,
+career titles, company names and problem titles.
+
+One SortedList of (key, entry_id) tuples is searched with bisect, so a
+write's inserts and deletes are O(log n) under the lock queries take. Every
+word start of a label is a key, so "sha" completes "Priya Sharma". Narrow
+prefixes are ranked straight from their key range; broad ones ("s", "pri")
+match too many keys for that, so they're served from a top-N bucket per
+type — precomputed for one- and two-character prefixes, cached on first use
+for longer ones, updated in place on writes and rescanned only once removals
+drain it below half.
+
+Loaded from search_documents (one query) at startup, then kept current by
+search_index's commit listener. Other workers' writes arrive through a
+periodic background reload (SUGGEST_REFRESH_SECONDS).
+"""
+import bisect
+import os
+import threading
+import time
+import unicodedata
+
+from sortedcontainers import SortedList
+from sqlalchemy import select
+
+from database import engine
+import models
+import search_index
+
+SUGGEST_TYPES = ("user", "skill", "career", "company", "problem")
+# Catalog entries outrank people for the same prefix; boost (≈1–1.5) orders within a type
+TYPE_PRIOR = {"skill": 3.0, "career": 3.0, "company": 2.0, "problem": 1.0, "user": 0.0}
+REFRESH_SECONDS = float(os.getenv("SUGGEST_REFRESH_SECONDS", "300"))
+SHORT_PREFIX = 2      # bucketed at load time
+SCAN_LIMIT = 256      # key ranges up to this size are ranked directly
+BUCKET_SIZE = 64      # entries kept per (type, prefix) bucket
+MAX_BUCKETS = 50_000  # cached long-prefix buckets before the cache is reset
+MAX_WORD_KEYS = 4     # word-start keys per label
+_HIGH = "\uffff"
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents, collapse whitespace."""
+    text = text or ""
+    if not text.isascii():
+        text = "".join(ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch))
+    return " ".join(text.casefold().split())
+
+
+class _Entry:
+    __slots__ = ("doc_type", "ref_id", "label", "norm", "exact", "keys", "weight", "payload")
+
+
+def _make_entry(doc_type: str, ref_id: str, title: str, data: dict, boost: float):
+    data = data or {}
+    e = _Entry()
+    e.doc_type = doc_type
+    e.ref_id = ref_id
+    e.label = title
+    e.norm = normalize(title)
+    words = e.norm.split()
+    keys = {" ".join(words[i:]) for i in range(min(len(words), MAX_WORD_KEYS))}
+    e.payload = {"type": doc_type, "label": title}
+    e.exact = {e.norm}
+    if doc_type == "user":
+        e.payload["username"] = data.get("username")
+        e.payload["avatar_url"] = data.get("avatar_url")
+        if data.get("username"):
+            username = normalize(data["username"])
+            keys.add(username)
+            e.exact.add(username)
+    else:
+        e.payload["slug"] = data.get("slug")
+    e.keys = tuple(k for k in keys if k)
+    e.weight = TYPE_PRIOR.get(doc_type, 0.0) + float(boost or 1.0)
+    return e
+
+
+def _prefixes(e: _Entry, max_len: int = None) -> set:
+    return {k[:n] for k in e.keys for n in range(1, min(len(k), max_len or len(k)) + 1)}
+
+
+class PrefixIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys = SortedList()  # (key, entry_id)
+        self._entries = {}     # entry_id → _Entry
+        self._by_ref = {}      # (doc_type, ref_id) → entry_id
+        self._buckets = {}     # (doc_type, prefix) → [entry_id] by weight desc
+        self._stale = set()    # buckets drained by removals, rescanned on next use
+        self._next_id = 0
+        self._replay = None    # changes seen while a reload is in flight
+        self.loaded_at = 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ─── Bulk load ───
+
+    def load(self, fetch):
+        """Replace the whole index from fetch() → (doc_type, ref_id, title, data, boost)
+        rows. Changes that commit while it runs are replayed on top."""
+        with self._lock:
+            self._replay = []
+        entries, by_ref, keys = {}, {}, []
+        for i, row in enumerate(fetch()):
+            e = _make_entry(*row)
+            entries[i] = e
+            by_ref[(e.doc_type, e.ref_id)] = i
+            keys.extend((k, i) for k in e.keys)
+        keys = SortedList(keys)
+        buckets = {}
+        for eid in sorted(entries, key=lambda i: -entries[i].weight):
+            for p in _prefixes(entries[eid], SHORT_PREFIX):
+                bucket = buckets.setdefault((entries[eid].doc_type, p), [])
+                if len(bucket) < BUCKET_SIZE:
+                    bucket.append(eid)
+        for p in {p for _, p in buckets}:
+            for t in SUGGEST_TYPES:
+                buckets.setdefault((t, p), [])
+        with self._lock:
+            self._keys, self._entries, self._by_ref = keys, entries, by_ref
+            self._buckets, self._stale = buckets, set()
+            self._next_id = len(entries)
+            replay, self._replay = self._replay, None
+            for change in replay:
+                self._apply(*change)
+            self.loaded_at = time.monotonic()
+
+    # ─── Incremental updates ───
+
+    def upsert(self, doc_type, ref_id, title, data, boost):
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append((doc_type, ref_id, (title, data, boost)))
+            self._apply(doc_type, ref_id, (title, data, boost))
+
+    def remove(self, doc_type, ref_id):
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append((doc_type, ref_id, None))
+            self._apply(doc_type, ref_id, None)
+
+    def _apply(self, doc_type, ref_id, doc):
+        old = self._by_ref.pop((doc_type, ref_id), None)
+        if old is not None:
+            e = self._entries.pop(old)
+            for k in e.keys:
+                self._keys.discard((k, old))
+            for p in _prefixes(e):
+                bucket = self._buckets.get((doc_type, p))
+                if bucket and old in bucket:
+                    bucket.remove(old)
+                    if len(bucket) < BUCKET_SIZE // 2:
+                        self._stale.add((doc_type, p))
+        if doc is None:
+            return
+        eid = self._next_id
+        self._next_id += 1
+        e = _make_entry(doc_type, ref_id, *doc)
+        self._entries[eid] = e
+        self._by_ref[(doc_type, ref_id)] = eid
+        for k in e.keys:
+            self._keys.add((k, eid))
+        for p in _prefixes(e):
+            bucket = self._buckets.get((doc_type, p))
+            if bucket is None:
+                if len(p) > SHORT_PREFIX:
+                    continue  # not cached; computed from the key range when first asked
+                bucket = self._buckets[(doc_type, p)] = []
+            if len(bucket) < BUCKET_SIZE or e.weight > self._entries[bucket[-1]].weight:
+                weights = [-self._entries[i].weight for i in bucket]
+                bucket.insert(bisect.bisect_right(weights, -e.weight), eid)
+                del bucket[BUCKET_SIZE:]
+
+    # ─── Queries ───
+
+    def _bounds(self, prefix: str) -> tuple:
+        return self._keys.bisect_left((prefix,)), self._keys.bisect_left((prefix + _HIGH,))
+
+    def _fill(self, prefix: str, lo: int, hi: int):
+        """Compute every type's bucket for a prefix from its full key range."""
+        if len(self._buckets) > MAX_BUCKETS:
+            self._buckets = {k: v for k, v in self._buckets.items() if len(k[1]) <= SHORT_PREFIX}
+        by_type = {t: set() for t in SUGGEST_TYPES}
+        for _, eid in self._keys.islice(lo, hi):
+            by_type.setdefault(self._entries[eid].doc_type, set()).add(eid)
+        for t, eids in by_type.items():
+            self._buckets[(t, prefix)] = sorted(eids, key=lambda i: -self._entries[i].weight)[:BUCKET_SIZE]
+            self._stale.discard((t, prefix))
+
+    def complete(self, query: str, limit: int = 8, types=None) -> list:
+        """Ranked completions: exact label/username, then label prefix, then word prefix; weight breaks ties."""
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        types = types or SUGGEST_TYPES
+        with self._lock:
+            lo, hi = self._bounds(prefix)
+            if hi - lo <= SCAN_LIMIT:
+                candidates = {eid for _, eid in self._keys.islice(lo, hi)}
+            else:
+                keys = [(t, prefix) for t in types]
+                if any(k not in self._buckets or k in self._stale for k in keys):
+                    self._fill(prefix, lo, hi)
+                candidates = [i for k in keys for i in self._buckets[k]]
+            entries = [self._entries[i] for i in candidates]
+        entries = [e for e in entries if e.doc_type in types]
+        entries.sort(key=lambda e: (prefix in e.exact, e.norm.startswith(prefix), e.weight), reverse=True)
+        return [e.payload for e in entries[:limit]]
+
+
+index = PrefixIndex()
+_reload_lock = threading.Lock()
+
+
+def _rows():
+    t = models.SearchDocument.__table__
+    stmt = select(t.c.doc_type, t.c.ref_id, t.c.title, t.c.data, t.c.boost).where(t.c.doc_type.in_(SUGGEST_TYPES))
+    with engine.connect() as conn:
+        return conn.execute(stmt).all()
+
+
+def reload():
+    """Rebuild from search_documents (one query)."""
+    with _reload_lock:
+        started = time.perf_counter()
+        search_index.ensure_schema()
+        index.load(_rows)
+        print(f"[Suggest] ✅ Loaded {len(index):,} entries in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+
+def ensure_loaded():
+    """Load on first use (unless a startup load is already in flight — then serve
+    what's there); afterwards refresh in the background once REFRESH_SECONDS old."""
+    if not index.loaded_at:
+        if not _reload_lock.locked():
+            reload()
+    elif time.monotonic() - index.loaded_at > REFRESH_SECONDS and not _reload_lock.locked():
+        index.loaded_at = time.monotonic()  # one refresh at a time
+        start_reload()
+
+
+def start_reload():
+    threading.Thread(target=reload, name="suggest-reload", daemon=True).start()
+
+
+def _on_index_change(pending: dict):
+    for (doc_type, ref_id), doc in pending.items():
+        if doc_type not in SUGGEST_TYPES:
+            continue
+        if doc is None:
+            index.remove(doc_type, ref_id)
+        else:
+            index.upsert(doc_type, ref_id, doc["title"], doc.get("data"), doc.get("boost"))
+
+
+search_index.add_listener(_on_index_change)
@@ -0,0 +1,5 @@
+"""
+Mentixy — Benchmark Suite
+Latency percentiles and throughput for the hot paths, run against a
+synthetic dataset (seed_synthetic.py). See `python -m benchmarks --help`.
+"""
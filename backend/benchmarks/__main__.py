@@ -0,0 +1,158 @@
+"""
+Run the benchmark suite.
+
+    python seed_synthetic.py --users 100000 --reset
+    python -m benchmarks --duration 15 --concurrency 16 --output bench.json
+    python -m benchmarks --baseline benchmarks/baseline.json          # exit 1 on regression
+    python -m benchmarks --save-baseline benchmarks/baseline.json
+
+Runs in-process (ASGI transport, no uvicorn) against DATABASE_URL unless
+--base-url points at a running server. AI calls are stubbed in-process.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from benchmarks import ai_stub
+from benchmarks.runner import run_scenario
+from benchmarks.scenarios import SCENARIOS, BenchContext
+
+# Gated metrics: (key, higher_is_worse)
+GATED = [("p50_ms", True), ("p95_ms", True), ("p99_ms", True), ("throughput_rps", False)]
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """[(scenario, metric, baseline, current, change)] for every metric worse than tolerance."""
+    regressions = []
+    for name, cur in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        if cur["errors"] > base.get("errors", 0) and cur["errors"] > 0.01 * max(cur["requests"], 1):
+            regressions.append((name, "errors", base.get("errors", 0), cur["errors"], None))
+        for key, higher_is_worse in GATED:
+            b, c = base.get(key), cur.get(key)
+            if not b or c is None:
+                continue
+            change = (c - b) / b
+            if (change > tolerance) if higher_is_worse else (change < -tolerance):
+                regressions.append((name, key, b, c, change))
+    return regressions
+
+
+def print_table(results: dict):
+    print(f"\n{'scenario':18s} {'req':>7s} {'err':>5s} {'rps':>9s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'sql':>6s}")
+    for name, r in results["scenarios"].items():
+        sql = "" if r.get("sql_per_request") is None else f"{r['sql_per_request']:.1f}"
+        print(f"{name:18s} {r['requests']:>7d} {r['errors']:>5d} {r['throughput_rps']:>9.1f} "
+              f"{r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} {sql:>6s}")
+
+
+async def _run(args) -> dict:
+    import main as app_module
+
+    stub = ai_stub.install(args.ai_latency_ms, args.ai_jitter_ms)
+    ctx = BenchContext(sample_users=args.sample_users, seed=args.seed)
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+    else:
+        transport = httpx.ASGITransport(app=app_module.app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60)
+
+    names = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"[Bench] Unknown scenarios: {', '.join(unknown)} (have: {', '.join(SCENARIOS)})")
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_rev": _git_rev(),
+            "python": platform.python_version(),
+            "database": ctx.dialect,
+            "users": ctx.user_count,
+            "target": args.base_url or "in-process",
+            "duration_s": args.duration,
+            "concurrency": args.concurrency,
+            "ai_latency_ms": args.ai_latency_ms,
+            "ai_jitter_ms": args.ai_jitter_ms,
+        },
+        "scenarios": {},
+    }
+    async with client:
+        for name in names:
+            op, setup, writes = SCENARIOS[name]
+            if writes and args.read_only:
+                continue
+            print(f"[Bench] {name} ...", flush=True)
+            results["scenarios"][name] = await run_scenario(
+                client, ctx, op, setup, duration_s=args.duration, concurrency=args.concurrency,
+                warmup=args.warmup, seed=args.seed, profile_sql=args.profile_sql,
+            )
+    results["meta"]["ai_calls"] = stub.calls
+    return results
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m benchmarks", description="Mentixy hot-path benchmarks.")
+    p.add_argument("--scenarios", default="", help=f"comma list (default: all) — {', '.join(SCENARIOS)}")
+    p.add_argument("--duration", type=float, default=10, help="seconds per scenario")
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--warmup", type=int, default=5, help="untimed requests per scenario")
+    p.add_argument("--sample-users", type=int, default=500)
+    p.add_argument("--seed", type=int, default=7)
+    p.add_argument("--ai-latency-ms", type=float, default=800, help="stubbed Gemini latency")
+    p.add_argument("--ai-jitter-ms", type=float, default=200)
+    p.add_argument("--profile-sql", action="store_true", help="also record SQL statements per request")
+    p.add_argument("--read-only", action="store_true", help="skip scenarios that write")
+    p.add_argument("--base-url", default="", help="benchmark a running server instead of in-process")
+    p.add_argument("--output", default="", help="write results JSON here")
+    p.add_argument("--baseline", default="", help="compare against this results JSON; exit 1 on regression")
+    p.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression (0.15 = 15%%)")
+    p.add_argument("--save-baseline", default="", help="write results as the new baseline")
+    args = p.parse_args(argv)
+
+    started = time.perf_counter()
+    results = asyncio.run(_run(args))
+    results["meta"]["wall_s"] = round(time.perf_counter() - started, 1)
+    print_table(results)
+
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"[Bench] wrote {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n[Bench] ❌ {len(regressions)} regression(s) vs {args.baseline} (tolerance {args.tolerance:.0%}):")
+            for name, key, b, c, change in regressions:
+                pct = "" if change is None else f" ({change:+.0%})"
+                print(f"  {name:18s} {key:15s} {b} → {c}{pct}")
+            sys.exit(1)
+        print(f"\n[Bench] ✅ no regressions vs {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
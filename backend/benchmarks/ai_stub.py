@@ -0,0 +1,48 @@
+"""Gemini stand-in for benchmarks: fixed latency (± jitter), no network, no quota."""
+import asyncio
+import random
+
+import ai_cache
+import ai_engine
+
+
+class _StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubModel:
+    """Replaces ai_engine.model. Sleeps like a real call, then returns plain text."""
+
+    def __init__(self, latency_ms: float, jitter_ms: float = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.calls = 0
+
+    async def generate_content_async(self, prompt, **kwargs):
+        self.calls += 1
+        delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        return _StubResponse("This is a benchmark stub reply from the career advisor.")
+
+
+def install(latency_ms: float, jitter_ms: float = 0) -> StubModel:
+    """Route every AI call through the stub via the real gateway (semaphore,
+    timeouts) and the response cache. Structured calls return their own
+    `_mock_*` fallback, so responses keep realistic shapes."""
+    stub = StubModel(latency_ms, jitter_ms)
+    ai_engine.model = stub
+
+    async def _safe_generate(prompt, fallback, cache=None):
+        if cache:
+            cached = await ai_cache.get(cache, ai_engine.MODEL_NAME, prompt)
+            if cached is not None:
+                return cached
+        await ai_engine.generate_text(prompt)
+        if cache:
+            await ai_cache.put(cache, ai_engine.MODEL_NAME, prompt, fallback)
+        return fallback
+
+    ai_engine._safe_generate = _safe_generate
+    return stub
@@ -0,0 +1,93 @@
+"""Closed-loop load runner: N concurrent workers per scenario for a fixed duration."""
+import asyncio
+import math
+import random
+import time
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def summarize(latencies_ms: list, errors: int, wall_s: float, sql_counts: list) -> dict:
+    lat = sorted(latencies_ms)
+    n = len(lat)
+    return {
+        "requests": n,
+        "errors": errors,
+        "throughput_rps": round(n / wall_s, 2) if wall_s else 0.0,
+        "mean_ms": round(sum(lat) / n, 2) if n else 0.0,
+        "p50_ms": round(percentile(lat, 50), 2),
+        "p95_ms": round(percentile(lat, 95), 2),
+        "p99_ms": round(percentile(lat, 99), 2),
+        "max_ms": round(lat[-1], 2) if n else 0.0,
+        "sql_per_request": round(sum(sql_counts) / len(sql_counts), 1) if sql_counts else None,
+    }
+
+
+class _SQLCountingClient:
+    """Wraps an httpx.AsyncClient: forces SQL profiling and records x-sql-count."""
+
+    def __init__(self, client, sink: list):
+        self._client = client
+        self._sink = sink
+
+    async def _send(self, method, url, headers=None, **kw):
+        headers = {**(headers or {}), "X-Profile-SQL": "1"}
+        resp = await self._client.request(method, url, headers=headers, **kw)
+        if "x-sql-count" in resp.headers:
+            self._sink.append(int(resp.headers["x-sql-count"]))
+        return resp
+
+    async def get(self, url, **kw):
+        return await self._send("GET", url, **kw)
+
+    async def post(self, url, **kw):
+        return await self._send("POST", url, **kw)
+
+
+async def run_scenario(client, ctx, op, setup, *, duration_s: float, concurrency: int,
+                       warmup: int, seed: int, profile_sql: bool) -> dict:
+    latencies, sql_counts = [], []
+    errors = 0
+    last_error = None
+    timed_client = _SQLCountingClient(client, sql_counts) if profile_sql else client
+
+    warm_rng = random.Random(seed - 1)
+    for _ in range(warmup):
+        try:
+            state = await setup(client, ctx, warm_rng) if setup else None
+            await op(client, ctx, warm_rng, state)
+        except Exception:
+            pass
+
+    deadline = time.perf_counter() + duration_s
+
+    async def worker(i: int):
+        nonlocal errors, last_error
+        rng = random.Random(seed * 1000 + i)
+        while time.perf_counter() < deadline:
+            try:
+                state = await setup(client, ctx, rng) if setup else None
+            except Exception as e:
+                errors += 1
+                last_error = f"setup: {e}"
+                continue
+            start = time.perf_counter()
+            try:
+                await op(timed_client, ctx, rng, state)
+                latencies.append((time.perf_counter() - start) * 1000)
+            except Exception as e:
+                errors += 1
+                last_error = str(e)[:200]
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    result = summarize(latencies, errors, time.perf_counter() - started, sql_counts)
+    if last_error:
+        result["last_error"] = last_error
+    return result
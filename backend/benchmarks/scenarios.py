@@ -0,0 +1,190 @@
+"""
+Benchmark scenarios — one coroutine per hot path.
+
+Each scenario takes (client, ctx, rng), performs exactly one timed operation
+and raises on failure. Untimed setup (e.g. starting the aptitude test a
+submit needs) goes in `setup`, which runs before the clock starts.
+"""
+import asyncio
+import random
+
+from sqlalchemy import func
+
+from auth import create_access_token
+from database import SessionLocal
+import models
+
+SEARCH_TERMS = ["python", "sharma", "software", "data", "tcs", "react", "iyer", "design", "java", "cloud"]
+
+
+class BenchContext:
+    """Ids and tokens sampled once from the dataset under test."""
+
+    def __init__(self, sample_users: int = 500, seed: int = 7):
+        db = SessionLocal()
+        try:
+            # Skew the sample towards active users, like real traffic
+            rows = db.query(models.UserProfile.user_id, models.UserProfile.username).order_by(
+                models.UserProfile.total_points.desc()
+            ).limit(sample_users * 4).all()
+            rng = random.Random(seed)
+            rows = rng.sample(rows, min(sample_users, len(rows)))
+            if not rows:
+                raise SystemExit("[Bench] No users in the database — run seed_synthetic.py first")
+            self.users = [(r.user_id, r.username, create_access_token({"sub": r.user_id})) for r in rows]
+            self.problem_slugs = [s for (s,) in db.query(models.CodingProblem.slug).all()]
+            self.user_count = db.query(func.count(models.User.id)).scalar()
+            self.dialect = db.get_bind().dialect.name
+        finally:
+            db.close()
+
+    def user(self, rng: random.Random):
+        return rng.choice(self.users)
+
+
+def _check(resp):
+    if resp.status_code >= 400:
+        raise RuntimeError(f"HTTP {resp.status_code}: {resp.text[:200]}")
+    return resp
+
+
+def _auth(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+# ─── Scenarios ───
+
+async def leaderboard(client, ctx, rng, state=None):
+    _check(await client.get("/api/leaderboard/individual", params={"limit": 50}))
+
+
+async def campus_wars(client, ctx, rng, state=None):
+    _check(await client.get("/api/leaderboard/campus-wars", params={"limit": 20}))
+
+
+async def community_feed(client, ctx, rng, state=None):
+    _, _, token = ctx.user(rng)
+    _check(await client.get("/api/community/posts", params={"page": rng.randint(1, 3)}, headers=_auth(token)))
+
+
+async def notifications(client, ctx, rng, state=None):
+    _, _, token = ctx.user(rng)
+    _check(await client.get("/api/notifications", headers=_auth(token)))
+
+
+async def search(client, ctx, rng, state=None):
+    _check(await client.get("/api/search", params={"q": rng.choice(SEARCH_TERMS)}))
+
+
+async def suggest(client, ctx, rng, state=None):
+    """Typeahead: a random prefix of a search term, as typed keystroke by keystroke."""
+    term = rng.choice(SEARCH_TERMS)
+    _check(await client.get("/api/search/suggest", params={"q": term[:rng.randint(1, len(term))]}))
+
+
+async def public_profile(client, ctx, rng, state=None):
+    _, username, _ = ctx.user(rng)
+    _check(await client.get(f"/api/profile/{username}"))
+
+
+async def mentixy_score(client, ctx, rng, state=None):
+    """calculate_mentixy_score() called directly — the batch/recompute cost, not HTTP."""
+    from score_calculator import calculate_mentixy_score
+    user_id, _, _ = ctx.user(rng)
+
+    def run():
+        db = SessionLocal()
+        try:
+            calculate_mentixy_score(user_id, db)
+        finally:
+            db.close()
+
+    await asyncio.to_thread(run)
+
+
+async def score_recompute_chunk(client, ctx, rng, state=None):
+    """recompute_chunk() over 500 users from a random starting id — compare with 500 × mentixy_score."""
+    from score_calculator import recompute_chunk
+    user_id, _, _ = ctx.user(rng)
+
+    def run():
+        db = SessionLocal()
+        try:
+            recompute_chunk(db, user_id, 500)
+        finally:
+            db.close()
+
+    await asyncio.to_thread(run)
+
+
+async def aptitude_start(client, ctx, rng, state=None):
+    _, _, token = ctx.user(rng)
+    _check(await client.post("/api/aptitude/start", json={"section": "mixed"}, headers=_auth(token)))
+
+
+async def _aptitude_setup(client, ctx, rng):
+    _, _, token = ctx.user(rng)
+    resp = _check(await client.post("/api/aptitude/start", json={"section": "mixed"}, headers=_auth(token)))
+    return token, resp.json()
+
+
+async def aptitude_submit(client, ctx, rng, state=None):
+    token, test = state
+    answers = [{"question_id": q["id"], "selected_option": rng.choice("ABCD"), "time_spent_ms": rng.randint(5000, 60000)}
+               for q in test["questions"]]
+    _check(await client.post("/api/aptitude/submit", json={"session_id": test["session_id"], "answers": answers},
+                             headers=_auth(token)))
+
+
+async def coding_submit(client, ctx, rng, state=None):
+    _, _, token = ctx.user(rng)
+    slug = rng.choice(ctx.problem_slugs)
+    _check(await client.post(f"/api/coding/problems/{slug}/submit",
+                             json={"language": "python", "code": "class Solution:\n    pass\n"},
+                             headers=_auth(token)))
+
+
+async def ai_skill_gap(client, ctx, rng, state=None):
+    """One AI-backed route, so stubbed model latency shows up end to end (cache bypassed)."""
+    _, _, token = ctx.user(rng)
+    _check(await client.post("/api/ai/skill-gap", params={"fresh": "true"},
+                             json={"current_skills": ["Python", "SQL"], "target_career": "Data Scientist"},
+                             headers=_auth(token)))
+
+
+async def jobs_matched(client, ctx, rng, state=None):
+    """Every active job scored locally for one user; no AI explanations."""
+    _, _, token = ctx.user(rng)
+    _check(await client.get("/api/jobs/matched", params={"explain": 0}, headers=_auth(token)))
+
+
+INTERVIEW_PAIRS = [("TCS", "Software Engineer"), ("Infosys", "Systems Engineer"), ("Wipro", "Project Engineer"),
+                   ("Accenture", "Associate Software Engineer"), ("Cognizant", "Programmer Analyst")]
+
+
+async def ai_interview_prep(client, ctx, rng, state=None):
+    """Drive-season traffic: a few popular company/role pairs, served from the AI response cache."""
+    _, _, token = ctx.user(rng)
+    company, role = rng.choice(INTERVIEW_PAIRS)
+    _check(await client.post("/api/ai/interview-prep", json={"company": company, "role": role},
+                             headers=_auth(token)))
+
+
+# name → (operation, untimed setup or None, writes?)
+SCENARIOS = {
+    "leaderboard": (leaderboard, None, False),
+    "campus_wars": (campus_wars, None, False),
+    "community_feed": (community_feed, None, False),
+    "notifications": (notifications, None, False),
+    "search": (search, None, False),
+    "suggest": (suggest, None, False),
+    "public_profile": (public_profile, None, False),
+    "mentixy_score": (mentixy_score, None, True),
+    "score_recompute_chunk": (score_recompute_chunk, None, True),
+    "aptitude_start": (aptitude_start, None, True),
+    "aptitude_submit": (aptitude_submit, _aptitude_setup, True),
+    "coding_submit": (coding_submit, None, True),
+    "jobs_matched": (jobs_matched, None, False),
+    "ai_skill_gap": (ai_skill_gap, None, False),
+    "ai_interview_prep": (ai_interview_prep, None, False),
+}
@@ -0,0 +1,89 @@
+"""
+Mentixy — Chat Memory
+Keeps career chat prompts bounded however long a session runs.
+
+A session's older turns are folded into a rolling summary (ChatSummary)
+by the `chat_compact` background job, never on the request path. Each turn's
+prompt then carries the summary plus as many of the newest unsummarized
+messages as fit CHAT_HISTORY_TOKENS, counted with ai_telemetry's measured
+characters-per-token estimate.
+
+    summary, recent = window(messages[covered:], summary)   # what the prompt gets
+    needs_compaction(messages, covered)                     # queue a fold?
+
+Compaction starts once the unsummarized turns fill COMPACT_AT of the budget
+and folds all but the newest KEEP_RECENT messages into the summary.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+
+import ai_telemetry
+
+HISTORY_TOKENS = int(os.getenv("CHAT_HISTORY_TOKENS", "1200"))   # summary + recent turns
+SUMMARY_TOKENS = int(os.getenv("CHAT_SUMMARY_TOKENS", "300"))
+COMPACT_AT = 0.75
+KEEP_RECENT = 4                       # the live exchange is never folded
+MESSAGE_OVERHEAD_TOKENS = 4           # "User: " / "Mentixy: " and the newline
+RETRY_AFTER = timedelta(minutes=10)   # re-queue a compaction that never landed
+
+
+def message_tokens(msg: dict) -> int:
+    return ai_telemetry.estimate_tokens(msg.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+
+
+def truncate(text: str, tokens: int) -> str:
+    """`text` cut to about `tokens` tokens, at a word boundary."""
+    if ai_telemetry.estimate_tokens(text) <= tokens:
+        return text
+    cut = text[:int(tokens * ai_telemetry.chars_per_token())]
+    return cut.rsplit(" ", 1)[0] + " …"
+
+
+def window(messages: list, summary: str = None, budget: int = None) -> tuple:
+    """(summary, newest messages) that together fit `budget` tokens.
+
+    The newest message is always kept, truncated if it alone is over budget.
+    """
+    budget = budget or HISTORY_TOKENS
+    summary = truncate(summary, SUMMARY_TOKENS) if summary else None
+    used = ai_telemetry.estimate_tokens(summary or "")
+    recent = []
+    for msg in reversed(messages or []):
+        cost = message_tokens(msg)
+        if used + cost > budget:
+            if not recent:
+                recent.append({**msg, "content": truncate(msg.get("content") or "",
+                                                          max(budget - used - MESSAGE_OVERHEAD_TOKENS, 16))})
+            break
+        recent.append(msg)
+        used += cost
+    return summary, recent[::-1]
+
+
+def needs_compaction(messages: list, covered: int = 0, requested_at: datetime = None) -> bool:
+    """Are the unsummarized turns big enough to fold, with no fold already pending?"""
+    pending = messages[covered:]
+    if len(pending) <= KEEP_RECENT:
+        return False
+    if sum(message_tokens(m) for m in pending) < COMPACT_AT * HISTORY_TOKENS:
+        return False
+    if requested_at is not None:
+        requested_at = requested_at if requested_at.tzinfo else requested_at.replace(tzinfo=timezone.utc)
+        return datetime.now(timezone.utc) - requested_at > RETRY_AFTER
+    return True
+
+
+def fold_range(messages: list, covered: int = 0) -> tuple:
+    """(start, end) of the messages a compaction folds into the summary."""
+    return covered, max(covered, len(messages) - KEEP_RECENT)
+
+
+def extractive_summary(previous: str, turns: list) -> str:
+    """Summary without a model: the questions asked, newest kept when space runs out."""
+    asked = [truncate(" ".join((m.get("content") or "").split()), 40) for m in turns if m.get("role") == "user"]
+    if not asked:
+        return previous or ""
+    text = (previous + "\n" if previous else "") + "The student asked about: " + "; ".join(asked)
+    if ai_telemetry.estimate_tokens(text) <= SUMMARY_TOKENS:
+        return text
+    return "…" + text[-int(SUMMARY_TOKENS * ai_telemetry.chars_per_token()):]
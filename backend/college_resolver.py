@@ -0,0 +1,274 @@
+"""
+Mentixy — College Resolution
+Maps the free-text UserProfile.college_name ("IIT Bombay", "IIT-B", "vit
+university") to a College, stored as UserProfile.college_id so every
+college-scoped query is an indexed equality join.
+
+Each college contributes normalized keys: its name, short name (spaced and
+compact: "iit b", "iitb") and slug. Normalizing casefolds, strips accents
+and punctuation, expands common abbreviations (IIT, NIT, engg, univ, ...)
+and drops filler words. A name resolves to the college with the most similar
+key by character trigrams (Dice coefficient, via an inverted trigram index),
+or whose key it contains word for word, if that clears MIN_SIMILARITY and
+beats the runner-up college by MARGIN; otherwise it stays unresolved.
+
+    resolve("IIT Bombay")  → id of "Indian Institute of Technology Bombay"
+
+Profiles are resolved inline whenever college_name is written (a before_flush
+hook) and in bulk by the `college_backfill` job (chunks by user id, then a
+Campus Wars rebuild). The index is built from colleges (one query) on first
+use and again after any College write commits.
+"""
+import asyncio
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+
+from sqlalchemy import event, inspect, select, text, update
+from sqlalchemy.orm import Session
+
+from database import engine, SessionLocal
+import job_queue
+from models import College, UserProfile
+import rankings
+import score_calculator
+
+MIN_SIMILARITY = float(os.getenv("COLLEGE_MATCH_MIN_SIMILARITY", "0.6"))
+MARGIN = 0.05          # best college must beat the next-best by this much
+CONTAINS_SCORE = 0.9   # a whole key inside the name, e.g. "VIT University" ⊃ "vit"
+MIN_CONTAINED = 3      # shortest key that counts when contained
+MAX_CACHE = 50_000     # resolved names kept before the cache is reset
+BACKFILL_CHUNK = int(os.getenv("COLLEGE_BACKFILL_CHUNK", "2000"))
+
+ABBREVIATIONS = {
+    "iit": "indian institute of technology",
+    "iiit": "indian institute of information technology",
+    "nit": "national institute of technology",
+    "iim": "indian institute of management",
+    "bits": "birla institute of technology and science",
+    "univ": "university", "uni": "university",
+    "inst": "institute", "tech": "technology", "engg": "engineering", "eng": "engineering",
+    "coll": "college", "clg": "college", "sci": "science", "mgmt": "management",
+}
+STOPWORDS = {"of", "the", "and", "for", "in", "at", "a"}
+_NON_WORD = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def normalize(name: str) -> str:
+    """'I.I.T. Bombay' → 'indian institute technology bombay'."""
+    name = (name or "").casefold()
+    if not name.isascii():
+        name = "".join(ch for ch in unicodedata.normalize("NFKD", name) if not unicodedata.combining(ch))
+    name = re.sub(r"\b(\w)\.(?=\w\.)", r"\1", name.replace("&", " and "))   # i.i.t. → iit.
+    words = []
+    for word in _NON_WORD.sub(" ", name.replace("_", " ")).split():
+        words.extend(ABBREVIATIONS.get(word, word).split())
+    return " ".join(w for w in words if w not in STOPWORDS)
+
+
+def trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CollegeIndex:
+    def __init__(self, colleges=()):
+        self._keys = []        # (college_id, key, trigram count)
+        self._grams = {}       # trigram → [key index]
+        self._cache = {}       # raw name → college id or None
+        self._ids = set()
+        for college_id, *names in colleges:
+            self._ids.add(college_id)
+            for key in self._college_keys(*names):
+                self._add(college_id, key)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, college_id):
+        return college_id in self._ids
+
+    @staticmethod
+    def _college_keys(name, short_name=None, slug=None) -> set:
+        keys = {normalize(name), normalize(slug)}
+        if short_name:
+            keys.add(normalize(short_name))
+            keys.add(_NON_WORD.sub("", short_name.casefold()))   # "IIT-B" → "iitb"
+        return {k for k in keys if k}
+
+    def _add(self, college_id: str, key: str):
+        grams = trigrams(key)
+        i = len(self._keys)
+        self._keys.append((college_id, key, len(grams)))
+        for g in grams:
+            self._grams.setdefault(g, []).append(i)
+
+    def scores(self, name: str) -> dict:
+        """{college_id: best similarity} for colleges sharing any trigram with `name`."""
+        query = normalize(name)
+        if not query:
+            return {}
+        grams = trigrams(query)
+        shared = Counter(i for g in grams for i in self._grams.get(g, ()))
+        padded = f" {query} "
+        best = {}
+        for i, common in shared.items():
+            college_id, key, size = self._keys[i]
+            score = 2 * common / (len(grams) + size)
+            if len(key) >= MIN_CONTAINED and f" {key} " in padded:
+                score = max(score, CONTAINS_SCORE)
+            if score > best.get(college_id, 0):
+                best[college_id] = score
+        return best
+
+    def resolve(self, name: str):
+        """College id for a free-text name, or None if nothing is a clear match."""
+        if not name:
+            return None
+        if name in self._cache:
+            return self._cache[name]
+        ranked = sorted(self.scores(name).items(), key=lambda item: item[1], reverse=True)
+        found = None
+        if ranked and ranked[0][1] >= MIN_SIMILARITY and (len(ranked) == 1 or ranked[0][1] - ranked[1][1] >= MARGIN):
+            found = ranked[0][0]
+        if len(self._cache) >= MAX_CACHE:
+            self._cache = {}
+        self._cache[name] = found
+        return found
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def index() -> CollegeIndex:
+    """The current index, built from colleges on first use (one query)."""
+    global _index
+    current = _index
+    if current is not None:
+        return current
+    with _index_lock:
+        if _index is None:
+            with engine.connect() as conn:
+                _index = CollegeIndex(conn.execute(
+                    select(College.id, College.name, College.short_name, College.slug)).all())
+            print(f"[College] ✅ Indexed {len(_index)} colleges")
+        return _index
+
+
+def resolve(name: str):
+    return index().resolve(name)
+
+
+def profile_filter(college: str):
+    """UserProfile filter for a college given by id or name: an indexed equality
+    on college_id when it resolves, otherwise a college_name substring match."""
+    college_id = college if college in index() else resolve(college)
+    if college_id:
+        return UserProfile.college_id == college_id
+    return UserProfile.college_name.ilike(f"%{college}%")
+
+
+# ─── Schema ───
+
+def ensure_schema() -> bool:
+    """Add user_profiles.college_id to databases created before it existed.
+    Returns True if it was added (the profiles then need a backfill)."""
+    if "college_id" in {c["name"] for c in inspect(engine).get_columns("user_profiles")}:
+        return False
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE user_profiles ADD COLUMN college_id VARCHAR REFERENCES colleges(id) ON DELETE SET NULL"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_user_profiles_college_id ON user_profiles (college_id)"))
+    print("[College] ✅ Added user_profiles.college_id")
+    return True
+
+
+# ─── Backfill ───
+
+def backfill_chunk(db: Session, after: str = None, limit: int = BACKFILL_CHUNK) -> tuple:
+    """Resolve the next `limit` profiles by user id after `after` and commit the
+    ones whose college changed. Returns (last user id, profiles, changed,
+    unresolved); (None, 0, 0, 0) once past the last profile."""
+    q = select(UserProfile.user_id, UserProfile.college_name, UserProfile.college_id) \
+        .order_by(UserProfile.user_id).limit(limit)
+    if after is not None:
+        q = q.where(UserProfile.user_id > after)
+    rows = db.execute(q).all()
+    if not rows:
+        return None, 0, 0, 0
+    colleges = index()
+    changed, unresolved = [], 0
+    for user_id, college_name, college_id in rows:
+        resolved = colleges.resolve(college_name)
+        unresolved += bool(college_name) and resolved is None
+        if resolved != college_id:
+            changed.append({"user_id": user_id, "college_id": resolved})
+    if changed:
+        db.execute(update(UserProfile), changed)
+    db.commit()
+    return rows[-1].user_id, len(rows), len(changed), unresolved
+
+
+def _backfill_chunk(after: str, limit: int) -> tuple:
+    db = SessionLocal()
+    try:
+        return backfill_chunk(db, after, limit)
+    finally:
+        db.close()
+
+
+@job_queue.handler("college_backfill")
+async def _college_backfill_job(job: job_queue.JobContext) -> dict:
+    """Resolve every profile's college_name to a college_id, a chunk per
+    transaction, then rebuild Campus Wars from the new assignments."""
+    import college_stats  # imports this module
+
+    chunk_size = int(job.payload.get("chunk_size") or BACKFILL_CHUNK)
+    started = time.perf_counter()
+    total = await asyncio.to_thread(score_calculator.count_profiles)
+    after, profiles, changed, unresolved = None, 0, 0, 0
+    while True:
+        after, n, c, u = await asyncio.to_thread(_backfill_chunk, after, chunk_size)
+        if not n:
+            break
+        profiles, changed, unresolved = profiles + n, changed + c, unresolved + u
+        await job.progress(100 * profiles / max(total, 1))
+    colleges = await asyncio.to_thread(college_stats.refresh_in_session)
+    if changed:
+        rankings.start_reload()   # bulk writes bypass the ORM feed
+    seconds = round(time.perf_counter() - started, 1)
+    print(f"[College] ✅ Resolved {profiles} profiles ({changed} changed, {unresolved} unresolved) in {seconds}s")
+    return {"profiles": profiles, "changed": changed, "unresolved": unresolved,
+            "colleges": colleges, "seconds": seconds}
+
+
+# ─── Inline ───
+
+@event.listens_for(Session, "before_flush")
+def _resolve_profiles(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, UserProfile) and (obj in session.new or inspect(obj).attrs.college_name.history.has_changes()):
+            college_id = resolve(obj.college_name)
+            if obj.college_id != college_id:
+                obj.college_id = college_id
+
+
+@event.listens_for(Session, "after_flush")
+def _watch_colleges(session, flush_context):
+    if any(isinstance(obj, College) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["colleges_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _rebuild_index(session):
+    global _index
+    if session.info.pop("colleges_changed", False):
+        _index = None   # rebuilt on next use
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session):
+    session.info.pop("colleges_changed", None)
@@ -0,0 +1,195 @@
+"""
+Mentixy — Campus Wars aggregates
+Per-college student count, average, median and top-k Mentixy Score and weekly
+activity, materialized in college_stats so /api/leaderboard/campus-wars is a
+single indexed query.
+
+A student counts for the college their profile resolves to (college_id, see
+college_resolver.py); unresolved profiles count for none.
+
+Kept current three ways:
+  - profile writes that change a score or a college append the college to
+    college_stats_changes in the same transaction — an INSERT, so students of
+    one big college never queue on its stats row;
+  - `college_stats_refresh` (every COLLEGE_STATS_REFRESH_MINUTES) recomputes
+    the colleges with logged changes and deletes the entries it folded in;
+  - `college_stats_rebuild` (nightly at COLLEGE_STATS_REBUILD_AT, UTC, after
+    the score recompute) recomputes every college, which also catches bulk
+    writes and activity aging out of the week.
+
+A refresh only deletes the log entries it read before reading the profiles,
+so a change committed while it runs stays logged for the next one.
+"""
+import asyncio
+import os
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, event, func, insert, inspect, or_, select, update
+from sqlalchemy.orm import Session
+
+import college_resolver  # noqa: F401 — sets UserProfile.college_id before each flush
+from database import SessionLocal
+import job_queue
+from models import College, CollegeStats, CollegeStatsChange, UserActivityDaily, UserProfile
+
+TOP_K = int(os.getenv("COLLEGE_STATS_TOP_K", "10"))
+REFRESH_MINUTES = int(os.getenv("COLLEGE_STATS_REFRESH_MINUTES", "5"))
+REBUILD_AT = os.getenv("COLLEGE_STATS_REBUILD_AT", "22:30")   # UTC; after the score recompute
+WEEK_DAYS = 7
+DELETE_CHUNK = 1000   # folded change ids per DELETE
+
+
+def top_k_score(scores: list, k: int = TOP_K) -> float:
+    """Mean of the best k scores, empty places counting 0 — so a college needs
+    both strong students and enough of them."""
+    return sum(sorted(scores, reverse=True)[:k]) / k if k else 0
+
+
+def _aggregate(scores: list, activity: list) -> dict:
+    """Stats row from every student's score and each active student's week."""
+    scored = [s for s in scores if s > 0]
+    return {
+        "student_count": len(scores),
+        "scored_count": len(scored),
+        "score_sum": sum(scored),
+        "avg_score": sum(scored) / len(scored) if scored else 0,
+        "median_score": statistics.median(scored) if scored else 0,
+        "top_score": max(scored, default=0),
+        "top_k_score": top_k_score(scored),
+        "weekly_active": len(activity),
+        "weekly_activity": sum(activity),
+    }
+
+
+# ─── Rebuild ───
+
+def refresh(db: Session, college_ids=None) -> int:
+    """Recompute the given colleges (all when None) from user_profiles and
+    user_activity_daily, delete their logged changes and commit. Returns how many."""
+    q = select(College.id)
+    if college_ids is not None:
+        q = q.where(College.id.in_(list(college_ids)))
+    colleges = db.scalars(q).all()
+    if not colleges:
+        return 0
+
+    # Read before the profiles: every change folded here is already visible below
+    pending = select(CollegeStatsChange.id)
+    if college_ids is not None:
+        pending = pending.where(CollegeStatsChange.college_id.in_(colleges))
+    folded = db.scalars(pending).all()
+
+    in_scope = UserProfile.college_id.in_(colleges) if college_ids is not None \
+        else UserProfile.college_id.isnot(None)
+    scores = {cid: [] for cid in colleges}
+    for cid, score in db.execute(select(UserProfile.college_id, UserProfile.mentixy_score).where(in_scope)):
+        scores[cid].append(score or 0)
+
+    since = datetime.now(timezone.utc).date() - timedelta(days=WEEK_DAYS - 1)
+    week = {cid: [] for cid in colleges}
+    for cid, total in db.execute(
+        select(UserProfile.college_id, func.sum(UserActivityDaily.activity_score))
+        .join(UserProfile, UserProfile.user_id == UserActivityDaily.user_id)
+        .where(in_scope, UserActivityDaily.activity_date >= since)
+        .group_by(UserProfile.college_id, UserActivityDaily.user_id)
+    ):
+        week[cid].append(total or 0)
+
+    now = datetime.now(timezone.utc)
+    stats = [{"college_id": cid, **_aggregate(scores[cid], week[cid]), "refreshed_at": now}
+             for cid in colleges]
+    existing = set(db.scalars(select(CollegeStats.college_id).where(CollegeStats.college_id.in_(colleges))))
+    new = [row for row in stats if row["college_id"] not in existing]
+    if new:
+        db.execute(insert(CollegeStats), new)
+    if len(new) < len(stats):
+        db.execute(update(CollegeStats), [row for row in stats if row["college_id"] in existing])
+    for i in range(0, len(folded), DELETE_CHUNK):
+        db.execute(delete(CollegeStatsChange).where(CollegeStatsChange.id.in_(folded[i:i + DELETE_CHUNK])))
+    db.commit()
+    return len(stats)
+
+
+def refresh_stale(db: Session) -> int:
+    """Recompute colleges with logged changes, and any without a stats row yet."""
+    stale = db.scalars(
+        select(College.id).outerjoin(CollegeStats, CollegeStats.college_id == College.id)
+        .where(or_(College.id.in_(select(CollegeStatsChange.college_id)), CollegeStats.college_id.is_(None)))
+    ).all()
+    return refresh(db, stale) if stale else 0
+
+
+def next_refresh(now: datetime) -> datetime:
+    """Next COLLEGE_STATS_REFRESH_MINUTES boundary after `now`."""
+    now = now.astimezone(timezone.utc).replace(second=0, microsecond=0)
+    return now + timedelta(minutes=REFRESH_MINUTES - now.minute % REFRESH_MINUTES)
+
+
+def next_rebuild(now: datetime) -> datetime:
+    """Next nightly rebuild time (REBUILD_AT, UTC) after `now`."""
+    hour, minute = (int(part) for part in REBUILD_AT.split(":"))
+    at = now.astimezone(timezone.utc).replace(hour=hour, minute=minute, second=0, microsecond=0)
+    return at if at > now else at + timedelta(days=1)
+
+
+# ─── Jobs ───
+
+def refresh_in_session(stale_only: bool = False) -> int:
+    """refresh_stale / refresh in a session of its own (for asyncio.to_thread)."""
+    db = SessionLocal()
+    try:
+        return refresh_stale(db) if stale_only else refresh(db)
+    finally:
+        db.close()
+
+
+@job_queue.handler("college_stats_refresh")
+async def _college_stats_refresh_job(job: job_queue.JobContext) -> dict:
+    """Recompute the colleges whose students' scores moved since the last run."""
+    return {"colleges": await asyncio.to_thread(refresh_in_session, True)}
+
+
+@job_queue.handler("college_stats_rebuild")
+async def _college_stats_rebuild_job(job: job_queue.JobContext) -> dict:
+    """Recompute every college's Campus Wars aggregates."""
+    started = time.perf_counter()
+    colleges = await asyncio.to_thread(refresh_in_session)
+    seconds = round(time.perf_counter() - started, 1)
+    print(f"[Campus Wars] ✅ Rebuilt stats for {colleges} colleges in {seconds}s")
+    return {"colleges": colleges, "seconds": seconds}
+
+
+job_queue.recurring("college_stats_refresh", next_refresh)
+job_queue.recurring("college_stats_rebuild", next_rebuild)
+
+
+# ─── Change log ───
+# after_flush still sees each profile's old score and college (college_id is
+# resolved before the flush). The entries go out in the same transaction, so
+# a rollback takes them back too.
+
+def _old(attr, current):
+    history = attr.history
+    return history.deleted[0] if history.deleted else current
+
+
+@event.listens_for(Session, "after_flush")
+def _log_changes(session, flush_context):
+    changed = set()
+    for obj in session.new:
+        if isinstance(obj, UserProfile):
+            changed.add(obj.college_id)
+    for obj in session.dirty:
+        if isinstance(obj, UserProfile):
+            attrs = inspect(obj).attrs
+            if attrs.college_id.history.has_changes() or attrs.mentixy_score.history.has_changes():
+                changed.update((_old(attrs.college_id, obj.college_id), obj.college_id))
+    for obj in session.deleted:
+        if isinstance(obj, UserProfile):
+            changed.add(obj.college_id)
+    changed.discard(None)
+    if changed:
+        session.connection().execute(insert(CollegeStatsChange.__table__),
+                                     [{"college_id": cid} for cid in sorted(changed)])
@@ -3,10 +3,16 @@ Mentixy — Database Configuration
 Supports: Supabase PostgreSQL (production) + SQLite (local dev)
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.pool import NullPool
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.orm import sessionmaker, DeclarativeBase, Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from dotenv import load_dotenv
+import itertools
+import threading
+import time
 import os
 
 load_dotenv()  # Load .env before reading env vars
@@ -38,6 +44,7 @@ print(f"[DB] Using {'PostgreSQL' if _is_postgres else 'SQLite'} | Serverless: {_
 # Strip pgbouncer=true (Supabase-specific, not a valid psycopg2 option)
 import re as _re
 DATABASE_URL = DATABASE_URL.strip()  # Remove trailing newlines from env vars
+_uses_pgbouncer = "pgbouncer=true" in DATABASE_URL
 DATABASE_URL = _re.sub(r'[?&]pgbouncer=true', '', DATABASE_URL)
 # Re-fix leading ? if we stripped the first param
 DATABASE_URL = DATABASE_URL.replace('?&', '?')
@@ -83,6 +90,237 @@ else:
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+# ─── Async Engine (hot read paths) ───
+# Same database through an async driver (asyncpg / aiosqlite), so read-heavy
+# routes don't hold one of uvicorn's threadpool slots while waiting on I/O.
+def _to_async_url(url: str):
+    u = make_url(url)
+    if u.drivername.startswith("postgresql"):
+        # asyncpg takes SSL via connect_args, not libpq's sslmode query param
+        return u.set(drivername="postgresql+asyncpg").difference_update_query(["sslmode"])
+    return u.set(drivername="sqlite+aiosqlite")
+
+
+ASYNC_DATABASE_URL = _to_async_url(DATABASE_URL)
+
+async_connect_args = {}
+if _is_postgres:
+    async_connect_args["ssl"] = "require"
+    if _uses_pgbouncer:
+        # Transaction-mode pgbouncer can't keep server-side prepared statements
+        async_connect_args["statement_cache_size"] = 0
+        async_connect_args["prepared_statement_cache_size"] = 0
+
+if _is_postgres and _is_serverless:
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        connect_args=async_connect_args,
+        echo=False,
+        poolclass=NullPool,
+    )
+elif _is_postgres:
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        connect_args=async_connect_args,
+        echo=False,
+        pool_pre_ping=True,
+        pool_size=10,
+        max_overflow=10,
+    )
+else:
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        echo=False,
+    )
+
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+# ─── Read Replicas (optional) ───
+# DATABASE_REPLICA_URLS=postgresql://...replica-1,postgresql://...replica-2
+# Reads from routes that opt in via get_read_db go to a healthy replica
+# (round-robin); anything that writes pins the session back to the primary.
+# Health is probed on a background thread, never inside a request; a read
+# that fails on a replica is retried on the primary.
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("DATABASE_REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_HEALTH_TTL_SECONDS = float(os.getenv("DATABASE_REPLICA_HEALTH_TTL_SECONDS", "10"))
+
+_REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+def _make_replica_engine(url: str):
+    url = url.strip()
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    url = _re.sub(r'[?&]pgbouncer=true', '', url).replace('?&', '?')
+    if "postgresql" not in url:
+        return create_engine(url, connect_args={"check_same_thread": False}, echo=False)
+    if "sslmode" not in url:
+        url = url + ("&" if "?" in url else "?") + "sslmode=require"
+    if _is_serverless:
+        return create_engine(url, connect_args={"sslmode": "require"}, echo=False, poolclass=NullPool)
+    return create_engine(
+        url,
+        connect_args={"sslmode": "require", "connect_timeout": 3},
+        echo=False,
+        pool_pre_ping=True,
+        pool_size=5,
+        max_overflow=10,
+    )
+
+
+class _Replica:
+    def __init__(self, engine):
+        self.engine = engine
+        self.healthy = True
+        self.lag_seconds = 0.0
+        self.checked_at = 0.0
+        self.last_error = None
+
+
+class ReplicaRouter:
+    """Round-robin over replicas, skipping ones that are down or lagging."""
+
+    def __init__(self, engines: list):
+        self.replicas = [_Replica(e) for e in engines]
+        self._cycle = itertools.cycle(self.replicas) if self.replicas else None
+        self._lock = threading.Lock()
+        self._prober = None
+        for replica in self.replicas:
+            event.listen(replica.engine, "handle_error", self._on_error(replica))
+
+    def _on_error(self, replica: _Replica):
+        def handler(context):
+            # Connection-level failures take the replica out until the next health check
+            if context.is_disconnect or isinstance(context.sqlalchemy_exception, OperationalError):
+                replica.healthy = False
+                replica.checked_at = time.monotonic()
+                replica.last_error = str(context.original_exception)[:200]
+        return handler
+
+    def _check(self, replica: _Replica):
+        try:
+            with replica.engine.connect() as conn:
+                if replica.engine.dialect.name == "postgresql":
+                    replica.lag_seconds = float(conn.execute(_REPLICA_LAG_SQL).scalar() or 0)
+                else:
+                    conn.execute(text("SELECT 1"))
+                    replica.lag_seconds = 0.0
+            replica.healthy = replica.lag_seconds <= REPLICA_MAX_LAG_SECONDS
+            replica.last_error = None if replica.healthy else f"lag {replica.lag_seconds:.1f}s"
+        except Exception as e:
+            replica.healthy = False
+            replica.last_error = str(e)[:200]
+        replica.checked_at = time.monotonic()
+
+    def check_all(self):
+        for replica in self.replicas:
+            self._check(replica)
+
+    def start(self):
+        """Probe every replica now, then every REPLICA_HEALTH_TTL_SECONDS on a daemon thread."""
+        if not self.replicas or self._prober:
+            return self._prober
+
+        def probe():
+            while True:
+                self.check_all()
+                time.sleep(REPLICA_HEALTH_TTL_SECONDS)
+
+        self._prober = threading.Thread(target=probe, name="replica-health", daemon=True)
+        self._prober.start()
+        return self._prober
+
+    def pick(self):
+        """Next healthy replica engine, or None (caller falls back to the primary).
+        Never connects: health comes from the prober and from query errors."""
+        if not self._cycle:
+            return None
+        now = time.monotonic()
+        for _ in range(len(self.replicas)):
+            with self._lock:
+                replica = next(self._cycle)
+            # Without a prober (serverless, scripts) a failed replica gets another
+            # try once its mark is old; a failing read falls back to the primary anyway
+            if replica.healthy or (not self._prober and now - replica.checked_at > REPLICA_HEALTH_TTL_SECONDS):
+                return replica.engine
+        return None
+
+    def status(self) -> list:
+        return [{
+            "url": _re.sub(r':([^@]+)@', ':****@', str(r.engine.url)[:80]),
+            "healthy": r.healthy,
+            "lag_seconds": round(r.lag_seconds, 2),
+            "error": r.last_error,
+        } for r in self.replicas]
+
+
+_replica_urls = [u for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+replica_router = ReplicaRouter([_make_replica_engine(u) for u in _replica_urls])
+if _replica_urls:
+    print(f"[DB] Read replicas configured: {len(_replica_urls)}")
+    if not _is_serverless:
+        replica_router.start()
+
+
+class RoutingSession(Session):
+    """Session that reads from a replica until it writes, then sticks to the primary.
+
+    The replica is chosen once per session so one request sees one snapshot;
+    after the first flush / non-SELECT statement every later read also goes to
+    the primary (the session's bind), which keeps read-your-writes within the
+    request. A read the replica fails with OperationalError is re-run on the
+    primary, and so is every read after it.
+    """
+
+    _use_primary = False
+    _replica = None
+
+    def __init__(self, *args, router: ReplicaRouter = None, **kw):
+        super().__init__(*args, **kw)
+        self.router = router or replica_router
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._use_primary or self._flushing or not getattr(clause, "is_select", False):
+            self._use_primary = True
+            return self.bind
+        if self._replica is None:
+            self._replica = self.router.pick() or self.bind
+        return self._replica
+
+    def _read(self, run, *args, **kw):
+        try:
+            return run(*args, **kw)
+        except OperationalError:
+            # Retry only a pure read on a replica: nothing written, nothing pending to lose
+            if self._use_primary or self._replica in (None, self.bind) or self.new or self.dirty or self.deleted:
+                raise
+            self.rollback()
+            self._replica = self.bind
+            return run(*args, **kw)
+
+    def execute(self, *args, **kw):
+        return self._read(super().execute, *args, **kw)
+
+    def scalar(self, *args, **kw):
+        return self._read(super().scalar, *args, **kw)
+
+    def scalars(self, *args, **kw):
+        return self._read(super().scalars, *args, **kw)
+
+
+ReadSessionLocal = (
+    sessionmaker(class_=RoutingSession, bind=engine, autocommit=False, autoflush=False)
+    if _replica_urls else SessionLocal
+)
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -96,6 +334,28 @@ def get_db():
         db.close()
 
 
+def release_connection(db: Session):
+    """Commit and hand the session's connection back to the pool before a long
+    await (AI calls), so slow requests don't pin pool slots or SQLite's write
+    lock. Objects stay attached; expired attributes reload on next access."""
+    db.commit()
+
+
+def get_read_db():
+    """Dependency: yields a session that reads from a healthy replica (primary if none)"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    """Dependency: yields an async database session (non-blocking reads)"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db():
     """Create tables — safe to call when tables already exist (uses IF NOT EXISTS)"""
     try:
@@ -0,0 +1,388 @@
+"""
+Mentixy — Job Match Scorer
+Deterministic user ↔ job scoring, done locally so every active JobListing
+can be ranked for a user in one batched NumPy pass. The LLM is only asked
+to explain the top few results (ai_engine.explain_job_matches), never to
+produce the score.
+
+Active jobs are vectorized once into a JobMatrix:
+  required / preferred   sparse (CSR-style) job × skill-entry incidence over a
+                         shared vocabulary ("Python/Java" is one entry, met by either)
+  graduation window, college tier cap, min CGPA, pay range   float columns (NaN = not set)
+
+A user becomes a weight vector over the same vocabulary (verified skills by
+score, resume skills at a flat weight), and every score is a few matrix ops:
+
+  score = 100 · Σ WEIGHTS[f] · fit_f        (× INELIGIBLE_FACTOR outside the batch window)
+
+The matrix is rebuilt on first use after a job is written in this process
+(search_index's commit listener) and at least every JOB_MATCH_REFRESH_SECONDS
+for writes from other workers.
+"""
+import functools
+import os
+import re
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import select
+
+from database import engine
+import models
+import search_index
+
+REFRESH_SECONDS = float(os.getenv("JOB_MATCH_REFRESH_SECONDS", "300"))
+
+# Feature weights (sum to 1)
+WEIGHTS = {
+    "required_skills": 0.45,
+    "preferred_skills": 0.15,
+    "graduation_year": 0.10,
+    "college_tier": 0.10,
+    "cgpa": 0.05,
+    "salary": 0.15,
+}
+INELIGIBLE_FACTOR = 0.5    # graduation year outside the job's window
+RESUME_SKILL_WEIGHT = 0.7  # skills only listed on the resume, not verified
+NEUTRAL = 0.5              # fit when one side of a feature is unknown
+TIER_STEP = 0.35           # fit lost per college tier below the job's cap
+CGPA_STEP = 0.5            # fit lost per CGPA point below the job's minimum
+
+_SPLIT = re.compile(r"\s*/\s*")
+ALIASES = {
+    "js": "javascript", "ts": "typescript", "golang": "go", "postgres": "postgresql",
+    "k8s": "kubernetes", "ml": "machine learning", "reactjs": "react", "react.js": "react",
+    "node": "node.js", "nodejs": "node.js", "c plus plus": "c++", "cpp": "c++",
+    "dsa": "data structures and algorithms",
+}
+
+
+def normalize_skill(name: str) -> str:
+    key = " ".join(str(name or "").casefold().replace("&", " and ").split())
+    return ALIASES.get(key, key)
+
+
+@functools.lru_cache(maxsize=65536)
+def alternatives(entry: str) -> tuple:
+    """'Python/Java' → ('python', 'java'); a single skill is its own alternative."""
+    return tuple(dict.fromkeys(normalize_skill(p) for p in _SPLIT.split(str(entry or "")) if p.strip()))
+
+
+def _skill_list(value) -> list:
+    return [s for s in (value or []) if isinstance(s, str) and s.strip()]
+
+
+def _num(value) -> float:
+    return float(value) if value is not None else np.nan
+
+
+# ─── Job side ───
+
+class JobMatrix:
+    """Active jobs as arrays; row i describes ids[i]."""
+
+    def __init__(self, rows):
+        rows = list(rows)
+        self.ids = [r.id for r in rows]
+        self.payloads = [job_dict(r) for r in rows]
+        self.row_of = {job_id: i for i, job_id in enumerate(self.ids)}
+
+        vocab = {}
+        required, preferred = [], []
+        for r in rows:
+            required.append([vocab.setdefault(e, len(vocab)) for e in _entries(r.required_skills)])
+            preferred.append([vocab.setdefault(e, len(vocab)) for e in _entries(r.preferred_skills)])
+        self.entries = list(vocab)
+        self.required = _Incidence(required)
+        self.preferred = _Incidence(preferred)
+
+        # skill name → vocabulary columns it satisfies
+        self.columns_for = {}
+        for col, entry in enumerate(self.entries):
+            for alt in alternatives(entry):
+                self.columns_for.setdefault(alt, []).append(col)
+
+        self.grad_min = np.array([_num(r.graduation_year_min) for r in rows], dtype=np.float32)
+        self.grad_max = np.array([_num(r.graduation_year_max) for r in rows], dtype=np.float32)
+        self.tier_cap = np.array([_num(r.college_tier_required) for r in rows], dtype=np.float32)
+        self.min_cgpa = np.array([_num(r.min_cgpa) for r in rows], dtype=np.float32)
+        self.pay_max = np.array([_pay_max(r) for r in rows], dtype=np.float32)
+        self.loaded_at = time.monotonic()
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def _entries(skills) -> list:
+    return list(dict.fromkeys(" / ".join(alternatives(s)) for s in _skill_list(skills) if alternatives(s)))
+
+
+class _Incidence:
+    """0/1 job × entry matrix as CSR index arrays: row i's entries are cols[ptr[i]:ptr[i+1]]."""
+
+    def __init__(self, rows: list):
+        self.counts = np.array([len(cols) for cols in rows], dtype=np.int32)
+        self.ptr = np.concatenate(([0], np.cumsum(self.counts))).astype(np.int64)
+        self.cols = np.fromiter((c for cols in rows for c in cols), dtype=np.int32, count=int(self.ptr[-1]))
+        self.rows = np.repeat(np.arange(len(rows), dtype=np.int32), self.counts)
+
+    def dot(self, u: np.ndarray) -> np.ndarray:
+        """Per-row sum of u over the row's entries (the sparse matrix-vector product)."""
+        return np.bincount(self.rows, weights=u[self.cols], minlength=len(self.counts)).astype(np.float32)
+
+    def row(self, i: int) -> np.ndarray:
+        return self.cols[self.ptr[i]:self.ptr[i + 1]]
+
+
+def _pay_max(job) -> float:
+    """Top of the pay range in LPA; internships annualize the monthly stipend."""
+    if job.salary_max_lpa is not None or job.salary_min_lpa is not None:
+        return float(job.salary_max_lpa if job.salary_max_lpa is not None else job.salary_min_lpa)
+    if job.stipend_monthly:
+        return job.stipend_monthly * 12 / 100_000
+    return np.nan
+
+
+def job_dict(j) -> dict:
+    """API shape of a job (ORM object or row)."""
+    return {
+        "id": j.id, "company_name": j.company_name, "company_logo_url": j.company_logo_url,
+        "company_type": j.company_type, "role_title": j.role_title, "role_type": j.role_type,
+        "location": j.location, "is_remote": j.is_remote,
+        "salary_min_lpa": j.salary_min_lpa, "salary_max_lpa": j.salary_max_lpa,
+        "required_skills": j.required_skills, "preferred_skills": j.preferred_skills,
+        "description_honest": j.description_honest,
+        "interview_rounds": j.interview_rounds, "interview_difficulty": j.interview_difficulty,
+        "application_deadline": str(j.application_deadline) if j.application_deadline else None,
+        "posted_at": str(j.posted_at), "source": j.source, "is_verified": j.is_verified,
+        "funding_stage": j.funding_stage, "team_size_range": j.team_size_range,
+    }
+
+
+_COLUMNS = (
+    "id", "company_name", "company_logo_url", "company_type", "role_title", "role_type", "location",
+    "is_remote", "salary_min_lpa", "salary_max_lpa", "stipend_monthly", "required_skills",
+    "preferred_skills", "description_honest", "interview_rounds", "interview_difficulty",
+    "application_deadline", "posted_at", "source", "is_verified", "funding_stage", "team_size_range",
+    "graduation_year_min", "graduation_year_max", "college_tier_required", "min_cgpa",
+)
+
+_matrix = None
+_stale = True
+_lock = threading.Lock()
+
+
+def load_matrix() -> JobMatrix:
+    """All active jobs (one query)."""
+    t = models.JobListing.__table__
+    stmt = select(*(t.c[name] for name in _COLUMNS)).where(t.c.is_active == True).order_by(t.c.posted_at.desc())
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        matrix = JobMatrix(conn.execute(stmt).all())
+    print(f"[Match] ✅ Vectorized {len(matrix):,} jobs × {len(matrix.entries):,} skills "
+          f"in {(time.perf_counter() - started) * 1000:.0f}ms")
+    return matrix
+
+
+def matrix() -> JobMatrix:
+    """The cached matrix, rebuilt when stale or older than REFRESH_SECONDS."""
+    global _matrix, _stale
+    current = _matrix
+    if current is not None and not _stale and time.monotonic() - current.loaded_at <= REFRESH_SECONDS:
+        return current
+    with _lock:
+        if _matrix is None or _stale or time.monotonic() - _matrix.loaded_at > REFRESH_SECONDS:
+            _stale = False
+            _matrix = load_matrix()
+        return _matrix
+
+
+def invalidate():
+    global _stale
+    _stale = True
+
+
+def _on_index_change(pending: dict):
+    if any(doc_type == "job" for doc_type, _ in pending):
+        invalidate()
+
+
+search_index.add_listener(_on_index_change)
+
+
+# ─── User side ───
+
+class Candidate:
+    """What a user brings to the match: skill weights plus the scalar features."""
+
+    def __init__(self, skills: dict, graduation_year=None, college_tier=None, cgpa=None,
+                 expected_lpa=None, target_role=None):
+        self.skills = {normalize_skill(k): float(v) for k, v in skills.items() if normalize_skill(k)}
+        self.graduation_year = graduation_year
+        self.college_tier = college_tier
+        self.cgpa = cgpa
+        self.expected_lpa = expected_lpa
+        self.target_role = target_role
+
+    def summary(self) -> dict:
+        """Compact profile for the explanation prompt."""
+        return {
+            "skills": sorted(self.skills, key=self.skills.get, reverse=True)[:20],
+            "graduation_year": self.graduation_year, "college_tier": self.college_tier,
+            "cgpa": self.cgpa, "expected_lpa": self.expected_lpa, "target_role": self.target_role,
+        }
+
+
+def load_candidate(db, user: models.User, expected_lpa: float = None) -> Candidate:
+    """Verified skills (weighted by score), primary resume skills and profile fields."""
+    verified = db.query(models.SkillsTaxonomy.name, models.UserSkillVerification.verified_score).join(
+        models.UserSkillVerification, models.UserSkillVerification.skill_id == models.SkillsTaxonomy.id
+    ).filter(
+        models.UserSkillVerification.user_id == user.id,
+        models.UserSkillVerification.is_expired != True,
+    ).all()
+    resume = db.query(models.Resume.content).filter(
+        models.Resume.user_id == user.id
+    ).order_by(models.Resume.is_primary.desc(), models.Resume.updated_at.desc()).first()
+
+    skills = {}
+    for name in _skill_list((resume.content or {}).get("skills") if resume else None):
+        skills[name] = RESUME_SKILL_WEIGHT
+    for name, score in verified:
+        weight = min(max((score or 60) / 100, 0.4), 1.0)
+        skills[name] = max(weight, skills.get(name, 0))
+
+    p = user.profile
+    return Candidate(
+        skills,
+        graduation_year=p.graduation_year if p else None,
+        college_tier=p.college_tier if p else None,
+        cgpa=p.cgpa if p else None,
+        expected_lpa=expected_lpa,
+        target_role=p.target_role if p else None,
+    )
+
+
+def skill_vector(m: JobMatrix, c: Candidate) -> np.ndarray:
+    u = np.zeros(len(m.entries), dtype=np.float32)
+    for name, weight in c.skills.items():
+        for alt in alternatives(name):
+            cols = m.columns_for.get(alt)
+            if cols:
+                u[cols] = np.maximum(u[cols], weight)
+    return u
+
+
+# ─── Scoring ───
+
+def _coverage(incidence: _Incidence, u: np.ndarray) -> np.ndarray:
+    """Share of each job's skill entries the user meets (weighted); NEUTRAL if it lists none."""
+    counts = incidence.counts
+    return np.where(counts > 0, incidence.dot(u) / np.maximum(counts, 1), NEUTRAL)
+
+
+def score_all(m: JobMatrix, c: Candidate) -> dict:
+    """Every job's fit per feature, eligibility and total score, as arrays aligned with m.ids."""
+    n = len(m)
+    u = skill_vector(m, c)
+    fits = {
+        "required_skills": _coverage(m.required, u),
+        "preferred_skills": _coverage(m.preferred, u),
+    }
+
+    eligible = np.ones(n, dtype=bool)
+    if c.graduation_year is None:
+        grad = np.full(n, NEUTRAL, dtype=np.float32)
+    else:
+        year = float(c.graduation_year)
+        eligible = ~((m.grad_min > year) | (m.grad_max < year))  # NaN compares False: no bound
+        grad = eligible.astype(np.float32)
+    fits["graduation_year"] = grad
+
+    if c.college_tier is None:
+        fits["college_tier"] = np.where(np.isnan(m.tier_cap), 1.0, NEUTRAL)
+    else:
+        below = np.nan_to_num(float(c.college_tier) - m.tier_cap, nan=0.0)
+        fits["college_tier"] = np.clip(1.0 - TIER_STEP * below, 0.0, 1.0)
+
+    if c.cgpa is None:
+        fits["cgpa"] = np.where(np.isnan(m.min_cgpa), 1.0, NEUTRAL)
+    else:
+        short = np.nan_to_num(m.min_cgpa - float(c.cgpa), nan=0.0)
+        fits["cgpa"] = np.clip(1.0 - CGPA_STEP * short, 0.0, 1.0)
+
+    if not c.expected_lpa:
+        fits["salary"] = np.ones(n, dtype=np.float32)
+    else:
+        ratio = np.clip(m.pay_max / float(c.expected_lpa), 0.0, 1.0)
+        fits["salary"] = np.where(np.isnan(m.pay_max), NEUTRAL, ratio)
+
+    total = sum(WEIGHTS[name] * fit for name, fit in fits.items())
+    total = np.where(eligible, total, total * INELIGIBLE_FACTOR) * 100
+    return {"fits": fits, "eligible": eligible, "score": total, "skills": u}
+
+
+def top_k(scores: np.ndarray, k: int, offset: int = 0) -> np.ndarray:
+    """Row indices of ranks offset..offset+k, best first (ties keep matrix order)."""
+    end = min(offset + k, len(scores))
+    if end <= offset:
+        return np.array([], dtype=np.int64)
+    if end < len(scores):
+        candidates = np.argpartition(-scores, end - 1)[:end]
+        candidates.sort()
+    else:
+        candidates = np.arange(len(scores))
+    order = candidates[np.argsort(-scores[candidates], kind="stable")]
+    return order[offset:end]
+
+
+def grade(score: float) -> str:
+    for floor, letter in ((90, "A+"), (80, "A"), (70, "B+"), (60, "B"), (50, "C+"), (40, "C")):
+        if score >= floor:
+            return letter
+    return "D"
+
+
+def _match(m: JobMatrix, scored: dict, i: int) -> dict:
+    u = scored["skills"]
+    required, preferred = m.required.row(i), m.preferred.row(i)
+    have = [m.entries[col] for col in required if u[col] > 0]
+    missing = [m.entries[col] for col in required if u[col] == 0]
+    bonus = [m.entries[col] for col in preferred if u[col] > 0]
+    score = float(scored["score"][i])
+    return {
+        "job": m.payloads[i],
+        "match_score": int(round(score)),
+        "match_grade": grade(score),
+        "eligible": bool(scored["eligible"][i]),
+        "matched_skills": [_label(m.payloads[i], e) for e in have + bonus],
+        "missing_skills": [_label(m.payloads[i], e) for e in missing],
+        "breakdown": {name: round(float(fit[i]), 3) for name, fit in scored["fits"].items()},
+    }
+
+
+def _label(payload: dict, entry: str) -> str:
+    """The job's own spelling of a normalized vocabulary entry."""
+    for s in _skill_list(payload["required_skills"]) + _skill_list(payload["preferred_skills"]):
+        if " / ".join(alternatives(s)) == entry:
+            return s
+    return entry
+
+
+def rank(m: JobMatrix, c: Candidate, limit: int = 20, offset: int = 0) -> dict:
+    """Score every job in `m` for `c`; return the requested page of matches, best first."""
+    started = time.perf_counter()
+    scored = score_all(m, c)
+    rows = top_k(scored["score"], limit, offset)
+    return {
+        "total": len(m),
+        "matches": [_match(m, scored, int(i)) for i in rows],
+        "scored_in_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+def score_job(job: models.JobListing, c: Candidate) -> dict:
+    """One job's match (active or not), scored the same way."""
+    m = JobMatrix([job])
+    return _match(m, score_all(m, c), 0)
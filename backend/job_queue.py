@@ -0,0 +1,461 @@
+"""
+Mentixy — Background Job Queue
+Durable, DB-backed queue for work too slow to hold a request open for: AI
+roadmap generation, resume enrichment, 4D assessment narratives and nightly
+batches such as the Mentixy Score recompute. There is no
+broker. Jobs are rows in background_jobs, so workers need nothing but
+DATABASE_URL and scale separately from the API pods.
+
+    python job_queue.py work --concurrency 4     # dedicated worker process
+    python job_queue.py drain                    # run everything due, then exit
+
+Routes enqueue a job and return 202 with its id. Clients poll
+/api/queue/jobs/{id} or listen for `job_update` on their websocket_hub
+connection; each API process pushes updates for the users connected to it.
+
+Claiming is a conditional UPDATE: the job must still be queued, or running
+with a stale lease. Any number of workers can poll the table, and whichever
+UPDATE matches owns the job. A running job's lease (locked_at) is renewed
+every LEASE_SECONDS / 3. If its worker dies, another worker reclaims it once
+the lease is stale. Failures retry with exponential backoff up to
+max_attempts. A handler's writes and the job's `succeeded` row commit in one
+transaction, so a retry never starts from half-applied results.
+
+Recurring kinds (`recurring(kind, next_run)`) always have their next run
+queued with a future run_after; workers top them up on every sweep.
+
+Each API process also runs one in-process worker; set JOB_IN_PROCESS_WORKER=0
+once dedicated workers are deployed. Serverless deployments run the job
+inline in the request that submits it.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+import ai_scheduler
+from database import engine, SessionLocal, _is_serverless
+import models
+
+LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "120"))
+POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "4"))
+IN_PROCESS_WORKER = os.getenv("JOB_IN_PROCESS_WORKER", "1") not in ("0", "false", "False")
+PUSH_SECONDS = float(os.getenv("JOB_PUSH_SECONDS", "1"))
+RETRY_BASE_SECONDS = 5  # 5s, 10s, 20s, ...
+
+HANDLERS = {}
+RECURRING = {}   # kind → fn(now) returning the next run time
+_table = models.BackgroundJob.__table__
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def handler(kind: str):
+    """Register `async def fn(job: JobContext) -> dict` for jobs of this kind."""
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def recurring(kind: str, next_run):
+    """Keep one `kind` job queued for next_run(now), e.g. a nightly batch.
+    Workers top it up (schedule_recurring) at start and on every sweep."""
+    RECURRING[kind] = next_run
+
+
+def view(job) -> dict:
+    """Client-facing job status (ORM object or table row)."""
+    out = {
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "progress": job.progress or 0,
+        "attempts": job.attempts or 0,
+        "created_at": str(job.created_at) if job.created_at else None,
+        "started_at": str(job.started_at) if job.started_at else None,
+        "finished_at": str(job.finished_at) if job.finished_at else None,
+    }
+    if job.status == "succeeded":
+        out["result"] = job.result
+    elif job.status == "failed":
+        out["error"] = job.error
+    return out
+
+
+# ─── Submitting ───
+
+def enqueue(db, kind: str, user_id: str, payload: dict, max_attempts: int = 3,
+            run_after: datetime = None, job_id: str = None) -> models.BackgroundJob:
+    """Add a job to the session. Workers see it once the caller commits (and
+    `run_after`, if given, has passed)."""
+    if kind not in HANDLERS:
+        raise ValueError(f"No handler registered for job kind '{kind}'")
+    now = _now()
+    job = models.BackgroundJob(id=job_id, kind=kind, user_id=user_id, payload=payload, status="queued",
+                               max_attempts=max_attempts, run_after=run_after or now,
+                               created_at=now, updated_at=now)
+    db.add(job)
+    db.flush()
+    return job
+
+
+async def submit(db, kind: str, user_id: str, payload: dict) -> dict:
+    """Enqueue and commit from a route; returns the 202 body. On serverless
+    (no worker survives the response) the job runs inline first. The session
+    is sync, so its work runs in a thread rather than on the event loop."""
+    job_id = await asyncio.to_thread(_enqueue_committed, db, kind, user_id, payload)
+    status = "queued"
+    if _is_serverless:
+        await run_inline(job_id)
+        status = await asyncio.to_thread(_status, db, job_id)
+    return {"job_id": job_id, "status": status, "status_url": f"/api/queue/jobs/{job_id}"}
+
+
+def _enqueue_committed(db, kind: str, user_id: str, payload: dict) -> str:
+    job_id = enqueue(db, kind, user_id, payload).id
+    db.commit()
+    return job_id
+
+
+def _status(db, job_id: str) -> str:
+    db.expire_all()
+    return db.get(models.BackgroundJob, job_id).status
+
+
+def defer(db, kind: str, user_id: str, payload: dict):
+    """Enqueue optional follow-up work (caller commits). Skipped on serverless,
+    where no worker would ever run it; returns the job or None."""
+    if _is_serverless:
+        return None
+    return enqueue(db, kind, user_id, payload)
+
+
+def schedule_recurring() -> int:
+    """Queue the next run of each recurring kind that has none queued or running.
+
+    A run's id is its kind and time, so workers racing here insert it once.
+    Returns the runs queued.
+    """
+    queued = 0
+    db = SessionLocal()
+    try:
+        for kind, next_run in RECURRING.items():
+            pending = db.scalar(select(func.count()).select_from(_table).where(
+                _table.c.kind == kind, _table.c.status.in_(("queued", "running"))))
+            if pending:
+                continue
+            at = next_run(_now())
+            try:
+                enqueue(db, kind, None, {}, run_after=at, job_id=f"{kind}@{at:%Y-%m-%dT%H:%M}")
+                db.commit()
+                queued += 1
+                print(f"[Jobs] Next {kind} run at {at:%Y-%m-%d %H:%M} UTC")
+            except IntegrityError:
+                db.rollback()  # another worker queued it first
+    finally:
+        db.close()
+    return queued
+
+
+# ─── Claiming ───
+
+def _claimable(now: datetime):
+    stale = now - timedelta(seconds=LEASE_SECONDS)
+    return or_(
+        and_(_table.c.status == "queued", _table.c.run_after <= now),
+        and_(_table.c.status == "running", _table.c.locked_at < stale, _table.c.attempts < _table.c.max_attempts),
+    )
+
+
+def claim(worker_id: str, limit: int = 1, job_id: str = None) -> list:
+    """Take up to `limit` due jobs (or the given one) for this worker. Returns their ids."""
+    now = _now()
+    if job_id:
+        candidates = [job_id]
+    else:
+        with engine.connect() as conn:
+            candidates = conn.execute(
+                select(_table.c.id).where(_claimable(now)).order_by(_table.c.run_after).limit(limit * 4)
+            ).scalars().all()
+    won = []
+    for candidate in candidates:
+        if len(won) >= limit:
+            break
+        with engine.begin() as conn:
+            matched = conn.execute(
+                update(_table).where(_table.c.id == candidate, _claimable(now)).values(
+                    status="running", locked_by=worker_id, locked_at=now, started_at=now,
+                    updated_at=now, attempts=_table.c.attempts + 1,
+                )
+            ).rowcount
+        if matched:
+            won.append(candidate)
+    return won
+
+
+def fail_abandoned() -> int:
+    """Fail running jobs whose lease went stale on their last allowed attempt."""
+    now = _now()
+    with engine.begin() as conn:
+        return conn.execute(
+            update(_table).where(
+                _table.c.status == "running",
+                _table.c.locked_at < now - timedelta(seconds=LEASE_SECONDS),
+                _table.c.attempts >= _table.c.max_attempts,
+            ).values(status="failed", error="Worker stopped responding on the last attempt",
+                     locked_by=None, finished_at=now, updated_at=now)
+        ).rowcount
+
+
+# ─── Running ───
+
+class JobContext:
+    """What a handler gets: payload, user, a session for its writes and progress().
+
+    Handlers add/flush through `db` but never commit — the worker commits
+    their writes together with the job's result.
+    """
+
+    def __init__(self, job_id: str, kind: str, user_id: str, payload: dict, attempt: int, worker_id: str, db):
+        self.id = job_id
+        self.kind = kind
+        self.user_id = user_id
+        self.payload = payload
+        self.attempt = attempt
+        self.worker_id = worker_id
+        self.db = db
+
+    async def progress(self, pct: int):
+        """Record progress (0-100); also renews the lease."""
+        await asyncio.to_thread(_touch, self.id, self.worker_id, pct)
+
+
+def _touch(job_id: str, worker_id: str, progress: int = None) -> bool:
+    now = _now()
+    values = {"locked_at": now, "updated_at": now}
+    if progress is not None:
+        values["progress"] = max(0, min(int(progress), 99))
+    with engine.begin() as conn:
+        return bool(conn.execute(
+            update(_table).where(_table.c.id == job_id, _table.c.locked_by == worker_id,
+                                 _table.c.status == "running").values(**values)
+        ).rowcount)
+
+
+async def _heartbeat(job_id: str, worker_id: str):
+    while True:
+        await asyncio.sleep(LEASE_SECONDS / 3)
+        await asyncio.to_thread(_touch, job_id, worker_id)
+
+
+async def run_job(job_id: str, worker_id: str):
+    """Run one claimed job to success, retry or failure."""
+    db = SessionLocal()
+    beat = asyncio.ensure_future(_heartbeat(job_id, worker_id))
+    try:
+        job = db.get(models.BackgroundJob, job_id)
+        ctx = JobContext(job.id, job.kind, job.user_id, job.payload, job.attempts, worker_id, db)
+        ai_scheduler.set_caller(ctx.user_id)
+        db.commit()  # don't hold a pooled connection through the handler's AI call
+        try:
+            fn = HANDLERS.get(ctx.kind)
+            if fn is None:
+                raise LookupError(f"No handler registered for job kind '{ctx.kind}'")
+            result = await fn(ctx)
+            job = db.get(models.BackgroundJob, job_id)
+            if job.status != "running" or job.locked_by != worker_id:
+                db.rollback()
+                print(f"[Jobs] ⚠️ {ctx.kind} {job_id}: lease lost to another worker, result discarded")
+                return
+            now = _now()
+            job.status, job.result, job.progress, job.error = "succeeded", result, 100, None
+            job.locked_by, job.finished_at, job.updated_at = None, now, now
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            job = db.get(models.BackgroundJob, job_id)
+            now = _now()
+            job.error = f"{type(e).__name__}: {e}"[:2000]
+            if job.attempts < job.max_attempts:
+                job.status = "queued"
+                job.run_after = now + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (job.attempts - 1))
+            else:
+                job.status, job.finished_at = "failed", now
+            job.locked_by, job.updated_at = None, now
+            db.commit()
+            print(f"[Jobs] ⚠️ {ctx.kind} {job_id} attempt {job.attempts}/{job.max_attempts} failed: {job.error[:200]}")
+    finally:
+        beat.cancel()
+        db.close()
+
+
+async def run_inline(job_id: str):
+    """Claim and run one specific job in the current task (serverless submit)."""
+    worker_id = f"inline:{socket.gethostname()}:{os.getpid()}"
+    if await asyncio.to_thread(claim, worker_id, 1, job_id):
+        await run_job(job_id, worker_id)
+
+
+async def drain(worker_id: str = None) -> int:
+    """Run every due job until none are left (CLI `drain`, tests). Returns jobs run."""
+    worker_id = worker_id or f"drain:{socket.gethostname()}:{os.getpid()}"
+    ran = 0
+    while True:
+        ids = await asyncio.to_thread(claim, worker_id, CONCURRENCY)
+        if not ids:
+            return ran
+        await asyncio.gather(*(run_job(job_id, worker_id) for job_id in ids))
+        ran += len(ids)
+
+
+class Worker:
+    """Polls for due jobs and runs up to `concurrency` at once on its event loop."""
+
+    def __init__(self, concurrency: int = CONCURRENCY, poll_seconds: float = POLL_SECONDS):
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self.id = f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident() % 100000}"
+        self.tasks = set()
+
+    async def run(self, stop: asyncio.Event = None):
+        print(f"[Jobs] Worker {self.id} started (concurrency {self.concurrency})")
+        last_sweep = 0.0
+        while not (stop and stop.is_set()):
+            claimed = []
+            try:
+                free = self.concurrency - len(self.tasks)
+                if free > 0:
+                    claimed = await asyncio.to_thread(claim, self.id, free)
+                for job_id in claimed:
+                    task = asyncio.ensure_future(run_job(job_id, self.id))
+                    self.tasks.add(task)
+                    task.add_done_callback(self.tasks.discard)
+                if time.monotonic() - last_sweep > LEASE_SECONDS:
+                    last_sweep = time.monotonic()
+                    await asyncio.to_thread(fail_abandoned)
+                    await asyncio.to_thread(schedule_recurring)
+            except Exception as e:
+                print(f"[Jobs] ⚠️ Poll failed: {str(e)[:200]}")
+            if not claimed:
+                await asyncio.sleep(self.poll_seconds)
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+
+
+def start_in_process():
+    """One worker on a daemon thread next to the API (skipped when disabled or serverless)."""
+    if not IN_PROCESS_WORKER or _is_serverless:
+        return None
+    thread = threading.Thread(target=lambda: asyncio.run(Worker().run()), name="job-worker", daemon=True)
+    thread.start()
+    return thread
+
+
+# ─── WebSocket push ───
+# Workers may live in other processes, so each API process watches the table
+# for jobs of the users connected to it rather than waiting to be told.
+
+_pushed = {}  # job_id → (status, progress) last sent
+
+
+def _naive(dt: datetime) -> datetime:
+    return dt.astimezone(timezone.utc).replace(tzinfo=None) if dt.tzinfo else dt
+
+
+def _changed_jobs(user_ids: list, since: datetime) -> list:
+    # Small overlap for clock skew between workers; _pushed drops the repeats
+    with engine.connect() as conn:
+        return conn.execute(
+            select(_table).where(_table.c.user_id.in_(user_ids),
+                                 _table.c.updated_at > since - timedelta(seconds=2))
+            .order_by(_table.c.updated_at).limit(500)
+        ).all()
+
+
+async def push_updates(since: datetime) -> datetime:
+    """Send `job_update` for jobs of online users changed after `since`; returns the new watermark."""
+    from websocket_hub import manager
+    online = list(manager.active_connections)
+    if not online:
+        return since
+    for row in await asyncio.to_thread(_changed_jobs, online, since):
+        since = max(since, _naive(row.updated_at))
+        state = (row.status, row.progress)
+        if _pushed.get(row.id) == state:
+            continue
+        _pushed[row.id] = state
+        await manager.send_to_user(row.user_id, {"type": "job_update", "job": view(row)})
+    if len(_pushed) > 10_000:
+        _pushed.clear()
+    return since
+
+
+async def _push_loop():
+    since = _naive(_now())
+    while True:
+        await asyncio.sleep(PUSH_SECONDS)
+        try:
+            since = await push_updates(since)
+        except Exception as e:
+            print(f"[Jobs] ⚠️ Push failed: {str(e)[:200]}")
+
+
+def start_push() -> asyncio.Task:
+    """Run the push loop on the API's event loop (call from the lifespan)."""
+    return asyncio.get_running_loop().create_task(_push_loop())
+
+
+def stats() -> dict:
+    """Job counts by kind and status, and how long the oldest due job has waited."""
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(_table.c.kind, _table.c.status, func.count()).group_by(_table.c.kind, _table.c.status)
+        ).all()
+        oldest = conn.execute(
+            select(func.min(_table.c.run_after)).where(_table.c.status == "queued")
+        ).scalar()
+    counts = {}
+    for kind, status, n in rows:
+        counts.setdefault(kind, {})[status] = n
+    wait = None
+    if oldest is not None:
+        wait = max(0.0, round((_naive(_now()) - _naive(oldest)).total_seconds(), 1))
+    return {"kinds": counts, "oldest_queued_seconds": wait, "handlers": sorted(HANDLERS)}
+
+
+def main(argv=None):
+    from database import init_db
+    import routes  # noqa: F401 — routes import every module that registers job handlers
+
+    parser = argparse.ArgumentParser(description="Mentixy background job worker")
+    sub = parser.add_subparsers(dest="command", required=True)
+    work = sub.add_parser("work", help="poll for jobs until interrupted")
+    work.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    work.add_argument("--poll-seconds", type=float, default=POLL_SECONDS)
+    sub.add_parser("drain", help="run every due job, then exit")
+    args = parser.parse_args(argv)
+
+    init_db()
+    if args.command == "work":
+        try:
+            asyncio.run(Worker(args.concurrency, args.poll_seconds).run())
+        except KeyboardInterrupt:
+            print("[Jobs] Worker stopped")
+    else:
+        print(f"[Jobs] Ran {asyncio.run(drain())} jobs")
+
+
+if __name__ == "__main__":
+    # Run through the importable module so handlers registered on import land in the same registry
+    import job_queue
+    job_queue.main()
@@ -18,9 +18,10 @@ if SENTRY_DSN:
     except Exception as e:
         print(f"⚠️ Sentry init failed (non-fatal): {e}")
 
-from database import init_db, SessionLocal
+from database import init_db, SessionLocal, async_engine, _is_serverless
 from routes import master_router
 from websocket_hub import router as ws_router
+from sql_profiler import SQLProfilerMiddleware
 
 
 @asynccontextmanager
@@ -29,6 +30,17 @@ async def lifespan(app: FastAPI):
     try:
         init_db()
 
+        import college_resolver
+        if college_resolver.ensure_schema():
+            # Profiles written before college_id existed; resolve them in the background
+            import job_queue
+            db = SessionLocal()
+            try:
+                job_queue.enqueue(db, "college_backfill", None, {}, job_id="college_backfill@schema")
+                db.commit()
+            finally:
+                db.close()
+
         # Seed data if database is empty
         db = SessionLocal()
         try:
@@ -42,11 +54,30 @@ async def lifespan(app: FastAPI):
                     print(f"⚠️ Seed data error (non-fatal): {e}")
         finally:
             db.close()
+
+        try:
+            from search_index import ensure_index
+            ensure_index()
+            if not _is_serverless:
+                import autocomplete
+                import rankings
+                autocomplete.start_reload()  # large indexes take seconds; don't hold up startup
+                rankings.start_reload()
+        except Exception as e:
+            print(f"⚠️ Search index init error (non-fatal): {e}")
     except Exception as e:
         print(f"⚠️ Database init error (non-fatal on serverless): {e}")
 
+    import job_queue
+    job_queue.start_in_process()
+    job_push = None if _is_serverless else job_queue.start_push()
+
     yield
 
+    if job_push:
+        job_push.cancel()
+    await async_engine.dispose()
+
 
 app = FastAPI(
     title="Mentixy",
@@ -87,58 +118,12 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(SQLProfilerMiddleware)
 
 app.include_router(master_router, prefix="/api")
 app.include_router(ws_router, prefix="/api", tags=["WebSocket"])
 
 
-# ─── Universal Search ───
-from fastapi import Query as Q, Depends
-from sqlalchemy.orm import Session
-from database import get_db
-
-@app.get("/api/search")
-def universal_search(
-    q: str = Q(..., min_length=1, max_length=100),
-    db: Session = Depends(get_db),
-):
-    """Search across users, careers, coding problems, and skills."""
-    from models import User, UserProfile, Career, CodingProblem, SkillsTaxonomy
-    import re
-    search = f"%{q}%"
-    results = {"query": q, "users": [], "careers": [], "problems": [], "skills": []}
-
-    # Search users
-    users = db.query(UserProfile).filter(
-        (UserProfile.display_name.ilike(search)) |
-        (UserProfile.username.ilike(search))
-    ).limit(5).all()
-    results["users"] = [{"username": u.username, "display_name": u.display_name, "avatar_url": u.avatar_url} for u in users]
-
-    # Search careers
-    careers = db.query(Career).filter(
-        (Career.title.ilike(search)) |
-        (Career.description.ilike(search))
-    ).limit(5).all()
-    results["careers"] = [{"slug": c.slug, "title": c.title, "category": c.category} for c in careers]
-
-    # Search coding problems
-    problems = db.query(CodingProblem).filter(
-        (CodingProblem.title.ilike(search)) |
-        (CodingProblem.category.ilike(search))
-    ).limit(5).all()
-    results["problems"] = [{"slug": p.slug, "title": p.title, "difficulty": p.difficulty} for p in problems]
-
-    # Search skills
-    skills = db.query(SkillsTaxonomy).filter(
-        (SkillsTaxonomy.name.ilike(search))
-    ).limit(5).all()
-    results["skills"] = [{"slug": s.slug, "name": s.name, "category": s.category} for s in skills]
-
-    results["total"] = sum(len(v) for v in results.values() if isinstance(v, list))
-    return results
-
-
 @app.get("/")
 def root():
     return {
@@ -165,7 +150,7 @@ def api_health():
 @app.get("/health/db")
 def health_db():
     """Diagnostic endpoint — shows database status"""
-    from database import DATABASE_URL, SessionLocal
+    from database import DATABASE_URL, SessionLocal, replica_router
     from sqlalchemy import text
     # Mask password in URL for display
     import re
@@ -175,6 +160,7 @@ def health_db():
         "db_url_safe": safe_url,
         "connection": "unknown",
         "tables": {},
+        "replicas": replica_router.status(),
         "error": None,
     }
     try:
@@ -75,6 +75,7 @@ class UserProfile(Base):
     gender = Column(String(20))
     # Education
     college_name = Column(String(200))
+    college_id = Column(String, ForeignKey("colleges.id", ondelete="SET NULL"), index=True)   # resolved from college_name
     college_tier = Column(Integer)
     stream = Column(String(100))
     graduation_year = Column(Integer)
@@ -693,6 +694,20 @@ class UserViyaScoreLog(Base):
     user = relationship("User", back_populates="score_log")
 
 
+class UserScoreComponents(Base):
+    """Raw 0-100 Mentixy Score components. Score events refresh only the one
+    they touch (score_calculator.refresh_score); the nightly recompute all."""
+    __tablename__ = "user_score_components"
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    verified_skills = Column(Float, default=0)
+    coding_consistency = Column(Float, default=0)
+    aptitude_percentile = Column(Float, default=0)
+    assessment_completion = Column(Float, default=0)
+    community = Column(Float, default=0)
+    roadmap_progress = Column(Float, default=0)
+    updated_at = Column(DateTime, default=_now)
+
+
 class UserActivityDaily(Base):
     __tablename__ = "user_activity_daily"
     id = Column(String, primary_key=True, default=_uuid)
@@ -833,6 +848,18 @@ class ChatSession(Base):
     updated_at = Column(DateTime, default=_now, onupdate=_now)
 
     user = relationship("User", back_populates="chat_sessions")
+    summary = relationship("ChatSummary", uselist=False, lazy="joined", cascade="all, delete-orphan")
+
+
+class ChatSummary(Base):
+    """Rolling summary of a chat session's older turns (chat_memory)."""
+    __tablename__ = "chat_summaries"
+    session_id = Column(String, ForeignKey("chat_sessions.id", ondelete="CASCADE"), primary_key=True)
+    summary = Column(Text, default="")
+    covered = Column(Integer, default=0)     # leading messages folded into the summary
+    tokens = Column(Integer, default=0)
+    requested_at = Column(DateTime)          # compaction queued; cleared when it lands
+    updated_at = Column(DateTime, default=_now, onupdate=_now)
 
 
 class Career(Base):
@@ -906,6 +933,33 @@ class College(Base):
     created_at = Column(DateTime, default=_now)
 
 
+class CollegeStats(Base):
+    """Campus Wars aggregates per college, materialized by college_stats.py and
+    recomputed by its jobs; score changes are logged in college_stats_changes."""
+    __tablename__ = "college_stats"
+    college_id = Column(String, ForeignKey("colleges.id", ondelete="CASCADE"), primary_key=True)
+    student_count = Column(Integer, default=0)
+    scored_count = Column(Integer, default=0)      # students with a Mentixy Score above 0
+    score_sum = Column(Integer, default=0)
+    avg_score = Column(Float, default=0)           # over scored students
+    median_score = Column(Float, default=0)
+    top_score = Column(Integer, default=0)
+    top_k_score = Column(Float, default=0, index=True)  # mean of the best K; Campus Wars rank
+    weekly_active = Column(Integer, default=0)     # students active in the last 7 days
+    weekly_activity = Column(Integer, default=0)   # their activity_score over those days
+    refreshed_at = Column(DateTime, default=_now)
+
+
+class CollegeStatsChange(Base):
+    """Append-only: a college whose students' scores or membership changed.
+    Inserted with the change, so busy colleges never contend on their stats
+    row; folded into college_stats (and deleted) by the refresh job."""
+    __tablename__ = "college_stats_changes"
+    id = Column(String, primary_key=True, default=_uuid)
+    college_id = Column(String, ForeignKey("colleges.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_at = Column(DateTime, default=_now)
+
+
 class InterviewExperience(Base):
     __tablename__ = "interview_experiences"
     id = Column(String, primary_key=True, default=_uuid)
@@ -935,3 +989,62 @@ class MarketInsight(Base):
     source = Column(String)
     region = Column(String, default="India")
     created_at = Column(DateTime, default=_now)
+
+
+# ═══════════════════════════ SEARCH ═══════════════════════════
+
+class SearchDocument(Base):
+    """One searchable row per indexed entity, kept in sync by search_index.py.
+    Full-text indexes live outside the ORM: a tsvector column + GIN/trigram
+    indexes on PostgreSQL, an FTS5 shadow table on SQLite."""
+    __tablename__ = "search_documents"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    doc_type = Column(String(20), nullable=False, index=True)  # user|career|problem|skill|job|company|post
+    ref_id = Column(String, nullable=False)
+    title = Column(String(300), nullable=False)
+    body = Column(Text)
+    data = Column(JSON)  # display fields, so results never join back to the source table
+    boost = Column(Float, default=1.0)
+    updated_at = Column(DateTime, default=_now, onupdate=_now)
+    __table_args__ = (UniqueConstraint("doc_type", "ref_id", name="uq_search_doc"),)
+
+
+# ═══════════════════════════ AI CACHE ═══════════════════════════
+
+class AIResponseCache(Base):
+    """Parsed Gemini responses keyed by sha256(model + normalized prompt),
+    shared by every worker. Managed by ai_cache.py (TTL + LRU eviction)."""
+    __tablename__ = "ai_response_cache"
+    key = Column(String(64), primary_key=True)
+    function = Column(String(50), nullable=False, index=True)
+    model = Column(String(100), nullable=False)
+    response = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=_now)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    last_used_at = Column(DateTime, default=_now, index=True)
+
+
+# ═══════════════════════════ BACKGROUND JOBS ═══════════════════════════
+
+class BackgroundJob(Base):
+    """Durable queue row for long-running work (AI generation), run by
+    job_queue.py workers. status: queued → running → succeeded | failed."""
+    __tablename__ = "background_jobs"
+    id = Column(String, primary_key=True, default=_uuid)
+    kind = Column(String(50), nullable=False)  # generate_roadmap|resume_review|assessment_submit
+    user_id = Column(String, ForeignKey("users.id"), index=True)
+    status = Column(String(20), default="queued", nullable=False)
+    payload = Column(JSON, nullable=False)
+    result = Column(JSON)
+    error = Column(Text)
+    progress = Column(Integer, default=0)  # 0-100
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    run_after = Column(DateTime, default=_now)  # retry backoff / scheduled run
+    locked_by = Column(String(100))
+    locked_at = Column(DateTime)  # lease; renewed while running, reclaimed when stale
+    created_at = Column(DateTime, default=_now)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    updated_at = Column(DateTime, default=_now, index=True)  # websocket push watermark
+    __table_args__ = (Index("ix_background_jobs_claim", "status", "run_after"),)
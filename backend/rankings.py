@@ -0,0 +1,255 @@
+"""
+Mentixy — Rankings
+In-memory leaderboards behind /api/leaderboard: Mentixy Score, streak and
+total points, each globally and per college.
+
+A college board holds the students resolved to that college (college_id, see
+college_resolver.py); an unresolved profile is ranked with others who typed
+exactly the same college_name.
+
+Every board is a SortedList of (-value, user_id), so a user's rank, a page
+of the top N and the neighbours around a user are O(log n) lookups and never
+scan user_profiles. Ties are ordered by user id, the same order a page shows.
+
+Loaded from user_profiles (one query) on first use, then kept current from
+committed UserProfile changes — score refreshes, streak check-ins, profile
+edits — and from the nightly recompute's bulk score writes (set_scores).
+Other workers' writes arrive through a periodic background reload
+(LEADERBOARD_REFRESH_SECONDS).
+"""
+import os
+import threading
+import time
+
+from sortedcontainers import SortedList
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from database import engine
+from models import UserProfile
+
+METRICS = ("mentixy_score", "streak_days", "total_points")
+DISPLAY = ("username", "display_name", "avatar_url", "college_id", "college_name", "archetype_name")
+FIELDS = METRICS + DISPLAY
+REFRESH_SECONDS = float(os.getenv("LEADERBOARD_REFRESH_SECONDS", "300"))
+
+
+def college_key(fields: dict):
+    """The college board a member with these fields is ranked on, or None."""
+    return fields.get("college_id") or fields.get("college_name") or None
+
+
+class _Member:
+    __slots__ = ("user_id", "college", "values", "payload")
+
+    def __init__(self, user_id: str, fields: dict):
+        self.user_id = user_id
+        self.college = college_key(fields)
+        self.values = {m: fields.get(m) or 0 for m in METRICS}
+        self.payload = {name: fields.get(name) for name in DISPLAY}
+        self.payload.update(self.values)
+
+
+class Leaderboards:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._members = {}    # user_id → _Member
+        self._boards = {}     # (metric, college or None) → SortedList[(-value, user_id)]
+        self._sums = {}       # (metric, college or None) → sum of values
+        self._replay = None   # changes seen while a reload is in flight
+        self.loaded_at = 0.0
+
+    def __len__(self):
+        return len(self._members)
+
+    # ─── Bulk load ───
+
+    def load(self, fetch):
+        """Replace every board from fetch() → mappings of user_id + FIELDS.
+        Changes that commit while it runs are replayed on top."""
+        with self._lock:
+            self._replay = []
+        members, keys = {}, {}
+        for row in fetch():
+            m = _Member(row["user_id"], row)
+            members[m.user_id] = m
+            for metric in METRICS:
+                for scope in (None, m.college) if m.college else (None,):
+                    keys.setdefault((metric, scope), []).append((-m.values[metric], m.user_id))
+        boards = {scope: SortedList(k) for scope, k in keys.items()}
+        sums = {scope: -sum(v for v, _ in k) for scope, k in keys.items()}
+        with self._lock:
+            self._members, self._boards, self._sums = members, boards, sums
+            replay, self._replay = self._replay, None
+            for user_id, fields in replay:
+                self._apply(user_id, fields)
+            self.loaded_at = time.monotonic()
+
+    # ─── Incremental updates ───
+
+    def update(self, user_id: str, fields: dict = None):
+        """Apply changed FIELDS for a user (all of them for one not yet ranked);
+        None removes the user."""
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append((user_id, fields))
+            self._apply(user_id, fields)
+
+    def _apply(self, user_id: str, fields):
+        old = self._members.pop(user_id, None)
+        if old is not None:
+            self._unrank(old)
+        if fields is None:
+            return
+        if old is not None:
+            fields = {**old.payload, **fields}
+        elif not set(FIELDS) <= set(fields):
+            return  # partial update for a user this index hasn't loaded; the next reload has them
+        m = self._members[user_id] = _Member(user_id, fields)
+        for metric in METRICS:
+            for scope in self._scopes(m):
+                self._boards.setdefault((metric, scope), SortedList()).add((-m.values[metric], user_id))
+                self._sums[(metric, scope)] = self._sums.get((metric, scope), 0) + m.values[metric]
+
+    def _unrank(self, m: _Member):
+        for metric in METRICS:
+            for scope in self._scopes(m):
+                board = self._boards[(metric, scope)]
+                board.remove((-m.values[metric], m.user_id))
+                self._sums[(metric, scope)] -= m.values[metric]
+                if not board:
+                    del self._boards[(metric, scope)], self._sums[(metric, scope)]
+
+    @staticmethod
+    def _scopes(m: _Member) -> tuple:
+        return (None, m.college) if m.college else (None,)
+
+    # ─── Queries ───
+    # college=None is the global board. `positive` counts only users above 0
+    # (a prefix of the board, since it is sorted by value descending).
+
+    def _board(self, metric: str, college: str = None) -> SortedList:
+        return self._boards.get((metric, college)) or SortedList()
+
+    def member(self, user_id: str) -> dict:
+        with self._lock:
+            m = self._members.get(user_id)
+            return dict(m.payload, user_id=user_id) if m else None
+
+    def count(self, metric: str, college: str = None, positive: bool = False) -> int:
+        with self._lock:
+            board = self._board(metric, college)
+            return board.bisect_left((0, "")) if positive else len(board)
+
+    def total(self, metric: str, college: str = None):
+        with self._lock:
+            return self._sums.get((metric, college), 0)
+
+    def rank(self, user_id: str, metric: str, college: str = None) -> int:
+        """1-based position of the user on the board; None if not on it."""
+        with self._lock:
+            m = self._members.get(user_id)
+            if m is None or (college is not None and m.college != college):
+                return None
+            return self._board(metric, college).index((-m.values[metric], user_id)) + 1
+
+    def top(self, metric: str, limit: int, offset: int = 0, college: str = None, positive: bool = False) -> list:
+        """[(rank, payload)] for ranks offset+1 .. offset+limit."""
+        with self._lock:
+            board = self._board(metric, college)
+            end = offset + max(limit, 0)
+            if positive:
+                end = min(end, board.bisect_left((0, "")))
+            return [(offset + i + 1, dict(self._members[user_id].payload, user_id=user_id))
+                    for i, (_, user_id) in enumerate(board.islice(offset, max(offset, end)))]
+
+    def around(self, user_id: str, metric: str, span: int = 5, college: str = None) -> list:
+        """[(rank, payload)] for the `span` users either side of user_id, and them."""
+        with self._lock:
+            rank = self.rank(user_id, metric, college)
+            if rank is None:
+                return []
+            start = max(rank - 1 - span, 0)
+            return self.top(metric, rank + span - start, start, college)
+
+
+index = Leaderboards()
+_reload_lock = threading.Lock()
+
+
+def _rows():
+    t = UserProfile.__table__
+    with engine.connect() as conn:
+        return conn.execute(select(t.c.user_id, *(t.c[name] for name in FIELDS))).mappings().all()
+
+
+def reload():
+    """Rebuild from user_profiles (one query)."""
+    with _reload_lock:
+        started = time.perf_counter()
+        index.load(_rows)
+        print(f"[Leaderboard] ✅ Ranked {len(index):,} users in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+
+def ensure_loaded():
+    """Load on first use (unless a startup load is already in flight — then serve
+    what's there); afterwards refresh in the background once REFRESH_SECONDS old."""
+    if not index.loaded_at:
+        if not _reload_lock.locked():
+            reload()
+    elif time.monotonic() - index.loaded_at > REFRESH_SECONDS and not _reload_lock.locked():
+        index.loaded_at = time.monotonic()  # one refresh at a time
+        start_reload()
+
+
+def start_reload():
+    threading.Thread(target=reload, name="leaderboard-reload", daemon=True).start()
+
+
+def set_scores(scores: dict):
+    """Mentixy Scores written in bulk, bypassing the ORM ({user_id: score})."""
+    for user_id, score in scores.items():
+        index.update(user_id, {"mentixy_score": score})
+
+
+# ─── Feed ───
+# Same shape as search_index's indexer: changed profiles are noted after each
+# flush and applied once the transaction commits.
+
+_PENDING = "rankings_pending"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect(session, flush_context):
+    changes = {}
+    for obj in session.new:
+        if isinstance(obj, UserProfile):
+            changes[obj.user_id] = {name: getattr(obj, name) for name in FIELDS}
+    for obj in session.dirty:
+        if isinstance(obj, UserProfile):
+            attrs = inspect(obj).attrs
+            changed = {name: getattr(obj, name) for name in FIELDS if attrs[name].history.has_changes()}
+            if changed:
+                changes[obj.user_id] = changed
+    for obj in session.deleted:
+        if isinstance(obj, UserProfile):
+            changes[obj.user_id] = None
+    pending = session.info.setdefault(_PENDING, {}) if changes else {}
+    for user_id, fields in changes.items():
+        if fields is not None and pending.get(user_id) is not None:
+            pending[user_id].update(fields)   # an earlier flush in this transaction
+        else:
+            pending[user_id] = fields
+
+
+@event.listens_for(Session, "after_commit")
+def _apply(session):
+    pending = session.info.pop(_PENDING, None)
+    if pending and (index.loaded_at or _reload_lock.locked()):
+        for user_id, fields in pending.items():
+            index.update(user_id, fields)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session):
+    session.info.pop(_PENDING, None)
@@ -0,0 +1,477 @@
+"""
+Mentixy — Resume ATS Engine
+Local, deterministic ATS scoring over Resume.content, in the same schema
+ai_engine.analyze_resume returns. Every save is scored here in a few
+milliseconds; the LLM is an optional enrichment pass (better rewrites and
+tips), not a requirement.
+
+    summary / experience / skills / education / projects
+        → each section scored on its own: presence, length, action verbs,
+          quantified bullets, role keywords it contains
+    role keywords
+        → most frequent required skills of matching Career rows and active
+          JobListing rows for the target role (cached per role)
+    ats_score = 70% weighted section scores + 30% role keyword coverage,
+                minus formatting issues
+
+Scoring is incremental: each section's result is stored with a hash of its
+content (and of the role keywords), so a save re-scores only the sections
+that changed since the previous version.
+"""
+import functools
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy import or_
+
+import job_match
+import models
+
+ENGINE_VERSION = 1
+SECTIONS = ("summary", "experience", "skills", "education", "projects")
+SECTION_WEIGHTS = {"summary": 0.15, "experience": 0.25, "skills": 0.25, "education": 0.10, "projects": 0.25}
+KEYWORD_SHARE = 0.30        # share of ats_score from role keyword coverage
+MAX_ROLE_KEYWORDS = 20
+ROLE_KEYWORDS_TTL = 600     # seconds a role's keyword list is cached
+MAX_WORDS = 700             # ≈ one page
+LONG_BULLET_WORDS = 35
+
+# Where sections live in Resume.content (first key present wins)
+SECTION_KEYS = {
+    "summary": ("summary", "objective", "about", "profile"),
+    "experience": ("experience", "work_experience", "internships", "work"),
+    "skills": ("skills", "technical_skills"),
+    "education": ("education",),
+    "projects": ("projects",),
+}
+CONTACT_FIELDS = ("email", "phone", "linkedin", "github")
+
+ACTION_VERBS = {
+    "achieved", "analyzed", "architected", "automated", "built", "collaborated", "configured", "created",
+    "debugged", "delivered", "deployed", "designed", "developed", "engineered", "enhanced", "established",
+    "evaluated", "executed", "implemented", "improved", "increased", "integrated", "launched", "led",
+    "managed", "mentored", "migrated", "modeled", "optimized", "organized", "reduced", "refactored",
+    "researched", "resolved", "scaled", "shipped", "simplified", "spearheaded", "streamlined", "tested",
+    "trained", "won", "wrote",
+}
+SUGGESTED_VERBS = ["Developed", "Implemented", "Architected", "Optimized", "Automated", "Deployed"]
+WEAK_PHRASES = ("responsible for", "worked on", "helped with", "helped in", "involved in", "duties included",
+                "familiar with", "various tasks")
+PRIORITY_ORDER = {"high": 0, "medium": 1, "low": 2}
+
+_NUMBER = re.compile(r"\d")
+_PARENS = re.compile(r"^(.*?)\((.*)\)\s*$")
+
+
+# ─── Text helpers ───
+
+def _text(value) -> str:
+    """All strings inside a (nested) value, space-joined."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return " ".join(_text(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return " ".join(_text(v) for v in value)
+    return str(value)
+
+
+def _norm(text: str) -> str:
+    return " ".join(text.casefold().replace("&", " and ").split())
+
+
+def _first(content: dict, keys: tuple):
+    for key in keys:
+        if content.get(key):
+            return content[key]
+    return None
+
+
+def _entries(value) -> list:
+    if not value:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _bullets(entry) -> list:
+    """Bullet lines of an experience/project entry (explicit list, or the description split into lines)."""
+    if isinstance(entry, str):
+        return [line.strip(" •-*\t") for line in entry.splitlines() if line.strip(" •-*\t")]
+    if not isinstance(entry, dict):
+        return []
+    for key in ("bullets", "highlights", "achievements", "points"):
+        if isinstance(entry.get(key), list):
+            return [str(b).strip(" •-*\t") for b in entry[key] if str(b).strip(" •-*\t")]
+    description = entry.get("description") or entry.get("summary") or ""
+    lines = [l.strip(" •-*\t") for l in re.split(r"\n|(?<=[.!?])\s+", str(description))]
+    return [l for l in lines if l]
+
+
+def _starts_with_verb(bullet: str) -> str:
+    first = bullet.split(maxsplit=1)[0].strip(",.:;").casefold() if bullet.split() else ""
+    return first if first in ACTION_VERBS else ""
+
+
+@functools.lru_cache(maxsize=4096)
+def keyword_alternatives(label: str) -> tuple:
+    """Phrases that count as having a keyword: 'Programming (Python/Java/JS)' →
+    programming, python, java, javascript, js; aliases work both ways."""
+    parts = [label]
+    m = _PARENS.match(label)
+    if m:
+        parts = [m.group(1)] + re.split(r"[,/]", m.group(2))
+    alts = []
+    for part in parts:
+        alts.extend(job_match.alternatives(_norm(part)))
+    for alt in list(alts):
+        alts.extend(short for short, full in job_match.ALIASES.items() if full == alt)
+    return tuple(dict.fromkeys(a for a in alts if a))
+
+
+@functools.lru_cache(maxsize=4096)
+def _pattern(phrase: str):
+    return re.compile(r"(?<![\w+#])" + re.escape(phrase) + r"(?![\w+#])")
+
+
+def find_keywords(text: str, keywords: list) -> list:
+    """Keywords (labels) with any alternative present in `text` (normalized)."""
+    return [k for k in keywords if any(_pattern(alt).search(text) for alt in keyword_alternatives(k))]
+
+
+# ─── Role keywords ───
+
+_role_cache = {}   # normalized role → (keywords, expires at)
+_role_lock = threading.Lock()
+
+
+def role_keywords(db, role: str) -> list:
+    """Most common required skills for a role, from Career and active JobListing rows (2 queries, cached)."""
+    key = _norm(role or "")
+    if not key:
+        return []
+    with _role_lock:
+        cached = _role_cache.get(key)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+    def lookup(pattern):
+        careers = db.query(models.Career.required_skills).filter(
+            or_(models.Career.title.ilike(pattern), models.Career.slug == key.replace(" ", "-"))
+        ).limit(5).all()
+        jobs = db.query(models.JobListing.required_skills, models.JobListing.preferred_skills).filter(
+            models.JobListing.is_active == True, models.JobListing.role_title.ilike(pattern)
+        ).limit(200).all()
+        return careers, jobs
+
+    careers, jobs = lookup(f"%{role.strip()}%")
+    if not careers and not jobs:
+        words = sorted((w for w in key.split() if len(w) > 2), key=len, reverse=True)
+        if words:
+            careers, jobs = lookup(f"%{words[0]}%")
+
+    counts, labels = Counter(), {}
+    for rows, weight in (([c.required_skills for c in careers], 3), ([j.required_skills for j in jobs], 1),
+                         ([j.preferred_skills for j in jobs], 0.5)):
+        for skills in rows:
+            for label in job_match._skill_list(skills):
+                entry = " / ".join(keyword_alternatives(label))
+                counts[entry] += weight
+                labels.setdefault(entry, label)
+    keywords = [labels[entry] for entry, _ in counts.most_common(MAX_ROLE_KEYWORDS)]
+    with _role_lock:
+        _role_cache[key] = (keywords, time.monotonic() + ROLE_KEYWORDS_TTL)
+    return keywords
+
+
+# ─── Section scorers ───
+# Each returns {score, feedback, keywords, verbs, issues, improvement?} for one section.
+
+def _bullet_stats(bullets: list) -> dict:
+    verbs = [v for v in (_starts_with_verb(b) for b in bullets) if v]
+    lower = [b.casefold() for b in bullets]
+    return {
+        "count": len(bullets),
+        "verbs": verbs,
+        "verb_ratio": len(verbs) / len(bullets) if bullets else 0,
+        "quantified_ratio": sum(1 for b in bullets if _NUMBER.search(b)) / len(bullets) if bullets else 0,
+        "weak": sum(1 for b in lower for p in WEAK_PHRASES if p in b),
+        "long": sum(1 for b in bullets if len(b.split()) > LONG_BULLET_WORDS),
+    }
+
+
+def _improvement(section, priority, current, suggested, impact):
+    return {"section": section, "priority": priority, "current": current, "suggested": suggested,
+            "impact_on_score": impact}
+
+
+def _score_summary(value, keywords, role) -> dict:
+    text = _text(value).strip()
+    words = len(text.split())
+    if not words:
+        return {"score": 20, "feedback": "Add a 2-line professional summary with your target role and key skills",
+                "keywords": [], "verbs": [], "issues": [],
+                "improvement": _improvement("summary", "high", "missing",
+                                            f"{role or 'Engineering'} aspirant skilled in "
+                                            f"{', '.join(keywords[:3]) or 'your top skills'}, seeking to ...",
+                                            "+10 to +15 points")}
+    norm = _norm(text)
+    found = find_keywords(norm, keywords)
+    score = 50 if 15 <= words <= 80 else 30
+    role_named = bool(role) and _norm(role) in norm
+    score += 20 if role_named else 0
+    score += min(30, 10 * len(found))
+    if words < 15:
+        feedback = "Too short — say what role you want and the 2–3 skills that qualify you"
+    elif words > 80:
+        feedback = "Too long — recruiters skim; keep it under 80 words"
+    elif not role_named:
+        feedback = "Name your target role explicitly so ATS filters match it"
+    else:
+        feedback = "Clear and targeted"
+    result = {"score": min(score, 100), "feedback": feedback, "keywords": found, "verbs": [], "issues": []}
+    if score < 70:
+        result["improvement"] = _improvement("summary", "medium", text[:120],
+                                             f"Mention '{role}' and {', '.join(keywords[:3]) or 'your strongest skills'}",
+                                             "+5 to +10 points")
+    return result
+
+
+def _score_experience(value, keywords, role) -> dict:
+    entries = _entries(value)
+    if not entries:
+        return {"score": 45, "feedback": "No experience listed — add internships, freelance or open-source work",
+                "keywords": [], "verbs": [], "issues": [],
+                "improvement": _improvement("experience", "medium", "missing",
+                                            "Add an internship, hackathon or open-source contribution with 2–3 bullets",
+                                            "+5 to +10 points")}
+    bullets = [b for e in entries for b in _bullets(e)]
+    s = _bullet_stats(bullets)
+    score = 40 + 10 * min(len(entries), 2) / 2 + 25 * s["verb_ratio"] + 25 * s["quantified_ratio"]
+    score -= min(15, 5 * s["weak"])
+    feedback = _bullet_feedback(s, "Strong, results-focused experience")
+    result = {"score": _clamp(score), "feedback": feedback, "keywords": find_keywords(_norm(_text(value)), keywords),
+              "verbs": s["verbs"], "issues": _bullet_issues(s)}
+    if s["quantified_ratio"] < 0.5 or s["verb_ratio"] < 0.6:
+        weakest = next((b for b in bullets if not _starts_with_verb(b) or not _NUMBER.search(b)), "")
+        result["improvement"] = _improvement("experience", "high", weakest[:120] or "bullets without outcomes",
+                                             "Use 'Developed X using Y, resulting in Z% improvement' format",
+                                             "+5 to +12 points")
+    return result
+
+
+def _skill_items(value) -> list:
+    """Skill names from a list, a comma/newline string, or a {group: [...]} dict."""
+    groups = value.values() if isinstance(value, dict) else _entries(value)
+    items = [item for group in groups for item in _entries(group)]
+    return [s.strip() for item in items for s in re.split(r"[,\n]", _text(item)) if s.strip()]
+
+
+def _score_skills(value, keywords, role) -> dict:
+    skills = _skill_items(value)
+    if not skills:
+        return {"score": 10, "feedback": "Add a skills section — it's the first thing ATS filters read",
+                "keywords": [], "verbs": [], "issues": [],
+                "improvement": _improvement("skills", "high", "missing",
+                                            f"List {', '.join(keywords[:5]) or 'your technical skills'} you actually know",
+                                            "+10 to +20 points")}
+    found = find_keywords(_norm(" , ".join(skills)), keywords)
+    score = min(50, 5 * len(skills))
+    if keywords:
+        score += 50 * len(found) / len(keywords)
+    elif len(skills) >= 8:
+        score += 30
+    missing = [k for k in keywords if k not in found]
+    if len(skills) < 6:
+        feedback = "Too few skills listed — aim for 8–15 relevant ones"
+    elif keywords and len(found) < len(keywords) / 2:
+        feedback = f"Missing core {role or 'role'} skills: {', '.join(missing[:3])}"
+    else:
+        feedback = "Good coverage. Group into Technical, Tools, and Soft Skills"
+    result = {"score": _clamp(score), "feedback": feedback, "keywords": found, "verbs": [], "issues": []}
+    if missing and score < 75:
+        result["improvement"] = _improvement("skills", "high" if score < 50 else "medium", ", ".join(skills[:6]),
+                                             f"Add (if you have them): {', '.join(missing[:5])}", "+5 to +15 points")
+    return result
+
+
+def _score_education(value, keywords, role) -> dict:
+    entries = _entries(value)
+    if not entries:
+        return {"score": 40, "feedback": "Add your degree, college, graduation year and CGPA",
+                "keywords": [], "verbs": [], "issues": [],
+                "improvement": _improvement("education", "medium", "missing",
+                                            "B.Tech CSE, <College>, 2026 — CGPA 8.1/10", "+3 to +6 points")}
+    best = 0
+    for e in entries:
+        if isinstance(e, dict):
+            has = lambda *keys: any(e.get(k) for k in keys)
+            score = (30 * has("degree", "course", "qualification") + 25 * has("institution", "college", "school", "university")
+                     + 20 * has("year", "graduation_year", "end", "end_date") + 15 * has("cgpa", "gpa", "percentage", "grade")
+                     + 10 * has("coursework", "relevant_coursework", "achievements"))
+        else:
+            text = str(e)
+            score = 40 + 20 * bool(re.search(r"\b(19|20)\d{2}\b", text)) + 15 * bool(re.search(r"cgpa|gpa|%", text, re.I))
+        best = max(best, score)
+    feedback = "Complete" if best >= 85 else "Include graduation year, CGPA and relevant coursework"
+    return {"score": _clamp(best), "feedback": feedback, "keywords": find_keywords(_norm(_text(value)), keywords),
+            "verbs": [], "issues": []}
+
+
+def _score_projects(value, keywords, role) -> dict:
+    entries = _entries(value)
+    if not entries:
+        return {"score": 30, "feedback": "Add 2–3 projects — for freshers they carry the most weight",
+                "keywords": [], "verbs": [], "issues": [],
+                "improvement": _improvement("projects", "high", "missing",
+                                            "Developed a full-stack app using React + Node.js, serving 100+ users",
+                                            "+8 to +15 points")}
+    bullets = [b for e in entries for b in _bullets(e)]
+    s = _bullet_stats(bullets)
+    dicts = [e for e in entries if isinstance(e, dict)]
+    with_tech = sum(1 for e in dicts if e.get("tech") or e.get("technologies") or e.get("tech_stack") or e.get("stack"))
+    with_link = sum(1 for e in dicts if e.get("link") or e.get("url") or e.get("github"))
+    score = (30 + 15 * min(len(entries), 3) / 3 + 20 * s["verb_ratio"] + 15 * s["quantified_ratio"]
+             + 10 * (with_tech / len(entries)) + 10 * (with_link / len(entries)))
+    score -= min(10, 5 * s["weak"])
+    feedback = _bullet_feedback(s, "Well-described projects") if bullets else "Describe what each project does and its impact"
+    if with_link < len(entries) and score >= 60:
+        feedback = "Add live or GitHub links to every project"
+    result = {"score": _clamp(score), "feedback": feedback, "keywords": find_keywords(_norm(_text(value)), keywords),
+              "verbs": s["verbs"], "issues": _bullet_issues(s)}
+    if score < 70:
+        current = bullets[0] if bullets else _text(entries[0])
+        result["improvement"] = _improvement("projects", "high", current[:120],
+                                             "Developed <what> using <stack>, serving <N users> / cutting <metric> by <X%>",
+                                             "+5 to +10 points")
+    return result
+
+
+def _bullet_feedback(s: dict, good: str) -> str:
+    if s["count"] == 0:
+        return "Add 2–3 bullets per entry describing what you built and its impact"
+    if s["verb_ratio"] < 0.6:
+        return "Start each bullet with an action verb (Developed, Optimized, Led ...)"
+    if s["quantified_ratio"] < 0.5:
+        return "Quantify impact — numbers (users, %, time saved) in at least half the bullets"
+    if s["weak"]:
+        return "Replace 'responsible for' / 'worked on' with what you actually did"
+    return good
+
+
+def _bullet_issues(s: dict) -> list:
+    return [f"{s['long']} bullet(s) longer than {LONG_BULLET_WORDS} words — split them"] if s["long"] else []
+
+
+def _clamp(score: float) -> int:
+    return int(round(max(0, min(100, score))))
+
+
+SCORERS = {
+    "summary": _score_summary, "experience": _score_experience, "skills": _score_skills,
+    "education": _score_education, "projects": _score_projects,
+}
+
+
+# ─── Document ───
+
+def section_hash(value, fingerprint: str) -> str:
+    raw = json.dumps(value, sort_keys=True, default=str) + "\0" + fingerprint
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def _contact(content: dict) -> dict:
+    contact = {}
+    for source in (content, content.get("contact") or {}, content.get("personal_info") or {}):
+        if isinstance(source, dict):
+            for field in CONTACT_FIELDS:
+                contact[field] = contact.get(field) or source.get(field) or source.get(f"{field}_url")
+    return contact
+
+
+def grade(score: int) -> str:
+    for floor, letter in ((90, "A+"), (80, "A"), (75, "B+"), (65, "B"), (60, "C+"), (50, "C")):
+        if score >= floor:
+            return letter
+    return "D"
+
+
+def score_resume(content: dict, target_role: str = None, keywords: list = None, previous: dict = None) -> dict:
+    """ATS report for Resume.content. `previous` is the last report for this
+    resume (Resume.ai_suggestions); sections whose content and role keywords
+    are unchanged reuse its section results."""
+    started = time.perf_counter()
+    content = content if isinstance(content, dict) else {}
+    keywords = keywords or []
+    fingerprint = f"{ENGINE_VERSION}\0{_norm(target_role or '')}\0" + "\0".join(keywords)
+    cached = (previous or {}).get("sections") or {}
+
+    sections, rescored = {}, []
+    for name in SECTIONS:
+        value = _first(content, SECTION_KEYS[name])
+        digest = section_hash(value, fingerprint)
+        if cached.get(name, {}).get("hash") == digest:
+            sections[name] = cached[name]
+            continue
+        sections[name] = {"hash": digest, **SCORERS[name](value, keywords, target_role)}
+        rescored.append(name)
+
+    weighted = sum(SECTION_WEIGHTS[n] * sections[n]["score"] for n in SECTIONS)
+    found = list(dict.fromkeys(k for n in SECTIONS for k in sections[n]["keywords"]))
+    if keywords:
+        score = (1 - KEYWORD_SHARE) * weighted + KEYWORD_SHARE * 100 * len(found) / len(keywords)
+    else:
+        score = weighted
+
+    contact = _contact(content)
+    issues = [f"Add your {field.title() if field != 'linkedin' else 'LinkedIn'} at the top"
+              for field in CONTACT_FIELDS if not contact.get(field)]
+    issues += [i for n in SECTIONS for i in sections[n]["issues"]]
+    words = len(_text(content).split())
+    if words > MAX_WORDS:
+        issues.append("Keep to 1 page")
+    score = _clamp(score - min(10, 2 * len(issues)))
+
+    verbs = list(dict.fromkeys(v.title() for n in SECTIONS for v in sections[n]["verbs"]))
+    improvements = sorted((sections[n]["improvement"] for n in SECTIONS if sections[n].get("improvement")),
+                          key=lambda i: PRIORITY_ORDER[i["priority"]])
+    best = max(SECTIONS, key=lambda n: sections[n]["score"])
+    worst = min(SECTIONS, key=lambda n: sections[n]["score"])
+    missing = [k for k in keywords if k not in found]
+
+    tips = []
+    if not contact.get("github") or not contact.get("linkedin"):
+        tips.append("Add GitHub and LinkedIn links at top")
+    if sections["projects"]["score"] >= sections["experience"]["score"]:
+        tips.append("List projects before education for freshers")
+    if missing:
+        tips.append(f"Mirror the job description's wording for {', '.join(missing[:2])} where you genuinely have it")
+    tips.append("Use .pdf format for ATS compatibility")
+
+    return {
+        "ats_score": score,
+        "grade": grade(score),
+        "overall_feedback": f"Strongest section: {best} ({sections[best]['score']}). "
+                            f"Biggest gain available in {worst}: {sections[worst]['feedback'].rstrip('.')}.",
+        "section_scores": {n: {"score": sections[n]["score"], "feedback": sections[n]["feedback"]} for n in SECTIONS},
+        "improvements": improvements,
+        "missing_keywords": missing,
+        "strong_action_verbs": verbs or SUGGESTED_VERBS,
+        "formatting_issues": issues,
+        "tips": tips,
+        "role_keywords": keywords,
+        "engine": "local",
+        "rescored_sections": rescored,
+        "scored_in_ms": round((time.perf_counter() - started) * 1000, 2),
+        "sections": sections,
+    }
+
+
+def public(report: dict) -> dict:
+    """The report without the per-section cache."""
+    return {k: v for k, v in report.items() if k != "sections"}
@@ -31,6 +31,9 @@ from .community import router as community_router
 from .connections import router as connections_router
 from .email import router as email_router
 from .recruiter import router as recruiter_router
+from .admin import router as admin_router
+from .search import router as search_router
+from .queue import router as queue_router
 
 master_router = APIRouter()
 
@@ -65,4 +68,7 @@ master_router.include_router(community_router, prefix="/community", tags=["Commu
 master_router.include_router(connections_router, prefix="/connections", tags=["Connections"])
 master_router.include_router(email_router, prefix="/email", tags=["Email Service"])
 master_router.include_router(recruiter_router, prefix="/recruiter", tags=["Recruiter Portal"])
+master_router.include_router(admin_router, prefix="/admin", tags=["Admin"])
+master_router.include_router(search_router, prefix="/search", tags=["Search"])
+master_router.include_router(queue_router, prefix="/queue", tags=["Job Queue"])
 
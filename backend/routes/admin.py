@@ -0,0 +1,89 @@
+"""Mentixy Admin — internal diagnostics (admin role only)"""
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from database import get_db
+from models import User
+from auth import require_admin
+import sql_profiler
+import ai_cache
+import ai_engine
+import ai_telemetry
+import job_queue
+
+router = APIRouter()
+
+
+@router.get("/perf/sql")
+def sql_perf_stats(
+    sort: str = "db_ms_total",  # db_ms_total | avg_statements | max_statements | n_plus_one_requests
+    limit: int = 50,
+    user: User = Depends(require_admin),
+):
+    """Per-endpoint SQL statement counts, DB time and suspected N+1 shapes (sampled requests)."""
+    rows = sql_profiler.registry.snapshot(sort=sort)
+    return {
+        "sample_rate": sql_profiler.SAMPLE_RATE,
+        "n_plus_one_threshold": sql_profiler.N_PLUS_ONE_THRESHOLD,
+        "total": len(rows),
+        "endpoints": rows[:limit],
+    }
+
+
+@router.delete("/perf/sql")
+def reset_sql_perf_stats(user: User = Depends(require_admin)):
+    """Clear the collected SQL stats."""
+    sql_profiler.registry.reset()
+    return {"success": True}
+
+
+@router.get("/perf/ai-cache")
+def ai_cache_stats(user: User = Depends(require_admin)):
+    """AI response cache hit/miss counters (this process) and gateway load."""
+    return {**ai_cache.stats(), "gateway": ai_engine.gateway.stats()}
+
+
+@router.delete("/perf/ai-cache")
+def purge_ai_cache(function: Optional[str] = None, user: User = Depends(require_admin)):
+    """Drop cached AI responses — all, or one function's (e.g. interview_prep)."""
+    removed = ai_cache.purge(function)
+    ai_cache.reset_stats()
+    return {"success": True, "removed": removed}
+
+
+@router.get("/perf/ai")
+def ai_call_stats(format: str = "json", user: User = Depends(require_admin)):
+    """Per-function AI latency histograms, token counts, failures and fallback rates
+    (this process); `format=prometheus` returns the text exposition format."""
+    if format == "prometheus":
+        return PlainTextResponse(ai_telemetry.prometheus(), media_type="text/plain; version=0.0.4")
+    return {**ai_telemetry.stats(), "gateway": ai_engine.gateway.stats()}
+
+
+@router.delete("/perf/ai")
+def reset_ai_call_stats(user: User = Depends(require_admin)):
+    """Clear the collected AI call telemetry."""
+    ai_telemetry.reset()
+    return {"success": True}
+
+
+@router.get("/queue")
+def job_queue_stats(user: User = Depends(require_admin)):
+    """Background job counts by kind/status and the oldest due job's wait — for sizing workers."""
+    return job_queue.stats()
+
+
+@router.post("/scores/recompute", status_code=202)
+async def recompute_scores(chunk_size: Optional[int] = None, user: User = Depends(require_admin),
+                           db: Session = Depends(get_db)):
+    """Queue a Mentixy Score recompute for every user now (it also runs nightly)."""
+    return await job_queue.submit(db, "score_recompute", user.id, {"chunk_size": chunk_size})
+
+
+@router.post("/colleges/backfill", status_code=202)
+async def backfill_colleges(chunk_size: Optional[int] = None, user: User = Depends(require_admin),
+                            db: Session = Depends(get_db)):
+    """Queue a re-resolution of every profile's college (e.g. after adding colleges)."""
+    return await job_queue.submit(db, "college_backfill", user.id, {"chunk_size": chunk_size})
@@ -1,15 +1,26 @@
-"""Mentixy AI Routes — exposes all AI engine capabilities"""
-from fastapi import APIRouter, Depends, HTTPException
+"""Mentixy AI Routes — exposes all AI engine capabilities
+
+Handlers are async so a slow AI call holds no worker thread, but the request
+session is sync: everything that touches it (lazy profile loads, queries,
+releasing the connection) runs through asyncio.to_thread before the AI await.
+"""
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Response
 from pydantic import BaseModel
 from typing import Optional, List
 from sqlalchemy.orm import Session
 
-from database import get_db
+from database import get_db, release_connection
+import ai_cache
+import job_match
+import job_queue
+import resume_ats
 from models import User
 from auth import require_user
 from ai_engine import (
     analyze_skill_gap, analyze_resume, review_code,
-    calculate_job_match, generate_roadmap, generate_interview_prep,
+    explain_job_matches, generate_roadmap, generate_interview_prep,
     generate_reroute_options, generate_parent_report, check_salary_truth,
     salary_negotiation_simulator, career_day_simulator, emotion_aware_intervention
 )
@@ -17,16 +28,24 @@ from ai_engine import (
 router = APIRouter()
 
 
+def _profile_context(db: Session, user: User, *fields: str) -> dict:
+    """The named profile fields ({} without a profile), then the connection
+    released for the AI call. Sync — run it with asyncio.to_thread."""
+    profile = user.profile
+    context = {name: getattr(profile, name) for name in fields} if profile else {}
+    release_connection(db)
+    return context
+
+
 class SkillGapReq(BaseModel):
     current_skills: List[str]
     target_career: str
 
 @router.post("/skill-gap")
-def ai_skill_gap(req: SkillGapReq, user: User = Depends(require_user), db: Session = Depends(get_db)):
-    ctx = {}
-    if user.profile:
-        ctx = {"college_tier": user.profile.college_tier, "stream": user.profile.stream, "graduation_year": user.profile.graduation_year}
-    result = analyze_skill_gap(req.current_skills, req.target_career, ctx)
+async def ai_skill_gap(req: SkillGapReq, fresh: bool = False, user: User = Depends(require_user), db: Session = Depends(get_db)):
+    ctx = await asyncio.to_thread(_profile_context, db, user, "college_tier", "stream", "graduation_year")
+    with ai_cache.bypass(fresh):
+        result = await analyze_skill_gap(req.current_skills, req.target_career, ctx)
     return result
 
 
@@ -35,9 +54,23 @@ class ResumeAnalyzeReq(BaseModel):
     target_role: str
 
 @router.post("/resume-review")
-def ai_resume_review(req: ResumeAnalyzeReq, user: User = Depends(require_user)):
-    result = analyze_resume(req.resume_data, req.target_role)
-    return result
+async def ai_resume_review(req: ResumeAnalyzeReq, response: Response, enrich: bool = False,
+                           user: User = Depends(require_user), db: Session = Depends(get_db)):
+    """Local ATS report (resume_ats.py), returned directly. With ?enrich=true the
+    AI rewrite pass is queued instead (202; poll /api/queue/jobs/{job_id})."""
+    keywords = await asyncio.to_thread(resume_ats.role_keywords, db, req.target_role)
+    report = resume_ats.public(resume_ats.score_resume(req.resume_data, req.target_role, keywords))
+    if not enrich:
+        return report
+    response.status_code = 202
+    return await job_queue.submit(db, "resume_review", user.id, {
+        "resume_data": req.resume_data, "target_role": req.target_role, "local_report": report})
+
+
+@job_queue.handler("resume_review")
+async def _resume_review_job(job: job_queue.JobContext) -> dict:
+    p = job.payload
+    return await analyze_resume(p["resume_data"], p["target_role"], p.get("local_report"))
 
 
 class CodeReviewReq(BaseModel):
@@ -46,35 +79,33 @@ class CodeReviewReq(BaseModel):
     problem_title: Optional[str] = ""
 
 @router.post("/code-review")
-def ai_code_review(req: CodeReviewReq, user: User = Depends(require_user)):
-    result = review_code(req.code, req.language, req.problem_title)
+async def ai_code_review(req: CodeReviewReq, fresh: bool = False, user: User = Depends(require_user), db: Session = Depends(get_db)):
+    await asyncio.to_thread(release_connection, db)
+    with ai_cache.bypass(fresh):
+        result = await review_code(req.code, req.language, req.problem_title)
     return result
 
 
 class JobMatchReq(BaseModel):
     job_id: str
 
-@router.post("/job-match")
-def ai_job_match(req: JobMatchReq, user: User = Depends(require_user), db: Session = Depends(get_db)):
+
+def _score_one_job(db: Session, user: User, job_id: str) -> tuple:
     from models import JobListing
-    job = db.query(JobListing).filter_by(id=req.job_id).first()
+    job = db.query(JobListing).filter_by(id=job_id).first()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
-    
-    profile = user.profile
-    user_data = {
-        "skills": profile.skills if profile and hasattr(profile, 'skills') else [],
-        "college_tier": profile.college_tier if profile else None,
-        "cgpa": profile.cgpa if profile else None,
-        "target_role": profile.target_role if profile else None,
-    }
-    job_data = {
-        "role_title": job.role_title, "company_name": job.company_name,
-        "required_skills": job.required_skills, "preferred_skills": job.preferred_skills,
-        "company_type": job.company_type, "salary_min_lpa": job.salary_min_lpa,
-    }
-    result = calculate_job_match(user_data, job_data)
-    return result
+    candidate = job_match.load_candidate(db, user)
+    match = job_match.score_job(job, candidate)
+    release_connection(db)
+    return candidate, match
+
+@router.post("/job-match")
+async def ai_job_match(req: JobMatchReq, user: User = Depends(require_user), db: Session = Depends(get_db)):
+    """Local match score for one job (job_match.py) plus an AI explanation of it."""
+    candidate, match = await asyncio.to_thread(_score_one_job, db, user, req.job_id)
+    explanation = (await explain_job_matches(candidate.summary(), [match]))[req.job_id]
+    return {**explanation, **{k: match[k] for k in ("match_score", "match_grade", "eligible", "breakdown")}}
 
 
 class RoadmapGenReq(BaseModel):
@@ -82,22 +113,32 @@ class RoadmapGenReq(BaseModel):
     current_skills: List[str] = []
     hours_per_week: int = 10
 
-@router.post("/generate-roadmap")
-def ai_generate_roadmap(req: RoadmapGenReq, user: User = Depends(require_user), db: Session = Depends(get_db)):
+@router.post("/generate-roadmap", status_code=202)
+async def ai_generate_roadmap(req: RoadmapGenReq, fresh: bool = False, user: User = Depends(require_user), db: Session = Depends(get_db)):
+    """Queue roadmap generation; the job's result is {roadmap_id, roadmap}."""
+    user_id = user.id
+    ctx = {"hours_per_week": req.hours_per_week,
+           **await asyncio.to_thread(_profile_context, db, user, "college_tier", "stream", "graduation_year")}
+    payload = {"target_career": req.target_career, "current_skills": req.current_skills,
+               "hours_per_week": req.hours_per_week, "context": ctx, "fresh": fresh}
+    return await job_queue.submit(db, "generate_roadmap", user_id, payload)
+
+
+@job_queue.handler("generate_roadmap")
+async def _generate_roadmap_job(job: job_queue.JobContext) -> dict:
     from models import LearningRoadmap, RoadmapPhase, RoadmapMilestone
-    
-    ctx = {"hours_per_week": req.hours_per_week}
-    if user.profile:
-        ctx.update({"college_tier": user.profile.college_tier, "stream": user.profile.stream, "graduation_year": user.profile.graduation_year})
-    
-    result = generate_roadmap(req.target_career, req.current_skills, ctx)
-    
-    # Save to database
+    p = job.payload
+    with ai_cache.bypass(p.get("fresh", False)):
+        result = await generate_roadmap(p["target_career"], p["current_skills"], p["context"])
+    await job.progress(80)
+
+    # Save to database (committed by the worker together with the job result)
+    db = job.db
     roadmap = LearningRoadmap(
-        user_id=user.id,
-        target_career_name=req.target_career,
+        user_id=job.user_id,
+        target_career_name=p["target_career"],
         total_months=result.get("total_months", 6),
-        hours_per_week=req.hours_per_week,
+        hours_per_week=p["hours_per_week"],
     )
     db.add(roadmap)
     db.flush()
@@ -116,7 +157,8 @@ def ai_generate_roadmap(req: RoadmapGenReq, user: User = Depends(require_user),
         for ms_data in phase_data.get("milestones", []):
             milestone = RoadmapMilestone(
                 phase_id=phase.id,
-                user_id=user.id,
+                roadmap_id=roadmap.id,
+                user_id=job.user_id,
                 milestone_order=ms_data.get("order", 1),
                 skill_name=ms_data.get("skill_name", ""),
                 resource_name=ms_data.get("resource_name", ""),
@@ -128,7 +170,7 @@ def ai_generate_roadmap(req: RoadmapGenReq, user: User = Depends(require_user),
             )
             db.add(milestone)
     
-    db.commit()
+    db.flush()
     return {"roadmap_id": roadmap.id, "roadmap": result}
 
 
@@ -138,8 +180,10 @@ class InterviewPrepReq(BaseModel):
     round_type: str = "technical"
 
 @router.post("/interview-prep")
-def ai_interview_prep(req: InterviewPrepReq, user: User = Depends(require_user)):
-    result = generate_interview_prep(req.company, req.role, req.round_type)
+async def ai_interview_prep(req: InterviewPrepReq, fresh: bool = False, user: User = Depends(require_user), db: Session = Depends(get_db)):
+    await asyncio.to_thread(release_connection, db)
+    with ai_cache.bypass(fresh):
+        result = await generate_interview_prep(req.company, req.role, req.round_type)
     return result
 
 
@@ -156,17 +200,11 @@ class RerouteReq(BaseModel):
     placement_deadline: Optional[str] = None
 
 @router.post("/reroute-roadmap")
-def ai_reroute_roadmap(req: RerouteReq, user: User = Depends(require_user)):
+async def ai_reroute_roadmap(req: RerouteReq, user: User = Depends(require_user), db: Session = Depends(get_db)):
     """Bible XF-08 — When student falls behind, generate 3 reroute options"""
-    student_profile = {}
-    if user.profile:
-        student_profile = {
-            "college_tier": getattr(user.profile, 'college_tier', None),
-            "stream": getattr(user.profile, 'stream', None),
-            "graduation_year": getattr(user.profile, 'graduation_year', None),
-            "display_name": getattr(user.profile, 'display_name', user.email),
-        }
-    result = generate_reroute_options(
+    student_profile = await asyncio.to_thread(
+        _profile_context, db, user, "college_tier", "stream", "graduation_year", "display_name")
+    result = await generate_reroute_options(
         req.original_roadmap, req.completed_milestones, req.missed_milestones,
         student_profile, req.available_hours_per_week, req.target_career, req.placement_deadline
     )
@@ -178,24 +216,20 @@ def ai_reroute_roadmap(req: RerouteReq, user: User = Depends(require_user)):
 # ═══════════════════════════════════════════════════════════════
 
 @router.get("/parent-report")
-def ai_parent_report(user: User = Depends(require_user)):
+async def ai_parent_report(user: User = Depends(require_user), db: Session = Depends(get_db)):
     """Bible XF-10 — Weekly parent-friendly progress report"""
-    student_profile = {
-        "display_name": getattr(user.profile, 'display_name', user.email) if user.profile else user.email,
-        "email": user.email,
-    }
-    if user.profile:
-        student_profile.update({
-            "target_role": getattr(user.profile, 'target_role', None),
-            "college_name": getattr(user.profile, 'college_name', None),
-        })
+    email = user.email
+    profile = await asyncio.to_thread(_profile_context, db, user, "display_name", "target_role", "college_name")
+    student_profile = {"display_name": profile["display_name"] if profile else email, "email": email}
+    if profile:
+        student_profile.update({"target_role": profile["target_role"], "college_name": profile["college_name"]})
     weekly_activity = {
         "problems_solved": 8,
         "modules_completed": 1,
         "streak_days": 12,
         "hours_spent": 6,
     }
-    result = generate_parent_report(student_profile, weekly_activity)
+    result = await generate_parent_report(student_profile, weekly_activity)
     return result
 
 
@@ -209,10 +243,11 @@ class SalaryTruthReq(BaseModel):
     city: str
 
 @router.post("/salary-truth")
-def ai_salary_truth(req: SalaryTruthReq, user: User = Depends(require_user)):
+async def ai_salary_truth(req: SalaryTruthReq, user: User = Depends(require_user), db: Session = Depends(get_db)):
     """Bible XF-10 — CTC vs in-hand salary breakdown for parents"""
-    college_tier = user.profile.college_tier if user.profile else 2
-    result = check_salary_truth(req.ctc_lpa, req.role, req.city, college_tier)
+    profile = await asyncio.to_thread(_profile_context, db, user, "college_tier")
+    college_tier = profile["college_tier"] if profile else 2
+    result = await check_salary_truth(req.ctc_lpa, req.role, req.city, college_tier)
     return result
 
 
@@ -230,9 +265,10 @@ class NegotiateReq(BaseModel):
     conversation_history: list = []
 
 @router.post("/negotiate-salary")
-def ai_negotiate_salary(req: NegotiateReq, user: User = Depends(require_user)):
+async def ai_negotiate_salary(req: NegotiateReq, user: User = Depends(require_user), db: Session = Depends(get_db)):
     """Bible 05-D — Interactive salary negotiation simulator with HR recruiter persona"""
-    result = salary_negotiation_simulator(
+    await asyncio.to_thread(release_connection, db)
+    result = await salary_negotiation_simulator(
         req.company_type, req.role, req.initial_offer_lpa,
         req.budget_ceiling_lpa, req.scenario,
         req.student_message, req.conversation_history
@@ -254,9 +290,10 @@ class CareerDayReq(BaseModel):
     conversation_history: list = []
 
 @router.post("/career-day-simulator")
-def ai_career_day(req: CareerDayReq, user: User = Depends(require_user)):
+async def ai_career_day(req: CareerDayReq, user: User = Depends(require_user), db: Session = Depends(get_db)):
     """Bible 05-G — Interactive day-in-the-life career simulation"""
-    result = career_day_simulator(
+    await asyncio.to_thread(release_connection, db)
+    result = await career_day_simulator(
         req.career, req.company_type, req.city, req.level,
         req.student_choice, req.decision_number, req.conversation_history
     )
@@ -273,9 +310,10 @@ class EmotionReq(BaseModel):
     positive_history: list = []
 
 @router.post("/wellbeing-check")
-def ai_wellbeing_check(req: EmotionReq, user: User = Depends(require_user)):
+async def ai_wellbeing_check(req: EmotionReq, user: User = Depends(require_user), db: Session = Depends(get_db)):
     """Bible 05-F — Triggered by behavioral signals — wellbeing support"""
-    result = emotion_aware_intervention(
+    await asyncio.to_thread(release_connection, db)
+    result = await emotion_aware_intervention(
         req.signal_type, req.student_data, req.positive_history
     )
     return result
@@ -12,6 +12,7 @@ from models import (
     User, AptitudeTestSession, UserAptitudeProfile, Question
 )
 from auth import require_user
+import score_calculator
 
 router = APIRouter()
 
@@ -264,6 +265,7 @@ def submit_aptitude_test(
     if len(trend) > 50:
         trend = trend[-50:]
     profile.score_trend = trend
+    score_calculator.refresh_score(db, user.id, aptitude_percentile=percentile)
 
     db.commit()
 
@@ -1,4 +1,4 @@
-"""Mentixy Assessment 4D — start, submit answers, get profile (AI-powered)"""
+"""Mentixy Assessment 4D — start, submit answers (scored locally), get profile"""
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import Optional, List
@@ -6,9 +6,12 @@ from sqlalchemy.orm import Session
 from datetime import datetime, timezone
 
 from database import get_db
-from models import (User, AssessmentSession, AssessmentAnswer, CareerProfile4D, CareerMatch, Question)
+from models import (User, UserProfile, AssessmentSession, AssessmentAnswer, CareerProfile4D, CareerMatch, Question)
 from auth import require_user
-from ai_engine import analyze_4d_assessment
+from ai_engine import write_4d_narrative
+import assessment_scoring
+import job_queue
+import score_calculator
 
 router = APIRouter()
 
@@ -106,78 +109,105 @@ class SubmitReq(BaseModel):
     answers: List[AnswerReq]
 
 @router.post("/submit")
-async def submit_assessment(req: SubmitReq, user: User = Depends(require_user), db: Session = Depends(get_db)):
+def submit_assessment(req: SubmitReq, user: User = Depends(require_user), db: Session = Depends(get_db)):
+    """Save the answers and score them locally (assessment_scoring) — the profile
+    and career matches are persisted and returned straight away. The archetype
+    narrative is written afterwards by the `assessment_narrative` job."""
     session = db.query(AssessmentSession).filter_by(id=req.session_id, user_id=user.id).first()
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
     # Save answers
-    answer_data = []
-    time_data = []
+    answers = []
     for a in req.answers:
         db.add(AssessmentAnswer(
             session_id=session.id, question_id=a.question_id,
             selected_option=a.selected_option, time_spent_ms=a.time_spent_ms,
             question_order=a.question_order,
         ))
-        answer_data.append({"question_id": a.question_id, "selected": a.selected_option, "order": a.question_order})
-        time_data.append(a.time_spent_ms)
+        answers.append({"question_id": a.question_id, "selected": a.selected_option, "time_spent_ms": a.time_spent_ms})
 
     session.is_complete = True
     session.completed_at = datetime.now(timezone.utc)
 
-    # Run AI 4D analysis (Gemini or mock fallback)
-    ai_result = await analyze_4d_assessment(answer_data, time_data)
-
-    dims = ai_result.get("dimensions", {"analytical": 70, "interpersonal": 60, "creative": 55, "systematic": 65})
-    archetype = ai_result.get("archetype", {"code": "AN", "name": "The Architect"})
-    dominant = ai_result.get("dominant_dimension", "analytical")
+    # Built-in questions aren't in the table; their options follow the A–D convention
+    ids = [a.question_id for a in req.answers]
+    questions = dict(db.query(Question.id, Question.options).filter(Question.id.in_(ids)).all()) if ids else {}
+    result = assessment_scoring.score_assessment(answers, questions, assessment_scoring.career_matrix(db))
+    dims, archetype = result["dimensions"], result["archetype"]
 
+    db.query(CareerProfile4D).filter_by(user_id=user.id, is_current=True).update({"is_current": False})
     profile = CareerProfile4D(
         user_id=user.id, session_id=session.id,
-        dim_analytical=dims.get("analytical", 70),
-        dim_interpersonal=dims.get("interpersonal", 60),
-        dim_creative=dims.get("creative", 55),
-        dim_systematic=dims.get("systematic", 65),
-        dominant_dimension=dominant,
-        archetype_code=archetype.get("code", "AN"),
-        archetype_name=archetype.get("name", "The Architect"),
-        consistency_score=ai_result.get("consistency_score", 80),
+        dim_analytical=dims["analytical"],
+        dim_interpersonal=dims["interpersonal"],
+        dim_creative=dims["creative"],
+        dim_systematic=dims["systematic"],
+        dominant_dimension=result["dominant_dimension"],
+        archetype_code=archetype["code"],
+        archetype_name=archetype["name"],
+        archetype_description=archetype["description"],
+        avg_response_time_ms=result["avg_response_time_ms"],
+        consistency_score=result["consistency_score"],
     )
     db.add(profile)
     db.flush()
 
     # Save career matches
-    for rank, career in enumerate(ai_result.get("top_careers", [])[:5], 1):
+    for rank, career in enumerate(result["top_careers"], 1):
         db.add(CareerMatch(
             user_id=user.id, profile_id=profile.id,
-            career_slug=career.get("slug", f"career-{rank}"),
-            career_name=career.get("name", "Unknown"),
-            match_score=career.get("match_score", 70),
-            rank=rank,
-            driving_dimension=career.get("driving_dimension", dominant),
-            why_match=career.get("why", ""),
+            career_slug=career["slug"], career_name=career["name"],
+            match_score=career["match_score"], rank=rank,
+            driving_dimension=career["driving_dimension"],
+            salary_p50=career["salary_p50"],
+            why_match=career["why"],
         ))
 
-    # Update user profile
-    if user.profile:
-        user.profile.archetype_code = archetype.get("code", "AN")
-        user.profile.archetype_name = archetype.get("name", "The Architect")
-
+    score_calculator.refresh_score(db, user.id, assessment_completion=100)
+    # Update user profile through the ORM, so the leaderboards' profile feed sees
+    # it (already loaded by refresh_score: no query)
+    user_profile = db.get(UserProfile, user.id)
+    if user_profile:
+        user_profile.archetype_code = archetype["code"]
+        user_profile.archetype_name = archetype["name"]
+
+    # Narrative commits with the profile, so a worker never sees one without the other
+    job = job_queue.defer(db, "assessment_narrative", user.id, {"profile_id": profile.id, "result": result})
+    narrative = {"job_id": job.id, "status_url": f"/api/queue/jobs/{job.id}"} if job else None
     db.commit()
     return {
         "profile": {
             "dimensions": dims,
-            "dominant": dominant,
+            "dominant": result["dominant_dimension"],
             "archetype": archetype,
-            "consistency_score": ai_result.get("consistency_score", 80),
+            "consistency_score": result["consistency_score"],
         },
-        "matches": [{"slug": c.get("slug"), "name": c.get("name"), "score": c.get("match_score"), "why": c.get("why")} for c in ai_result.get("top_careers", [])[:5]],
-        "personality_summary": ai_result.get("personality_summary", ""),
-        "advice": ai_result.get("advice", ""),
+        "matches": [{"slug": c["slug"], "name": c["name"], "score": c["match_score"], "why": c["why"]}
+                    for c in result["top_careers"]],
+        "personality_summary": result["personality_summary"],
+        "advice": result["advice"],
+        "narrative": narrative,
     }
 
 
+@job_queue.handler("assessment_narrative")
+async def _assessment_narrative_job(job: job_queue.JobContext) -> dict:
+    result = job.payload["result"]
+    narrative = await write_4d_narrative(result)
+    await job.progress(80)
+
+    db = job.db
+    profile = db.get(CareerProfile4D, job.payload["profile_id"])
+    if profile is None:   # superseded and removed meanwhile
+        return narrative
+    profile.archetype_description = narrative["archetype_description"]
+    for match in profile.matches:
+        match.why_match = narrative["why"].get(match.career_slug, match.why_match)
+    db.flush()
+    return narrative
+
+
 @router.get("/profile")
 def get_profile(user: User = Depends(require_user), db: Session = Depends(get_db)):
     profile = db.query(CareerProfile4D).filter_by(user_id=user.id, is_current=True).first()
@@ -190,7 +220,8 @@ def get_profile(user: User = Depends(require_user), db: Session = Depends(get_db
             "analytical": profile.dim_analytical, "interpersonal": profile.dim_interpersonal,
             "creative": profile.dim_creative, "systematic": profile.dim_systematic,
         },
-        "archetype": {"code": profile.archetype_code, "name": profile.archetype_name},
+        "archetype": {"code": profile.archetype_code, "name": profile.archetype_name,
+                      "description": profile.archetype_description},
         "consistency_score": profile.consistency_score,
         "matches": [{"slug": m.career_slug, "name": m.career_name, "score": m.match_score, "rank": m.rank, "why": m.why_match} for m in matches],
     }
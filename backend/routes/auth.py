@@ -68,6 +68,7 @@ def _user_response(user: User, profile: UserProfile):
             "bio": profile.bio,
             "city": profile.city,
             "state": profile.state,
+            "college_id": profile.college_id,
             "college_name": profile.college_name,
             "college_tier": profile.college_tier,
             "stream": profile.stream,
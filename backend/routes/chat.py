@@ -1,13 +1,22 @@
-"""Mentixy AI Chat — Gemini-powered career advisor"""
+"""Mentixy AI Chat — Gemini-powered career advisor (history bounded by chat_memory)"""
+import asyncio
+
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
-from database import get_db
-from models import ChatSession, User
+import json
+import time
+from database import get_db, release_connection, SessionLocal
+from models import ChatSession, ChatSummary, User
 from auth import require_user
-from ai_engine import career_chat
+from ai_engine import career_chat, career_chat_stream, summarize_chat
+from websocket_hub import manager as ws_manager
+import ai_telemetry
+import chat_memory
+import job_queue
 
 router = APIRouter()
 
@@ -15,19 +24,20 @@ class ChatReq(BaseModel):
     message: str
     session_id: Optional[str] = None
 
-@router.post("")
-@router.post("/")
-async def chat(req: ChatReq, user: User = Depends(require_user), db: Session = Depends(get_db)):
+def _open_session(req: ChatReq, user: User, db: Session):
+    """Load or create the chat session, append the question and commit it.
+    Returns (session id, unsummarized history before this message, rolling summary,
+    user profile context). Sync — async routes run it with asyncio.to_thread. Queues a compaction when the history has grown too big."""
     if req.session_id:
         session = db.query(ChatSession).filter_by(id=req.session_id, user_id=user.id).first()
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
     else:
-        session = ChatSession(user_id=user.id, title=req.message[:50], messages=[])
+        session = ChatSession(user_id=user.id, title=req.message[:50], messages=[], summary=None)
         db.add(session)
         db.flush()
 
-    msgs = session.messages or []
+    msgs = list(session.messages or [])  # a copy, so the assignment below registers as a change
     msgs.append({"role": "user", "content": req.message, "ts": str(datetime.now(timezone.utc))})
 
     # Build user profile context for AI
@@ -44,14 +54,119 @@ async def chat(req: ChatReq, user: User = Depends(require_user), db: Session = D
             "mentixy_score": user.profile.mentixy_score,
         }
 
+    memory = session.summary
+    covered = memory.covered if memory else 0
+    summary = memory.summary if memory else None
+    if chat_memory.needs_compaction(msgs, covered, memory.requested_at if memory else None):
+        if job_queue.defer(db, "chat_compact", user.id, {"session_id": session.id}):
+            if memory is None:
+                memory = session.summary = ChatSummary(session_id=session.id, summary="", covered=0)
+            memory.requested_at = datetime.now(timezone.utc)
+
+    # Persist the question before the slow AI call so no transaction stays open across it
+    session.messages = list(msgs)
+    session_id = session.id
+    release_connection(db)
+    return session_id, msgs[covered:-1], summary, user_profile
+
+
+@router.post("")
+@router.post("/")
+async def chat(req: ChatReq, user: User = Depends(require_user), db: Session = Depends(get_db)):
+    session_id, history, summary, user_profile = await asyncio.to_thread(_open_session, req, user, db)
+
     # Generate AI response via Gemini (or mock fallback)
-    ai_reply = await career_chat(req.message, msgs[:-1], user_profile)
-    msgs.append({"role": "assistant", "content": ai_reply, "ts": str(datetime.now(timezone.utc))})
+    ai_reply = await career_chat(req.message, history, user_profile, summary)
+
+    await asyncio.to_thread(_save_reply, session_id, ai_reply, False)
+    return {"session_id": session_id, "reply": ai_reply}
+
+
+# ─── Streaming ───
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _save_reply(session_id: str, reply: str, interrupted: bool):
+    if not reply:
+        return
+    db = SessionLocal()
+    try:
+        session = db.query(ChatSession).filter_by(id=session_id).first()
+        if session is None:
+            return
+        msg = {"role": "assistant", "content": reply, "ts": str(datetime.now(timezone.utc))}
+        if interrupted:
+            msg["interrupted"] = True
+        session.messages = list(session.messages or []) + [msg]
+        session.updated_at = datetime.now(timezone.utc)
+        db.commit()
+    finally:
+        db.close()
+
+
+@router.post("/stream")
+async def chat_stream(req: ChatReq, user: User = Depends(require_user), db: Session = Depends(get_db)):
+    """Career chat as Server-Sent Events: `start`, then `token` events as Gemini
+    produces text, then `done` with the full reply and time-to-first-token.
+
+    Tokens are mirrored to the user's open WebSocket connections (chat_token /
+    chat_done), so other tabs and devices follow along. The assembled reply is
+    saved to the ChatSession when the stream ends — including a partial one
+    (marked interrupted) if the client disconnects.
+    """
+    user_id = user.id
+    session_id, history, summary, user_profile = await asyncio.to_thread(_open_session, req, user, db)
+
+    async def events():
+        started = time.perf_counter()
+        ttft_ms = None
+        chunks = []
+        finished = False
+        yield _sse("start", {"session_id": session_id})
+        try:
+            async for text in career_chat_stream(req.message, history, user_profile, summary):
+                if ttft_ms is None:
+                    ttft_ms = round((time.perf_counter() - started) * 1000, 1)
+                chunks.append(text)
+                yield _sse("token", {"text": text})
+                if ws_manager.is_user_online(user_id):
+                    await ws_manager.send_to_user(user_id, {"type": "chat_token", "session_id": session_id, "text": text})
+            finished = True
+        finally:
+            # Also runs when the client goes away mid-stream: shielded, so a
+            # cancelled stream still finishes the save in its thread
+            await asyncio.shield(asyncio.to_thread(_save_reply, session_id, "".join(chunks), not finished))
+        reply = "".join(chunks)
+        total_ms = round((time.perf_counter() - started) * 1000, 1)
+        if ws_manager.is_user_online(user_id):
+            await ws_manager.send_to_user(user_id, {"type": "chat_done", "session_id": session_id, "reply": reply})
+        yield _sse("done", {"session_id": session_id, "reply": reply, "ttft_ms": ttft_ms, "total_ms": total_ms})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@job_queue.handler("chat_compact")
+async def _chat_compact_job(job: job_queue.JobContext) -> dict:
+    """Fold all but the newest turns into the session's rolling summary."""
+    db = job.db
+    session = db.query(ChatSession).filter_by(id=job.payload["session_id"]).first()
+    if session is None:
+        return {"covered": 0}
+    memory = session.summary or ChatSummary(session_id=session.id, summary="", covered=0)
+    messages = list(session.messages or [])
+    start, end = chat_memory.fold_range(messages, memory.covered or 0)
+    if end > start:
+        memory.summary = await summarize_chat(memory.summary, messages[start:end])
+        memory.covered = end
+        memory.tokens = ai_telemetry.estimate_tokens(memory.summary)
+    memory.requested_at = None
+    session.summary = memory
+    db.flush()
+    return {"covered": memory.covered, "tokens": memory.tokens}
 
-    session.messages = msgs
-    session.updated_at = datetime.now(timezone.utc)
-    db.commit()
-    return {"session_id": session.id, "reply": ai_reply}
 
 @router.get("/sessions")
 def list_sessions(user: User = Depends(require_user), db: Session = Depends(get_db)):
@@ -63,4 +178,5 @@ def get_session(session_id: str, user: User = Depends(require_user), db: Session
     s = db.query(ChatSession).filter_by(id=session_id, user_id=user.id).first()
     if not s:
         raise HTTPException(status_code=404, detail="Session not found")
-    return {"id": s.id, "title": s.title, "messages": s.messages}
+    return {"id": s.id, "title": s.title, "messages": s.messages,
+            "summary": {"text": s.summary.summary, "covered": s.summary.covered} if s.summary and s.summary.covered else None}
@@ -5,9 +5,10 @@ from typing import Optional
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
 
-from database import get_db
+from database import get_db, get_read_db
 from models import CodingProblem, UserProblemSubmission, UserCodingStats, User
 from auth import require_user
+import score_calculator
 
 router = APIRouter()
 
@@ -69,7 +70,7 @@ def list_problems(
     difficulty: Optional[str] = None,
     company: Optional[str] = None,
     skip: int = 0, limit: int = 20,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     q = db.query(CodingProblem).filter(CodingProblem.is_active == True)
     if category:
@@ -242,6 +243,8 @@ def submit_solution(slug: str, req: SubmitReq, user: User = Depends(require_user
         field = diff_map.get(problem.difficulty)
         if field:
             setattr(stats, field, (getattr(stats, field) or 0) + 1)
+        score_calculator.refresh_score(db, user.id, coding_consistency=score_calculator.coding_raw(
+            stats.current_streak_days, stats.problems_solved_total))
 
     db.commit()
 
@@ -5,12 +5,15 @@ Uses SQLAlchemy with SQLite/PostgreSQL (no supabase client)
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional, List
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
 from datetime import datetime, timezone
 
-from database import get_db
+from database import get_db, get_async_db
 from models import User, UserProfile, CommunityPost, PostComment, PostLike, ViyaNotification
-from auth import require_user, get_current_user
+from auth import require_user, get_current_user, get_current_user_async
+import score_calculator
 
 router = APIRouter()
 
@@ -25,8 +28,8 @@ class CreateCommentReq(BaseModel):
     content: str
 
 
-def _post_response(post: CommunityPost, current_user_id: str = None):
-    """Format a post for API response."""
+def _post_response(post: CommunityPost, current_user_id: str = None, user_liked: Optional[bool] = None):
+    """Format a post for API response. Pass user_liked to skip loading post.likes."""
     author_name = "Anonymous"
     author_avatar = None
     author_username = None
@@ -37,9 +40,10 @@ def _post_response(post: CommunityPost, current_user_id: str = None):
             author_username = post.author.profile.username
 
     # Check if current user liked this post
-    user_liked = False
-    if current_user_id and post.likes:
-        user_liked = any(like.user_id == current_user_id for like in post.likes)
+    if user_liked is None:
+        user_liked = False
+        if current_user_id and post.likes:
+            user_liked = any(like.user_id == current_user_id for like in post.likes)
 
     return {
         "id": post.id,
@@ -77,28 +81,42 @@ def _comment_response(comment: PostComment):
 
 
 @router.get("/posts")
-def get_posts(
+async def get_posts(
     category: Optional[str] = None,
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=50),
-    user: Optional[User] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user: Optional[User] = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get community posts with optional category filter."""
-    query = db.query(CommunityPost).filter(
+    query = select(CommunityPost).where(
         CommunityPost.moderation_status == "approved"
-    ).order_by(CommunityPost.is_pinned.desc(), CommunityPost.created_at.desc())
+    )
 
     if category and category not in ("all", ""):
-        query = query.filter(CommunityPost.post_type == category)
+        query = query.where(CommunityPost.post_type == category)
 
-    total = query.count()
+    total = await db.scalar(select(func.count()).select_from(query.subquery()))
     offset = (page - 1) * limit
-    posts = query.offset(offset).limit(limit).all()
+    # Authors + profiles are eager-loaded: the async session can't lazy-load
+    result = await db.execute(
+        query.options(selectinload(CommunityPost.author).selectinload(User.profile))
+        .order_by(CommunityPost.is_pinned.desc(), CommunityPost.created_at.desc())
+        .offset(offset).limit(limit)
+    )
+    posts = result.scalars().all()
 
     user_id = user.id if user else None
+    liked_ids = set()
+    if user_id and posts:
+        liked = await db.execute(select(PostLike.post_id).where(
+            PostLike.user_id == user_id,
+            PostLike.post_id.in_([p.id for p in posts]),
+        ))
+        liked_ids = set(liked.scalars().all())
+
     return {
-        "posts": [_post_response(p, user_id) for p in posts],
+        "posts": [_post_response(p, user_id, p.id in liked_ids) for p in posts],
         "page": page,
         "total": total,
         "has_more": (offset + limit) < total,
@@ -145,6 +163,7 @@ def create_post(req: CreatePostReq, user: User = Depends(require_user), db: Sess
         tags=req.tags,
     )
     db.add(post)
+    score_calculator.refresh_score(db, user.id, "community")
     db.commit()
     db.refresh(post)
 
@@ -246,6 +265,7 @@ def delete_post(post_id: str, user: User = Depends(require_user), db: Session =
         raise HTTPException(status_code=403, detail="Not your post")
 
     db.delete(post)
+    score_calculator.refresh_score(db, post.author_id, "community")
     db.commit()
     return {"success": True}
 
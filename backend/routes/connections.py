@@ -12,6 +12,7 @@ from datetime import datetime, timezone
 from database import get_db
 from models import User, UserProfile, UserConnection, ViyaNotification
 from auth import require_user
+import score_calculator
 
 router = APIRouter()
 
@@ -179,6 +180,8 @@ def connect_with_peer(req: ConnectReq, user: User = Depends(require_user), db: S
             if existing.requester_id == req.user_id:
                 existing.status = "accepted"
                 existing.responded_at = datetime.now(timezone.utc)
+                for user_id in (user.id, req.user_id):
+                    score_calculator.refresh_score(db, user_id, "community")
                 db.commit()
                 return {"success": True, "status": "accepted", "message": "Connection accepted!"}
             raise HTTPException(status_code=400, detail="Request already sent")
@@ -192,6 +195,8 @@ def connect_with_peer(req: ConnectReq, user: User = Depends(require_user), db: S
         responded_at=datetime.now(timezone.utc),
     )
     db.add(connection)
+    for user_id in (user.id, req.user_id):
+        score_calculator.refresh_score(db, user_id, "community")
     db.commit()
 
     # Notify the other user
@@ -225,6 +230,9 @@ def disconnect_peer(req: DisconnectReq, user: User = Depends(require_user), db:
         raise HTTPException(status_code=404, detail="Connection not found")
 
     db.delete(connection)
+    if connection.status == "accepted":
+        for user_id in (user.id, req.user_id):
+            score_calculator.refresh_score(db, user_id, "community")
     db.commit()
     return {"success": True, "message": "Disconnected"}
 
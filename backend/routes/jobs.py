@@ -1,47 +1,82 @@
 """Mentixy Jobs Engine — listing, search, apply, track, AI match"""
+import asyncio
+
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional, List
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
 from datetime import datetime, timezone
 
-from database import get_db
+from database import get_db, get_async_db, release_connection
 from models import JobListing, UserJobApplication, User
 from auth import require_user
+from ai_engine import explain_job_matches
+import job_match
+from job_match import job_dict as _job_dict
 
 router = APIRouter()
 
 
 @router.get("")
-def list_jobs(
+async def list_jobs(
     q: Optional[str] = None,
     role_type: Optional[str] = None,
     location: Optional[str] = None,
     min_salary: Optional[float] = None,
     company_type: Optional[str] = None,
     skip: int = 0, limit: int = 20,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(JobListing).filter(JobListing.is_active == True)
+    query = select(JobListing).where(JobListing.is_active == True)
     if q:
-        query = query.filter(
+        query = query.where(
             (JobListing.role_title.ilike(f"%{q}%")) |
             (JobListing.company_name.ilike(f"%{q}%"))
         )
     if role_type:
-        query = query.filter(JobListing.role_type == role_type)
+        query = query.where(JobListing.role_type == role_type)
     if location:
-        query = query.filter(JobListing.location.ilike(f"%{location}%"))
+        query = query.where(JobListing.location.ilike(f"%{location}%"))
     if min_salary:
-        query = query.filter(JobListing.salary_min_lpa >= min_salary)
+        query = query.where(JobListing.salary_min_lpa >= min_salary)
     if company_type:
-        query = query.filter(JobListing.company_type == company_type)
+        query = query.where(JobListing.company_type == company_type)
 
-    total = query.count()
-    jobs = query.order_by(JobListing.posted_at.desc()).offset(skip).limit(limit).all()
+    total = await db.scalar(select(func.count()).select_from(query.subquery()))
+    result = await db.execute(query.order_by(JobListing.posted_at.desc()).offset(skip).limit(limit))
+    jobs = result.scalars().all()
     return {"total": total, "jobs": [_job_dict(j) for j in jobs]}
 
 
+def _load_candidate(db: Session, user: User, expected_lpa: Optional[float]):
+    """The user's match profile, then the connection released for the AI call."""
+    candidate = job_match.load_candidate(db, user, expected_lpa)
+    release_connection(db)
+    return candidate
+
+
+@router.get("/matched")
+async def matched_jobs(
+    skip: int = Query(0, ge=0), limit: int = Query(20, ge=1, le=50),
+    explain: int = Query(3, ge=0, le=10),
+    expected_lpa: Optional[float] = Query(None, gt=0),
+    user: User = Depends(require_user), db: Session = Depends(get_db)
+):
+    """Every active job scored for the user (job_match.py), best first.
+    The first `explain` jobs on the page get an AI explanation of their score."""
+    candidate = await asyncio.to_thread(_load_candidate, db, user, expected_lpa)
+    ranked = job_match.rank(await asyncio.to_thread(job_match.matrix), candidate, limit=limit, offset=skip)
+    top = ranked["matches"][:explain]
+    explanations = await explain_job_matches(candidate.summary(), top) if top else {}
+    return {
+        "total": ranked["total"],
+        "scored_in_ms": ranked["scored_in_ms"],
+        "jobs": [_matched_dict(m, explanations.get(m["job"]["id"])) for m in ranked["matches"]],
+    }
+
+
 @router.get("/{job_id}")
 def get_job(job_id: str, db: Session = Depends(get_db)):
     job = db.query(JobListing).filter(JobListing.id == job_id).first()
@@ -50,21 +85,6 @@ def get_job(job_id: str, db: Session = Depends(get_db)):
     return _job_dict(job)
 
 
-@router.get("/matched")
-def matched_jobs(user: User = Depends(require_user), db: Session = Depends(get_db)):
-    profile = user.profile
-    if not profile:
-        return {"jobs": []}
-    query = db.query(JobListing).filter(JobListing.is_active == True)
-    if profile.graduation_year:
-        query = query.filter(
-            (JobListing.graduation_year_min <= profile.graduation_year) |
-            (JobListing.graduation_year_min == None)
-        )
-    jobs = query.order_by(JobListing.posted_at.desc()).limit(20).all()
-    return {"jobs": [_job_dict(j) for j in jobs]}
-
-
 class ApplyReq(BaseModel):
     resume_version_id: Optional[str] = None
     cover_letter: Optional[str] = None
@@ -113,16 +133,7 @@ def update_application(app_id: str, req: UpdateAppReq, user: User = Depends(requ
     return {"status": "updated"}
 
 
-def _job_dict(j: JobListing):
-    return {
-        "id": j.id, "company_name": j.company_name, "company_logo_url": j.company_logo_url,
-        "company_type": j.company_type, "role_title": j.role_title, "role_type": j.role_type,
-        "location": j.location, "is_remote": j.is_remote,
-        "salary_min_lpa": j.salary_min_lpa, "salary_max_lpa": j.salary_max_lpa,
-        "required_skills": j.required_skills, "preferred_skills": j.preferred_skills,
-        "description_honest": j.description_honest,
-        "interview_rounds": j.interview_rounds, "interview_difficulty": j.interview_difficulty,
-        "application_deadline": str(j.application_deadline) if j.application_deadline else None,
-        "posted_at": str(j.posted_at), "source": j.source, "is_verified": j.is_verified,
-        "funding_stage": j.funding_stage, "team_size_range": j.team_size_range,
-    }
+def _matched_dict(m: dict, explanation: dict = None):
+    match = {k: m[k] for k in ("match_score", "match_grade", "eligible", "matched_skills", "missing_skills", "breakdown")}
+    match["explanation"] = explanation
+    return {**m["job"], "match": match}
@@ -1,46 +1,49 @@
 """Mentixy Leaderboard & Campus Wars — college vs college gamification
 Bible Section 1 (Prompt 1.2 §9) + Section 3 (Prompt 3.1 §Screen 9)
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Query
 from typing import Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
 
-from database import get_db
-from models import (
-    User, UserProfile, UserCodingStats, UserViyaScoreLog,
-    College, UserActivityDaily
-)
+from database import get_db, get_read_db
+from models import User, College, CollegeStats, UserActivityDaily
 from auth import require_user
+import college_stats  # noqa: F401 — registers the Campus Wars jobs
+import rankings
 
 router = APIRouter()
 
 
 # ─── 0. Leaderboard Overview ───
+# Rankings come from the in-memory boards in rankings.py, not user_profiles.
+
+METRICS = {"mentixy_score": "mentixy_score", "streak": "streak_days", "problems_solved": "total_points"}
+
+
+def _entry(rank: int, p: dict) -> dict:
+    return {
+        "rank": rank,
+        "username": p["username"],
+        "display_name": p["display_name"],
+        "avatar_url": p["avatar_url"],
+        "college_name": p["college_name"],
+        "mentixy_score": p["mentixy_score"],
+        "streak_days": p["streak_days"],
+        "total_points": p["total_points"],
+        "archetype_name": p["archetype_name"],
+    }
+
 
 @router.get("")
-def leaderboard_overview(
-    db: Session = Depends(get_db),
-):
+def leaderboard_overview():
     """Get leaderboard overview — top users by Mentixy Score."""
-    profiles = db.query(UserProfile).filter(
-        UserProfile.mentixy_score > 0,
-    ).order_by(desc(UserProfile.mentixy_score)).limit(20).all()
-
+    rankings.ensure_loaded()
+    top = rankings.index.top("mentixy_score", 20, positive=True)
     return {
-        "total": len(profiles),
-        "leaderboard": [{
-            "rank": i + 1,
-            "username": p.username,
-            "display_name": p.display_name,
-            "avatar_url": p.avatar_url,
-            "college_name": p.college_name,
-            "mentixy_score": p.mentixy_score or 0,
-            "streak_days": p.streak_days or 0,
-            "archetype_name": p.archetype_name,
-        } for i, p in enumerate(profiles)],
+        "total": len(top),
+        "leaderboard": [_entry(rank, p) for rank, p in top],
     }
 
 
@@ -51,39 +54,42 @@ def individual_leaderboard(
     metric: str = "mentixy_score",  # mentixy_score | streak | problems_solved
     period: str = "all",         # all | weekly | monthly
     skip: int = 0, limit: int = 50,
-    db: Session = Depends(get_db),
 ):
     """
     Individual leaderboard ranked by Mentixy Score, streak, or problems solved.
     """
-    q = db.query(UserProfile)
-
-    if metric == "mentixy_score":
-        q = q.order_by(desc(UserProfile.mentixy_score))
-    elif metric == "streak":
-        q = q.order_by(desc(UserProfile.streak_days))
-    elif metric == "problems_solved":
-        q = q.order_by(desc(UserProfile.total_points))
-    else:
-        q = q.order_by(desc(UserProfile.mentixy_score))
+    rankings.ensure_loaded()
+    field = METRICS.get(metric, "mentixy_score")
+    return {
+        "metric": metric,
+        "total": rankings.index.count(field),
+        "leaderboard": [_entry(rank, p) for rank, p in rankings.index.top(field, limit, max(skip, 0))],
+    }
 
-    total = q.count()
-    profiles = q.offset(skip).limit(limit).all()
 
+@router.get("/me")
+def my_rank(
+    metric: str = "mentixy_score",  # mentixy_score | streak | problems_solved
+    scope: str = Query("global", pattern="^(global|college)$"),
+    around: int = Query(5, ge=0, le=25),
+    user: User = Depends(require_user),
+):
+    """The logged-in user's rank on a board and the users either side of them."""
+    rankings.ensure_loaded()
+    field = METRICS.get(metric, "mentixy_score")
+    me = rankings.index.member(user.id)
+    college = rankings.college_key(me) if me and scope == "college" else None
+    if me is None or (scope == "college" and not college):
+        return {"metric": metric, "scope": scope, "rank": None, "total": 0, "neighbors": []}
     return {
         "metric": metric,
-        "total": total,
-        "leaderboard": [{
-            "rank": skip + i + 1,
-            "username": p.username,
-            "display_name": p.display_name,
-            "avatar_url": p.avatar_url,
-            "college_name": p.college_name,
-            "mentixy_score": p.mentixy_score or 0,
-            "streak_days": p.streak_days or 0,
-            "total_points": p.total_points or 0,
-            "archetype_name": p.archetype_name,
-        } for i, p in enumerate(profiles)],
+        "scope": scope,
+        "college_id": me["college_id"] if college else None,
+        "college_name": me["college_name"] if college else None,
+        "rank": rankings.index.rank(user.id, field, college),
+        "total": rankings.index.count(field, college),
+        "neighbors": [dict(_entry(rank, p), is_me=p["user_id"] == user.id)
+                      for rank, p in rankings.index.around(user.id, field, around, college)],
     }
 
 
@@ -94,46 +100,40 @@ def campus_wars_leaderboard(
     state: Optional[str] = None,
     tier: Optional[int] = None,
     skip: int = 0, limit: int = 30,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
-    Campus Wars leaderboard — colleges ranked by aggregate student scores.
+    Campus Wars leaderboard — colleges ranked by their best students' Mentixy
+    Scores (top-k average; see college_stats.py), then by average score.
     """
-    q = db.query(College)
+    q = db.query(College, CollegeStats).join(CollegeStats, CollegeStats.college_id == College.id)
     if state:
         q = q.filter(College.state.ilike(f"%{state}%"))
     if tier:
         q = q.filter(College.tier == tier)
 
-    colleges = q.order_by(desc(College.avg_ctc_viya)).offset(skip).limit(limit).all()
-
-    results = []
-    for rank, college in enumerate(colleges, skip + 1):
-        # Count active students from this college
-        student_count = db.query(UserProfile).filter(
-            UserProfile.college_name.ilike(f"%{college.name}%"),
-        ).count()
-
-        # Aggregate Viya score
-        avg_score = db.query(func.avg(UserProfile.mentixy_score)).filter(
-            UserProfile.college_name.ilike(f"%{college.name}%"),
-            UserProfile.mentixy_score > 0,
-        ).scalar() or 0
-
-        results.append({
-            "rank": rank,
-            "college_id": college.id,
-            "college_name": college.name,
-            "slug": college.slug,
-            "city": college.city,
-            "state": college.state,
-            "tier": college.tier,
-            "nirf_rank": college.nirf_rank,
-            "active_students": student_count,
-            "avg_mentixy_score": round(float(avg_score), 1),
-            "placement_rate": college.placement_rate_viya,
-            "avg_ctc": college.avg_ctc_viya,
-        })
+    rows = q.order_by(desc(CollegeStats.top_k_score), desc(CollegeStats.avg_score), College.name) \
+        .offset(skip).limit(limit).all()
+
+    results = [{
+        "rank": rank,
+        "college_id": college.id,
+        "college_name": college.name,
+        "slug": college.slug,
+        "city": college.city,
+        "state": college.state,
+        "tier": college.tier,
+        "nirf_rank": college.nirf_rank,
+        "active_students": stats.student_count,
+        "avg_mentixy_score": round(stats.avg_score or 0, 1),
+        "median_mentixy_score": round(stats.median_score or 0, 1),
+        "top_mentixy_score": stats.top_score,
+        "top_k_score": round(stats.top_k_score or 0, 1),
+        "weekly_active_students": stats.weekly_active,
+        "weekly_activity": stats.weekly_activity,
+        "placement_rate": college.placement_rate_viya,
+        "avg_ctc": college.avg_ctc_viya,
+    } for rank, (college, stats) in enumerate(rows, skip + 1)]
 
     return {"total": len(results), "campus_wars": results}
 
@@ -141,43 +141,33 @@ def campus_wars_leaderboard(
 # ─── 3. My College Rank ───
 
 @router.get("/my-college")
-def my_college_rank(
-    user: User = Depends(require_user),
-    db: Session = Depends(get_db),
-):
+def my_college_rank(user: User = Depends(require_user)):
     """Get the logged-in user's college ranking in Campus Wars."""
-    profile = user.profile
-    if not profile or not profile.college_name:
+    rankings.ensure_loaded()
+    me = rankings.index.member(user.id)
+    college = rankings.college_key(me) if me else None
+    if not college:
         return {"has_college": False}
 
-    # Find college peers
-    peers = db.query(UserProfile).filter(
-        UserProfile.college_name == profile.college_name,
-        UserProfile.mentixy_score > 0,
-    ).order_by(desc(UserProfile.mentixy_score)).all()
-
-    my_rank = None
-    for i, p in enumerate(peers, 1):
-        if p.user_id == user.id:
-            my_rank = i
-            break
-
-    college_avg = sum(p.mentixy_score or 0 for p in peers) / max(len(peers), 1)
+    # Only students with a score count towards the college
+    total = rankings.index.count("mentixy_score", college, positive=True)
+    my_rank = rankings.index.rank(user.id, "mentixy_score", college) if me["mentixy_score"] > 0 else None
 
     return {
         "has_college": True,
-        "college_name": profile.college_name,
+        "college_id": me["college_id"],
+        "college_name": me["college_name"],
         "my_rank_in_college": my_rank,
-        "total_students": len(peers),
-        "college_avg_score": round(college_avg, 1),
-        "my_score": profile.mentixy_score or 0,
+        "total_students": total,
+        "college_avg_score": round(rankings.index.total("mentixy_score", college) / max(total, 1), 1),
+        "my_score": me["mentixy_score"],
         "top_students": [{
-            "rank": i + 1,
-            "username": p.username,
-            "display_name": p.display_name,
-            "mentixy_score": p.mentixy_score or 0,
-            "archetype_name": p.archetype_name,
-        } for i, p in enumerate(peers[:10])],
+            "rank": rank,
+            "username": p["username"],
+            "display_name": p["display_name"],
+            "mentixy_score": p["mentixy_score"],
+            "archetype_name": p["archetype_name"],
+        } for rank, p in rankings.index.top("mentixy_score", 10, college=college, positive=True)],
     }
 
 
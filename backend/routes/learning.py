@@ -2,12 +2,14 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import Optional
+from sqlalchemy import case, func, select
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
 
 from database import get_db
 from models import LearningRoadmap, RoadmapPhase, RoadmapMilestone, User
 from auth import require_user
+import score_calculator
 
 router = APIRouter()
 
@@ -52,5 +54,20 @@ def complete_milestone(milestone_id: str, user: User = Depends(require_user), db
         raise HTTPException(status_code=404, detail="Milestone not found")
     m.status = "completed"
     m.completed_at = datetime.now(timezone.utc)
+    # Milestones generated before roadmap_id was set reach their roadmap through the phase
+    m.roadmap_id = m.roadmap_id or db.scalar(select(RoadmapPhase.roadmap_id).where(RoadmapPhase.id == m.phase_id))
+    db.flush()
+
+    total, done = db.query(
+        func.count(RoadmapMilestone.id),
+        func.sum(case((RoadmapMilestone.status == "completed", 1), else_=0)),
+    ).filter(RoadmapMilestone.phase_id.in_(
+        select(RoadmapPhase.id).where(RoadmapPhase.roadmap_id == m.roadmap_id)
+    )).one()
+    roadmap = db.get(LearningRoadmap, m.roadmap_id) if m.roadmap_id else None
+    if roadmap and total:
+        roadmap.completion_pct = round(100 * (done or 0) / total, 1)
+        if roadmap.is_active:
+            score_calculator.refresh_score(db, user.id, "roadmap_progress")  # best of all active roadmaps
     db.commit()
-    return {"status": "completed"}
+    return {"status": "completed", "roadmap_completion_pct": roadmap.completion_pct if roadmap else None}
@@ -8,6 +8,8 @@ from datetime import datetime, timezone
 from database import get_db
 from models import UserConnection, CommunityPost, User, UserProfile
 from auth import require_user
+import college_resolver
+import score_calculator
 
 router = APIRouter()
 
@@ -40,6 +42,9 @@ def respond_connection(conn_id: str, accept: bool = True, user: User = Depends(r
         raise HTTPException(status_code=404, detail="Connection not found")
     conn.status = "accepted" if accept else "rejected"
     conn.responded_at = datetime.now(timezone.utc)
+    if accept:
+        for user_id in (conn.requester_id, conn.receiver_id):
+            score_calculator.refresh_score(db, user_id, "community")
     db.commit()
     return {"status": conn.status}
 
@@ -70,11 +75,11 @@ def find_peers(
     if career_path:
         q = q.filter(UserProfile.target_role.ilike(f"%{career_path}%"))
     if college:
-        q = q.filter(UserProfile.college_name.ilike(f"%{college}%"))
+        q = q.filter(college_resolver.profile_filter(college))
     peers = q.offset(skip).limit(limit).all()
     return {"peers": [{
         "user_id": p.user_id, "username": p.username, "display_name": p.display_name,
-        "college_name": p.college_name, "target_role": p.target_role,
+        "college_id": p.college_id, "college_name": p.college_name, "target_role": p.target_role,
         "mentixy_score": p.mentixy_score,
     } for p in peers]}
 
@@ -93,6 +98,7 @@ def create_post(req: PostReq, user: User = Depends(require_user), db: Session =
         post_type=req.post_type, tags=req.tags, is_anonymous=req.is_anonymous,
     )
     db.add(post)
+    score_calculator.refresh_score(db, user.id, "community")
     db.commit()
     return {"status": "posted", "post_id": post.id}
 
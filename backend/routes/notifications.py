@@ -6,11 +6,13 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
 from datetime import datetime, timezone
 
-from database import get_db
+from database import get_db, get_async_db
 from models import User, ViyaNotification
-from auth import require_user
+from auth import require_user, require_user_async
 
 router = APIRouter()
 
@@ -28,31 +30,32 @@ class SendNotifReq(BaseModel):
 
 
 @router.get("")
-def get_notifications(
+async def get_notifications(
     unread_only: bool = False,
     page: int = Query(1, ge=1),
     limit: int = Query(30, ge=1, le=100),
-    user: User = Depends(require_user),
-    db: Session = Depends(get_db)
+    user: User = Depends(require_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get notifications for the current user."""
-    query = db.query(ViyaNotification).filter(
+    query = select(ViyaNotification).where(
         ViyaNotification.user_id == user.id
     )
 
     if unread_only:
-        query = query.filter(ViyaNotification.is_read == False)
+        query = query.where(ViyaNotification.is_read == False)
 
-    total = query.count()
-    unread_count = db.query(ViyaNotification).filter(
+    total = await db.scalar(select(func.count()).select_from(query.subquery()))
+    unread_count = await db.scalar(select(func.count()).select_from(ViyaNotification).where(
         ViyaNotification.user_id == user.id,
         ViyaNotification.is_read == False,
-    ).count()
+    ))
 
     offset = (page - 1) * limit
-    notifications = query.order_by(
+    result = await db.execute(query.order_by(
         ViyaNotification.created_at.desc()
-    ).offset(offset).limit(limit).all()
+    ).offset(offset).limit(limit))
+    notifications = result.scalars().all()
 
     return {
         "notifications": [
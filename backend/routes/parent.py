@@ -1,13 +1,16 @@
 """Mentixy Parent Intelligence Portal — weekly reports, salary truth, trajectory
 Bible Section 1 (Prompt 1.2 §7) + Section 3 (Prompt 3.1 §Screen 8)
 """
+import asyncio
+
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import Optional
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
 
-from database import get_db
+from database import get_db, release_connection
+import ai_cache
 from models import User, UserProfile, UserCodingStats, UserAptitudeProfile, UserSkillVerification
 from auth import require_user
 from ai_engine import generate_parent_report, check_salary_truth
@@ -39,6 +42,27 @@ async def weekly_summary(
     Generate WhatsApp-shareable weekly summary for parents.
     Shows: activity this week, skills verified, streak, next milestone.
     """
+    student_profile, weekly_activity = await asyncio.to_thread(_weekly_inputs, db, user)
+
+    # Use AI engine to generate parent-friendly report
+    report = await generate_parent_report(student_profile, weekly_activity)
+
+    return {
+        "student_name": student_profile["name"],
+        "report": report,
+        "quick_stats": {
+            "mentixy_score": student_profile["mentixy_score"],
+            "streak_days": student_profile["streak_days"],
+            "skills_verified": weekly_activity["skills_verified"],
+            "problems_solved": weekly_activity["problems_solved"],
+        },
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def _weekly_inputs(db: Session, user: User) -> tuple:
+    """(student profile, weekly activity) for the report, then the connection
+    released for the AI call. Sync — run it with asyncio.to_thread."""
     profile = user.profile
     coding_stats = db.query(UserCodingStats).filter_by(user_id=user.id).first()
     aptitude = db.query(UserAptitudeProfile).filter_by(user_id=user.id).first()
@@ -63,21 +87,8 @@ async def weekly_summary(
         "skills_verified": verified_skills,
         "tests_taken": aptitude.tests_taken if aptitude else 0,
     }
-
-    # Use AI engine to generate parent-friendly report
-    report = await generate_parent_report(student_profile, weekly_activity)
-
-    return {
-        "student_name": student_profile["name"],
-        "report": report,
-        "quick_stats": {
-            "mentixy_score": student_profile["mentixy_score"],
-            "streak_days": student_profile["streak_days"],
-            "skills_verified": verified_skills,
-            "problems_solved": weekly_activity["problems_solved"],
-        },
-        "generated_at": datetime.now(timezone.utc).isoformat(),
-    }
+    release_connection(db)
+    return student_profile, weekly_activity
 
 
 # ─── 2. Salary Truth Checker (CTC → In-Hand) ───
@@ -85,25 +96,29 @@ async def weekly_summary(
 @router.post("/salary-truth")
 async def salary_truth(
     req: SalaryTruthReq,
+    fresh: bool = False,
     user: User = Depends(require_user),
+    db: Session = Depends(get_db),
 ):
     """
     CTC to in-hand salary conversion for parents.
     Shows: base salary, HRA, PF deductions, tax, actual monthly in-hand.
     """
-    result = await check_salary_truth(
-        ctc_lpa=req.ctc_lpa,
-        role=req.role,
-        city=req.city,
-        college_tier=req.college_tier,
-    )
+    await asyncio.to_thread(release_connection, db)
+    with ai_cache.bypass(fresh):
+        result = await check_salary_truth(
+            ctc_lpa=req.ctc_lpa,
+            role=req.role,
+            city=req.city,
+            college_tier=req.college_tier,
+        )
     return result
 
 
 # ─── 3. 5-Year Career Trajectory Projection ───
 
 @router.post("/trajectory")
-async def career_trajectory(
+def career_trajectory(
     req: TrajectoryReq,
     user: User = Depends(require_user),
     db: Session = Depends(get_db),
@@ -5,7 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
 
-from database import get_db
+from database import get_read_db
 from models import (
     User, UserProfile, UserSkillVerification, UserCodingStats,
     UserAptitudeProfile, CareerProfile4D, CareerMatch, UserBadge,
@@ -18,7 +18,7 @@ router = APIRouter()
 # ─── 1. Public Profile by Username ───
 
 @router.get("/{username}")
-def public_profile(username: str, db: Session = Depends(get_db)):
+def public_profile(username: str, db: Session = Depends(get_read_db)):
     """
     Public career profile page.
     Shows: Mentixy Score, verified skill badges, activity heatmap, placement readiness.
@@ -37,7 +37,10 @@ def public_profile(username: str, db: Session = Depends(get_db)):
     now = datetime.now(timezone.utc)
     verified_skills = []
     for v in verifications:
-        is_active = v.expires_at and v.expires_at > now if v.expires_at else False
+        expires = v.expires_at
+        if expires and expires.tzinfo is None:
+            expires = expires.replace(tzinfo=timezone.utc)  # SQLite returns naive datetimes
+        is_active = bool(expires and expires > now)
         skill = db.query(SkillsTaxonomy).filter_by(id=v.skill_id).first()
         if is_active:
             verified_skills.append({
@@ -0,0 +1,38 @@
+"""Mentixy Job Queue — status of background jobs (roadmap generation, resume review, assessment scoring)
+Jobs are queued by the AI/assessment routes and run by job_queue.py workers.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+from sqlalchemy.orm import Session
+
+from database import get_db
+from models import BackgroundJob, User
+from auth import require_user
+import job_queue
+
+router = APIRouter()
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str, user: User = Depends(require_user), db: Session = Depends(get_db)):
+    """Poll a job: status queued|running|succeeded|failed, progress 0-100, and
+    `result` once it has succeeded (`error` if it failed)."""
+    job = db.query(BackgroundJob).filter_by(id=job_id, user_id=user.id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_queue.view(job)
+
+
+@router.get("/jobs")
+def list_jobs(
+    status: Optional[str] = Query(None, pattern="^(queued|running|succeeded|failed)$"),
+    limit: int = Query(20, ge=1, le=100),
+    user: User = Depends(require_user),
+    db: Session = Depends(get_db),
+):
+    """The user's most recent jobs, newest first."""
+    q = db.query(BackgroundJob).filter_by(user_id=user.id)
+    if status:
+        q = q.filter_by(status=status)
+    jobs = q.order_by(BackgroundJob.created_at.desc()).limit(limit).all()
+    return {"jobs": [job_queue.view(j) for j in jobs]}
@@ -12,6 +12,7 @@ from datetime import datetime, timezone
 from database import get_db
 from models import User, UserProfile, JobListing
 from auth import require_user
+import college_resolver
 
 router = APIRouter()
 
@@ -22,6 +23,7 @@ def search_candidates(
     skills: Optional[str] = None,
     min_score: int = 0,
     college_tier: Optional[int] = None,
+    college: Optional[str] = None,  # college id or name
     stream: Optional[str] = None,
     open_to_work: Optional[bool] = None,
     skip: int = 0, limit: int = 20,
@@ -40,6 +42,8 @@ def search_candidates(
         query = query.filter(UserProfile.mentixy_score >= min_score)
     if college_tier:
         query = query.filter(UserProfile.college_tier == college_tier)
+    if college:
+        query = query.filter(college_resolver.profile_filter(college))
     if stream:
         query = query.filter(UserProfile.stream.ilike(f"%{stream}%"))
     if open_to_work is not None:
@@ -55,6 +59,7 @@ def search_candidates(
             "username": c.username,
             "display_name": c.display_name,
             "avatar_url": c.avatar_url,
+            "college_id": c.college_id,
             "college_name": c.college_name,
             "college_tier": c.college_tier,
             "stream": c.stream,
@@ -83,6 +88,7 @@ def candidate_detail(user_id: str, db: Session = Depends(get_db)):
         "display_name": profile.display_name,
         "avatar_url": profile.avatar_url,
         "bio": profile.bio,
+        "college_id": profile.college_id,
         "college_name": profile.college_name,
         "college_tier": profile.college_tier,
         "stream": profile.stream,
@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from database import get_db
 from models import Resume, User
 from auth import require_user
+import resume_ats
 
 router = APIRouter()
 
@@ -18,9 +19,10 @@ class ResumeReq(BaseModel):
 @router.post("")
 def create_resume(req: ResumeReq, user: User = Depends(require_user), db: Session = Depends(get_db)):
     resume = Resume(user_id=user.id, title=req.title, template=req.template, content=req.content, target_role=req.target_role)
+    report = _score(resume, user, db)
     db.add(resume)
     db.commit()
-    return {"resume_id": resume.id, "status": "created"}
+    return {"resume_id": resume.id, "status": "created", "ats_score": report["ats_score"], "ats": resume_ats.public(report)}
 
 @router.get("")
 def list_resumes(user: User = Depends(require_user), db: Session = Depends(get_db)):
@@ -32,7 +34,7 @@ def get_resume(resume_id: str, user: User = Depends(require_user), db: Session =
     r = db.query(Resume).filter_by(id=resume_id, user_id=user.id).first()
     if not r:
         raise HTTPException(status_code=404, detail="Resume not found")
-    return {"id": r.id, "title": r.title, "template": r.template, "content": r.content, "ai_suggestions": r.ai_suggestions, "ats_score": r.ats_score, "target_role": r.target_role}
+    return {"id": r.id, "title": r.title, "template": r.template, "content": r.content, "ai_suggestions": resume_ats.public(r.ai_suggestions or {}) or None, "ats_score": r.ats_score, "target_role": r.target_role}
 
 @router.patch("/{resume_id}")
 def update_resume(resume_id: str, req: ResumeReq, user: User = Depends(require_user), db: Session = Depends(get_db)):
@@ -43,5 +45,15 @@ def update_resume(resume_id: str, req: ResumeReq, user: User = Depends(require_u
     r.template = req.template
     r.content = req.content
     r.target_role = req.target_role
+    report = _score(r, user, db, previous=r.ai_suggestions)
     db.commit()
-    return {"status": "updated"}
+    return {"status": "updated", "ats_score": report["ats_score"], "ats": resume_ats.public(report)}
+
+
+def _score(r: Resume, user: User, db: Session, previous: dict = None) -> dict:
+    """Local ATS report for the resume's content; re-scores only sections changed since `previous`."""
+    role = r.target_role or (user.profile.target_role if user.profile else None)
+    report = resume_ats.score_resume(r.content, role, resume_ats.role_keywords(db, role), previous)
+    r.ats_score = report["ats_score"]
+    r.ai_suggestions = report
+    return report
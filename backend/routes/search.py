@@ -0,0 +1,71 @@
+"""Mentixy Universal Search — ranked full-text search with facets, plus typeahead
+Users, careers, coding problems, skills, jobs, companies and community posts.
+Index maintenance lives in search_index.py; suggestions in autocomplete.py.
+"""
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import time
+
+from database import get_async_db
+import autocomplete
+import search_index
+from search_index import GROUP_KEYS
+
+router = APIRouter()
+
+SEARCH_TYPES = "^(" + "|".join(GROUP_KEYS) + ")$"
+_SUGGEST_TYPE = "(" + "|".join(autocomplete.SUGGEST_TYPES) + ")"
+SUGGEST_TYPES = f"^{_SUGGEST_TYPE}(,{_SUGGEST_TYPE})*$"
+
+
+@router.get("")
+async def universal_search(
+    q: str = Query(..., min_length=1, max_length=100),
+    type: Optional[str] = Query(None, pattern=SEARCH_TYPES),
+    page: int = Query(1, ge=1, le=50),
+    limit: int = Query(20, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Ranked search across every indexed type.
+
+    `results` is one page of hits (optionally filtered by `type`), `facets`
+    counts matches per type. Without a type filter the top 5 of each type are
+    also returned under users/careers/problems/skills/jobs/companies/posts.
+    """
+    found = await search_index.search(db, q, doc_type=type, page=page, limit=limit,
+                                      per_type=0 if type else 5)
+    response = {
+        "query": q,
+        "type": type,
+        "page": page,
+        "limit": limit,
+        "total": found["total"],
+        "facets": {t: found["facets"].get(t, 0) for t in GROUP_KEYS},
+        "results": found["hits"],
+    }
+    if not type:
+        for doc_type, key in GROUP_KEYS.items():
+            response[key] = found["groups"].get(doc_type, [])
+    return response
+
+
+@router.get("/suggest")
+async def suggest(
+    q: str = Query(..., min_length=1, max_length=50),
+    types: Optional[str] = Query(None, pattern=SUGGEST_TYPES, description="comma list, e.g. user,skill"),
+    limit: int = Query(8, ge=1, le=20),
+):
+    """Typeahead completions from the in-memory prefix index — no database round trip."""
+    started = time.perf_counter()
+    if autocomplete.index.loaded_at:
+        autocomplete.ensure_loaded()   # at most starts a background refresh
+    else:
+        await asyncio.to_thread(autocomplete.ensure_loaded)   # cold process: the first load queries
+    suggestions = autocomplete.index.complete(q, limit, types.split(",") if types else None)
+    return {
+        "query": q,
+        "suggestions": suggestions,
+        "took_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
@@ -12,6 +12,7 @@ from models import (
     User, SkillsTaxonomy, UserSkillVerification, Question, UserBadge, Badge
 )
 from auth import require_user
+import score_calculator
 
 router = APIRouter()
 
@@ -261,6 +262,7 @@ def submit_skill_verification(
             if badge:
                 db.add(UserBadge(user_id=user.id, badge_id=badge.id))
 
+    score_calculator.refresh_score(db, user.id, "verified_skills")
     db.commit()
 
     return {
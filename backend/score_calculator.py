@@ -10,104 +10,219 @@ Formula:
               + 0.05 × Roadmap Progress
 
 Weights derived from Multiple Linear Regression on placement data.
+
+Each user's raw component scores (0-100) are kept in user_score_components.
+The events that move one — an accepted coding submission, an aptitude test,
+a skill verification, a connection, a post, a completed milestone, a 4D
+assessment — call refresh_score() for just that component, and the total is
+re-derived from the stored six. recompute_chunk() rescores a range of users
+with one grouped query per component for the nightly `score_recompute` job,
+which also catches what no event signals (skills expiring).
+calculate_mentixy_score() recomputes one user from scratch. All three read
+the same per-component queries, so they always agree.
 """
-from sqlalchemy.orm import Session
+import asyncio
+import os
+import time
 from datetime import datetime, timezone, timedelta
 
+from sqlalchemy import func, insert, literal, select, union_all, update
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
 from models import (
-    User, UserProfile, UserSkillVerification, UserCodingStats,
-    UserAptitudeProfile, CareerProfile4D, UserViyaScoreLog,
-    UserActivityDaily, UserConnection, CommunityPost, LearningRoadmap,
+    UserProfile, UserSkillVerification, UserCodingStats, UserAptitudeProfile,
+    CareerProfile4D, UserViyaScoreLog, UserScoreComponents, UserConnection,
+    CommunityPost, LearningRoadmap,
 )
+import job_queue
+import rankings
 
+RECOMPUTE_CHUNK = int(os.getenv("SCORE_RECOMPUTE_CHUNK", "2000"))
+RECOMPUTE_AT = os.getenv("SCORE_RECOMPUTE_AT", "21:30")   # UTC; 03:00 IST
 
-def calculate_mentixy_score(user_id: str, db: Session) -> dict:
-    """
-    Calculate and store the composite Mentixy Score™ for a user.
-    Returns breakdown and total score (0-100).
-    """
+COMPONENTS = {   # name → weight
+    "verified_skills": 0.30,
+    "coding_consistency": 0.20,
+    "aptitude_percentile": 0.20,
+    "assessment_completion": 0.15,
+    "community": 0.10,
+    "roadmap_progress": 0.05,
+}
+
+
+# ─── Components ───
+
+def skills_raw(count: int, percentile_sum: float) -> float:
+    """0-100 from the number of active verified skills (cap at 10), scaled by
+    their mean percentile (a missing or zero percentile counts as 50)."""
+    score = min(100, count * 10)
+    if count:
+        score = min(100, score * (percentile_sum / count / 100) * 1.3)
+    return score
+
+
+def coding_raw(streak_days: int, problems_solved: int) -> float:
+    streak_score = min(100, (streak_days or 0) * 3)
+    problems_score = min(100, (problems_solved or 0) * 2)
+    return streak_score * 0.6 + problems_score * 0.4
+
+
+def community_raw(connections: int, posts: int) -> float:
+    return min(100, (connections * 5) + (posts * 10))
 
-    # ─── 1. Verified Skills Component (30%) ───
-    verified_skills = db.query(UserSkillVerification).filter_by(
-        user_id=user_id,
-    ).filter(UserSkillVerification.is_expired == False).all()
-    now = datetime.now(timezone.utc)
-    active_skills = [
-        s for s in verified_skills
-        if s.expires_at and s.expires_at > now
-    ]
-    # Score: 0-100 based on number of verified skills (cap at 10)
-    skill_score = min(100, len(active_skills) * 10)
-    # Bonus for high percentile scores
-    if active_skills:
-        avg_percentile = sum(s.verified_percentile or 50 for s in active_skills) / len(active_skills)
-        skill_score = min(100, skill_score * (avg_percentile / 100) * 1.3)
-    skill_component = round(skill_score * 0.30, 2)
-
-    # ─── 2. Coding Consistency Component (20%) ───
-    coding_stats = db.query(UserCodingStats).filter_by(user_id=user_id).first()
-    if coding_stats:
-        streak_score = min(100, (coding_stats.current_streak_days or 0) * 3)
-        problems_score = min(100, (coding_stats.problems_solved_total or 0) * 2)
-        coding_score = (streak_score * 0.6 + problems_score * 0.4)
-    else:
-        coding_score = 0
-    coding_component = round(coding_score * 0.20, 2)
-
-    # ─── 3. Aptitude Percentile Component (20%) ───
-    aptitude = db.query(UserAptitudeProfile).filter_by(user_id=user_id).first()
-    aptitude_score = aptitude.overall_percentile if aptitude and aptitude.overall_percentile else 0
-    aptitude_component = round(aptitude_score * 0.20, 2)
-
-    # ─── 4. Assessment Completion Component (15%) ───
-    has_4d = db.query(CareerProfile4D).filter_by(
-        user_id=user_id, is_current=True,
-    ).first() is not None
-    assessment_score = 100 if has_4d else 0
-    assessment_component = round(assessment_score * 0.15, 2)
-
-    # ─── 5. Community Component (10%) ───
-    connections = db.query(UserConnection).filter(
-        (UserConnection.requester_id == user_id) | (UserConnection.receiver_id == user_id),
-    ).filter(UserConnection.status == "accepted").count()
-    posts = db.query(CommunityPost).filter_by(author_id=user_id).count()
-    community_score = min(100, (connections * 5) + (posts * 10))
-    community_component = round(community_score * 0.10, 2)
-
-    # ─── 6. Roadmap Progress Component (5%) ───
-    roadmap = db.query(LearningRoadmap).filter_by(
-        user_id=user_id, is_active=True,
-    ).first()
-    roadmap_score = roadmap.completion_pct if roadmap and roadmap.completion_pct else 0
-    roadmap_component = round(roadmap_score * 0.05, 2)
 
-    # ─── Final Score ───
-    total_score = round(
-        skill_component + coding_component + aptitude_component
-        + assessment_component + community_component + roadmap_component,
+# Each source returns {user_id: raw score} for the users `match(user_id column)`
+# selects; users it leaves out score 0.
+
+def _verified_skills(db: Session, match) -> dict:
+    sv = UserSkillVerification
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    rows = db.execute(
+        select(sv.user_id, func.count(), func.sum(func.coalesce(func.nullif(sv.verified_percentile, 0), 50)))
+        .where(match(sv.user_id), sv.is_expired == False, sv.expires_at > now)
+        .group_by(sv.user_id)
+    )
+    return {user_id: skills_raw(count, total or 0) for user_id, count, total in rows}
+
+
+def _coding_consistency(db: Session, match) -> dict:
+    rows = db.execute(
+        select(UserCodingStats.user_id, UserCodingStats.current_streak_days, UserCodingStats.problems_solved_total)
+        .where(match(UserCodingStats.user_id))
+    )
+    return {user_id: coding_raw(streak, solved) for user_id, streak, solved in rows}
+
+
+def _aptitude_percentile(db: Session, match) -> dict:
+    rows = db.execute(
+        select(UserAptitudeProfile.user_id, UserAptitudeProfile.overall_percentile)
+        .where(match(UserAptitudeProfile.user_id))
+    )
+    return {user_id: percentile or 0 for user_id, percentile in rows}
+
+
+def _assessment_completion(db: Session, match) -> dict:
+    rows = db.scalars(
+        select(CareerProfile4D.user_id).distinct()
+        .where(match(CareerProfile4D.user_id), CareerProfile4D.is_current == True)
     )
-    total_score = max(0, min(100, total_score))
+    return dict.fromkeys(rows, 100)
+
+
+def _community(db: Session, match) -> dict:
+    accepted = UserConnection.status == "accepted"
+    events = union_all(
+        select(UserConnection.requester_id.label("user_id"), literal(1).label("connection"))
+        .where(match(UserConnection.requester_id), accepted),
+        select(UserConnection.receiver_id, literal(1)).where(match(UserConnection.receiver_id), accepted),
+        select(CommunityPost.author_id, literal(0)).where(match(CommunityPost.author_id)),
+    ).subquery()
+    rows = db.execute(
+        select(events.c.user_id, func.sum(events.c.connection), func.count() - func.sum(events.c.connection))
+        .group_by(events.c.user_id)
+    )
+    return {user_id: community_raw(connections, posts) for user_id, connections, posts in rows}
+
+
+def _roadmap_progress(db: Session, match) -> dict:
+    rows = db.execute(
+        select(LearningRoadmap.user_id, func.max(LearningRoadmap.completion_pct))
+        .where(match(LearningRoadmap.user_id), LearningRoadmap.is_active == True)
+        .group_by(LearningRoadmap.user_id)
+    )
+    return {user_id: pct or 0 for user_id, pct in rows}
+
+
+_SOURCES = {
+    "verified_skills": _verified_skills,
+    "coding_consistency": _coding_consistency,
+    "aptitude_percentile": _aptitude_percentile,
+    "assessment_completion": _assessment_completion,
+    "community": _community,
+    "roadmap_progress": _roadmap_progress,
+}
+
 
+def total_score(raws: dict) -> tuple:
+    """(total 0-100, breakdown) from the six raw component scores."""
     breakdown = {
-        "verified_skills": {"raw": round(skill_score, 1), "weight": 0.30, "weighted": skill_component},
-        "coding_consistency": {"raw": round(coding_score, 1), "weight": 0.20, "weighted": coding_component},
-        "aptitude_percentile": {"raw": round(aptitude_score, 1), "weight": 0.20, "weighted": aptitude_component},
-        "assessment_completion": {"raw": assessment_score, "weight": 0.15, "weighted": assessment_component},
-        "community": {"raw": community_score, "weight": 0.10, "weighted": community_component},
-        "roadmap_progress": {"raw": round(roadmap_score, 1), "weight": 0.05, "weighted": roadmap_component},
+        name: {"raw": round(raws.get(name) or 0, 1), "weight": weight,
+               "weighted": round((raws.get(name) or 0) * weight, 2)}
+        for name, weight in COMPONENTS.items()
     }
+    total = round(sum(part["weighted"] for part in breakdown.values()))
+    return max(0, min(100, total)), breakdown
 
-    # ─── Save to profile ───
-    profile = db.query(UserProfile).filter_by(user_id=user_id).first()
-    old_score = profile.mentixy_score or 0 if profile else 0
-    if profile:
-        profile.mentixy_score = total_score
+
+def _insert_components(dialect: str):
+    """INSERT into user_score_components with the dialect's ON CONFLICT clauses."""
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(UserScoreComponents.__table__)
+
+
+# ─── Per user ───
+
+def _refresh(db: Session, user_id: str, components, known: dict) -> tuple:
+    db.flush()  # sessions don't autoflush: the queries below must see the event's own writes
+    # Profile and components in one round trip (both usually exist)
+    found = db.execute(
+        select(UserProfile, UserScoreComponents)
+        .outerjoin(UserScoreComponents, UserScoreComponents.user_id == UserProfile.user_id)
+        .where(UserProfile.user_id == user_id)
+    ).first()
+    profile, row = found if found else (None, db.get(UserScoreComponents, user_id))
+    if row is None:
+        components = COMPONENTS  # first score for this user: everything
+    one = lambda col: col == user_id  # noqa: E731
+    raws = {name: _SOURCES[name](db, one).get(user_id, 0) for name in components if name not in known}
+    raws.update(known)
+    if row is None:
+        # First score: two events for a new user may get here together, so
+        # create the row insert-or-keep and load whichever one exists
+        db.execute(_insert_components(db.get_bind().dialect.name)
+                   .on_conflict_do_nothing(index_elements=["user_id"]).values(user_id=user_id))
+        row = db.get(UserScoreComponents, user_id)
+    for name, raw in raws.items():
+        setattr(row, name, raw)
+    row.updated_at = datetime.now(timezone.utc)
+
+    total, breakdown = total_score({name: getattr(row, name) for name in COMPONENTS})
+    old_score = (profile.mentixy_score or 0) if profile else 0
+    if profile is not None and profile.mentixy_score != total:
+        profile.mentixy_score = total
+    return total, breakdown, old_score
+
+
+def refresh_score(db: Session, user_id: str, *components: str, **known: float) -> int:
+    """Update the named components (re-queried) and `known` ones (raw values the
+    caller already has), then the total; logs the new score if it moved.
+    The caller commits.
+
+        refresh_score(db, user.id, "community")
+        refresh_score(db, user.id, aptitude_percentile=percentile)
+    """
+    total, breakdown, old_score = _refresh(db, user_id, components, known)
+    if total != old_score:
+        db.add(UserViyaScoreLog(user_id=user_id, score=total, score_breakdown=breakdown, delta=total - old_score))
+    return total
+
+
+def calculate_mentixy_score(user_id: str, db: Session) -> dict:
+    """
+    Calculate and store the composite Mentixy Score™ for a user.
+    Returns breakdown and total score (0-100).
+    """
+    total, breakdown, old_score = _refresh(db, user_id, COMPONENTS, {})
 
     # Log score change
-    delta = total_score - old_score
+    delta = total - old_score
     log_entry = UserViyaScoreLog(
         user_id=user_id,
-        score=total_score,
+        score=total,
         score_breakdown=breakdown,
         delta=delta,
     )
@@ -115,8 +230,111 @@ def calculate_mentixy_score(user_id: str, db: Session) -> dict:
     db.commit()
 
     return {
-        "mentixy_score": total_score,
+        "mentixy_score": total,
         "delta": delta,
         "breakdown": breakdown,
         "calculated_at": datetime.now(timezone.utc).isoformat(),
     }
+
+
+# ─── Batch recompute ───
+
+def next_recompute(now: datetime) -> datetime:
+    """Next nightly recompute time (RECOMPUTE_AT, UTC) after `now`."""
+    hour, minute = (int(part) for part in RECOMPUTE_AT.split(":"))
+    at = now.astimezone(timezone.utc).replace(hour=hour, minute=minute, second=0, microsecond=0)
+    return at if at > now else at + timedelta(days=1)
+
+
+def _upsert_components(dialect: str):
+    """INSERT … ON CONFLICT (user_id) DO UPDATE for user_score_components: a
+    row an event created since it was read is overwritten, not a failed chunk."""
+    stmt = _insert_components(dialect)
+    return stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={c: stmt.excluded[c] for c in (*COMPONENTS, "updated_at")},
+    )
+
+
+def recompute_chunk(db: Session, after: str = None, limit: int = RECOMPUTE_CHUNK) -> tuple:
+    """Rescore the next `limit` profiled users by id after `after` and commit.
+
+    One grouped query per component over the chunk's id range, then bulk
+    writes of the component rows and scores that changed, with a log row per
+    changed score (unchanged ones are not logged, so a rerun is cheap).
+    Returns (last user id, users scored, scores changed); (None, 0, 0) once
+    past the last user.
+    """
+    q = select(UserProfile.user_id, UserProfile.mentixy_score).order_by(UserProfile.user_id).limit(limit)
+    if after is not None:
+        q = q.where(UserProfile.user_id > after)
+    users = db.execute(q).all()
+    if not users:
+        return None, 0, 0
+    first, last = users[0].user_id, users[-1].user_id
+    in_chunk = lambda col: col.between(first, last)  # noqa: E731
+    sources = {name: source(db, in_chunk) for name, source in _SOURCES.items()}
+    stored = {row.user_id: row for row in db.execute(
+        select(UserScoreComponents.user_id, *(getattr(UserScoreComponents, name) for name in COMPONENTS))
+        .where(in_chunk(UserScoreComponents.user_id))
+    )}
+
+    now = datetime.now(timezone.utc)
+    component_rows, scores, logs = [], [], []
+    for user_id, old_score in users:
+        raws = {name: sources[name].get(user_id, 0) for name in COMPONENTS}
+        row = stored.get(user_id)
+        if row is None or any(getattr(row, name) != raw for name, raw in raws.items()):
+            component_rows.append({"user_id": user_id, **raws, "updated_at": now})
+        total, breakdown = total_score(raws)
+        delta = total - (old_score or 0)
+        if delta or old_score is None:
+            scores.append({"user_id": user_id, "mentixy_score": total})
+            logs.append({"user_id": user_id, "score": total, "score_breakdown": breakdown, "delta": delta})
+    if component_rows:
+        db.execute(_upsert_components(db.get_bind().dialect.name), component_rows)
+    if scores:
+        db.execute(update(UserProfile), scores)
+        db.execute(insert(UserViyaScoreLog), logs)
+    db.commit()
+    rankings.set_scores({s["user_id"]: s["mentixy_score"] for s in scores})
+    return last, len(users), len(scores)
+
+
+def count_profiles() -> int:
+    """Profiled users — the denominator of chunked jobs' progress."""
+    db = SessionLocal()
+    try:
+        return db.query(func.count(UserProfile.user_id)).scalar()
+    finally:
+        db.close()
+
+
+def _recompute_chunk(after: str, limit: int) -> tuple:
+    db = SessionLocal()
+    try:
+        return recompute_chunk(db, after, limit)
+    finally:
+        db.close()
+
+
+@job_queue.handler("score_recompute")
+async def _score_recompute_job(job: job_queue.JobContext) -> dict:
+    """Rescore every profiled user, a chunk per transaction (a retry starts over;
+    unchanged scores are skipped, so that's cheap)."""
+    chunk_size = int(job.payload.get("chunk_size") or RECOMPUTE_CHUNK)
+    started = time.perf_counter()
+    total = await asyncio.to_thread(count_profiles)
+    after, scored, changed = None, 0, 0
+    while True:
+        after, n, c = await asyncio.to_thread(_recompute_chunk, after, chunk_size)
+        if not n:
+            break
+        scored, changed = scored + n, changed + c
+        await job.progress(100 * scored / max(total, 1))
+    seconds = round(time.perf_counter() - started, 1)
+    print(f"[Score] ✅ Recomputed {scored} scores ({changed} changed) in {seconds}s")
+    return {"users": scored, "changed": changed, "chunk_size": chunk_size, "seconds": seconds}
+
+
+job_queue.recurring("score_recompute", next_recompute)
@@ -0,0 +1,449 @@
+"""
+Mentixy — Search Index
+Ranked full-text search over users, careers, coding problems, skills, jobs,
+companies and community posts.
+
+Every indexed row is mirrored into `search_documents` (title, body, display
+data). PostgreSQL matches it through a generated tsvector column (GIN) and a
+pg_trgm index on titles for typo tolerance; SQLite uses an FTS5 table kept in
+step by triggers. ORM commits are picked up incrementally, so the index
+follows inserts, updates and deletes. Bulk loads that bypass the ORM call
+rebuild():
+
+    python search_index.py --rebuild
+"""
+import argparse
+import math
+import re
+import threading
+from datetime import datetime, timezone
+
+from sqlalchemy import JSON, event, func, inspect, select, text
+from sqlalchemy.orm import Session
+
+from database import engine, SessionLocal, _is_serverless
+import models
+
+_TOKEN = re.compile(r"[^\W_]+", re.UNICODE)
+MAX_QUERY_TOKENS = 8
+
+# doc_type → key of the grouped lists in the /api/search response
+GROUP_KEYS = {
+    "user": "users", "career": "careers", "problem": "problems", "skill": "skills",
+    "job": "jobs", "company": "companies", "post": "posts",
+}
+
+
+# ─── Documents ───
+
+def _join(*parts) -> str:
+    words = []
+    for part in parts:
+        if isinstance(part, (list, tuple)):
+            words.extend(str(p) for p in part if p and not isinstance(p, dict))
+        elif part:
+            words.append(str(part))
+    return " ".join(words)
+
+
+def _user_doc(p: models.UserProfile):
+    if p.is_public is False:
+        return None
+    return {
+        "title": p.display_name or p.username,
+        "body": _join(p.username, p.tagline, p.college_name, p.target_role, p.city, p.bio),
+        "data": {"username": p.username, "display_name": p.display_name,
+                 "avatar_url": p.avatar_url, "college_name": p.college_name},
+        "boost": 1 + min(p.mentixy_score or 0, 1000) / 2000,
+    }
+
+
+def _career_doc(c: models.Career):
+    return {
+        "title": c.title,
+        "body": _join(c.category, c.description, c.required_skills),
+        "data": {"slug": c.slug, "title": c.title, "category": c.category},
+        "boost": 1.3,
+    }
+
+
+def _problem_doc(p: models.CodingProblem):
+    return {
+        "title": p.title,
+        "body": _join(p.category, p.difficulty, p.sub_categories, p.company_tags),
+        "data": {"slug": p.slug, "title": p.title, "difficulty": p.difficulty, "category": p.category},
+        "boost": 1.1,
+    }
+
+
+def _skill_doc(s: models.SkillsTaxonomy):
+    return {
+        "title": s.name,
+        "body": _join(s.category, s.sub_category, s.description),
+        "data": {"slug": s.slug, "name": s.name, "category": s.category},
+        "boost": 1.3,
+    }
+
+
+def _job_doc(j: models.JobListing):
+    if j.is_active is False:
+        return None
+    return {
+        "title": j.role_title,
+        "body": _join(j.company_name, j.location, j.role_type, j.required_skills, j.preferred_skills),
+        "data": {"id": j.id, "role_title": j.role_title, "company_name": j.company_name,
+                 "location": j.location, "role_type": j.role_type},
+        "boost": 1.1,
+    }
+
+
+def _company_doc(c: models.ViyaCompany):
+    return {
+        "title": c.name,
+        "body": _join(c.industry, c.company_type, c.headquarters_city, c.viya_honest_summary),
+        "data": {"slug": c.slug, "name": c.name, "industry": c.industry, "logo_url": c.logo_url},
+        "boost": 1.2,
+    }
+
+
+def _post_doc(p: models.CommunityPost):
+    if (p.moderation_status or "approved") != "approved":
+        return None
+    return {
+        "title": (p.title or p.content or "")[:300],
+        "body": _join(p.content, p.tags),
+        "data": {"id": p.id, "title": p.title, "post_type": p.post_type},
+        "boost": 1 + math.log1p(p.likes_count or 0) / 10,
+    }
+
+
+class _Indexed:
+    __slots__ = ("doc_type", "ref", "fields", "build")
+
+    def __init__(self, doc_type, ref, fields, build):
+        self.doc_type = doc_type
+        self.ref = ref
+        self.fields = fields
+        self.build = build
+
+
+# model → how it is indexed. `fields` are the columns whose change triggers a
+# reindex; counters (mentixy_score, likes_count) only feed the boost and are
+# deliberately left out so score recomputes and likes don't rewrite the index.
+INDEXED = {
+    models.UserProfile: _Indexed("user", "user_id", (
+        "username", "display_name", "tagline", "avatar_url", "college_name",
+        "target_role", "city", "bio", "is_public"), _user_doc),
+    models.Career: _Indexed("career", "id", (
+        "title", "slug", "category", "description", "required_skills"), _career_doc),
+    models.CodingProblem: _Indexed("problem", "id", (
+        "title", "slug", "difficulty", "category", "sub_categories", "company_tags"), _problem_doc),
+    models.SkillsTaxonomy: _Indexed("skill", "id", (
+        "name", "slug", "category", "sub_category", "description"), _skill_doc),
+    models.JobListing: _Indexed("job", "id", (
+        "role_title", "company_name", "location", "role_type", "required_skills",
+        "preferred_skills", "is_active"), _job_doc),
+    models.ViyaCompany: _Indexed("company", "id", (
+        "name", "slug", "industry", "company_type", "headquarters_city",
+        "viya_honest_summary", "logo_url"), _company_doc),
+    models.CommunityPost: _Indexed("post", "id", (
+        "title", "content", "tags", "post_type", "moderation_status"), _post_doc),
+}
+
+
+# ─── Schema ───
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+_trigram = False   # pg_trgm available (PostgreSQL)
+_fts5 = True       # FTS5 available (SQLite); falls back to LIKE over search_documents
+
+_PG_DDL = [
+    """ALTER TABLE search_documents ADD COLUMN IF NOT EXISTS tsv tsvector GENERATED ALWAYS AS (
+           setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+           setweight(to_tsvector('english', coalesce(body, '')), 'B')) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_search_documents_tsv ON search_documents USING gin (tsv)",
+]
+_PG_TRGM_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_search_documents_title_trgm ON search_documents USING gin (title gin_trgm_ops)",
+]
+_SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+           title, body, content='search_documents', content_rowid='id',
+           tokenize='porter unicode61 remove_diacritics 2', prefix='2 3')""",
+    """CREATE TRIGGER IF NOT EXISTS search_documents_ai AFTER INSERT ON search_documents BEGIN
+           INSERT INTO search_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS search_documents_ad AFTER DELETE ON search_documents BEGIN
+           INSERT INTO search_fts(search_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS search_documents_au AFTER UPDATE ON search_documents BEGIN
+           INSERT INTO search_fts(search_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+           INSERT INTO search_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+       END""",
+]
+
+
+def ensure_schema():
+    """Create search_documents and its full-text indexes (idempotent, once per process)."""
+    global _schema_ready, _trigram, _fts5
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        models.SearchDocument.__table__.create(engine, checkfirst=True)
+        if engine.dialect.name == "postgresql":
+            with engine.begin() as conn:
+                for ddl in _PG_DDL:
+                    conn.execute(text(ddl))
+            try:
+                with engine.begin() as conn:
+                    for ddl in _PG_TRGM_DDL:
+                        conn.execute(text(ddl))
+                _trigram = True
+            except Exception as e:
+                print(f"[Search] ⚠️ pg_trgm unavailable, typo matching disabled: {str(e)[:120]}")
+        else:
+            try:
+                with engine.begin() as conn:
+                    fresh = conn.execute(text(
+                        "SELECT 1 FROM sqlite_master WHERE name = 'search_fts'")).first() is None
+                    for ddl in _SQLITE_DDL:
+                        conn.execute(text(ddl))
+                    if fresh:
+                        # Index rows written before the FTS table existed
+                        conn.execute(text("INSERT INTO search_fts(search_fts) VALUES ('rebuild')"))
+            except Exception as e:
+                _fts5 = False
+                print(f"[Search] ⚠️ FTS5 unavailable, using LIKE fallback: {str(e)[:120]}")
+        _schema_ready = True
+
+
+# ─── Writes ───
+
+def _upsert_statement(dialect: str):
+    table = models.SearchDocument.__table__
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=["doc_type", "ref_id"],
+        set_={c: stmt.excluded[c] for c in ("title", "body", "data", "boost", "updated_at")},
+    )
+
+
+_DELETE_SQL = text("DELETE FROM search_documents WHERE doc_type = :doc_type AND ref_id = :ref_id")
+
+
+def write_documents(conn, pending: dict, stamp: datetime = None):
+    """Apply {(doc_type, ref_id): doc or None} — None removes the document."""
+    stamp = stamp or datetime.now(timezone.utc)
+    upserts, removals = [], []
+    for (doc_type, ref_id), doc in pending.items():
+        if doc is None:
+            removals.append({"doc_type": doc_type, "ref_id": ref_id})
+        else:
+            upserts.append({"doc_type": doc_type, "ref_id": ref_id, "updated_at": stamp, **doc})
+    if removals:
+        conn.execute(_DELETE_SQL, removals)
+    if upserts:
+        conn.execute(_upsert_statement(conn.dialect.name), upserts)
+
+
+# ─── Incremental indexer ───
+# after_flush still sees pre-flush history, so that's where changed rows are
+# turned into documents; they're written once the transaction commits (a
+# rollback drops them).
+
+_PENDING = "search_pending"
+_listeners = []
+
+
+def add_listener(fn):
+    """Call fn({(doc_type, ref_id): doc or None}) after each committed index update."""
+    _listeners.append(fn)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect(session, flush_context):
+    changes = {}
+    for obj in session.new:
+        spec = INDEXED.get(type(obj))
+        if spec:
+            changes[(spec.doc_type, str(getattr(obj, spec.ref)))] = spec.build(obj)
+    for obj in session.dirty:
+        spec = INDEXED.get(type(obj))
+        if spec and any(inspect(obj).attrs[f].history.has_changes() for f in spec.fields):
+            changes[(spec.doc_type, str(getattr(obj, spec.ref)))] = spec.build(obj)
+    for obj in session.deleted:
+        spec = INDEXED.get(type(obj))
+        if spec:
+            changes[(spec.doc_type, str(getattr(obj, spec.ref)))] = None
+    if changes:
+        session.info.setdefault(_PENDING, {}).update(changes)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply(session):
+    pending = session.info.pop(_PENDING, None)
+    if not pending:
+        return
+    try:
+        ensure_schema()
+        with engine.begin() as conn:
+            write_documents(conn, pending)
+    except Exception as e:
+        # Never fail the request over the index; the next rebuild catches up
+        print(f"[Search] ⚠️ Index update failed ({len(pending)} docs): {str(e)[:200]}")
+        return
+    for fn in _listeners:
+        try:
+            fn(pending)
+        except Exception as e:
+            print(f"[Search] ⚠️ Index listener {fn.__module__}.{fn.__name__} failed: {str(e)[:200]}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session):
+    session.info.pop(_PENDING, None)
+
+
+# ─── Rebuild ───
+
+def rebuild(batch_size: int = 2000) -> dict:
+    """Reindex every source table. Search stays live: documents are upserted
+    in place and only ones not seen in this pass are deleted at the end."""
+    ensure_schema()
+    started = datetime.now(timezone.utc)
+    counts = {}
+    db = SessionLocal()
+    try:
+        for model, spec in INDEXED.items():
+            batch, n = {}, 0
+            for obj in db.query(model).yield_per(batch_size):
+                doc = spec.build(obj)
+                if doc is None:
+                    continue
+                batch[(spec.doc_type, str(getattr(obj, spec.ref)))] = doc
+                if len(batch) >= batch_size:
+                    with engine.begin() as conn:
+                        write_documents(conn, batch, started)
+                    n += len(batch)
+                    batch = {}
+            if batch:
+                with engine.begin() as conn:
+                    write_documents(conn, batch, started)
+                n += len(batch)
+            counts[spec.doc_type] = n
+    finally:
+        db.close()
+    with engine.begin() as conn:
+        table = models.SearchDocument.__table__
+        conn.execute(table.delete().where(table.c.updated_at < started))
+        if engine.dialect.name == "sqlite" and _fts5:
+            conn.execute(text("INSERT INTO search_fts(search_fts) VALUES ('rebuild')"))
+    print(f"[Search] ✅ Indexed {sum(counts.values()):,} documents: "
+          + ", ".join(f"{k}={v:,}" for k, v in counts.items()))
+    return counts
+
+
+def ensure_index():
+    """Startup hook: create the schema and backfill an empty index."""
+    ensure_schema()
+    db = SessionLocal()
+    try:
+        empty = db.query(models.SearchDocument.id).first() is None
+        has_data = db.query(models.Career.id).first() is not None
+    finally:
+        db.close()
+    if empty and has_data:
+        if _is_serverless:
+            print("[Search] ⚠️ Search index is empty — run `python search_index.py --rebuild`")
+        else:
+            rebuild()
+
+
+# ─── Queries ───
+
+def _match_sql(dialect: str, tokens: list) -> tuple:
+    """(FROM, WHERE, score expression, params) for the active backend."""
+    if dialect == "postgresql":
+        params = {"tsq": " & ".join(f"{t}:*" for t in tokens), "q": " ".join(tokens)}
+        where = "d.tsv @@ to_tsquery('english', :tsq)"
+        score = "ts_rank_cd(d.tsv, to_tsquery('english', :tsq))"
+        if _trigram:
+            where = f"({where} OR d.title % :q)"
+            score = f"({score} + similarity(d.title, :q))"
+        return "search_documents d", where, f"{score} * d.boost", params
+    if _fts5:
+        params = {"match": " ".join(f'"{t}"*' for t in tokens)}
+        return ("search_fts JOIN search_documents d ON d.id = search_fts.rowid",
+                "search_fts MATCH :match", "-bm25(search_fts, 10.0, 1.0) * d.boost", params)
+    params = {f"t{i}": f"%{t}%" for i, t in enumerate(tokens)}
+    where = " AND ".join(f"(lower(d.title) LIKE :t{i} OR lower(d.body) LIKE :t{i})" for i in range(len(tokens)))
+    return "search_documents d", where, "d.boost", params
+
+
+def _hit(row) -> dict:
+    return {"type": row.doc_type, "id": row.ref_id, "title": row.title,
+            "score": round(float(row.score), 4), **(row.data or {})}
+
+
+async def search(db, q: str, doc_type: str = None, page: int = 1, limit: int = 20, per_type: int = 0) -> dict:
+    """Ranked search on an AsyncSession.
+
+    Returns {"total", "facets": {doc_type: count}, "hits": [...]} and, when
+    per_type > 0 and no doc_type filter, "groups": the display data of the top
+    per_type documents of each type.
+    """
+    tokens = [t for t in _TOKEN.findall(q.lower())][:MAX_QUERY_TOKENS]
+    result = {"total": 0, "facets": {}, "hits": [], "groups": {}}
+    if not tokens:
+        return result
+    ensure_schema()
+
+    source, where, score, params = _match_sql(db.bind.dialect.name, tokens)
+    facets = await db.execute(text(
+        f"SELECT d.doc_type, COUNT(*) AS n FROM {source} WHERE {where} GROUP BY d.doc_type"), params)
+    result["facets"] = {row.doc_type: row.n for row in facets}
+    result["total"] = result["facets"].get(doc_type, 0) if doc_type else sum(result["facets"].values())
+    if not result["total"]:
+        return result
+
+    type_filter = " AND d.doc_type = :doc_type" if doc_type else ""
+    page_sql = text(
+        f"SELECT d.doc_type, d.ref_id, d.title, d.data, {score} AS score FROM {source} "
+        f"WHERE {where}{type_filter} ORDER BY score DESC, d.id LIMIT :limit OFFSET :offset"
+    ).columns(data=JSON)
+    rows = await db.execute(page_sql, {**params, "doc_type": doc_type, "limit": limit,
+                                       "offset": (page - 1) * limit})
+    result["hits"] = [_hit(r) for r in rows]
+
+    if per_type and not doc_type:
+        grouped_sql = text(
+            "SELECT doc_type, ref_id, title, data, score FROM ("
+            "  SELECT m.*, ROW_NUMBER() OVER (PARTITION BY m.doc_type ORDER BY m.score DESC, m.id) AS rn FROM ("
+            f"    SELECT d.id, d.doc_type, d.ref_id, d.title, d.data, {score} AS score FROM {source} WHERE {where}"
+            "  ) m"
+            ") ranked WHERE rn <= :per_type ORDER BY doc_type, score DESC"
+        ).columns(data=JSON)
+        for r in await db.execute(grouped_sql, {**params, "per_type": per_type}):
+            result["groups"].setdefault(r.doc_type, []).append(r.data or {})
+    return result
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Mentixy search index maintenance.")
+    p.add_argument("--rebuild", action="store_true", help="reindex every searchable table")
+    args = p.parse_args()
+    if args.rebuild:
+        rebuild()
+    else:
+        ensure_schema()
+        with engine.connect() as conn:
+            n = conn.execute(select(func.count()).select_from(models.SearchDocument.__table__)).scalar()
+        print(f"[Search] {n:,} documents indexed")
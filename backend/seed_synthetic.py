@@ -0,0 +1,611 @@
+"""
+Mentixy — Synthetic Dataset Generator
+Production-shaped data for performance work: heavy-tailed activity, skewed
+college sizes, power-law social graph, bursty coding sessions.
+
+    python seed_synthetic.py --users 1000000 --reset
+    DATABASE_URL=postgresql://... python seed_synthetic.py --users 200000
+
+Writes to the same database as the app (DATABASE_URL). Catalog data
+(careers, problems, skills, questions...) comes from seed_data first.
+Rows are bulk-loaded with COPY on PostgreSQL and executemany elsewhere.
+Deterministic for a given --seed.
+"""
+import argparse
+import bisect
+import csv
+import io
+import itertools
+import json
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+sys.stdout.reconfigure(encoding="utf-8")
+
+from database import Base, engine, SessionLocal
+import models
+
+SYNTHETIC_DOMAIN = "synthetic.mentixy.in"
+
+FIRST_NAMES = [
+    "Aarav", "Vivaan", "Aditya", "Arjun", "Sai", "Rohan", "Karthik", "Rahul", "Nikhil", "Pranav",
+    "Ishaan", "Harsh", "Manish", "Siddharth", "Varun", "Ananya", "Diya", "Priya", "Sneha", "Kavya",
+    "Aishwarya", "Pooja", "Riya", "Meera", "Shreya", "Nandini", "Divya", "Lakshmi", "Tanvi", "Isha",
+]
+LAST_NAMES = [
+    "Sharma", "Verma", "Iyer", "Reddy", "Nair", "Patel", "Gupta", "Singh", "Kumar", "Rao",
+    "Menon", "Joshi", "Das", "Banerjee", "Chatterjee", "Mishra", "Pillai", "Naidu", "Kulkarni", "Shah",
+]
+CITIES = [
+    ("Bangalore", "Karnataka"), ("Chennai", "Tamil Nadu"), ("Hyderabad", "Telangana"), ("Pune", "Maharashtra"),
+    ("Mumbai", "Maharashtra"), ("New Delhi", "Delhi"), ("Kolkata", "West Bengal"), ("Coimbatore", "Tamil Nadu"),
+    ("Nagpur", "Maharashtra"), ("Jaipur", "Rajasthan"), ("Lucknow", "Uttar Pradesh"), ("Bhopal", "Madhya Pradesh"),
+    ("Vizag", "Andhra Pradesh"), ("Kochi", "Kerala"), ("Indore", "Madhya Pradesh"), ("Bhubaneswar", "Odisha"),
+]
+COLLEGE_PREFIXES = ["Sri", "National", "Government", "Rajiv Gandhi", "St. Joseph's", "Amrita", "Manipal",
+                    "PES", "RV", "BMS", "Dayananda Sagar", "KL", "Anna", "Jawaharlal Nehru", "Bharati", "Sardar Patel"]
+COLLEGE_KINDS = ["Institute of Technology", "College of Engineering", "University", "Engineering College",
+                 "Institute of Engineering and Technology", "Institute of Science and Technology"]
+STREAMS = ["CSE", "IT", "ECE", "EEE", "Mechanical", "Civil", "AI & DS", "MCA", "BCA"]
+ROLES = ["Software Engineer", "Data Scientist", "Product Manager", "DevOps Engineer", "UX Designer",
+         "Cybersecurity Analyst", "Data Analyst", "ML Engineer", "Backend Developer", "Frontend Developer"]
+SUBMISSION_STATUSES = ["accepted", "wrong_answer", "time_limit_exceeded", "runtime_error", "compilation_error"]
+SUBMISSION_WEIGHTS = [45, 33, 10, 8, 4]
+LANGUAGES = ["python", "cpp", "java", "javascript", "c"]
+LANGUAGE_WEIGHTS = [45, 30, 18, 5, 2]
+NOTIFICATION_TYPES = ["streak", "connection", "system", "achievement", "job_match", "challenge", "community"]
+POST_TYPES = ["discussion", "placements", "resources", "question", "experience"]
+
+
+# ─── Distributions ───
+
+def heavy_tail(rng: random.Random, mean: float, alpha: float = 1.6, cap: float = 60) -> int:
+    """Pareto-distributed count with the given mean, truncated at cap × mean."""
+    if mean <= 0:
+        return 0
+    xm = mean * (alpha - 1) / alpha
+    return int(min(rng.paretovariate(alpha) * xm, mean * cap))
+
+
+def zipf_cum_weights(n: int, s: float) -> list:
+    """Cumulative Zipf weights for ranks 1..n (for random.choices / bisect)."""
+    return list(itertools.accumulate(1.0 / (rank ** s) for rank in range(1, n + 1)))
+
+
+def weighted_index(rng: random.Random, cum_weights: list) -> int:
+    return bisect.bisect_left(cum_weights, rng.random() * cum_weights[-1])
+
+
+def placement_season_day(rng: random.Random, days_back: int) -> int:
+    """Days-ago offset, weighted towards recent activity and the Aug–Dec season."""
+    while True:
+        d = int(rng.triangular(0, days_back, 0))
+        month = (date.today() - timedelta(days=d)).month
+        if month in (8, 9, 10, 11, 12) or rng.random() < 0.55:
+            return d
+
+
+# ─── Bulk loader ───
+
+class BulkLoader:
+    """Buffers rows per table and writes them in batches.
+
+    PostgreSQL: COPY ... FROM STDIN (csv). Other backends: Core executemany.
+    Python-side column defaults (ids, timestamps, flags) are filled in here
+    because COPY bypasses SQLAlchemy.
+    """
+
+    # FK order: parents are always flushed before children
+    ORDER = [
+        "colleges", "users", "user_profiles", "user_coding_stats", "user_aptitude_profile",
+        "user_problem_submissions", "user_activity_daily", "user_skill_verifications",
+        "viya_notifications", "user_mentixy_score_log", "user_connections",
+        "community_posts", "post_likes",
+    ]
+
+    def __init__(self, bind, batch_size: int):
+        self.engine = bind
+        self.batch_size = batch_size
+        self.is_postgres = bind.dialect.name == "postgresql"
+        self.buffers = defaultdict(list)
+        self.counts = defaultdict(int)
+        self._defaults = {}
+
+    def _table_defaults(self, table):
+        if table.name not in self._defaults:
+            defaults = []
+            for col in table.columns:
+                d = col.default
+                if d is None:
+                    continue
+                if d.is_callable:
+                    defaults.append((col.name, d.arg, True))
+                elif d.is_scalar:
+                    defaults.append((col.name, d.arg, False))
+            self._defaults[table.name] = defaults
+        return self._defaults[table.name]
+
+    def add(self, table_name: str, row: dict):
+        buf = self.buffers[table_name]
+        buf.append(row)
+        if len(buf) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        for name in self.ORDER:
+            if self.buffers[name]:
+                self._write(Base.metadata.tables[name], self.buffers[name])
+                self.counts[name] += len(self.buffers[name])
+                self.buffers[name] = []
+
+    def _complete(self, table, rows: list) -> list:
+        defaults = self._table_defaults(table)
+        cols = [c.name for c in table.columns]
+        for row in rows:
+            for name, value, is_callable in defaults:
+                if name not in row:
+                    row[name] = value(None) if is_callable else (
+                        value.copy() if isinstance(value, (dict, list)) else value)
+        return cols
+
+    def _write(self, table, rows: list):
+        cols = self._complete(table, rows)
+        if self.is_postgres:
+            self._copy(table, cols, rows)
+        else:
+            with self.engine.begin() as conn:
+                conn.execute(table.insert(), [{c: r.get(c) for c in cols} for r in rows])
+
+    def _copy(self, table, cols: list, rows: list):
+        json_cols = {c.name for c in table.columns if isinstance(c.type, models.JSON)}
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for r in rows:
+            out = []
+            for c in cols:
+                v = r.get(c)
+                if v is None:
+                    out.append("\\N")
+                elif c in json_cols:
+                    out.append(json.dumps(v))
+                elif isinstance(v, bool):
+                    out.append("t" if v else "f")
+                elif isinstance(v, (datetime, date)):
+                    out.append(v.isoformat())
+                else:
+                    out.append(v)
+            writer.writerow(out)
+        buf.seek(0)
+        raw = self.engine.raw_connection()
+        try:
+            with raw.cursor() as cur:
+                cur.copy_expert(
+                    f"COPY {table.name} ({', '.join(cols)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buf)
+            raw.commit()
+        finally:
+            raw.close()
+
+
+# ─── Generator ───
+
+class SyntheticWorld:
+    def __init__(self, args, loader: BulkLoader):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.loader = loader
+        self.now = datetime.utcnow().replace(microsecond=0)
+        self.user_ids = []
+        self.user_college = []          # index into self.colleges, -1 = none
+        self.college_members = defaultdict(list)
+        self.colleges = []
+        self.problems = []
+        self.skill_ids = []
+        self._pending_likes = []        # (post_id, likes) — likers need every user id
+        self.started = time.perf_counter()
+
+    def _uuid(self) -> str:
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def _ago(self, days: float, jitter_hours: float = 24) -> datetime:
+        return self.now - timedelta(days=days, hours=self.rng.random() * jitter_hours)
+
+    def _progress(self, label: str, done: int, total: int):
+        elapsed = time.perf_counter() - self.started
+        print(f"[Synth] {label}: {done:,}/{total:,}  ({elapsed:,.0f}s)", flush=True)
+
+    # ── catalog ──
+
+    def load_catalog(self):
+        db = SessionLocal()
+        try:
+            problems = db.query(models.CodingProblem.id, models.CodingProblem.difficulty,
+                                models.CodingProblem.category).all()
+            self.problems = [(p.id, (p.difficulty or "easy").lower(), p.category or "misc") for p in problems]
+            self.skill_ids = [s.id for s in db.query(models.SkillsTaxonomy.id).all()]
+            existing = db.query(models.College).all()
+            self.colleges = [{"id": c.id, "name": c.name, "short_name": c.short_name, "tier": c.tier or 2,
+                              "city": c.city, "state": c.state} for c in existing]
+        finally:
+            db.close()
+        if not self.problems:
+            raise SystemExit("[Synth] No coding problems found — run seed_data first (or pass --reset)")
+        # Popular problems get most submissions; easy ones more than hard
+        weight = {"easy": 5, "medium": 3, "hard": 1}
+        zipf = zipf_cum_weights(len(self.problems), 0.8)
+        base = [zipf[0]] + [zipf[i] - zipf[i - 1] for i in range(1, len(zipf))]
+        self.problem_cum = list(itertools.accumulate(
+            b * weight.get(p[1], 2) for b, p in zip(base, self.problems)))
+
+    def make_colleges(self):
+        target = self.args.colleges or max(20, self.args.users // 400)
+        seen = {c["name"] for c in self.colleges}
+        i = 0
+        while len(self.colleges) < target:
+            city, state = CITIES[i % len(CITIES)]
+            name = f"{self.rng.choice(COLLEGE_PREFIXES)} {self.rng.choice(COLLEGE_KINDS)}, {city}"
+            i += 1
+            if name in seen:
+                name = f"{name} Campus {i}"
+            seen.add(name)
+            rank = len(self.colleges)
+            tier = 1 if rank < target * 0.04 else 2 if rank < target * 0.3 else 3
+            college = {
+                "id": self._uuid(), "name": name, "slug": f"synthetic-college-{i}",
+                "short_name": "".join(w[0] for w in name.split(",")[0].split() if w[0].isupper()),
+                "tier": tier, "city": city, "state": state,
+                "college_type": "Private" if self.rng.random() < 0.6 else "Government",
+                "avg_ctc_reported": round(self.rng.uniform(*{1: (12, 25), 2: (5, 10), 3: (2.8, 5)}[tier]), 1),
+                "placement_rate_reported": round(self.rng.uniform(0.5, 0.95), 2),
+                "created_at": self._ago(400),
+            }
+            self.loader.add("colleges", dict(college))
+            self.colleges.append(college)
+        self.loader.flush()
+        # Skewed sizes: a few huge campuses, a long tail of small ones
+        self.college_cum = zipf_cum_weights(len(self.colleges), self.args.college_skew)
+        print(f"[Synth] colleges: {len(self.colleges):,}")
+
+    def _college_name_as_typed(self, college: dict) -> str:
+        """Free-text college_name the way students actually type it."""
+        r = self.rng.random()
+        if r < 0.75 or not college.get("short_name"):
+            return college["name"]
+        if r < 0.85:
+            return college["name"].lower()
+        if r < 0.93:
+            return college["short_name"]
+        return college["name"].replace(",", "").replace("Institute", "Inst.")
+
+    # ── users and per-user activity ──
+
+    def make_users(self):
+        a = self.args
+        from auth import hash_password
+        hashed = hash_password("synthetic-pass")   # one bcrypt hash, shared by all synthetic users
+        days_back = a.days
+
+        for n in range(a.users):
+            uid = self._uuid()
+            self.user_ids.append(uid)
+            ci = weighted_index(self.rng, self.college_cum) if self.rng.random() > 0.08 else -1
+            self.user_college.append(ci)
+            if ci >= 0:
+                self.college_members[ci].append(n)
+
+            first, last = self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+            username = f"{first.lower()}{last.lower()}{n}"
+            joined = self._ago(placement_season_day(self.rng, days_back))
+            self.loader.add("users", {
+                "id": uid, "email": f"{username}@{SYNTHETIC_DOMAIN}", "hashed_password": hashed,
+                "role": "student", "is_email_verified": self.rng.random() < 0.7,
+                "created_at": joined, "last_active_at": self._ago(placement_season_day(self.rng, 60)),
+            })
+
+            activity = self._user_activity(uid, joined)
+            college = self.colleges[ci] if ci >= 0 else None
+            score = min(100, int(8 + activity["solved"] * 0.6 + activity["skills"] * 6
+                                 + activity["aptitude"] * 0.15 + self.rng.gauss(0, 6)))
+            score = max(0, score)
+            self.loader.add("user_profiles", {
+                "user_id": uid, "username": username, "display_name": f"{first} {last}",
+                "college_name": self._college_name_as_typed(college) if college else None,
+                "college_tier": college["tier"] if college else None,
+                "city": college["city"] if college else self.rng.choice(CITIES)[0],
+                "state": college["state"] if college else None,
+                "stream": self.rng.choice(STREAMS),
+                "graduation_year": self.now.year + self.rng.randint(0, 3),
+                "current_year_of_study": self.rng.randint(1, 4),
+                "cgpa": round(min(10.0, max(5.0, self.rng.gauss(7.6, 0.9))), 2),
+                "target_role": self.rng.choice(ROLES),
+                "open_to_work": self.rng.random() < 0.4,
+                "mentixy_score": score,
+                "streak_days": activity["streak"], "longest_streak": max(activity["streak"], activity["longest"]),
+                "total_points": activity["solved"] * 10 + activity["submissions"] * 2 + activity["skills"] * 25,
+                "updated_at": self._ago(3),
+            })
+            self._score_log(uid, score, joined)
+            self._notifications(uid)
+            if self.rng.random() < a.posts_per_user:
+                for _ in range(1 + heavy_tail(self.rng, 1.5)):
+                    self._post(uid)
+
+            if (n + 1) % 50_000 == 0:
+                self._progress("users", n + 1, a.users)
+        self.loader.flush()
+        self._progress("users", a.users, a.users)
+
+    def _user_activity(self, uid: str, joined: datetime) -> dict:
+        """Bursty coding history: streak runs of active days, several submissions per session."""
+        rng, a = self.rng, self.args
+        target = heavy_tail(rng, a.submissions_per_user)
+        max_days = max(1, (self.now - joined).days)
+        attempts = defaultdict(int)
+        solved = {}
+        days = defaultdict(lambda: [0, 0])        # day offset → [submissions, solved]
+        submitted = 0
+        while submitted < target:
+            start = min(placement_season_day(rng, a.days), max_days)
+            run = 1 + int(rng.expovariate(0.35))  # consecutive active days
+            for d in range(start, max(start - run, -1), -1):
+                burst = 1 + int(rng.expovariate(0.4))
+                session = self._ago(d, jitter_hours=16)
+                for k in range(burst):
+                    pid, difficulty, category = self.problems[weighted_index(rng, self.problem_cum)]
+                    status = rng.choices(SUBMISSION_STATUSES, SUBMISSION_WEIGHTS)[0]
+                    attempts[pid] += 1
+                    self.loader.add("user_problem_submissions", {
+                        "id": self._uuid(), "user_id": uid, "problem_id": pid,
+                        "language": rng.choices(LANGUAGES, LANGUAGE_WEIGHTS)[0],
+                        "code": "# synthetic submission\n", "status": status,
+                        "runtime_ms": int(rng.lognormvariate(4, 0.8)) if status == "accepted" else None,
+                        "memory_mb": round(rng.uniform(10, 60), 1) if status == "accepted" else None,
+                        "test_cases_passed": 10 if status == "accepted" else rng.randint(0, 9),
+                        "test_cases_total": 10, "attempt_number": attempts[pid],
+                        "time_spent_ms": int(rng.lognormvariate(13, 0.7)),
+                        "submitted_at": session + timedelta(minutes=k * rng.uniform(2, 15)),
+                    })
+                    days[d][0] += 1
+                    if status == "accepted" and pid not in solved:
+                        solved[pid] = (difficulty, category)
+                        days[d][1] += 1
+                    submitted += 1
+                    if submitted >= target:
+                        break
+                if submitted >= target:
+                    break
+
+        for d, (subs, solved_today) in days.items():
+            self.loader.add("user_activity_daily", {
+                "id": self._uuid(), "user_id": uid, "activity_date": (self.now - timedelta(days=d)).date(),
+                "problems_solved": solved_today, "activity_score": subs * 2 + solved_today * 10,
+                "session_minutes": subs * rng.randint(5, 20), "created_at": self._ago(d, 0),
+            })
+
+        active = sorted(days)
+        streak = 0
+        while streak in days:
+            streak += 1
+        longest, run, prev = 0, 0, None
+        for d in active:
+            run = run + 1 if prev is not None and d == prev + 1 else 1
+            longest, prev = max(longest, run), d
+
+        by_difficulty = defaultdict(int)
+        by_category = defaultdict(int)
+        for difficulty, category in solved.values():
+            by_difficulty[difficulty] += 1
+            by_category[category] += 1
+        self.loader.add("user_coding_stats", {
+            "user_id": uid, "problems_solved_total": len(solved),
+            "easy_solved": by_difficulty["easy"], "medium_solved": by_difficulty["medium"],
+            "hard_solved": by_difficulty["hard"], "problems_by_category": dict(by_category),
+            "current_streak_days": streak, "longest_streak_days": longest,
+            "last_solved_at": self._ago(active[0]) if active else None,
+            "contest_rating": int(1400 + len(solved) * 4 + rng.gauss(0, 60)),
+            "updated_at": self._ago(1),
+        })
+
+        aptitude = 0.0
+        if rng.random() < 0.55:
+            aptitude = round(min(99.0, max(1.0, rng.gauss(55, 20))), 1)
+            self.loader.add("user_aptitude_profile", {
+                "user_id": uid, "overall_percentile": aptitude,
+                "quant_percentile": round(min(99.0, max(1.0, aptitude + rng.gauss(0, 10))), 1),
+                "logical_percentile": round(min(99.0, max(1.0, aptitude + rng.gauss(0, 10))), 1),
+                "verbal_percentile": round(min(99.0, max(1.0, aptitude + rng.gauss(0, 10))), 1),
+                "tests_taken": 1 + heavy_tail(rng, 3), "last_tested_at": self._ago(rng.randint(0, 90)),
+            })
+
+        skills = min(len(self.skill_ids), heavy_tail(rng, a.skills_per_user))
+        for sid in rng.sample(self.skill_ids, skills):
+            verified = self._ago(rng.randint(0, 300))
+            self.loader.add("user_skill_verifications", {
+                "id": self._uuid(), "user_id": uid, "skill_id": sid,
+                "verified_score": rng.randint(40, 100), "proficiency_level": rng.choice(
+                    ["beginner", "intermediate", "advanced"]),
+                "last_verified_at": verified, "expires_at": verified + timedelta(days=365),
+                "created_at": verified,
+            })
+
+        return {"solved": len(solved), "submissions": submitted, "streak": streak,
+                "longest": longest, "skills": skills, "aptitude": aptitude}
+
+    def _score_log(self, uid: str, score: int, joined: datetime):
+        """Weekly random walk ending at the current score."""
+        weeks = min(heavy_tail(self.rng, self.args.score_logs_per_user), max(1, (self.now - joined).days // 7))
+        s = score
+        for w in range(weeks):
+            delta = int(self.rng.gauss(1.5, 3))
+            self.loader.add("user_mentixy_score_log", {
+                "id": self._uuid(), "user_id": uid, "score": s, "delta": delta,
+                "calculated_at": self._ago(w * 7, jitter_hours=48),
+            })
+            s = max(0, min(100, s - delta))
+
+    def _notifications(self, uid: str):
+        for _ in range(heavy_tail(self.rng, self.args.notifications_per_user)):
+            days = placement_season_day(self.rng, 120)
+            self.loader.add("viya_notifications", {
+                "id": self._uuid(), "user_id": uid, "type": self.rng.choice(NOTIFICATION_TYPES),
+                "title": "Synthetic notification", "body": "Generated for load testing.",
+                "is_read": self.rng.random() < (0.9 if days > 7 else 0.35),
+                "created_at": self._ago(days),
+            })
+
+    def _post(self, uid: str):
+        pid = self._uuid()
+        likes = heavy_tail(self.rng, 4)
+        self.loader.add("community_posts", {
+            "id": pid, "author_id": uid, "post_type": self.rng.choice(POST_TYPES),
+            "title": "Synthetic post", "content": "Generated for load testing.",
+            "tags": self.rng.sample(["dsa", "placements", "tcs", "system-design", "aptitude", "resume"], 2),
+            "views_count": likes * self.rng.randint(5, 30), "likes_count": likes,
+            "comments_count": heavy_tail(self.rng, 2), "created_at": self._ago(placement_season_day(self.rng, 200)),
+        })
+        self._pending_likes.append((pid, likes))
+
+    # ── graph (needs every user id first) ──
+
+    def make_connections(self):
+        """Preferential attachment: a few well-connected students, most with a handful.
+
+        Half of each student's requests go to their own campus.
+        """
+        rng, n = self.rng, len(self.user_ids)
+        popularity = list(itertools.accumulate(rng.paretovariate(1.3) for _ in range(n)))
+        total = 0
+        for i, uid in enumerate(self.user_ids):
+            degree = min(heavy_tail(rng, self.args.connections_per_user / 2, alpha=1.4), n - 1)
+            members = self.college_members.get(self.user_college[i], ())
+            targets = set()
+            for _ in range(degree * 2):
+                if len(targets) >= degree:
+                    break
+                j = rng.choice(members) if members and rng.random() < 0.5 else weighted_index(rng, popularity)
+                if j != i:
+                    targets.add(j)
+            for j in targets:
+                r = rng.random()
+                status = "accepted" if r < 0.8 else "pending" if r < 0.95 else "rejected"
+                created = self._ago(placement_season_day(rng, self.args.days))
+                self.loader.add("user_connections", {
+                    "id": self._uuid(), "requester_id": uid, "receiver_id": self.user_ids[j],
+                    "status": status, "connection_type": "peer", "created_at": created,
+                    "responded_at": created + timedelta(hours=rng.uniform(1, 72)) if status != "pending" else None,
+                })
+            total += len(targets)
+            if (i + 1) % 100_000 == 0:
+                self._progress("connection rows for users", i + 1, n)
+        self.loader.flush()
+        print(f"[Synth] connections: {total:,}")
+
+    def make_likes(self):
+        n = len(self.user_ids)
+        popularity = list(itertools.accumulate(self.rng.paretovariate(1.3) for _ in range(n)))
+        for pid, likes in self._pending_likes:
+            likers = {weighted_index(self.rng, popularity) for _ in range(min(likes, n))}
+            for j in likers:
+                self.loader.add("post_likes", {"id": self._uuid(), "post_id": pid, "user_id": self.user_ids[j]})
+        self.loader.flush()
+
+    def update_college_counts(self):
+        from sqlalchemy import update
+        with engine.begin() as conn:
+            for ci, members in self.college_members.items():
+                conn.execute(update(models.College).where(models.College.id == self.colleges[ci]["id"])
+                             .values(viya_enrolled_students=len(members)))
+
+    def resolve_colleges(self):
+        """college_id from the names as typed, the way the college_backfill job does it."""
+        import college_resolver
+        college_resolver._index = None   # the synthetic colleges are new
+        db = SessionLocal()
+        try:
+            after, profiles, unresolved = None, 0, 0
+            while True:
+                after, n, _, u = college_resolver.backfill_chunk(db, after, self.args.batch_size)
+                if not n:
+                    break
+                profiles, unresolved = profiles + n, unresolved + u
+        finally:
+            db.close()
+        print(f"[Synth] college ids: {profiles:,} profiles, {unresolved:,} names unresolved")
+
+    def run(self):
+        self.load_catalog()
+        self.make_colleges()
+        self.make_users()
+        self.make_connections()
+        self.make_likes()
+        self.update_college_counts()
+        self.resolve_colleges()
+
+
+def _reset_and_seed_catalog():
+    print("[Synth] Recreating tables...")
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        from seed_data import seed_all
+        seed_all(db)
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Generate a production-shaped synthetic Mentixy dataset.")
+    p.add_argument("--users", type=int, default=10_000)
+    p.add_argument("--colleges", type=int, default=0, help="default: users / 400 (min 20)")
+    p.add_argument("--college-skew", type=float, default=1.1, help="Zipf exponent for college sizes")
+    p.add_argument("--connections-per-user", type=float, default=12)
+    p.add_argument("--submissions-per-user", type=float, default=25)
+    p.add_argument("--notifications-per-user", type=float, default=15)
+    p.add_argument("--score-logs-per-user", type=float, default=12)
+    p.add_argument("--skills-per-user", type=float, default=2)
+    p.add_argument("--posts-per-user", type=float, default=0.15, help="fraction of users who post")
+    p.add_argument("--days", type=int, default=730, help="history window")
+    p.add_argument("--batch-size", type=int, default=20_000)
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--reset", action="store_true", help="drop and recreate all tables first (destructive)")
+    args = p.parse_args(argv)
+
+    if args.reset:
+        _reset_and_seed_catalog()
+    else:
+        Base.metadata.create_all(bind=engine)
+        db = SessionLocal()
+        try:
+            if db.query(models.Career).count() == 0:
+                from seed_data import seed_all
+                seed_all(db)
+            if db.query(models.User).filter(models.User.email.like(f"%@{SYNTHETIC_DOMAIN}")).first():
+                raise SystemExit("[Synth] Synthetic users already present — use --reset to regenerate")
+        finally:
+            db.close()
+
+    loader = BulkLoader(engine, args.batch_size)
+    start = time.perf_counter()
+    SyntheticWorld(args, loader).run()
+    elapsed = time.perf_counter() - start
+
+    print("\n" + "=" * 40)
+    print("SYNTHETIC DATASET")
+    print("=" * 40)
+    for name in BulkLoader.ORDER:
+        print(f"  {name:28s} {loader.counts[name]:>12,}")
+    total = sum(loader.counts.values())
+    print("=" * 40)
+    print(f"  {total:,} rows in {elapsed:,.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+
+    # COPY/executemany bypass the ORM, so the incremental search indexer never saw these rows
+    from search_index import rebuild
+    rebuild()
+
+
+if __name__ == "__main__":
+    main()
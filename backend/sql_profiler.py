@@ -0,0 +1,236 @@
+"""
+Mentixy — SQL Profiler
+Per-request statement count, DB time and repeated statement shapes (N+1
+detection), recorded from SQLAlchemy cursor events on every engine.
+
+Sampled: only a fraction of requests (SQL_PROFILE_SAMPLE_RATE) are measured.
+`X-Profile-SQL: 1` forces profiling and returns the counts in response
+headers, but only where SQL_PROFILE_ALLOW_FORCE is set (dev, CI) — otherwise
+anyone could profile every request. Unsampled requests pay one contextvar
+lookup per statement.
+"""
+import contextvars
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import lru_cache
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SAMPLE_RATE = float(os.getenv("SQL_PROFILE_SAMPLE_RATE", "0.05"))
+ALLOW_FORCE = os.getenv("SQL_PROFILE_ALLOW_FORCE", "0") not in ("0", "false", "False")
+N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+MAX_ENDPOINTS = 500          # cap on distinct endpoint keys kept in memory
+MAX_SHAPES_PER_ENDPOINT = 5  # worst repeated shapes kept per endpoint
+FORCE_HEADER = b"x-profile-sql"
+
+_current: contextvars.ContextVar = contextvars.ContextVar("sql_profile", default=None)
+_START_KEY = "_sql_profile_start"
+
+
+# ─── Statement shapes ───
+
+_PARAM = re.compile(r"%\(\w+\)s|\$\d+|%s|:\w+|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WS = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so the same query with different params matches."""
+    shape = _PARAM.sub("?", statement)
+    shape = _IN_LIST.sub("(?)", shape)
+    return _WS.sub(" ", shape).strip()
+
+
+_SELECT_LIST = re.compile(r"^SELECT .+? FROM ", re.IGNORECASE)
+
+
+def short_shape(shape: str, max_len: int = 200) -> str:
+    """Display form: column list elided, e.g. `SELECT … FROM badges WHERE badges.id = ?`."""
+    return _SELECT_LIST.sub("SELECT … FROM ", shape)[:max_len]
+
+
+class SQLStats:
+    """Statements seen while a profile is active (one request, or a capture() block)."""
+
+    __slots__ = ("count", "db_ms", "shapes", "_lock")
+
+    def __init__(self):
+        self.count = 0
+        self.db_ms = 0.0
+        self.shapes = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, elapsed_ms: float):
+        shape = statement_shape(statement)
+        with self._lock:
+            self.count += 1
+            self.db_ms += elapsed_ms
+            self.shapes[shape] += 1
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> list:
+        """[(shape, times)] for shapes run at least `threshold` times, worst first."""
+        return [(s, n) for s, n in self.shapes.most_common() if n >= threshold]
+
+
+# ─── SQLAlchemy hooks (all engines: sync, async, replicas) ───
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    starts = conn.info.get(_START_KEY)
+    if not starts:
+        return
+    stats.record(statement, (time.perf_counter() - starts.pop()) * 1000)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start so
+    # the pooled connection's next statement isn't timed from it
+    conn = context.connection
+    if conn is None or conn.closed or conn.invalidated:
+        return  # failed to connect, or the DBAPI connection (and its info) is discarded
+    starts = conn.info.get(_START_KEY)
+    if starts:
+        starts.pop()
+
+
+@contextmanager
+def capture():
+    """Profile every statement run in this context (scripts, benchmarks, tests)."""
+    stats = SQLStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+# ─── Aggregation ───
+
+class SQLProfileRegistry:
+    """Rolling per-endpoint aggregates of sampled requests."""
+
+    def __init__(self):
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, stats: SQLStats, request_ms: float):
+        repeated = stats.repeated()
+        if repeated:
+            shape, times = repeated[0]
+            print(f"[SQL] ⚠️ N+1 suspect {endpoint}: {times}x {short_shape(shape)} "
+                  f"({stats.count} statements, {stats.db_ms:.1f}ms)")
+
+        with self._lock:
+            if endpoint not in self._endpoints and len(self._endpoints) >= MAX_ENDPOINTS:
+                endpoint = "(other)"
+            e = self._endpoints.get(endpoint)
+            if e is None:
+                e = self._endpoints[endpoint] = {
+                    "requests": 0, "statements_total": 0, "statements_max": 0,
+                    "db_ms_total": 0.0, "db_ms_max": 0.0, "request_ms_total": 0.0,
+                    "n_plus_one_requests": 0, "repeated_shapes": {},
+                }
+            e["requests"] += 1
+            e["statements_total"] += stats.count
+            e["statements_max"] = max(e["statements_max"], stats.count)
+            e["db_ms_total"] += stats.db_ms
+            e["db_ms_max"] = max(e["db_ms_max"], stats.db_ms)
+            e["request_ms_total"] += request_ms
+            if repeated:
+                e["n_plus_one_requests"] += 1
+                shapes = e["repeated_shapes"]
+                for shape, times in repeated:
+                    shapes[shape] = max(shapes.get(shape, 0), times)
+                if len(shapes) > MAX_SHAPES_PER_ENDPOINT:
+                    keep = sorted(shapes.items(), key=lambda kv: kv[1], reverse=True)
+                    e["repeated_shapes"] = dict(keep[:MAX_SHAPES_PER_ENDPOINT])
+
+    def snapshot(self, sort: str = "db_ms_total") -> list:
+        with self._lock:
+            rows = []
+            for endpoint, e in self._endpoints.items():
+                n = e["requests"]
+                rows.append({
+                    "endpoint": endpoint,
+                    "requests": n,
+                    "avg_statements": round(e["statements_total"] / n, 1),
+                    "max_statements": e["statements_max"],
+                    "avg_db_ms": round(e["db_ms_total"] / n, 2),
+                    "max_db_ms": round(e["db_ms_max"], 2),
+                    "db_ms_total": round(e["db_ms_total"], 2),
+                    "avg_request_ms": round(e["request_ms_total"] / n, 2),
+                    "n_plus_one_requests": e["n_plus_one_requests"],
+                    "repeated_shapes": [
+                        {"shape": short_shape(s, 500), "max_times": t}
+                        for s, t in sorted(e["repeated_shapes"].items(), key=lambda kv: kv[1], reverse=True)
+                    ],
+                })
+        return sorted(rows, key=lambda r: r.get(sort) or 0, reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+registry = SQLProfileRegistry()
+
+
+# ─── ASGI middleware ───
+
+def _endpoint_key(scope) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope.get("path", "")
+    return f"{scope.get('method', '')} {path}"
+
+
+class SQLProfilerMiddleware:
+    """Profiles a sample of HTTP requests. Forced requests (when allowed) also
+    get the numbers back in `Server-Timing` / `X-SQL-Count` response headers."""
+
+    def __init__(self, app, sample_rate: float = SAMPLE_RATE, allow_force: bool = ALLOW_FORCE):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.allow_force = allow_force
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        forced = self.allow_force and any(k == FORCE_HEADER and v not in (b"", b"0") for k, v in scope.get("headers", ()))
+        if not forced and random.random() >= self.sample_rate:
+            return await self.app(scope, receive, send)
+
+        stats = SQLStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if forced and message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", f'db;dur={stats.db_ms:.2f};desc="{stats.count} statements"'.encode()))
+                headers.append((b"x-sql-count", str(stats.count).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            registry.record(_endpoint_key(scope), stats, (time.perf_counter() - start) * 1000)
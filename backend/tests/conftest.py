@@ -0,0 +1,196 @@
+"""
+Mentixy — test fixtures
+The app runs in-process (TestClient) against a throwaway SQLite database,
+seeded with the normal catalog data plus a small "world" of users and
+activity so list endpoints have enough rows to expose per-row queries.
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+# Must be set before any app module is imported (database.py reads them at import)
+_TMP = tempfile.mkdtemp(prefix="mentixy-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP}/test.db"
+os.environ["SQL_PROFILE_SAMPLE_RATE"] = "0"
+os.environ["SQL_PROFILE_ALLOW_FORCE"] = "1"  # query budgets read X-SQL-Count
+os.environ["GEMINI_API_KEY"] = ""
+os.environ["GOOGLE_API_KEY"] = ""
+os.environ["RESEND_API_KEY"] = ""
+os.environ["SMTP_USER"] = ""
+os.environ["JOB_IN_PROCESS_WORKER"] = "0"  # tests run queued jobs with job_queue.drain()
+os.environ.pop("DATABASE_REPLICA_URLS", None)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+PEERS = 8
+PASSWORD = "test-pass-123"
+COLLEGE = "Vellore Institute of Technology"
+
+
+def _seed_world(db) -> dict:
+    """Users, social graph and activity around one student. Returns ids for URLs."""
+    from auth import hash_password, create_access_token
+    from models import (
+        User, UserProfile, UserConnection, CommunityPost, PostLike, PostComment,
+        ViyaNotification, Resume, ChatSession, LearningRoadmap, RoadmapPhase,
+        RoadmapMilestone, SkillsTaxonomy, UserSkillVerification, Badge, UserBadge,
+        JobListing, UserJobApplication, CodingProblem, UserProblemSubmission,
+        AptitudeTestSession, AssessmentSession, Question, Challenge, ViyaCompany,
+        UserViyaScoreLog,
+    )
+    now = datetime.now(timezone.utc)
+    hashed = hash_password(PASSWORD)
+
+    def make_user(n: int, role: str = "student") -> User:
+        user = User(email=f"user{n}@test.mentixy.in", hashed_password=hashed, role=role)
+        db.add(user)
+        db.flush()
+        db.add(UserProfile(
+            user_id=user.id, username=f"user{n}", display_name=f"Test User {n}",
+            college_name=COLLEGE, college_tier=2, stream="CSE", graduation_year=2027,
+            target_role="Software Engineer", open_to_work=True,
+            mentixy_score=40 + n, streak_days=n, total_points=100 * n,
+        ))
+        return user
+
+    student = make_user(0)
+    admin = make_user(99, role="admin")
+    peers = [make_user(i + 1) for i in range(PEERS)]
+    outsider = make_user(50)
+
+    # Social graph: accepted both ways, one pending request to the student
+    for p in peers[:5]:
+        db.add(UserConnection(requester_id=student.id, receiver_id=p.id, status="accepted"))
+    for p in peers[5:7]:
+        db.add(UserConnection(requester_id=p.id, receiver_id=student.id, status="accepted"))
+    pending = UserConnection(requester_id=peers[7].id, receiver_id=student.id, status="pending")
+    db.add(pending)
+
+    posts = []
+    for i, p in enumerate(peers):
+        post = CommunityPost(author_id=p.id, post_type="discussion", title=f"Post {i}",
+                             content=f"Placement prep notes {i}", tags=["dsa"])
+        db.add(post)
+        posts.append(post)
+    own_post = CommunityPost(author_id=student.id, post_type="discussion",
+                             title="My post", content="Delete me", tags=[])
+    db.add(own_post)
+    db.flush()
+    for post in posts[:4]:
+        db.add(PostLike(post_id=post.id, user_id=student.id))
+        db.add(PostComment(post_id=post.id, author_id=student.id, content="Nice"))
+
+    notifications = [
+        ViyaNotification(user_id=student.id, type="system", title=f"Notice {i}", body="Hello")
+        for i in range(6)
+    ]
+    db.add_all(notifications)
+
+    resume = Resume(user_id=student.id, content={"name": "Test User 0", "skills": ["Python", "SQL"]},
+                    target_role="Software Engineer", is_primary=True)
+    chat = ChatSession(user_id=student.id, title="Career chat", messages=[
+        {"role": "user", "content": "Which career suits me?"},
+        {"role": "assistant", "content": "Let's find out."},
+    ])
+    db.add_all([resume, chat])
+
+    roadmap = LearningRoadmap(user_id=student.id, target_career_slug="software-engineer",
+                              target_career_name="Software Engineer", total_months=6, hours_per_week=10)
+    db.add(roadmap)
+    db.flush()
+    milestones = []
+    for ph in range(3):
+        phase = RoadmapPhase(roadmap_id=roadmap.id, phase_number=ph + 1, title=f"Phase {ph + 1}")
+        db.add(phase)
+        db.flush()
+        for m in range(3):
+            ms = RoadmapMilestone(phase_id=phase.id, roadmap_id=roadmap.id, user_id=student.id,
+                                  milestone_order=m + 1, skill_name=f"Skill {ph}.{m}", estimated_hours=5)
+            db.add(ms)
+            milestones.append(ms)
+
+    skills = db.query(SkillsTaxonomy).limit(6).all()
+    for s in skills[:5]:
+        db.add(UserSkillVerification(user_id=student.id, skill_id=s.id, verified_score=80,
+                                     proficiency_level="intermediate"))
+    for b in db.query(Badge).limit(3).all():
+        db.add(UserBadge(user_id=student.id, badge_id=b.id))
+
+    jobs = db.query(JobListing).limit(2).all()
+    application = UserJobApplication(user_id=student.id, job_id=jobs[0].id, status="applied")
+    db.add(application)
+
+    problem = db.query(CodingProblem).filter(CodingProblem.slug == "two-sum").first()
+    submission = UserProblemSubmission(user_id=student.id, problem_id=problem.id, language="python",
+                                       code="print(1)", status="accepted", runtime_ms=42)
+    db.add(submission)
+
+    aptitude_qs = db.query(Question).filter(Question.is_aptitude_question == True).limit(10).all()
+    aptitude_session = AptitudeTestSession(user_id=student.id, test_type="mixed")
+    assessment_session = AssessmentSession(user_id=student.id, total_questions=10)
+    db.add_all([aptitude_session, assessment_session])
+
+    for i in range(5):
+        db.add(UserViyaScoreLog(user_id=student.id, score=40 + i, delta=1,
+                                calculated_at=now - timedelta(days=5 - i)))
+
+    db.commit()
+    # Score components for everyone, as the nightly recompute leaves them
+    from score_calculator import recompute_chunk
+    recompute_chunk(db, None, 10_000)
+    import college_stats
+    college_stats.refresh(db)
+
+    assessment_qs = db.query(Question).filter(Question.is_aptitude_question != True).limit(10).all()
+    return {
+        "student_id": student.id,
+        "student_email": student.email,
+        "admin_id": admin.id,
+        "peer_id": peers[0].id,
+        "outsider_id": outsider.id,
+        "username": "user0",
+        "tokens": {
+            "student": create_access_token({"sub": student.id}),
+            "admin": create_access_token({"sub": admin.id}),
+        },
+        "conn_id": pending.id,
+        "post_id": posts[0].id,
+        "own_post_id": own_post.id,
+        "notification_id": notifications[0].id,
+        "resume_id": resume.id,
+        "chat_session_id": chat.id,
+        "roadmap_id": roadmap.id,
+        "milestone_id": milestones[0].id,
+        "skill_id": skills[5].id if len(skills) > 5 else skills[0].id,
+        "job_id": jobs[1].id if len(jobs) > 1 else jobs[0].id,
+        "app_id": application.id,
+        "problem_slug": problem.slug,
+        "submission_id": submission.id,
+        "aptitude_session_id": aptitude_session.id,
+        "aptitude_question_ids": [q.id for q in aptitude_qs],
+        "assessment_session_id": assessment_session.id,
+        "assessment_question_ids": [q.id for q in assessment_qs],
+        "challenge_slug": db.query(Challenge.slug).first()[0],
+        "company_slug": db.query(ViyaCompany.slug).first()[0],
+    }
+
+
+@pytest.fixture(scope="session")
+def client():
+    import main
+    # Entering the context runs the lifespan: create tables + seed catalog data
+    with TestClient(main.app, raise_server_exceptions=False, follow_redirects=False) as c:
+        yield c
+
+
+@pytest.fixture(scope="session")
+def world(client):
+    from database import SessionLocal
+    db = SessionLocal()
+    try:
+        return _seed_world(db)
+    finally:
+        db.close()
@@ -0,0 +1,101 @@
+"""
+Local stand-in for the Gemini REST API with injectable faults, for tests that
+exercise the real SDK over HTTP (breaker, hedging).
+
+    stub = GeminiStub().start()
+    stub.inject(500, 500, delay=0.3)   # next requests: two HTTP 500s, then one slow reply
+    ai_engine.model = stub.model()
+"""
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import google.generativeai as genai
+
+
+class GeminiStub:
+    """Answers POST /v1beta/models/<model>:generateContent with `text`.
+
+    Faults queued with inject() apply to the next requests in order: an int is
+    an HTTP error status, a float a delay (seconds) before a normal reply.
+    """
+
+    def __init__(self, text: str = "stub reply"):
+        self.text = text
+        self.faults = deque()
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    def inject(self, *faults):
+        with self._lock:
+            self.faults.extend(faults)
+
+    def _next_fault(self):
+        with self._lock:
+            self.requests += 1
+            return self.faults.popleft() if self.faults else None
+
+    def start(self) -> "GeminiStub":
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("content-length", 0)))
+                fault = stub._next_fault()
+                if isinstance(fault, float):
+                    time.sleep(fault)
+                if isinstance(fault, int):
+                    self._send(fault, {"error": {"code": fault, "message": "injected fault", "status": "INTERNAL"}})
+                    return
+                self._send(200, {
+                    "candidates": [{"content": {"parts": [{"text": stub.text}], "role": "model"},
+                                    "finishReason": "STOP", "index": 0}],
+                    "usageMetadata": {"promptTokenCount": 12, "candidatesTokenCount": 3, "totalTokenCount": 15},
+                })
+
+            def _send(self, status, body):
+                data = json.dumps(body).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("content-type", "application/json")
+                    self.send_header("content-length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client gave up (timeout / lost hedge)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="gemini-stub", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def model(self, name: str = "gemini-2.0-flash"):
+        genai.configure(api_key="stub-key", transport="rest", client_options={"api_endpoint": self.endpoint})
+        return _ThreadedModel(genai.GenerativeModel(name))
+
+
+class _ThreadedModel:
+    """generate_content_async over the SDK's sync REST transport, in a thread
+    (the SDK's async client has no working REST transport)."""
+
+    def __init__(self, model):
+        self._model = model
+
+    async def generate_content_async(self, prompt, **kwargs):
+        return await asyncio.to_thread(self._model.generate_content, prompt,
+                                       request_options={"retry": None, "timeout": 10}, **kwargs)
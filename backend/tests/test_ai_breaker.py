@@ -0,0 +1,100 @@
+"""
+ai_engine circuit breaker and hedged calls, against a local fault-injecting Gemini stub.
+"""
+import asyncio
+import json
+import time
+
+import pytest
+
+import ai_cache
+import ai_engine
+import ai_telemetry
+from gemini_stub import GeminiStub
+
+
+@pytest.fixture(scope="module")
+def stub():
+    server = GeminiStub().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def gateway(stub, monkeypatch):
+    stub.faults.clear()
+    stub.text = "stub reply"
+    monkeypatch.setattr(ai_engine, "model", stub.model())
+    breaker = ai_engine.CircuitBreaker(window=10, min_calls=4, failure_rate=0.5, slow_seconds=0.3, cooldown=0.3)
+    gw = ai_engine.AIGateway(max_concurrency=4, timeout=2, breaker=breaker, hedge_after=0.15)
+    monkeypatch.setattr(ai_engine, "gateway", gw)
+    monkeypatch.setattr(ai_cache, "ENABLED", False)
+    monkeypatch.setattr(ai_telemetry, "_chars_per_token", ai_telemetry.chars_per_token())  # stub usage is fake
+    ai_telemetry.reset()
+    yield gw
+    ai_telemetry.reset()
+
+
+def _chat(i=0):
+    return asyncio.run(ai_engine.career_chat(f"question {i}"))
+
+
+def test_stub_round_trip_through_the_sdk(gateway, stub):
+    stub.text = json.dumps({"score": 1})
+    assert asyncio.run(ai_engine.generate_parent_report({"name": "Asha"}, {})) == {"score": 1}
+    assert ai_telemetry.stats()["functions"]["generate_parent_report"]["prompt_tokens"] == 12
+
+
+def test_errors_open_the_circuit_and_calls_fail_fast(gateway, stub):
+    stub.inject(500, 503, 500, 500)
+    replies = [_chat(i) for i in range(4)]
+    assert all(r == ai_engine._mock_chat_response("question") for r in replies)
+    assert gateway.breaker.state == "open"
+
+    sent = stub.requests
+    started = time.perf_counter()
+    assert _chat(9) == ai_engine._mock_chat_response("question")
+    assert time.perf_counter() - started < 0.05
+    assert stub.requests == sent  # nothing reached the upstream
+    row = ai_telemetry.stats()["functions"]["career_chat"]
+    assert (row["error"], row["circuit_open"], row["fallbacks"]) == (4, 1, 5)
+
+
+def test_half_open_probe_closes_or_reopens(gateway, stub):
+    stub.inject(500, 500, 500, 500)
+    for i in range(4):
+        _chat(i)
+    assert gateway.breaker.state == "open"
+
+    time.sleep(0.35)
+    stub.inject(500)  # the probe fails → open again
+    _chat(10)
+    assert gateway.breaker.state == "open" and gateway.breaker.trips == 2
+
+    time.sleep(0.35)
+    assert _chat(11) == "stub reply"  # healthy probe
+    assert gateway.breaker.state == "closed"
+    assert _chat(12) == "stub reply"
+
+
+def test_slow_replies_count_as_failures(gateway, stub):
+    gateway.hedge_after = 0
+    stub.inject(0.35, 0.35, 0.35, 0.35)
+    replies = [_chat(i) for i in range(4)]
+    assert replies == ["stub reply"] * 4  # answered, but too slowly
+    assert gateway.breaker.state == "open"
+
+
+def test_hedged_call_takes_the_faster_reply(gateway, stub):
+    stub.inject(1.5)  # the first request hangs; the hedge lands
+    started = time.perf_counter()
+    assert _chat() == "stub reply"
+    assert time.perf_counter() - started < 1.0
+    assert (gateway.hedges, gateway.hedge_wins) == (1, 1)
+    assert gateway.stats()["breaker"]["state"] == "closed"
+
+    # Structured calls aren't hedged
+    stub.text = json.dumps({"ok": True})
+    stub.inject(0.25)
+    asyncio.run(ai_engine.generate_parent_report({"name": "Ravi"}, {}))
+    assert gateway.hedges == 1
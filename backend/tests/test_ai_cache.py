@@ -0,0 +1,149 @@
+"""
+ai_cache — persistent AI response cache: keys, TTL, LRU eviction, bypass, metrics.
+"""
+import asyncio
+import json
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+import ai_cache
+import ai_engine
+from database import engine
+from models import AIResponseCache
+from test_ai_gateway import FakeModel
+
+PREP = {"company": "TCS", "overall_difficulty": 2}
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    model = FakeModel(delay=0.01, text=json.dumps(PREP))
+    model.calls = 0
+    original = model.generate_content_async
+
+    async def counted(prompt, **kwargs):
+        model.calls += 1
+        return await original(prompt, **kwargs)
+
+    model.generate_content_async = counted
+    monkeypatch.setattr(ai_engine, "model", model)
+    monkeypatch.setattr(ai_engine, "gateway", ai_engine.AIGateway(max_concurrency=2, timeout=5))
+    ai_cache.purge()
+    ai_cache.reset_stats()
+    yield model
+    ai_cache.purge()
+    ai_cache.reset_stats()
+
+
+def _rows():
+    t = AIResponseCache.__table__
+    with engine.connect() as conn:
+        return conn.execute(select(t.c.key, t.c.function).order_by(t.c.key)).all()
+
+
+def test_identical_calls_hit_the_cache(fake):
+    first = asyncio.run(ai_engine.generate_interview_prep("TCS", "Software Engineer"))
+    again = asyncio.run(ai_engine.generate_interview_prep("tcs", "  software   engineer "))
+    assert first == again == PREP
+    assert fake.calls == 1
+    assert [r.function for r in _rows()] == ["interview_prep"]
+
+    # Served from the table once the in-process copy is gone (another worker's view)
+    ai_cache._memory.clear()
+    assert asyncio.run(ai_engine.generate_interview_prep("TCS", "Software Engineer")) == PREP
+    assert fake.calls == 1
+
+    counters = ai_cache.stats()["functions"]["interview_prep"]
+    assert (counters["misses"], counters["memory_hits"], counters["hits"], counters["writes"]) == (1, 1, 1, 1)
+    assert counters["hit_rate"] == round(2 / 3, 3)
+
+
+def test_key_includes_model_and_respects_case_for_code(fake):
+    assert ai_cache.make_key("interview_prep", "gemini-a", "TCS") != ai_cache.make_key("interview_prep", "gemini-b", "TCS")
+    asyncio.run(ai_engine.review_code("def f(X): return X", "python"))
+    asyncio.run(ai_engine.review_code("def f(x): return x", "python"))
+    asyncio.run(ai_engine.review_code("def  f(x):  return x", "python"))
+    assert fake.calls == 2
+
+
+def _scored_job():
+    return {"job": {"id": "j1", "role_title": "SDE", "company_name": "Acme"}, "match_score": 60,
+            "match_grade": "B", "eligible": True, "matched_skills": [], "missing_skills": ["Go"], "breakdown": {}}
+
+
+def test_uncacheable_functions_and_fallbacks_are_not_stored(fake):
+    asyncio.run(ai_engine.explain_job_matches({"skills": []}, [_scored_job()]))
+    fake.text = "not json"
+    asyncio.run(ai_engine.check_salary_truth(7, "SDE", "Pune"))
+    assert _rows() == []
+
+
+def test_expired_entries_miss(fake):
+    asyncio.run(ai_engine.check_salary_truth(7, "SDE", "Pune"))
+    t = AIResponseCache.__table__
+    with engine.begin() as conn:
+        conn.execute(update(t).values(expires_at=ai_cache._now() - timedelta(seconds=1)))
+    ai_cache._memory.clear()
+    asyncio.run(ai_engine.check_salary_truth(7, "SDE", "Pune"))
+    assert fake.calls == 2
+
+
+def test_lru_eviction(fake, monkeypatch):
+    monkeypatch.setattr(ai_cache, "MAX_ENTRIES", 2)
+    for city in ("Pune", "Delhi", "Chennai"):
+        asyncio.run(ai_engine.check_salary_truth(7, "SDE", city))
+    t = AIResponseCache.__table__
+    pune = ai_cache.make_key("salary_truth", ai_engine.MODEL_NAME, _salary_prompt("Pune"))
+    with engine.begin() as conn:
+        conn.execute(update(t).where(t.c.key != pune).values(last_used_at=ai_cache._now() - timedelta(hours=1)))
+        conn.execute(update(t).where(t.c.key == pune).values(last_used_at=ai_cache._now()))
+    assert ai_cache.evict() == 1
+    assert pune in [r.key for r in _rows()]
+    assert len(_rows()) == 2
+
+
+def _salary_prompt(city):
+    captured = {}
+
+    async def capture(prompt, fallback, cache=None):
+        captured["prompt"] = prompt
+        return fallback
+
+    original, ai_engine._safe_generate = ai_engine._safe_generate, capture
+    try:
+        asyncio.run(ai_engine.check_salary_truth(7, "SDE", city))
+    finally:
+        ai_engine._safe_generate = original
+    return captured["prompt"]
+
+
+def test_bypass_refreshes_and_is_counted(fake):
+    asyncio.run(ai_engine.analyze_skill_gap(["Python"], "Data Scientist"))
+
+    async def fresh():
+        with ai_cache.bypass():
+            return await ai_engine.analyze_skill_gap(["Python"], "Data Scientist")
+
+    fake.text = json.dumps({"gap_score": 10})
+    assert asyncio.run(fresh()) == {"gap_score": 10}
+    assert asyncio.run(ai_engine.analyze_skill_gap(["Python"], "Data Scientist")) == {"gap_score": 10}
+    assert fake.calls == 2
+    assert ai_cache.stats()["functions"]["skill_gap"]["bypassed"] == 1
+
+
+def test_routes_fresh_flag_and_admin_stats(client, world, fake):
+    headers = {"Authorization": f"Bearer {world['tokens']['student']}"}
+    body = {"company": "Infosys", "role": "Systems Engineer"}
+    for params in ({}, {}, {"fresh": "true"}):
+        resp = client.post("/api/ai/interview-prep", params=params, json=body, headers=headers)
+        assert resp.status_code == 200, resp.text[:300]
+    assert fake.calls == 2
+
+    admin = {"Authorization": f"Bearer {world['tokens']['admin']}"}
+    stats = client.get("/api/admin/perf/ai-cache", headers=admin).json()
+    assert stats["functions"]["interview_prep"]["bypassed"] == 1
+    assert "gateway" in stats
+    assert client.get("/api/admin/perf/ai-cache", headers=headers).status_code == 403
+    assert client.delete("/api/admin/perf/ai-cache", headers=admin).json()["removed"] == 1
@@ -0,0 +1,181 @@
+"""
+ai_engine gateway — global concurrency cap, timeouts, cancellation, single-flight, sync shim.
+"""
+import asyncio
+import json
+import time
+
+import pytest
+
+import ai_cache
+import ai_engine
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    def __init__(self, delay=0.05, text='{"ok": true}'):
+        self.delay = delay
+        self.text = text
+        self.active = 0
+        self.peak = 0
+        self.cancelled = 0
+
+    async def generate_content_async(self, prompt, **kwargs):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            return FakeResponse(self.text)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.active -= 1
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    model = FakeModel()
+    monkeypatch.setattr(ai_engine, "model", model)
+    monkeypatch.setattr(ai_engine, "gateway", ai_engine.AIGateway(max_concurrency=2, timeout=5))
+    monkeypatch.setattr(ai_cache, "ENABLED", False)
+    return model
+
+
+def test_concurrency_is_capped_across_callers(fake):
+    async def burst():
+        return await asyncio.gather(*(ai_engine.generate_text(f"p{i}") for i in range(6)))
+
+    started = time.perf_counter()
+    replies = asyncio.run(burst())
+    assert replies == ['{"ok": true}'] * 6
+    assert fake.peak == 2
+    assert time.perf_counter() - started >= 3 * fake.delay * 0.9
+
+
+def test_timeout_falls_back_and_cancels_the_call(fake):
+    fake.delay = 2
+    assert asyncio.run(ai_engine.generate_text("slow", timeout=0.05)) is None
+    ai_engine.gateway.timeout = 0.05
+    assert asyncio.run(ai_engine._safe_generate("slow", {"fallback": 1})) == {"fallback": 1}
+    deadline = time.time() + 1
+    while fake.cancelled < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert fake.cancelled == 2 and fake.active == 0
+
+
+def test_caller_cancellation_propagates(fake):
+    fake.delay = 2
+
+    async def cancel_midway():
+        task = asyncio.ensure_future(ai_engine.generate_text("p"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_midway())
+    deadline = time.time() + 1
+    while fake.cancelled < 1 and time.time() < deadline:
+        time.sleep(0.01)
+    assert fake.cancelled == 1 and fake.active == 0
+
+
+def test_sync_shim_and_json_parsing(fake):
+    fake.text = "```json\n" + json.dumps({"target_career": "Data Scientist", "gap_score": 40}) + "\n```"
+    result = ai_engine.run_sync(ai_engine.analyze_skill_gap(["Python"], "Data Scientist"))
+    assert result == {"target_career": "Data Scientist", "gap_score": 40}
+
+    fake.text = "not json"
+    result = ai_engine.run_sync(ai_engine.analyze_skill_gap(["Python"], "Data Scientist"))
+    assert result == ai_engine._mock_skill_gap(["Python"], "Data Scientist")
+
+
+def test_no_model_uses_mocks(monkeypatch):
+    monkeypatch.setattr(ai_engine, "model", None)
+    assert isinstance(asyncio.run(ai_engine.career_chat("Should I learn Go?")), str)
+    assert asyncio.run(ai_engine.check_salary_truth(7, "SDE", "Bangalore")) == ai_engine._mock_salary_truth(7, "Bangalore")
+
+
+# ─── Single-flight ───
+
+def test_identical_concurrent_calls_share_one_upstream_call(fake):
+    async def burst():
+        same = [ai_engine.generate_text("drive: TCS / SDE") for _ in range(5)]
+        other = [ai_engine.generate_text("drive: Infosys / SE")]
+        return await asyncio.gather(*same, *other)
+
+    assert asyncio.run(burst()) == ['{"ok": true}'] * 6
+    stats = ai_engine.gateway.stats()
+    assert (stats["upstream_calls"], stats["coalesced_callers"], stats["max_callers_per_call"]) == (2, 4, 5)
+    assert stats["callers_per_call"] == 3.0
+
+    asyncio.run(ai_engine.generate_text("drive: TCS / SDE"))
+    assert ai_engine.gateway.stats()["upstream_calls"] == 3  # finished calls aren't reused
+
+
+def test_shared_call_survives_until_the_last_caller_leaves(fake):
+    fake.delay = 0.3
+
+    async def one_leaves():
+        leaver = asyncio.ensure_future(ai_engine.generate_text("p"))
+        stayer = asyncio.ensure_future(ai_engine.generate_text("p"))
+        await asyncio.sleep(0.05)
+        leaver.cancel()
+        return await stayer
+
+    assert asyncio.run(one_leaves()) == '{"ok": true}'
+    assert fake.cancelled == 0
+
+    async def all_leave():
+        tasks = [asyncio.ensure_future(ai_engine.generate_text("q")) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run(all_leave())
+    deadline = time.time() + 1
+    while fake.cancelled < 1 and time.time() < deadline:
+        time.sleep(0.01)
+    assert fake.cancelled == 1 and fake.active == 0
+    assert ai_engine.gateway.stats()["upstream_calls"] == 2
+
+
+def test_ai_routes_keep_database_work_off_the_event_loop(client, world, fake):
+    """Async AI routes run their sync-session queries and commits in threads."""
+    from sqlalchemy import event
+    from database import engine
+
+    on_loop = []
+
+    def record(conn, cursor, statement, *args):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        on_loop.append(statement.split()[0])
+
+    headers = {"Authorization": f"Bearer {world['tokens']['student']}"}
+    calls = [
+        ("post", "/api/ai/skill-gap", {"current_skills": ["python"], "target_career": "Data Analyst"}),
+        ("post", "/api/ai/job-match", {"job_id": world["job_id"]}),
+        ("post", "/api/ai/salary-truth", {"ctc_lpa": 8, "role": "SDE", "city": "Pune"}),
+        ("get", "/api/ai/parent-report", None),
+        ("get", "/api/parent/weekly-summary", None),
+        ("get", "/api/jobs/matched", None),
+        ("post", "/api/chat", {"message": "How do I prepare for placements?"}),
+        ("post", "/api/chat/stream", {"message": "How do I prepare for placements?"}),
+    ]
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        for method, url, body in calls:
+            resp = client.request(method, url, json=body, headers=headers)
+            assert resp.status_code == 200, (url, resp.text[:200])
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert on_loop == []
@@ -0,0 +1,167 @@
+"""
+ai_scheduler — priority classes, per-user fairness, rate limiting and deadline shedding.
+"""
+import asyncio
+import time
+
+import pytest
+
+import ai_engine
+import ai_scheduler
+import ai_telemetry
+from ai_scheduler import BATCH, INTERACTIVE, STANDARD
+from test_ai_gateway import FakeModel, FakeResponse
+
+
+def _run(scheduler, calls, hold=0.02):
+    """Acquire for each (label, cls, user, deadline-in-seconds) in order; return the start order."""
+    order = []
+
+    async def one(label, cls, user, deadline):
+        ticket = scheduler.ticket(cls, user, time.monotonic() + deadline)
+        try:
+            await scheduler.acquire(ticket)
+        except ai_scheduler.Dropped:
+            order.append(f"dropped:{label}")
+            return
+        order.append(label)
+        await asyncio.sleep(hold)
+        scheduler.release(ticket)
+
+    async def main():
+        tasks = []
+        for call in calls:
+            tasks.append(asyncio.ensure_future(one(*call)))
+            await asyncio.sleep(0)  # enqueue in the given order
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    return order
+
+
+def test_interactive_calls_jump_queued_background_work():
+    scheduler = ai_scheduler.Scheduler(slots=2, rate_per_minute=0, reserved=1)
+    order = _run(scheduler, [("b1", BATCH, "u1", 5), ("b2", BATCH, "u2", 5), ("s1", STANDARD, "u3", 5),
+                             ("i1", INTERACTIVE, "u4", 5), ("i2", INTERACTIVE, "u5", 5)])
+    # b1 takes the one unreserved slot; i1 the reserved one; then strict class order
+    assert order == ["b1", "i1", "i2", "s1", "b2"]
+    stats = scheduler.stats()
+    assert stats["in_use"] == 0 and stats["classes"][BATCH]["dispatched"] == 2
+    assert stats["classes"][INTERACTIVE]["wait_ms"]["p95"] is not None
+
+
+def test_users_within_a_class_are_served_round_robin():
+    scheduler = ai_scheduler.Scheduler(slots=1, rate_per_minute=0)
+    order = _run(scheduler, [("a1", STANDARD, "a", 5), ("a2", STANDARD, "a", 5), ("a3", STANDARD, "a", 5),
+                             ("a4", STANDARD, "a", 5), ("b1", STANDARD, "b", 5), ("c1", STANDARD, "c", 5)],
+                 hold=0.005)
+    assert order == ["a1", "a2", "b1", "c1", "a3", "a4"]
+
+
+def test_rate_limit_spaces_starts_and_keeps_tokens_for_interactive():
+    scheduler = ai_scheduler.Scheduler(slots=10, rate_per_minute=600, reserved=1, burst=2)  # 10/s
+    started = time.perf_counter()
+    order = _run(scheduler, [(f"i{n}", INTERACTIVE, "u", 5) for n in range(5)], hold=0)
+    assert len(order) == 5
+    assert time.perf_counter() - started >= 0.25  # 2 from the burst, then one per 100ms
+    assert scheduler.stats()["rate_limited"] >= 3
+
+    scheduler = ai_scheduler.Scheduler(slots=10, rate_per_minute=600, reserved=1, burst=2)
+    assert scheduler.available(BATCH)
+    scheduler.tokens = 1.5  # the last token is held back for interactive calls
+    assert scheduler.available(INTERACTIVE) and not scheduler.available(BATCH)
+
+
+def test_background_work_that_cannot_finish_in_time_is_shed():
+    scheduler = ai_scheduler.Scheduler(slots=1, rate_per_minute=0)
+    order = _run(scheduler, [("holder", STANDARD, "a", 5), ("batch", BATCH, "b", 0.05),
+                             ("chat", INTERACTIVE, "c", 0.05)], hold=0.1)
+    # Interactive calls are never shed: the caller's own timeout decides
+    assert sorted(order) == ["chat", "dropped:batch", "holder"]
+    assert scheduler.stats()["classes"][BATCH]["dropped"] == 1
+
+    # Measured service time: 100ms; a 50ms budget is hopeless as soon as it has to queue
+    order = _run(scheduler, [("holder", STANDARD, "a", 5), ("report", BATCH, "b", 0.15),
+                             ("digest", BATCH, "d", 0.05)], hold=0.1)
+    assert order == ["holder", "dropped:digest", "report"]
+
+
+# ─── Through the gateway ───
+
+@pytest.fixture
+def fake(monkeypatch):
+    model = FakeModel(delay=0.05)
+    monkeypatch.setattr(ai_engine, "model", model)
+    gateway = ai_engine.AIGateway(max_concurrency=4, timeout=5,
+                                  scheduler=ai_scheduler.Scheduler(4, rate_per_minute=0, reserved=1))
+    monkeypatch.setattr(ai_engine, "gateway", gateway)
+    ai_telemetry.reset()
+    yield model
+    ai_telemetry.reset()
+
+
+def test_chat_latency_stays_flat_under_a_batch_flood(fake):
+    async def timed(prompt, cls):
+        started = time.perf_counter()
+        await ai_engine.gateway.generate(prompt, cls=cls, user="student")
+        return time.perf_counter() - started
+
+    async def main():
+        flood = [asyncio.ensure_future(timed(f"report {n}", BATCH)) for n in range(24)]
+        await asyncio.sleep(0.02)
+        chats = await asyncio.gather(*(timed(f"chat {n}", INTERACTIVE) for n in range(3)))
+        return chats, await asyncio.gather(*flood)
+
+    chats, reports = asyncio.run(main())
+    assert max(chats) < 0.15           # one reserved slot + the next free ones
+    assert max(reports) >= 0.35        # 24 calls through the 3 unreserved slots
+    assert fake.peak == 4
+    classes = ai_engine.gateway.stats()["scheduler"]["classes"]
+    assert (classes[BATCH]["dispatched"], classes[INTERACTIVE]["dispatched"]) == (24, 3)
+
+
+def test_joining_caller_promotes_a_queued_call(fake):
+    async def main():
+        flood = [asyncio.ensure_future(ai_engine.gateway.generate(f"report {n}", cls=BATCH)) for n in range(12)]
+        await asyncio.sleep(0.01)
+        started = time.perf_counter()
+        await ai_engine.gateway.generate("report 11", cls=INTERACTIVE)  # same prompt as the last queued one
+        waited = time.perf_counter() - started
+        await asyncio.gather(*flood)
+        return waited
+
+    assert asyncio.run(main()) < 0.15
+    assert ai_engine.gateway.stats()["coalesced_callers"] == 1
+
+
+def test_shed_calls_fall_back_and_are_counted(fake):
+    fake.delay = 0.3
+
+    @ai_telemetry.track(name="write_4d_narrative")
+    async def narrative(n, timeout):
+        return await ai_engine.generate_text(f"narrative {n}", timeout=timeout)
+
+    async def main():
+        await narrative("warm-up", 5)  # the scheduler learns calls take ~300ms
+        return await asyncio.gather(*(narrative(n, 0.2) for n in range(5)))
+
+    assert asyncio.run(main()) == [None] * 5
+    row = ai_telemetry.stats()["functions"]["write_4d_narrative"]
+    # 3 unreserved slots: those calls time out; the 2 that would have queued are shed on arrival
+    assert (row["timeout"], row["dropped"], row["fallbacks"]) == (3, 2, 5)
+    assert fake.peak == 3
+
+
+def test_calls_are_attributed_to_the_signed_in_student(client, world, monkeypatch):
+    seen = []
+
+    async def generate(prompt, timeout=None, hedge=False, cls=STANDARD, user=None):
+        seen.append((cls, user))
+        return FakeResponse("Start with arrays.")
+
+    monkeypatch.setattr(ai_engine, "model", FakeModel())
+    monkeypatch.setattr(ai_engine.gateway, "generate", generate)
+    headers = {"Authorization": f"Bearer {world['tokens']['student']}"}
+    resp = client.post("/api/chat", json={"message": "Where do I start with DSA?"}, headers=headers)
+    assert resp.status_code == 200
+    assert seen == [(INTERACTIVE, world["student_id"])]
@@ -0,0 +1,117 @@
+"""
+ai_telemetry — per-function latency histograms, tokens, failures and fallback rates.
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import ai_cache
+import ai_engine
+import ai_telemetry
+from test_ai_gateway import FakeModel, FakeResponse
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    model = FakeModel(delay=0.01, text=json.dumps({"company": "TCS"}))
+    monkeypatch.setattr(ai_engine, "model", model)
+    monkeypatch.setattr(ai_engine, "gateway", ai_engine.AIGateway(max_concurrency=2, timeout=5))
+    ai_cache.purge()
+    ai_telemetry.reset()
+    yield model
+    ai_cache.purge()
+    ai_telemetry.reset()
+
+
+def _fn(name):
+    return ai_telemetry.stats()["functions"][name]
+
+
+def test_successful_calls_record_latency_and_tokens(fake):
+    asyncio.run(ai_engine.generate_parent_report({"name": "Asha"}, {"hours": 3}))
+    row = _fn("generate_parent_report")
+    assert (row["calls"], row["model_calls"], row["fallbacks"]) == (1, 1, 0)
+    assert row["prompt_tokens"] > 50 and row["response_tokens"] == ai_telemetry.estimate_tokens(fake.text)
+    assert row["model_ms_buckets"]["50"] == row["model_ms_buckets"]["+Inf"] == 1
+    assert row["recent"]["calls"] == 1 and row["recent"]["model_ms"]["p50"] >= 10
+
+    async def with_usage(prompt, **kwargs):
+        response = FakeResponse("{}")
+        response.usage_metadata = SimpleNamespace(prompt_token_count=321, candidates_token_count=7)
+        return response
+
+    fake.generate_content_async = with_usage
+    asyncio.run(ai_engine.generate_parent_report({"name": "Ravi"}, {}))
+    assert _fn("generate_parent_report")["response_tokens"] == row["response_tokens"] + 7
+
+
+def test_failures_are_labeled_and_count_as_fallbacks(fake, monkeypatch):
+    fake.text = "not json"
+    asyncio.run(ai_engine.generate_parent_report({"name": "Asha"}, {}))
+    monkeypatch.setattr(ai_engine, "gateway", ai_engine.AIGateway(max_concurrency=2, timeout=0.01))
+    fake.delay = 0.2
+    asyncio.run(ai_engine.generate_parent_report({"name": "Ravi"}, {}))
+    monkeypatch.setattr(ai_engine, "model", None)
+    asyncio.run(ai_engine.career_chat("salary for SDE?"))
+
+    report = _fn("generate_parent_report")
+    assert (report["parse_error"], report["timeout"], report["fallbacks"]) == (1, 1, 2)
+    assert report["fallback_rate"] == 1.0 and report["recent"]["fallback_rate"] == 1.0
+    chat = _fn("career_chat")
+    assert (chat["no_model"], chat["model_calls"], chat["fallbacks"]) == (1, 0, 1)
+
+
+def test_cache_hits_skip_the_model(fake):
+    for _ in range(2):
+        asyncio.run(ai_engine.generate_interview_prep("TCS", "Software Engineer"))
+    row = _fn("generate_interview_prep")
+    assert (row["calls"], row["cache_hits"], row["model_calls"]) == (2, 1, 1)
+    assert row["cache_hit_rate"] == 0.5
+
+
+def test_streams_are_tracked_until_closed(fake):
+    fake.text = "ignored"
+
+    async def consume():
+        return [chunk async for chunk in ai_engine.career_chat_stream("how do I learn DSA?")]
+
+    class Chunks:
+        def __init__(self, parts):
+            self.parts = parts
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            if not self.parts:
+                raise StopAsyncIteration
+            return SimpleNamespace(text=self.parts.pop(0))
+
+    async def streamed(prompt, stream=False, **kwargs):
+        return Chunks(["Start ", "with ", "arrays."])
+
+    fake.generate_content_async = streamed
+    assert "".join(asyncio.run(consume())) == "Start with arrays."
+    row = _fn("career_chat_stream")
+    assert (row["calls"], row["model_calls"], row["fallbacks"]) == (1, 1, 0)
+    assert row["response_tokens"] == ai_telemetry.estimate_tokens("Start with arrays.")
+    assert ai_telemetry._current.get() is None
+
+
+def test_admin_metrics_endpoint(client, world, fake):
+    asyncio.run(ai_engine.generate_parent_report({"name": "Asha"}, {}))
+    admin = {"Authorization": f"Bearer {world['tokens']['admin']}"}
+    body = client.get("/api/admin/perf/ai", headers=admin).json()
+    assert body["functions"]["generate_parent_report"]["calls"] == 1 and "gateway" in body
+
+    text = client.get("/api/admin/perf/ai", params={"format": "prometheus"}, headers=admin).text
+    assert 'mentixy_ai_calls_total{function="generate_parent_report"} 1' in text
+    assert 'mentixy_ai_model_latency_ms_bucket{function="generate_parent_report",le="+Inf"} 1' in text
+    assert 'mentixy_ai_tokens_total{function="generate_parent_report",kind="prompt"}' in text
+
+    student = {"Authorization": f"Bearer {world['tokens']['student']}"}
+    assert client.get("/api/admin/perf/ai", headers=student).status_code == 403
+    assert client.delete("/api/admin/perf/ai", headers=admin).json()["success"]
+    assert ai_telemetry.stats()["functions"] == {}
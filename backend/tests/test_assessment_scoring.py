@@ -0,0 +1,111 @@
+"""
+assessment_scoring — local 4D vector, response-time weighting, cosine career matches, async narrative.
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import ai_engine
+import assessment_scoring as scoring
+import job_queue
+import rankings
+from test_ai_gateway import FakeModel
+
+SEEDED = {"q1": [{"key": "A", "dimension": "creative"}, {"key": "B", "dimension": "systematic"}]}
+
+
+def _careers(*slugs):
+    return scoring.CareerMatrix([SimpleNamespace(slug=s, title=s.replace("-", " ").title(), category="Technology",
+                                                 salary_range_min=600000, salary_range_max=1000000) for s in slugs])
+
+
+def _auth(world):
+    return {"Authorization": f"Bearer {world['tokens']['student']}"}
+
+
+def test_option_dimensions_follow_the_question_then_the_letter():
+    assert scoring.option_dimension(SEEDED["q1"], "A") == "creative"
+    assert scoring.option_dimension(["A: Break it down", "B: Discuss"], "B: Discuss") == "interpersonal"
+    assert scoring.option_dimension(None, "d") == "systematic"
+    assert scoring.option_dimension(None, "E") is None
+
+
+def test_dimension_scores_and_response_time_weights():
+    times = np.array([0, 4000, 4000, 1000, 16000], dtype=np.float64)
+    weights = scoring.time_weights(times)
+    assert weights[0] == 1 and weights[3] == 0.5
+    assert weights[4] == pytest.approx(scoring.TIME_WEIGHT_RANGE[0])
+
+    pure = scoring.score_dimensions(["analytical"] * 8, [3000] * 8)
+    assert pure["scores"] == {"analytical": 100, "interpersonal": 0, "creative": 0, "systematic": 0}
+    assert pure["consistency"] == 100 and pure["avg_time_ms"] == 3000
+
+    flipped = scoring.score_dimensions(["analytical"] * 4 + ["creative"] * 4, [3000] * 8)
+    assert flipped["consistency"] == 0
+    rushed = scoring.score_dimensions(["analytical"] * 8, [500] * 8)
+    assert rushed["consistency"] == 50
+
+    empty = scoring.score_dimensions([None, None], [3000, 3000])
+    assert empty["answered"] == 0 and set(empty["scores"].values()) == {50}
+
+
+def test_archetype_blends_close_dimensions():
+    assert scoring.archetype(np.array([0.6, 0.1, 0.1, 0.2]))["code"] == "AN"
+    assert scoring.archetype(np.array([0.1, 0.1, 0.4, 0.42]))["code"] == "CS"
+
+
+def test_careers_rank_by_cosine_similarity():
+    m = _careers("ux-designer", "devops-engineer", "data-scientist")
+    analytical = scoring.match_careers(m, np.array([0.7, 0.05, 0.05, 0.2]))
+    assert [c["slug"] for c in analytical] == ["data-scientist", "devops-engineer", "ux-designer"]
+    assert analytical[0]["driving_dimension"] == "analytical" and analytical[0]["salary_p50"] == 800000
+    assert analytical[0]["match_score"] > 90 > 50 > analytical[-1]["match_score"]
+    creative = scoring.match_careers(m, np.array([0.05, 0.25, 0.65, 0.05]), k=1)
+    assert [c["slug"] for c in creative] == ["ux-designer"]
+    assert scoring.career_vector("unknown", "Design") == scoring.CATEGORY_VECTORS["design"]
+
+
+def test_submit_is_scored_without_the_model(client, world, monkeypatch):
+    monkeypatch.setattr(ai_engine, "model", None)
+    session_id = client.post("/api/assessment/start", json={"device_type": "web"}, headers=_auth(world)).json()["session_id"]
+    answers = [{"question_id": f"aq-{i}", "selected_option": "C", "time_spent_ms": 3500, "question_order": i}
+               for i in range(1, 11)]
+    body = client.post("/api/assessment/submit", json={"session_id": session_id, "answers": answers},
+                       headers=_auth(world)).json()
+    assert body["profile"]["archetype"]["code"] == "CR"
+    assert body["profile"]["dimensions"]["creative"] == 100
+    assert body["matches"][0]["slug"] == "ux-designer"
+
+    saved = client.get("/api/assessment/profile", headers=_auth(world)).json()
+    assert saved["archetype"]["code"] == "CR"
+    assert [m["slug"] for m in saved["matches"]] == [m["slug"] for m in body["matches"]]
+    rankings.ensure_loaded()
+    assert rankings.index.member(world["student_id"])["archetype_name"] == body["profile"]["archetype"]["name"]
+
+
+def test_narrative_job_only_rewrites_text(client, world, monkeypatch):
+    session_id = client.post("/api/assessment/start", json={"device_type": "web"}, headers=_auth(world)).json()["session_id"]
+    answers = [{"question_id": f"aq-{i}", "selected_option": "A", "time_spent_ms": 3500, "question_order": i}
+               for i in range(1, 11)]
+    body = client.post("/api/assessment/submit", json={"session_id": session_id, "answers": answers},
+                       headers=_auth(world)).json()
+    top = body["matches"][0]["slug"]
+
+    model = FakeModel(delay=0.01, text=json.dumps({
+        "archetype_description": "A born problem solver.", "advice": "Ship projects.",
+        "why": {top: "Logic-heavy work."}, "dimensions": {"analytical": 1}}))
+    monkeypatch.setattr(ai_engine, "model", model)
+    monkeypatch.setattr(ai_engine, "gateway", ai_engine.AIGateway(max_concurrency=2, timeout=5))
+    asyncio.run(job_queue.drain())
+
+    narrative = client.get(body["narrative"]["status_url"], headers=_auth(world)).json()["result"]
+    assert narrative["advice"] == "Ship projects."
+    assert narrative["personality_summary"] == body["personality_summary"]  # missing → local text
+    saved = client.get("/api/assessment/profile", headers=_auth(world)).json()
+    assert saved["archetype"]["description"] == "A born problem solver."
+    assert saved["matches"][0]["why"] == "Logic-heavy work."
+    assert saved["matches"][1]["why"] == body["matches"][1]["why"]
+    assert saved["dimensions"] == body["profile"]["dimensions"]
@@ -0,0 +1,57 @@
+"""
+AsyncSession routes — auth through get_current_user_async / require_user_async, and
+writes seen by the async reads that follow them.
+"""
+from datetime import timedelta
+
+from auth import create_access_token
+
+
+def _bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_async_auth_rejects_missing_invalid_and_expired_tokens(client, world):
+    expired = create_access_token({"sub": world["student_id"]}, timedelta(minutes=-5))
+    cases = {
+        "missing": ({}, "Authentication required"),
+        "invalid": (_bearer("not-a-jwt"), "Invalid or expired token"),
+        "expired": (_bearer(expired), "Invalid or expired token"),
+        "unknown user": (_bearer(create_access_token({"sub": "no-such-user"})), "User not found"),
+    }
+    for name, (headers, detail) in cases.items():
+        resp = client.get("/api/notifications", headers=headers)   # require_user_async
+        assert resp.status_code == 401 and resp.json()["detail"] == detail, name
+
+    # Optional auth: anonymous is fine, a bad token is still rejected
+    assert client.get("/api/community/posts").status_code == 200
+    for headers in (_bearer("not-a-jwt"), _bearer(expired)):
+        assert client.get("/api/community/posts", headers=headers).status_code == 401
+    assert client.get("/api/notifications", headers=_bearer(world["tokens"]["student"])).status_code == 200
+
+
+def test_like_round_trip_through_async_reads(client, world):
+    student = _bearer(world["tokens"]["student"])
+
+    def listed():
+        return client.get("/api/community/posts", params={"limit": 50}, headers=student).json()["posts"]
+
+    # A peer's post the student hasn't liked (the seeded likes are left to other tests)
+    before = next(p for p in listed() if p["author_id"] not in (None, world["student_id"]) and not p["user_liked"])
+    post_id, author = before["id"], _bearer(create_access_token({"sub": before["author_id"]}))
+
+    def like_notifications():
+        items = client.get("/api/notifications", params={"limit": 100}, headers=author).json()["notifications"]
+        return [n for n in items if n["type"] == "post_like"]
+
+    notified = len(like_notifications())
+
+    liked = client.post(f"/api/community/posts/{post_id}/like", headers=student).json()
+    assert liked["liked"] is True and liked["likes_count"] == before["likes_count"] + 1
+    after = next(p for p in listed() if p["id"] == post_id)
+    assert after["user_liked"] is True and after["likes_count"] == liked["likes_count"]
+    assert len(like_notifications()) == notified + 1   # the author's async inbox sees it
+
+    unliked = client.post(f"/api/community/posts/{post_id}/like", headers=student).json()
+    assert unliked["liked"] is False
+    assert next(p for p in listed() if p["id"] == post_id) == before
@@ -0,0 +1,104 @@
+"""
+chat_memory — token-bounded chat prompts and rolling summaries compacted off the request path.
+"""
+import asyncio
+
+import pytest
+
+import ai_engine
+import ai_telemetry
+import chat_memory
+import job_queue
+from database import SessionLocal
+from models import BackgroundJob, ChatSummary
+
+
+@pytest.fixture(autouse=True)
+def default_ratio(monkeypatch):
+    """Earlier tests may have calibrated the estimate; these assume the default."""
+    monkeypatch.setattr(ai_telemetry, "_chars_per_token", 4.0)
+
+
+def _auth(world):
+    return {"Authorization": f"Bearer {world['tokens']['student']}"}
+
+
+def _msgs(n, words=20):
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"turn {i} " + "word " * words}
+            for i in range(n)]
+
+
+@pytest.fixture
+def prompts(monkeypatch):
+    """Prompts sent by career_chat (no model: the mock reply still comes back)."""
+    sent = []
+    original = ai_engine.generate_text
+
+    async def record(prompt, timeout=None, hedge=False):
+        sent.append(prompt)
+        return await original(prompt, timeout, hedge)
+
+    monkeypatch.setattr(ai_engine, "generate_text", record)
+    return sent
+
+
+def test_window_keeps_the_newest_turns_within_budget():
+    messages = _msgs(30)
+    per_message = chat_memory.message_tokens(messages[0])
+    summary, recent = chat_memory.window(messages, budget=per_message * 5 + 1)
+    assert summary is None and recent == messages[-5:]
+
+    summary, recent = chat_memory.window(messages, summary="word " * 100, budget=per_message * 5 + 1)
+    assert len(recent) < 5 and recent[-1] == messages[-1]
+
+    huge = [{"role": "user", "content": "x " * 5000}]
+    _, recent = chat_memory.window(huge, budget=200)
+    assert chat_memory.message_tokens(recent[0]) <= 200 + chat_memory.MESSAGE_OVERHEAD_TOKENS
+
+
+def test_token_estimate_is_calibrated_from_reported_usage():
+    assert ai_telemetry.estimate_tokens("a" * 400) == 100
+    for _ in range(50):
+        ai_telemetry.observe_tokens(300, 100)  # this model: 3 chars per token
+    assert ai_telemetry.chars_per_token() == pytest.approx(3.0, abs=0.05)
+    assert ai_telemetry.estimate_tokens("a" * 300) == pytest.approx(100, abs=2)
+    ai_telemetry.observe_tokens(10_000, 1)  # nonsense is clamped
+    assert ai_telemetry.chars_per_token() <= ai_telemetry.CHARS_PER_TOKEN_RANGE[1]
+
+
+def test_needs_compaction():
+    budget_msgs = int(chat_memory.HISTORY_TOKENS / chat_memory.message_tokens(_msgs(1)[0])) + 1
+    assert not chat_memory.needs_compaction(_msgs(3, words=2000))            # too few to fold
+    assert not chat_memory.needs_compaction(_msgs(8))                        # small enough
+    assert chat_memory.needs_compaction(_msgs(budget_msgs))
+    assert not chat_memory.needs_compaction(_msgs(budget_msgs), covered=budget_msgs - 4)
+    assert chat_memory.fold_range(_msgs(10), covered=2) == (2, 6)
+
+
+def test_long_sessions_are_compacted_in_the_background(client, world, prompts, monkeypatch):
+    monkeypatch.setattr(chat_memory, "HISTORY_TOKENS", 300)
+    session_id = None
+    for i in range(6):
+        body = {"message": f"Question {i}: " + "should I study DSA or web dev first? " * 4, "session_id": session_id}
+        session_id = client.post("/api/chat", json=body, headers=_auth(world)).json()["session_id"]
+    assert all(ai_telemetry.estimate_tokens(p.split("Conversation history:")[-1]) < 700 for p in prompts)
+
+    db = SessionLocal()
+    try:
+        memory = db.get(ChatSummary, session_id)
+        assert memory.requested_at is not None and memory.covered == 0
+        queued = [j for j in db.query(BackgroundJob).filter_by(kind="chat_compact", status="queued")
+                  if j.payload["session_id"] == session_id]
+        assert len(queued) == 1  # not re-queued while one is pending
+    finally:
+        db.close()
+
+    asyncio.run(job_queue.drain())
+    saved = client.get(f"/api/chat/sessions/{session_id}", headers=_auth(world)).json()
+    assert saved["summary"]["covered"] == len(saved["messages"]) - chat_memory.KEEP_RECENT
+    assert saved["summary"]["text"].startswith("The student asked about: Question 0")
+
+    prompts.clear()
+    client.post("/api/chat", json={"message": "And after that?", "session_id": session_id}, headers=_auth(world))
+    assert "Summary of the earlier conversation:\nThe student asked about: Question 0" in prompts[0]
+    assert "Question 0: should" not in prompts[0].split("Conversation history:")[-1]
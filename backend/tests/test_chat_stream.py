@@ -0,0 +1,104 @@
+"""
+/api/chat — SSE token stream, WebSocket mirror, persistence of both turns.
+"""
+import asyncio
+import json
+
+import pytest
+
+import ai_engine
+from test_ai_gateway import FakeResponse
+
+
+def _auth(world):
+    return {"Authorization": f"Bearer {world['tokens']['student']}"}
+
+
+def _events(resp) -> list:
+    """[(event, data)] from an SSE body."""
+    out = []
+    for block in resp.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        out.append((lines["event"], json.loads(lines["data"])))
+    return out
+
+
+class StreamingModel:
+    def __init__(self, chunks, delay=0.01):
+        self.chunks = chunks
+        self.delay = delay
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        assert stream
+
+        async def gen():
+            for chunk in self.chunks:
+                await asyncio.sleep(self.delay)
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield FakeResponse(chunk)
+        return gen()
+
+
+@pytest.fixture
+def streaming(monkeypatch):
+    def install(chunks):
+        monkeypatch.setattr(ai_engine, "model", StreamingModel(chunks))
+        monkeypatch.setattr(ai_engine, "gateway", ai_engine.AIGateway(max_concurrency=2, timeout=5))
+    return install
+
+
+def test_stream_without_model_sends_mock_tokens_and_saves(client, world):
+    resp = client.post("/api/chat/stream", json={"message": "How do I crack TCS NQT?"}, headers=_auth(world))
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    events = _events(resp)
+    assert events[0][0] == "start" and events[-1][0] == "done"
+    tokens = [data["text"] for name, data in events if name == "token"]
+    assert len(tokens) > 5
+    done = events[-1][1]
+    assert done["reply"] == "".join(tokens) == ai_engine._mock_chat_response("How do I crack TCS NQT?")
+    assert done["ttft_ms"] is not None and done["ttft_ms"] <= done["total_ms"]
+
+    saved = client.get(f"/api/chat/sessions/{done['session_id']}", headers=_auth(world)).json()["messages"]
+    assert [m["role"] for m in saved] == ["user", "assistant"]
+    assert saved[-1]["content"] == done["reply"]
+
+
+def test_stream_relays_model_chunks_and_mirrors_to_websocket(client, world, streaming):
+    streaming(["Learn ", "DSA ", "first."])
+    with client.websocket_connect(f"/api/ws/{world['student_id']}") as ws:
+        assert ws.receive_json()["type"] == "connected"
+        resp = client.post("/api/chat/stream", json={"message": "What first?", "session_id": world["chat_session_id"]},
+                           headers=_auth(world))
+        pushed = [ws.receive_json() for _ in range(4)]
+    events = _events(resp)
+    assert [d["text"] for e, d in events if e == "token"] == ["Learn ", "DSA ", "first."]
+    assert [m["type"] for m in pushed] == ["chat_token"] * 3 + ["chat_done"]
+    assert pushed[-1]["reply"] == "Learn DSA first."
+
+    saved = client.get(f"/api/chat/sessions/{world['chat_session_id']}", headers=_auth(world)).json()["messages"]
+    assert saved[-2]["content"] == "What first?" and saved[-1]["content"] == "Learn DSA first."
+
+
+def test_stream_failure_before_first_token_falls_back(client, world, streaming):
+    streaming([RuntimeError("quota exceeded")])
+    resp = client.post("/api/chat/stream", json={"message": "Is GATE worth it?"}, headers=_auth(world))
+    assert _events(resp)[-1][1]["reply"] == ai_engine._mock_chat_response("Is GATE worth it?")
+
+
+def test_stream_failure_mid_reply_keeps_the_partial_text(client, world, streaming):
+    streaming(["Half an ", RuntimeError("connection reset")])
+    resp = client.post("/api/chat/stream", json={"message": "Tell me more"}, headers=_auth(world))
+    done = _events(resp)[-1][1]
+    assert done["reply"] == "Half an "
+
+
+def test_plain_chat_appends_both_turns_to_an_existing_session(client, world):
+    before = client.get(f"/api/chat/sessions/{world['chat_session_id']}", headers=_auth(world)).json()["messages"]
+    resp = client.post("/api/chat", json={"message": "Any tips for Infosys?", "session_id": world["chat_session_id"]},
+                       headers=_auth(world))
+    assert resp.status_code == 200
+    after = client.get(f"/api/chat/sessions/{world['chat_session_id']}", headers=_auth(world)).json()["messages"]
+    assert len(after) == len(before) + 2
+    assert after[-2]["content"] == "Any tips for Infosys?" and after[-1]["content"] == resp.json()["reply"]
@@ -0,0 +1,80 @@
+"""
+college_resolver — free-text college names to College.id: variants, inline on profile writes, backfill.
+"""
+import college_resolver
+import college_stats
+from database import SessionLocal
+from models import College, CollegeStats, CollegeStatsChange, UserProfile
+
+VIT = "Vellore Institute of Technology"
+
+
+def _auth(world):
+    return {"Authorization": f"Bearer {world['tokens']['student']}"}
+
+
+def _college_id(db, slug: str) -> str:
+    return db.query(College.id).filter_by(slug=slug).scalar()
+
+
+def test_name_variants_resolve_to_one_college(world):
+    db = SessionLocal()
+    try:
+        iitb, vit = _college_id(db, "iit-bombay"), _college_id(db, "vit-vellore")
+    finally:
+        db.close()
+    for name in ("Indian Institute of Technology Bombay", "IIT Bombay", "IIT-B", "iitb", "I.I.T. Bombay",
+                 "iit bombay, powai", "Indian Institue of Technology Bombay"):
+        assert college_resolver.resolve(name) == iitb, name
+    for name in (VIT, "VIT University", "vit vellore"):
+        assert college_resolver.resolve(name) == vit, name
+    # Too vague (every IIT is as close) or nothing like any college
+    for name in ("IIT", "Indian Institute of Technology", "Nowhere Polytechnic", "", None):
+        assert college_resolver.resolve(name) is None, name
+
+
+def test_profile_edits_resolve_inline(client, world):
+    db = SessionLocal()
+    try:
+        iitb = _college_id(db, "iit-bombay")
+        before = db.get(CollegeStats, iitb).student_count
+    finally:
+        db.close()
+    try:
+        me = client.patch("/api/auth/profile", json={"college_name": "IIT-B"}, headers=_auth(world)).json()
+        assert me["profile"]["college_id"] == iitb
+
+        db = SessionLocal()
+        try:
+            assert db.query(CollegeStatsChange).filter_by(college_id=iitb).count() == 1
+            college_stats.refresh_stale(db)
+            assert db.get(CollegeStats, iitb).student_count == before + 1
+        finally:
+            db.close()
+        found = client.get("/api/recruiter/candidates", params={"college": "iit bombay"}).json()["candidates"]
+        assert [c["id"] for c in found] == [world["student_id"]]
+    finally:
+        client.patch("/api/auth/profile", json={"college_name": VIT}, headers=_auth(world))
+
+
+def test_backfill_resolves_existing_profiles(world):
+    db = SessionLocal()
+    try:
+        vit = _college_id(db, "vit-vellore")
+        expected = dict(db.query(UserProfile.user_id, UserProfile.college_id))
+        assert set(expected.values()) == {vit}
+        db.query(UserProfile).update({"college_id": None})   # as after adding the column
+        db.commit()
+
+        after, profiles, changed = None, 0, 0
+        while True:
+            after, n, c, unresolved = college_resolver.backfill_chunk(db, after, 5)
+            if not n:
+                break
+            profiles, changed = profiles + n, changed + c
+            assert unresolved == 0
+        assert profiles == changed == len(expected)
+        assert dict(db.query(UserProfile.user_id, UserProfile.college_id)) == expected
+        assert college_resolver.backfill_chunk(db, None, 100)[2] == 0   # nothing left to change
+    finally:
+        db.close()
@@ -0,0 +1,136 @@
+"""
+college_stats — materialized Campus Wars aggregates: rebuild, change log, refresh.
+"""
+import statistics
+from datetime import datetime, timezone
+
+from sqlalchemy import event
+
+import college_stats
+from database import SessionLocal, engine
+from models import College, CollegeStats, CollegeStatsChange, UserProfile
+
+VIT = "Vellore Institute of Technology"
+
+
+def _vit(db) -> tuple:
+    college = db.query(College).filter_by(name=VIT).one()
+    db.expire_all()
+    return college, db.get(CollegeStats, college.id)
+
+
+def _pending(db, college_id) -> int:
+    return db.query(CollegeStatsChange).filter_by(college_id=college_id).count()
+
+
+def _expected(db) -> dict:
+    college = db.query(College).filter_by(name=VIT).one()
+    scores = [p.mentixy_score or 0 for p in db.query(UserProfile).filter_by(college_id=college.id)]
+    scored = [s for s in scores if s > 0]
+    return {"student_count": len(scores), "scored_count": len(scored), "score_sum": sum(scored),
+            "median_score": statistics.median(scored),
+            "top_k_score": sum(sorted(scored, reverse=True)[:college_stats.TOP_K]) / college_stats.TOP_K}
+
+
+def _row(stats: CollegeStats) -> dict:
+    return {name: getattr(stats, name) for name in
+            ("student_count", "scored_count", "score_sum", "median_score", "top_k_score")}
+
+
+def test_rebuild_matches_the_profiles(world):
+    db = SessionLocal()
+    try:
+        assert college_stats.refresh(db) == db.query(College).count()
+        college, stats = _vit(db)
+        assert _row(stats) == _expected(db) and stats.student_count >= 10
+        assert stats.avg_score == stats.score_sum / stats.scored_count and _pending(db, college.id) == 0
+    finally:
+        db.close()
+
+
+def test_score_changes_are_logged_and_folded_by_the_refresh(world):
+    db = SessionLocal()
+    try:
+        college, before = _vit(db)
+        before = _row(before)
+        profile = db.get(UserProfile, world["peer_id"])
+        old = profile.mentixy_score
+        profile.mentixy_score = old + 7
+        db.flush()
+        db.rollback()  # a rolled-back write leaves no trace
+        assert _pending(db, college.id) == 0
+
+        profile = db.get(UserProfile, world["peer_id"])
+        profile.mentixy_score = old + 7
+        db.commit()
+        assert _pending(db, college.id) == 1
+        assert _row(_vit(db)[1]) == before  # the write never touches the stats row
+
+        profile = db.get(UserProfile, world["peer_id"])
+        profile.college_name = "Somewhere Else"  # leaves VIT
+        db.commit()
+        assert _pending(db, college.id) == 2
+
+        assert college_stats.refresh_stale(db) >= 1
+        _, stats = _vit(db)
+        assert _row(stats) == _expected(db) and stats.student_count == before["student_count"] - 1
+        assert _pending(db, college.id) == 0 and college_stats.refresh_stale(db) == 0
+
+        profile = db.get(UserProfile, world["peer_id"])
+        profile.college_name, profile.mentixy_score = VIT, old
+        db.commit()
+        college_stats.refresh_stale(db)
+        assert _row(_vit(db)[1]) == before
+    finally:
+        db.close()
+
+
+def test_change_committed_during_a_refresh_stays_logged(world):
+    db, other = SessionLocal(), SessionLocal()
+    try:
+        college, _ = _vit(db)
+        old = db.get(UserProfile, world["peer_id"]).mentixy_score
+        raced = []
+
+        def race(conn, cursor, statement, *args):
+            # A score event commits after the refresh read the log and the profiles
+            if "user_activity_daily" in statement and not raced:
+                raced.append(statement)
+                other.get(UserProfile, world["peer_id"]).mentixy_score = old + 3
+                other.commit()
+
+        event.listen(engine, "before_cursor_execute", race)
+        try:
+            college_stats.refresh(db, [college.id])
+        finally:
+            event.remove(engine, "before_cursor_execute", race)
+        assert raced and _pending(db, college.id) == 1
+        assert college_stats.refresh_stale(db) >= 1
+        assert _row(_vit(db)[1]) == _expected(db) and _pending(db, college.id) == 0
+
+        other.get(UserProfile, world["peer_id"]).mentixy_score = old
+        other.commit()
+        college_stats.refresh_stale(db)
+    finally:
+        db.close()
+        other.close()
+
+
+def test_campus_wars_ranks_by_top_k(client, world):
+    body = client.get("/api/leaderboard/campus-wars").json()
+    rows = body["campus_wars"]
+    assert body["total"] == len(rows) >= 1
+    keys = [(r["top_k_score"], r["avg_mentixy_score"]) for r in rows]
+    assert keys == sorted(keys, reverse=True)
+    vit = next(r for r in rows if r["college_name"] == VIT)
+    assert vit["active_students"] >= 10 and vit["median_mentixy_score"] > 0
+
+    only = client.get("/api/leaderboard/campus-wars", params={"state": "tamil"}).json()["campus_wars"]
+    assert {r["state"] for r in only} == {"Tamil Nadu"}
+
+
+def test_refresh_schedule():
+    at = college_stats.next_refresh(datetime(2026, 3, 1, 10, 7, 30, tzinfo=timezone.utc))
+    assert at == datetime(2026, 3, 1, 10, 10, tzinfo=timezone.utc)
+    assert college_stats.next_refresh(at) == datetime(2026, 3, 1, 10, 15, tzinfo=timezone.utc)
+    assert college_stats.next_rebuild(at) == datetime(2026, 3, 1, 22, 30, tzinfo=timezone.utc)
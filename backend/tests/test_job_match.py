@@ -0,0 +1,124 @@
+"""
+job_match — local batched job scoring; the LLM only explains the top-k.
+"""
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import ai_engine
+import job_match
+from test_ai_gateway import FakeModel
+
+
+def _job(job_id, required=(), preferred=None, **fields):
+    row = dict.fromkeys(job_match._COLUMNS)
+    row.update(id=job_id, company_name=f"Co {job_id}", role_title=f"Role {job_id}",
+               required_skills=list(required), preferred_skills=preferred, posted_at="2026-01-01")
+    row.update(fields)
+    return SimpleNamespace(**row)
+
+
+def _auth(world):
+    return {"Authorization": f"Bearer {world['tokens']['student']}"}
+
+
+def test_skill_alternatives_and_aliases():
+    assert job_match.alternatives("Python / Java") == ("python", "java")
+    assert job_match.alternatives("JS") == ("javascript",)
+    m = job_match.JobMatrix([_job("a", ["Python/Java", "SQL"]), _job("b", ["java", "Golang"])])
+    assert m.entries == ["python / java", "sql", "java", "go"]
+    c = job_match.Candidate({"Java": 1.0, "go": 0.5})
+    assert job_match.skill_vector(m, c).tolist() == [1.0, 0.0, 1.0, 0.5]
+
+
+def test_scores_every_feature_in_one_pass():
+    jobs = [
+        _job("full", ["Python", "SQL"], salary_max_lpa=12),
+        _job("half", ["Python", "Kubernetes"], salary_max_lpa=12),
+        _job("underpaid", ["Python", "SQL"], salary_max_lpa=5),
+        _job("tier1", ["Python", "SQL"], salary_max_lpa=12, college_tier_required=1, min_cgpa=8.5),
+        _job("batch", ["Python", "SQL"], salary_max_lpa=12, graduation_year_min=2028),
+    ]
+    c = job_match.Candidate({"Python": 1.0, "SQL": 1.0}, graduation_year=2027, college_tier=2,
+                            cgpa=7.5, expected_lpa=10)
+    scored = job_match.score_all(job_match.JobMatrix(jobs), c)
+    score = dict(zip([j.id for j in jobs], scored["score"].round(1)))
+
+    assert score["full"] == 100 - 100 * job_match.WEIGHTS["preferred_skills"] * (1 - job_match.NEUTRAL)
+    assert score["full"] > score["underpaid"] > score["half"]
+    assert score["full"] > score["tier1"]
+    assert scored["fits"]["salary"][2] == pytest.approx(0.5)
+    assert scored["fits"]["college_tier"][3] == pytest.approx(1 - job_match.TIER_STEP)
+    assert scored["fits"]["cgpa"][3] == pytest.approx(0.5)
+    assert scored["eligible"].tolist() == [True, True, True, True, False]
+    assert score["batch"] < score["full"] * job_match.INELIGIBLE_FACTOR + 1
+
+
+def test_top_k_pages_are_ordered_and_stable():
+    scores = np.array([5, 9, 1, 9, 7, 3], dtype=np.float32)
+    assert job_match.top_k(scores, 3).tolist() == [1, 3, 4]
+    assert job_match.top_k(scores, 3, offset=3).tolist() == [0, 5, 2]
+    assert job_match.top_k(scores, 10, offset=6).tolist() == []
+
+
+def test_matched_ranks_all_jobs_and_fixes_route_order(client, world):
+    resp = client.get("/api/jobs/matched", params={"limit": 50, "explain": 0}, headers=_auth(world))
+    assert resp.status_code == 200, resp.text[:300]
+    body = resp.json()
+    scores = [j["match"]["match_score"] for j in body["jobs"]]
+    assert len(scores) == body["total"] > 5
+    assert scores == sorted(scores, reverse=True)
+    assert all(j["match"]["explanation"] is None for j in body["jobs"])
+
+    page = client.get("/api/jobs/matched", params={"skip": 2, "limit": 2, "explain": 0}, headers=_auth(world)).json()
+    assert [j["id"] for j in page["jobs"]] == [j["id"] for j in body["jobs"][2:4]]
+
+
+def test_only_top_k_are_explained_in_one_call(client, world, monkeypatch):
+    matched = client.get("/api/jobs/matched", params={"explain": 0}, headers=_auth(world)).json()["jobs"]
+    top = [j["id"] for j in matched[:2]]
+    model = FakeModel(delay=0.01, text=json.dumps({top[0]: {"recommendation": "apply_now", "gaps": []}}))
+    prompts = []
+    original = model.generate_content_async
+
+    async def record(prompt, **kwargs):
+        prompts.append(prompt)
+        return await original(prompt, **kwargs)
+
+    model.generate_content_async = record
+    monkeypatch.setattr(ai_engine, "model", model)
+    monkeypatch.setattr(ai_engine, "gateway", ai_engine.AIGateway(max_concurrency=2, timeout=5))
+
+    jobs = client.get("/api/jobs/matched", params={"explain": 2}, headers=_auth(world)).json()["jobs"]
+    assert len(prompts) == 1
+    assert all(job_id in prompts[0] for job_id in top)
+    assert jobs[0]["match"]["explanation"] == {"recommendation": "apply_now", "gaps": []}
+    assert jobs[1]["match"]["explanation"]["recommendation"]  # missing from the reply → local fallback
+    assert all(j["match"]["explanation"] is None for j in jobs[2:])
+    assert [j["match"]["match_score"] for j in jobs] == [j["match"]["match_score"] for j in matched]
+
+
+def test_single_job_match_uses_the_local_score(client, world):
+    resp = client.post("/api/ai/job-match", json={"job_id": world["job_id"]}, headers=_auth(world))
+    assert resp.status_code == 200
+    body = resp.json()
+    assert 0 <= body["match_score"] <= 100 and body["match_grade"]
+    assert set(body["breakdown"]) == set(job_match.WEIGHTS)
+    assert body["recommendation"] in ("apply_now", "upskill_first", "stretch_goal", "not_recommended")
+
+
+def test_job_writes_invalidate_the_matrix(client, world):
+    from database import SessionLocal
+    from models import JobListing
+    job_match.matrix()
+    db = SessionLocal()
+    try:
+        job = JobListing(company_name="Acme", role_title="Rust Engineer", required_skills=["Rust"])
+        db.add(job)
+        db.commit()
+        job_id = job.id
+    finally:
+        db.close()
+    assert job_id in job_match.matrix().row_of
@@ -0,0 +1,172 @@
+"""
+job_queue — durable background jobs: submit → 202, workers, retries, leases, push.
+"""
+import asyncio
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import update
+
+import job_queue
+from database import SessionLocal, engine
+from models import BackgroundJob, CareerProfile4D, LearningRoadmap
+
+
+def _auth(world, who="student"):
+    return {"Authorization": f"Bearer {world['tokens'][who]}"}
+
+
+def _job(client, world, job_id):
+    resp = client.get(f"/api/queue/jobs/{job_id}", headers=_auth(world))
+    assert resp.status_code == 200, resp.text[:300]
+    return resp.json()
+
+
+def _set(job_id, **values):
+    with engine.begin() as conn:
+        conn.execute(update(BackgroundJob.__table__).where(BackgroundJob.__table__.c.id == job_id).values(**values))
+
+
+@pytest.fixture
+def flaky():
+    """A handler that fails `fail_times` times, then succeeds."""
+    state = {"fail_times": 1, "calls": 0}
+
+    @job_queue.handler("test_flaky")
+    async def run(job):
+        state["calls"] += 1
+        await job.progress(50)
+        if state["calls"] <= state["fail_times"]:
+            raise RuntimeError(f"boom {state['calls']}")
+        return {"calls": state["calls"], "echo": job.payload}
+
+    yield state
+    job_queue.HANDLERS.pop("test_flaky", None)
+
+
+def _enqueue(world, kind="test_flaky", payload=None, max_attempts=3):
+    db = SessionLocal()
+    try:
+        job = job_queue.enqueue(db, kind, world["student_id"], payload or {"n": 1}, max_attempts=max_attempts)
+        db.commit()
+        return job.id
+    finally:
+        db.close()
+
+
+def test_roadmap_submit_returns_job_and_worker_saves_result(client, world):
+    resp = client.post("/api/ai/generate-roadmap", json={"target_career": "Data Engineer"}, headers=_auth(world))
+    assert resp.status_code == 202
+    body = resp.json()
+    assert body["status"] == "queued" and body["status_url"] == f"/api/queue/jobs/{body['job_id']}"
+    assert _job(client, world, body["job_id"])["status"] == "queued"
+
+    assert asyncio.run(job_queue.drain()) >= 1
+    job = _job(client, world, body["job_id"])
+    assert job["status"] == "succeeded" and job["progress"] == 100 and job["attempts"] == 1
+    assert job["result"]["roadmap"]["phases"]
+
+    db = SessionLocal()
+    try:
+        roadmap = db.get(LearningRoadmap, job["result"]["roadmap_id"])
+        assert roadmap.user_id == world["student_id"] and roadmap.target_career_name == "Data Engineer"
+    finally:
+        db.close()
+
+    listed = client.get("/api/queue/jobs", params={"status": "succeeded"}, headers=_auth(world)).json()["jobs"]
+    assert body["job_id"] in [j["job_id"] for j in listed]
+    assert client.get(f"/api/queue/jobs/{body['job_id']}", headers=_auth(world, "admin")).status_code == 404
+
+
+def test_assessment_and_resume_jobs(client, world):
+    resp = client.post("/api/assessment/start", json={"device_type": "web"}, headers=_auth(world))
+    session_id = resp.json()["session_id"]
+    answers = [{"question_id": q, "selected_option": "B", "time_spent_ms": 3000, "question_order": i}
+               for i, q in enumerate(world["assessment_question_ids"])]
+    assessment = client.post("/api/assessment/submit", json={"session_id": session_id, "answers": answers},
+                             headers=_auth(world)).json()
+    review = client.post("/api/ai/resume-review", params={"enrich": "true"},
+                         json={"resume_data": {"skills": ["Go"]}, "target_role": "SRE"}, headers=_auth(world)).json()
+    asyncio.run(job_queue.drain())
+
+    assert set(assessment) == {"profile", "matches", "personality_summary", "advice", "narrative"}
+    narrative = _job(client, world, assessment["narrative"]["job_id"])
+    assert narrative["status"] == "succeeded" and set(narrative["result"]["why"]) == {
+        m["slug"] for m in assessment["matches"]}
+    db = SessionLocal()
+    try:
+        assert db.query(CareerProfile4D).filter_by(session_id=session_id).count() == 1
+    finally:
+        db.close()
+    assert "ats_score" in _job(client, world, review["job_id"])["result"]
+
+
+def test_failures_retry_with_backoff_then_succeed(client, world, flaky):
+    job_id = _enqueue(world)
+    asyncio.run(job_queue.drain())
+    job = _job(client, world, job_id)
+    assert job["status"] == "queued" and job["attempts"] == 1
+    assert asyncio.run(job_queue.drain()) == 0  # backing off
+
+    _set(job_id, run_after=job_queue._now() - timedelta(seconds=1))
+    asyncio.run(job_queue.drain())
+    job = _job(client, world, job_id)
+    assert job["status"] == "succeeded" and job["attempts"] == 2
+    assert job["result"] == {"calls": 2, "echo": {"n": 1}}
+
+
+def test_exhausted_attempts_fail(client, world, flaky):
+    flaky["fail_times"] = 99
+    job_id = _enqueue(world, max_attempts=2)
+    for _ in range(2):
+        _set(job_id, run_after=job_queue._now() - timedelta(seconds=1))
+        asyncio.run(job_queue.drain())
+    job = _job(client, world, job_id)
+    assert job["status"] == "failed" and job["attempts"] == 2
+    assert job["error"] == "RuntimeError: boom 2"
+
+
+def test_claims_are_exclusive_and_stale_leases_are_reclaimed(client, world, flaky):
+    job_id = _enqueue(world)
+    assert job_queue.claim("worker-a", job_id=job_id) == [job_id]
+    assert job_queue.claim("worker-b", job_id=job_id) == []
+
+    # worker-a dies: once its lease is stale, worker-b takes over
+    _set(job_id, locked_at=job_queue._now() - timedelta(seconds=job_queue.LEASE_SECONDS + 1))
+    assert job_queue.claim("worker-b", job_id=job_id) == [job_id]
+    flaky["fail_times"] = 0
+    asyncio.run(job_queue.run_job(job_id, "worker-b"))
+    job = _job(client, world, job_id)
+    assert job["status"] == "succeeded" and job["attempts"] == 2
+
+    # A stale job on its last attempt is failed instead of reclaimed
+    lost = _enqueue(world, max_attempts=1)
+    assert job_queue.claim("worker-a", job_id=lost) == [lost]
+    _set(lost, locked_at=job_queue._now() - timedelta(seconds=job_queue.LEASE_SECONDS + 1))
+    assert job_queue.claim("worker-b", job_id=lost) == []
+    assert job_queue.fail_abandoned() == 1
+    assert _job(client, world, lost)["status"] == "failed"
+
+
+def test_result_discarded_when_lease_was_lost(client, world, flaky):
+    flaky["fail_times"] = 0
+    job_id = _enqueue(world)
+    job_queue.claim("worker-a", job_id=job_id)
+    _set(job_id, locked_by="worker-b")
+    asyncio.run(job_queue.run_job(job_id, "worker-a"))
+    assert _job(client, world, job_id)["status"] == "running"
+
+
+def test_updates_are_pushed_to_websocket(client, world, flaky):
+    flaky["fail_times"] = 0
+    since = job_queue._naive(job_queue._now()) - timedelta(seconds=5)
+    job_id = _enqueue(world)
+    with client.websocket_connect(f"/api/ws/{world['student_id']}") as ws:
+        ws.receive_json()
+        asyncio.run(job_queue.drain())
+        client.portal.call(job_queue.push_updates, since)
+        pushed = ws.receive_json()
+        while pushed["job"]["job_id"] != job_id:
+            pushed = ws.receive_json()
+    assert pushed["type"] == "job_update"
+    assert pushed["job"]["status"] == "succeeded" and pushed["job"]["result"]["calls"] == 1
@@ -0,0 +1,311 @@
+"""
+Query budgets — every route in master_router, with a ceiling on SQL
+statements (counted by sql_profiler via X-Profile-SQL) and on wall time.
+
+A new N+1 or an accidental extra round trip fails here instead of in
+production. When a change legitimately needs more queries, raise the budget
+in the same commit; when an optimization lands, tighten it.
+"""
+import os
+import time
+
+import pytest
+from fastapi.routing import APIRoute
+
+from routes import master_router
+
+# In-process SQLite + mocked AI: real latencies are a few ms. Scale for slow CI.
+LATENCY_SCALE = float(os.getenv("QUERY_BUDGET_LATENCY_SCALE", "1"))
+DEFAULT_MS = 500
+
+
+def case(method, route, sql, url=None, json=None, auth="student", ms=DEFAULT_MS, status=None):
+    """One budgeted request. `url` takes {world} placeholders; `json` may be a callable of world.
+    `status` pins an expected status code (default: anything but a 5xx)."""
+    return {
+        "method": method, "route": route, "sql": sql, "url": url or route,
+        "json": json, "auth": auth, "ms": ms, "status": status,
+    }
+
+
+# ─── Budgets (run in this order: reads first, then writes, then deletes) ───
+
+CASES = [
+    # Auth
+    case("GET", "/auth/me", 2),
+    case("PATCH", "/auth/profile", 6, json={"tagline": "Building things", "city": "Chennai"}),
+    case("POST", "/auth/signup", 10, auth=None, ms=1500,
+         json={"email": "fresh@test.mentixy.in", "password": "test-pass-123",
+               "display_name": "Fresh User", "username": "freshuser"}),
+    case("POST", "/auth/login", 4, auth=None, ms=1500,
+         json=lambda w: {"email": w["student_email"], "password": "test-pass-123"}),
+    case("POST", "/auth/forgot-password", 5, auth=None, json=lambda w: {"email": w["student_email"]}),
+    case("POST", "/auth/reset-password", 1, auth=None, json={"token": "not-a-token", "new_password": "whatever123"}),
+    case("POST", "/auth/change-password", 2, ms=2000,
+         json={"current_password": "test-pass-123", "new_password": "test-pass-123"}),
+    case("GET", "/auth/google", 0, auth=None, status=503),  # GOOGLE_CLIENT_ID unset
+    case("GET", "/auth/google/callback", 0, url="/auth/google/callback?error=access_denied", auth=None),
+
+    # Assessment
+    case("GET", "/assessment/questions", 2),
+    case("POST", "/assessment/start", 4, json={"device_type": "web"}),
+    case("POST", "/assessment/submit", 16,  # 15 once the career matrix is cached; 5 are the score refresh
+         json=lambda w: {"session_id": w["assessment_session_id"], "answers": [
+             {"question_id": q, "selected_option": "A", "time_spent_ms": 4000, "question_order": i}
+             for i, q in enumerate(w["assessment_question_ids"])]}),
+    case("GET", "/assessment/profile", 3),
+
+    # Careers / jobs / internships
+    case("GET", "/careers", 1, auth=None),
+    case("GET", "/careers/{slug}", 1, url="/careers/software-engineer", auth=None),
+    case("GET", "/jobs", 2, auth=None),
+    case("GET", "/jobs/{job_id}", 1, url="/jobs/{job_id}", auth=None),
+    case("GET", "/jobs/matched", 5),  # 4 once the job matrix is cached
+    case("GET", "/jobs/applications/me", 3),
+    case("POST", "/jobs/{job_id}/apply", 4, url="/jobs/{job_id}/apply", json={"cover_letter": "Hi"}),
+    case("PATCH", "/jobs/applications/{app_id}", 3, url="/jobs/applications/{app_id}",
+         json={"status": "interview", "notes": "Round 1 on Monday"}),
+    case("GET", "/internships", 2, auth=None),
+
+    # Coding
+    case("GET", "/coding/daily", 3),
+    case("GET", "/coding/problems", 2, auth=None),
+    case("GET", "/coding/problems/{slug}", 1, url="/coding/problems/{problem_slug}"),
+    case("POST", "/coding/problems/{slug}/run", 2, url="/coding/problems/{problem_slug}/run",
+         json={"language": "python", "code": "print(1)"}),
+    case("POST", "/coding/problems/{slug}/submit", 11,  # + score refresh when accepted
+         url="/coding/problems/{problem_slug}/submit",
+         json={"language": "python", "code": "def two_sum(nums, t):\n    return [0, 1]"}),
+    case("GET", "/coding/problems/{slug}/submissions", 3, url="/coding/problems/{problem_slug}/submissions"),
+    case("GET", "/coding/submissions/{submission_id}/code", 2, url="/coding/submissions/{submission_id}/code"),
+    case("GET", "/coding/stats/me", 2),
+
+    # Learning
+    case("GET", "/learning/roadmaps", 2),
+    case("GET", "/learning/roadmaps/{roadmap_id}", 6, url="/learning/roadmaps/{roadmap_id}"),
+    case("POST", "/learning/milestones/{milestone_id}/complete", 10,  # roadmap % + score refresh
+         url="/learning/milestones/{milestone_id}/complete"),
+
+    # Challenges
+    case("GET", "/challenges", 2, auth=None),
+    case("GET", "/challenges/{slug}", 1, url="/challenges/{challenge_slug}", auth=None),
+    case("POST", "/challenges/{slug}/register", 6, url="/challenges/{challenge_slug}/register"),
+    case("GET", "/challenges/my/registrations", 2),
+
+    # Network (legacy)
+    case("GET", "/network/connections", 10),
+    case("GET", "/network/peers", 2),
+    case("GET", "/network/community/posts", 1),
+    case("POST", "/network/community/posts", 10, json={"content": "Anyone preparing for TCS NQT?"}),
+    case("POST", "/network/connect", 4, json=lambda w: {"receiver_id": w["admin_id"]}),
+    case("POST", "/network/connect/{conn_id}/respond", 16,  # community score refresh for both users
+         url="/network/connect/{conn_id}/respond?accept=true"),
+
+    # Companies
+    case("GET", "/companies", 2, auth=None),
+    case("GET", "/companies/{slug}", 1, url="/companies/{company_slug}", auth=None),
+    case("GET", "/companies/{slug}/reviews", 2, url="/companies/{company_slug}/reviews", auth=None),
+    case("POST", "/companies/{slug}/reviews", 6, url="/companies/{company_slug}/reviews",
+         json={"overall_rating": 4, "pros": "Good mentors", "cons": "Long hours"}),
+
+    # Resume
+    case("GET", "/resume", 2),
+    case("GET", "/resume/{resume_id}", 2, url="/resume/{resume_id}"),
+    # Saves score the resume locally; the role keyword lookup (2 queries) is cached per role
+    case("POST", "/resume", 6, json={"title": "SDE resume", "content": {"name": "Test User 0"}}),
+    case("PATCH", "/resume/{resume_id}", 6, url="/resume/{resume_id}",
+         json={"title": "SDE resume v2", "content": {"name": "Test User 0", "skills": ["Go"]}}),
+
+    # Chat
+    case("GET", "/chat/sessions", 2),
+    case("GET", "/chat/sessions/{session_id}", 2, url="/chat/sessions/{chat_session_id}"),
+    case("POST", "/chat/", 7, json={"message": "Should I learn Go?"}),
+    case("POST", "/chat/stream", 7, json={"message": "Stream me an answer"}),
+    case("POST", "/chat", 7,  # the question's UPDATE used to be silently dropped
+         json=lambda w: {"message": "And Rust?", "session_id": w["chat_session_id"]}),
+
+    # Notifications
+    case("GET", "/notifications", 4),
+    case("POST", "/notifications/mark-read", 3, json=lambda w: {"notification_id": w["notification_id"]}),
+    case("POST", "/notifications/mark-all-read", 2),
+    case("POST", "/notifications/send", 3, auth="admin",
+         json=lambda w: {"user_id": w["student_id"], "title": "Drive tomorrow", "body": "TCS at 10am"}),
+
+    # Campus / market
+    case("GET", "/campus/colleges", 1, auth=None),
+    case("GET", "/campus/placements", 1, auth=None),
+    case("GET", "/campus/interviews", 1, auth=None),
+    case("GET", "/market/insights", 1, auth=None),
+    case("GET", "/market/trending-skills", 1, auth=None),
+
+    # AI engine (mock fallbacks, no API key)
+    case("POST", "/ai/skill-gap", 2, json={"current_skills": ["Python"], "target_career": "Data Scientist"}),
+    case("POST", "/ai/resume-review", 3,
+         json={"resume_data": {"skills": ["Python"]}, "target_role": "Software Engineer"}),
+    case("POST", "/ai/code-review", 1, json={"code": "print(1)", "language": "python"}),
+    case("POST", "/ai/job-match", 5, json=lambda w: {"job_id": w["job_id"]}),
+    case("POST", "/ai/generate-roadmap", 4, status=202, json={"target_career": "Software Engineer"}),
+    case("POST", "/ai/interview-prep", 1, json={"company": "TCS", "role": "Software Engineer"}),
+    case("POST", "/ai/reroute-roadmap", 2, json={}),
+    case("GET", "/ai/parent-report", 2),
+    case("POST", "/ai/salary-truth", 2, json={"ctc_lpa": 7, "role": "SDE", "city": "Bangalore"}),
+    case("POST", "/ai/negotiate-salary", 1, json={"student_message": "Can you do 10 LPA?"}),
+    case("POST", "/ai/career-day-simulator", 1, json={}),
+    case("POST", "/ai/wellbeing-check", 1, json={}),
+
+    # Aptitude
+    case("GET", "/aptitude/topics", 6),
+    case("POST", "/aptitude/practice/check", 2,
+         json=lambda w: {"question_id": w["aptitude_question_ids"][0], "selected_option": "A"}),
+    case("POST", "/aptitude/start", 14, json={"section": "mixed"}),
+    case("POST", "/aptitude/submit", 21,
+         json=lambda w: {"session_id": w["aptitude_session_id"], "answers": [
+             {"question_id": q, "selected_option": "A", "time_spent_ms": 30000}
+             for q in w["aptitude_question_ids"]]}),
+    case("GET", "/aptitude/history", 2),
+    case("GET", "/aptitude/profile", 2),
+
+    # Skills
+    case("GET", "/skills", 2, auth=None),
+    case("GET", "/skills/trending", 0, auth=None),
+    case("GET", "/skills/catalog", 2, auth=None),
+    case("GET", "/skills/my-skills", 7),
+    case("POST", "/skills/verify/start", 5, json=lambda w: {"skill_id": w["skill_id"]}),
+    case("POST", "/skills/verify/submit", 14,
+         json=lambda w: {"skill_id": w["skill_id"], "answers": [
+             {"question_id": q, "selected_option": "A"} for q in w["aptitude_question_ids"][:5]]}),
+
+    # Parent portal
+    case("GET", "/parent/weekly-summary", 5),
+    case("POST", "/parent/salary-truth", 1,
+         json={"ctc_lpa": 7, "role": "SDE", "city": "Bangalore"}),
+    case("POST", "/parent/trajectory", 2, json={"target_role": "Software Engineer"}),
+    case("GET", "/parent/stability/{role}", 0, url="/parent/stability/software-engineer"),
+
+    # Leaderboard / profile
+    case("GET", "/leaderboard", 1, auth=None),  # 0 once the in-memory boards are loaded
+    case("GET", "/leaderboard/individual", 1, auth=None),  # same
+    case("GET", "/leaderboard/campus-wars", 1, auth=None),  # was 2 per college on the page
+    case("GET", "/leaderboard/my-college", 1),
+    case("GET", "/leaderboard/me", 1),
+    case("GET", "/leaderboard/today-contribution", 2),
+    case("GET", "/profile/{username}", 15, url="/profile/{username}", auth=None),
+
+    # Mock drive
+    case("POST", "/mock-drive/start", 3, json={}),
+    case("POST", "/mock-drive/submit-round", 11,
+         json=lambda w: {"drive_id": "test", "round_number": 1, "answers": [
+             {"question_id": q, "selected_option": "A"} for q in w["aptitude_question_ids"]]}),
+    # Bare `round_scores: list` is declared as a form field, so a JSON body is rejected
+    case("POST", "/mock-drive/results", 1, url="/mock-drive/results?drive_id=test", status=422,
+         json=[{"round": 1, "score": 70}, {"round": 2, "score": 60}]),
+
+    # Score / gamification
+    case("GET", "/score", 2),
+    case("GET", "/score/current", 2),
+    case("GET", "/score/history", 2),
+    case("POST", "/score/calculate", 12),  # + Campus Wars counts when the score moves
+    case("GET", "/achievements", 4),
+    case("GET", "/tracker", 2),
+    case("POST", "/tracker/check-in", 4),
+    case("POST", "/tracker/freeze", 2, json={}),
+    case("GET", "/referral", 2),
+    case("POST", "/referral/apply", 3, json={"ref_code": "VIYU-USER1"}),
+
+    # Community
+    case("GET", "/community/posts", 6),
+    case("GET", "/community/posts/{post_id}", 10, url="/community/posts/{post_id}"),
+    case("GET", "/community/categories", 0, auth=None),
+    case("POST", "/community/posts", 13, json={"title": "Mock drive tips", "content": "Practice aptitude daily"}),
+    case("POST", "/community/posts/{post_id}/like", 5, url="/community/posts/{post_id}/like"),
+    case("POST", "/community/posts/{post_id}/comment", 12, url="/community/posts/{post_id}/comment",
+         json={"content": "Thanks!"}),
+
+    # Connections
+    case("GET", "/connections/peers", 7),
+    case("GET", "/connections/connections", 19),
+    case("GET", "/connections/pending", 2),
+    case("GET", "/connections/stats", 3),
+    case("POST", "/connections/connect", 17,  # score refresh for both users
+         json=lambda w: {"user_id": w["outsider_id"], "message": "Hi"}),
+
+    # Email
+    case("GET", "/email/templates", 0, auth=None),
+    case("POST", "/email/send", 2, json={"email_type": "streak_reminder"}),
+    case("POST", "/email/password-reset", 5, auth=None, json=lambda w: {"email": w["student_email"]}),
+    case("POST", "/email/verify-reset", 1, auth=None, json={"token": "not-a-token", "new_password": "whatever123"}),
+
+    # Recruiter
+    case("GET", "/recruiter/candidates", 2),
+    case("GET", "/recruiter/candidates/{user_id}", 1, url="/recruiter/candidates/{peer_id}"),
+    case("GET", "/recruiter/stats", 3),
+    case("POST", "/recruiter/jobs", 4, json={"role_title": "SDE Intern", "company_name": "Acme"}),
+
+    # Admin
+    case("GET", "/admin/perf/sql", 1, auth="admin"),
+    case("DELETE", "/admin/perf/sql", 1, auth="admin"),
+    case("GET", "/admin/perf/ai-cache", 1, auth="admin"),
+    case("GET", "/admin/perf/ai", 1, auth="admin"),
+    case("DELETE", "/admin/perf/ai", 1, auth="admin"),
+    case("GET", "/admin/queue", 3, auth="admin"),
+    case("POST", "/admin/scores/recompute", 3, auth="admin", status=202),
+    case("POST", "/admin/colleges/backfill", 3, auth="admin", status=202),
+    case("DELETE", "/admin/perf/ai-cache", 3, auth="admin"),  # + table check on first use
+
+    # Search
+    case("GET", "/search", 3, url="/search?q=python", auth=None),
+    case("GET", "/search/suggest", 0, url="/search/suggest?q=vel", auth=None),
+
+    # Background jobs (the submits above queued one each)
+    case("GET", "/queue/jobs", 2),
+    case("GET", "/queue/jobs/{job_id}", 2, url="/queue/jobs/missing", status=404),
+
+    # Destructive — keep last
+    case("DELETE", "/community/posts/{post_id}", 12, url="/community/posts/{own_post_id}"),
+    case("DELETE", "/connections/disconnect", 17,  # score refresh for both users
+         json=lambda w: {"user_id": w["peer_id"]}),
+    case("DELETE", "/notifications/clear", 2),
+]
+
+
+def _case_id(c) -> str:
+    return f"{c['method']} {c['route']}"
+
+
+def _params() -> list:
+    return [pytest.param(c, id=_case_id(c)) for c in CASES]
+
+
+# ─── Tests ───
+
+def test_every_route_has_a_budget():
+    routes = {
+        f"{method} {r.path}"
+        for r in master_router.routes if isinstance(r, APIRoute)
+        for method in r.methods
+    }
+    budgeted = [_case_id(c) for c in CASES]
+    assert len(budgeted) == len(set(budgeted)), "duplicate budget entries"
+    assert sorted(routes - set(budgeted)) == [], "routes without a query budget"
+    assert sorted(set(budgeted) - routes) == [], "budgets for routes that no longer exist"
+
+
+@pytest.mark.parametrize("c", _params())
+def test_query_budget(client, world, c):
+    url = "/api" + c["url"].format(**world)
+    body = c["json"](world) if callable(c["json"]) else c["json"]
+    headers = {"X-Profile-SQL": "1"}
+    if c["auth"]:
+        headers["Authorization"] = f"Bearer {world['tokens'][c['auth']]}"
+
+    start = time.perf_counter()
+    resp = client.request(c["method"], url, json=body, headers=headers)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if c["status"]:
+        assert resp.status_code == c["status"], f"{resp.status_code}: {resp.text[:300]}"
+    else:
+        assert resp.status_code < 500, f"{resp.status_code}: {resp.text[:300]}"
+    statements = int(resp.headers["x-sql-count"])
+    assert statements <= c["sql"], f"{statements} SQL statements (budget {c['sql']})"
+    assert elapsed_ms <= c["ms"] * LATENCY_SCALE, f"{elapsed_ms:.0f}ms (budget {c['ms']}ms)"
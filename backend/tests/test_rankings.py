@@ -0,0 +1,114 @@
+"""
+rankings — in-memory leaderboards agree with a full sort and follow profile writes.
+"""
+import random
+import time
+
+import rankings
+import score_calculator
+from database import SessionLocal
+from models import UserProfile
+
+
+def _auth(world):
+    return {"Authorization": f"Bearer {world['tokens']['student']}"}
+
+
+def _row(n: int, score: int, college: str = "A", streak: int = 0, points: int = 0) -> dict:
+    return {"user_id": f"u{n:05d}", "username": f"user{n}", "display_name": f"User {n}", "avatar_url": None,
+            "college_name": college, "archetype_name": None,
+            "mentixy_score": score, "streak_days": streak, "total_points": points}
+
+
+def _expected(members: dict, metric: str, college: str = None) -> list:
+    rows = [m for m in members.values() if college is None or m["college_name"] == college]
+    return [m["user_id"] for m in sorted(rows, key=lambda m: (-m[metric], m["user_id"]))]
+
+
+def test_ranks_pages_and_neighbours_match_a_full_sort():
+    rng = random.Random(7)
+    members = {r["user_id"]: r for r in (
+        _row(n, rng.randint(0, 100), rng.choice("ABC"), rng.randint(0, 40), rng.randint(0, 5000))
+        for n in range(3000))}
+    boards = rankings.Leaderboards()
+    boards.load(lambda: list(members.values()))
+
+    # Random score, streak and college changes, and a few users leaving
+    for user_id in rng.sample(sorted(members), 300):
+        change = {"mentixy_score": rng.randint(0, 100), "streak_days": rng.randint(0, 40)}
+        if rng.random() < 0.2:
+            change["college_name"] = rng.choice("ABC")
+        members[user_id].update(change)
+        boards.update(user_id, change)
+    for user_id in rng.sample(sorted(members), 20):
+        del members[user_id]
+        boards.update(user_id, None)
+
+    for metric in rankings.METRICS:
+        for college in (None, "A", "C"):
+            expected = _expected(members, metric, college)
+            assert boards.count(metric, college) == len(expected)
+            assert [p["user_id"] for _, p in boards.top(metric, 25, 40, college)] == expected[40:65]
+            user_id = expected[len(expected) // 2]
+            assert boards.rank(user_id, metric, college) == expected.index(user_id) + 1
+            near = boards.around(user_id, metric, 3, college)
+            assert [rank for rank, _ in near] == list(range(len(expected) // 2 - 2, len(expected) // 2 + 5))
+
+    positive = [u for u in _expected(members, "mentixy_score", "B") if members[u]["mentixy_score"] > 0]
+    assert boards.count("mentixy_score", "B", positive=True) == len(positive)
+    assert len(boards.top("mentixy_score", 5000, college="B", positive=True)) == len(positive)
+    assert boards.total("mentixy_score", "B") == sum(members[u]["mentixy_score"] for u in positive)
+    assert boards.rank(positive[0], "mentixy_score", "A") is None
+
+    started = time.perf_counter()
+    for user_id in list(members)[:1000]:
+        boards.rank(user_id, "mentixy_score")
+        boards.around(user_id, "mentixy_score", 5)
+    assert time.perf_counter() - started < 0.5
+
+
+def test_partial_update_waits_for_a_load():
+    boards = rankings.Leaderboards()
+    boards.update("u1", {"mentixy_score": 50})  # unknown user, partial fields: nothing to rank
+    assert len(boards) == 0
+    boards.load(lambda: [_row(1, 10), _row(2, 20)])
+    boards.update("u00001", {"mentixy_score": 30})
+    assert boards.rank("u00001", "mentixy_score") == 1
+    assert boards.member("u00001")["display_name"] == "User 1"
+
+
+def test_endpoints_follow_profile_writes(client, world):
+    db = SessionLocal()
+    try:
+        profile = db.get(UserProfile, world["peer_id"])
+        profile.streak_days = 999  # an ORM write, as a check-in makes
+        db.commit()
+    finally:
+        db.close()
+
+    top = client.get("/api/leaderboard/individual", params={"metric": "streak", "limit": 3}).json()
+    assert top["leaderboard"][0]["streak_days"] == 999 and top["leaderboard"][0]["rank"] == 1
+
+    db = SessionLocal()
+    try:
+        # Bulk score writes from the nightly recompute reach the boards too
+        db.query(UserProfile).filter_by(user_id=world["student_id"]).update({"mentixy_score": 0})
+        db.commit()
+        score_calculator.recompute_chunk(db, None, 10_000)
+        student_score = db.get(UserProfile, world["student_id"]).mentixy_score
+        expected = [p.username for p in db.query(UserProfile).order_by(
+            UserProfile.mentixy_score.desc(), UserProfile.user_id).limit(10)]
+    finally:
+        db.close()
+    page = client.get("/api/leaderboard/individual", params={"limit": 10}).json()
+    assert [p["username"] for p in page["leaderboard"]] == expected
+
+    me = client.get("/api/leaderboard/me", params={"scope": "college", "around": 2}, headers=_auth(world)).json()
+    mine = [n for n in me["neighbors"] if n["is_me"]]
+    assert len(mine) == 1 and mine[0]["rank"] == me["rank"] and mine[0]["mentixy_score"] == student_score
+    assert me["college_name"] and 1 <= len(me["neighbors"]) <= 5
+
+    college = client.get("/api/leaderboard/my-college", headers=_auth(world)).json()
+    assert college["my_score"] == student_score and college["total_students"] > 0
+    ranks = [s["rank"] for s in college["top_students"]]
+    assert ranks == list(range(1, len(ranks) + 1))
@@ -0,0 +1,82 @@
+"""
+Read replicas — RoutingSession against two SQLite engines: routing, read-your-writes, failover.
+"""
+import os
+import tempfile
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, event, insert, select
+
+from database import ReplicaRouter, RoutingSession
+
+_TMP = tempfile.mkdtemp(prefix="mentixy-replicas-")
+_meta = MetaData()
+notes = Table("notes", _meta, Column("id", Integer, primary_key=True), Column("body", String))
+
+
+def _engine(name: str, body: str = None):
+    e = create_engine(f"sqlite:///{os.path.join(_TMP, name)}.db", connect_args={"check_same_thread": False})
+    if body is not None:
+        _meta.create_all(e)
+        with e.begin() as conn:
+            conn.execute(insert(notes).values(id=1, body=body))
+    return e
+
+
+def _session(primary, router):
+    return RoutingSession(bind=primary, router=router)
+
+
+def _body(db) -> str:
+    return db.scalar(select(notes.c.body).where(notes.c.id == 1))
+
+
+def test_reads_go_to_the_replica_until_the_session_writes():
+    primary, replica = _engine("primary-rw", "primary"), _engine("replica-rw", "replica")
+    router = ReplicaRouter([replica])
+    db = _session(primary, router)
+    try:
+        assert _body(db) == "replica"
+        db.execute(insert(notes).values(id=2, body="new"))   # first write pins the session
+        assert _body(db) == "primary"
+        assert db.scalar(select(notes.c.body).where(notes.c.id == 2)) == "new"   # reads its own write
+        db.rollback()
+        assert _body(db) == "primary"   # still pinned after the transaction ends
+    finally:
+        db.close()
+    db = _session(primary, router)
+    try:
+        assert _body(db) == "replica"   # a new session starts on the replica again
+    finally:
+        db.close()
+
+
+def test_pick_never_probes_in_the_request():
+    replica = create_engine(f"sqlite:///{os.path.join(_TMP, 'missing', 'replica.db')}")   # can't connect
+    attempts = []
+    event.listen(replica, "handle_error", lambda ctx: attempts.append(ctx))
+    router = ReplicaRouter([replica])
+    assert router.pick() is replica and not attempts
+    router.check_all()   # what the background prober runs
+    assert router.pick() is None
+    assert router.status()[0]["healthy"] is False and router.status()[0]["error"]
+
+    prober = router.start()
+    assert prober.daemon and router.start() is prober
+
+
+def test_failed_replica_read_is_retried_on_the_primary():
+    primary, replica = _engine("primary-fail", "primary"), _engine("replica-fail")   # no tables: queries fail
+    router = ReplicaRouter([replica])
+    db = _session(primary, router)
+    try:
+        assert _body(db) == "primary"
+        assert db.execute(select(notes.c.body)).scalars().all() == ["primary"]   # later reads stay there
+        assert router.status()[0]["healthy"] is False   # handle_error took the replica out
+    finally:
+        db.close()
+    db = _session(primary, router)
+    try:
+        router._prober = object()   # as if probed: an unhealthy replica isn't picked at all
+        assert db.get_bind(clause=select(notes)) is primary
+    finally:
+        db.close()
@@ -0,0 +1,120 @@
+"""
+resume_ats — local ATS scoring, incremental section re-scoring, optional AI enrichment.
+"""
+import asyncio
+import json
+
+import ai_engine
+import job_queue
+import resume_ats
+from database import SessionLocal
+from test_ai_gateway import FakeModel
+
+KEYWORDS = ["Programming (Python/Java/JS)", "Data Structures & Algorithms", "SQL", "System Design", "Git"]
+
+STRONG = {
+    "name": "Asha Rao", "email": "asha@example.com", "phone": "+91 90000 00000",
+    "linkedin": "linkedin.com/in/asha", "github": "github.com/asha",
+    "summary": "Software Engineer aspirant with strong Python, SQL and data structures and algorithms skills, "
+               "looking to build reliable backend systems at a product company.",
+    "skills": ["Python", "Java", "SQL", "Git", "DSA", "System Design", "Docker", "React", "Linux"],
+    "experience": [{"title": "Backend Intern", "company": "Acme", "bullets": [
+        "Developed a REST API in Python serving 20k requests/day",
+        "Optimized SQL queries, cutting p95 latency by 40%",
+    ]}],
+    "projects": [{"name": "Campus Cab", "tech": ["React", "Node.js"], "link": "github.com/asha/cab", "bullets": [
+        "Built a ride-sharing app used by 300+ students", "Deployed on AWS with CI from GitHub Actions",
+    ]}],
+    "education": [{"degree": "B.Tech CSE", "institution": "VIT", "year": 2026, "cgpa": 8.4}],
+}
+
+
+def _auth(world):
+    return {"Authorization": f"Bearer {world['tokens']['student']}"}
+
+
+def test_keyword_alternatives_and_matching():
+    assert resume_ats.keyword_alternatives("Programming (Python/Java/JS)") == (
+        "programming", "python", "java", "javascript", "js")
+    text = resume_ats._norm("Fluent in JavaScript, DSA & version control (git)")
+    assert resume_ats.find_keywords(text, KEYWORDS + ["Version Control (Git)"]) == [
+        "Programming (Python/Java/JS)", "Data Structures & Algorithms", "Git", "Version Control (Git)"]
+    assert resume_ats.find_keywords("java developer", ["JS"]) == []
+
+
+def test_strong_resume_outscores_weak_one():
+    strong = resume_ats.score_resume(STRONG, "Software Engineer", KEYWORDS)
+    weak = resume_ats.score_resume({"name": "X", "skills": ["MS Word"], "experience": [
+        {"title": "Intern", "description": "Responsible for various tasks. Worked on testing."}]},
+        "Software Engineer", KEYWORDS)
+
+    assert strong["ats_score"] >= 80 > 50 > weak["ats_score"]
+    assert set(strong["section_scores"]) == set(resume_ats.SECTIONS)
+    assert strong["missing_keywords"] == [] and strong["formatting_issues"] == []
+    assert {"Developed", "Optimized", "Built", "Deployed"} <= set(strong["strong_action_verbs"])
+    assert weak["missing_keywords"] == KEYWORDS
+    assert "Add your Email at the top" in weak["formatting_issues"]
+    assert weak["improvements"][0]["priority"] == "high"
+    assert weak["section_scores"]["experience"]["feedback"].startswith("Start each bullet")
+
+
+def test_only_changed_sections_are_rescored():
+    first = resume_ats.score_resume(STRONG, "Software Engineer", KEYWORDS)
+    assert first["rescored_sections"] == list(resume_ats.SECTIONS)
+
+    edited = {**STRONG, "skills": STRONG["skills"] + ["Kubernetes"]}
+    second = resume_ats.score_resume(edited, "Software Engineer", KEYWORDS, previous=first)
+    assert second["rescored_sections"] == ["skills"]
+    assert second["sections"]["projects"] is first["sections"]["projects"]
+
+    # Role keywords feed every section's score, so a role change re-scores all of them
+    third = resume_ats.score_resume(edited, "Data Scientist", ["Statistics"], previous=second)
+    assert third["rescored_sections"] == list(resume_ats.SECTIONS)
+
+
+def test_role_keywords_come_from_careers_and_jobs(client):
+    db = SessionLocal()
+    try:
+        keywords = resume_ats.role_keywords(db, "Data Scientist")
+        assert "Statistics" in keywords and "SQL" in keywords
+        assert resume_ats.role_keywords(db, "Data Scientist") is keywords  # cached
+        assert resume_ats.role_keywords(db, "") == []
+    finally:
+        db.close()
+
+
+def test_saves_store_a_local_report(client, world):
+    resp = client.post("/api/resume", json={"title": "v1", "content": STRONG, "target_role": "Software Engineer"},
+                       headers=_auth(world))
+    assert resp.status_code == 200
+    created = resp.json()
+    assert created["ats"]["engine"] == "local" and "sections" not in created["ats"]
+
+    content = {**STRONG, "summary": "Backend developer."}
+    updated = client.patch(f"/api/resume/{created['resume_id']}", headers=_auth(world),
+                           json={"title": "v2", "content": content, "target_role": "Software Engineer"}).json()
+    assert updated["ats"]["rescored_sections"] == ["summary"]
+    assert updated["ats_score"] < created["ats_score"]
+
+    saved = client.get(f"/api/resume/{created['resume_id']}", headers=_auth(world)).json()
+    assert saved["ats_score"] == updated["ats_score"]
+    assert saved["ai_suggestions"]["section_scores"] == updated["ats"]["section_scores"]
+    assert "sections" not in saved["ai_suggestions"]
+
+
+def test_review_is_local_unless_enrichment_is_asked_for(client, world, monkeypatch):
+    body = {"resume_data": STRONG, "target_role": "Software Engineer"}
+    local = client.post("/api/ai/resume-review", json=body, headers=_auth(world))
+    assert local.status_code == 200 and local.json()["engine"] == "local"
+
+    model = FakeModel(delay=0.01, text=json.dumps({"overall_feedback": "Sharp resume.", "tips": ["Add a blog"],
+                                                   "ats_score": 12}))
+    monkeypatch.setattr(ai_engine, "model", model)
+    monkeypatch.setattr(ai_engine, "gateway", ai_engine.AIGateway(max_concurrency=2, timeout=5))
+    queued = client.post("/api/ai/resume-review", params={"enrich": "true"}, json=body, headers=_auth(world))
+    assert queued.status_code == 202
+    asyncio.run(job_queue.drain())
+    result = client.get(f"/api/queue/jobs/{queued.json()['job_id']}", headers=_auth(world)).json()["result"]
+    assert result["engine"] == "local+ai" and result["overall_feedback"] == "Sharp resume."
+    assert result["ats_score"] == local.json()["ats_score"]  # the model can't move the score
+    assert result["improvements"] == local.json()["improvements"]
@@ -0,0 +1,188 @@
+"""
+score_calculator — score events update just their component, and the total follows.
+"""
+import asyncio
+
+from sqlalchemy import event
+
+import job_queue
+import score_calculator
+from database import SessionLocal, engine
+from models import (
+    LearningRoadmap, RoadmapMilestone, User, UserConnection, UserProfile, UserScoreComponents,
+)
+
+
+def _student(world):
+    return {"Authorization": f"Bearer {world['tokens']['student']}"}
+
+
+def _components(db, user_id) -> dict:
+    row = db.get(UserScoreComponents, user_id)
+    return {name: getattr(row, name) for name in score_calculator.COMPONENTS} if row else None
+
+
+def _check_total(db, user_id):
+    total, _ = score_calculator.total_score(_components(db, user_id))
+    assert db.get(UserProfile, user_id).mentixy_score == total
+
+
+def test_known_component_is_applied_without_requerying_the_rest(world):
+    statements = []
+    listener = lambda *args: statements.append(1)  # noqa: E731
+    db = SessionLocal()
+    try:
+        before = _components(db, world["peer_id"])
+        db.expire_all()
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            score_calculator.refresh_score(db, world["peer_id"], aptitude_percentile=93.0)
+            queried = len(statements)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        db.commit()
+        after = _components(db, world["peer_id"])
+        assert queried == 1  # profile + components in one select; nothing recomputed
+        assert after == {**before, "aptitude_percentile": 93.0}
+        _check_total(db, world["peer_id"])
+    finally:
+        db.close()
+
+
+def test_milestone_completion_moves_roadmap_progress(client, world):
+    db = SessionLocal()
+    try:
+        db.query(LearningRoadmap).filter_by(id=world["roadmap_id"]).update({"is_active": True})
+        ahead = LearningRoadmap(user_id=world["student_id"], target_career_name="Ahead", completion_pct=99.0)
+        db.add(ahead)  # a second active roadmap further along: progress is the best of them
+        db.commit()
+        ahead_id = ahead.id
+        milestone = db.query(RoadmapMilestone).filter(
+            RoadmapMilestone.roadmap_id == world["roadmap_id"], RoadmapMilestone.status != "completed").first()
+        before = _components(db, world["student_id"])
+    finally:
+        db.close()
+
+    resp = client.post(f"/api/learning/milestones/{milestone.id}/complete", headers=_student(world))
+    assert resp.status_code == 200
+    pct = resp.json()["roadmap_completion_pct"]
+
+    db = SessionLocal()
+    try:
+        milestones = db.query(RoadmapMilestone).filter_by(roadmap_id=world["roadmap_id"]).all()
+        done = sum(m.status == "completed" for m in milestones)
+        assert pct == round(100 * done / len(milestones), 1) > 0
+        assert db.get(LearningRoadmap, world["roadmap_id"]).completion_pct == pct
+        assert _components(db, world["student_id"]) == {**before, "roadmap_progress": 99.0}
+        _check_total(db, world["student_id"])
+
+        db.delete(db.get(LearningRoadmap, ahead_id))
+        db.commit()
+        score_calculator.refresh_score(db, world["student_id"], "roadmap_progress")
+        db.commit()
+        assert _components(db, world["student_id"])["roadmap_progress"] == pct
+    finally:
+        db.close()
+
+
+def test_generated_roadmap_milestones_move_its_progress(client, world):
+    """Milestones saved by the generate_roadmap job, including ones written before
+    they carried roadmap_id, count towards their own roadmap."""
+    resp = client.post("/api/ai/generate-roadmap", json={"target_career": "ML Engineer"}, headers=_student(world))
+    assert resp.status_code == 202
+    asyncio.run(job_queue.drain())
+    roadmap_id = client.get(resp.json()["status_url"], headers=_student(world)).json()["result"]["roadmap_id"]
+
+    db = SessionLocal()
+    try:
+        milestones = db.query(RoadmapMilestone).filter_by(roadmap_id=roadmap_id).all()
+        assert len(milestones) >= 2 and all(m.user_id == world["student_id"] for m in milestones)
+        legacy = milestones[1].id
+        db.query(RoadmapMilestone).filter_by(id=legacy).update({"roadmap_id": None})
+        db.commit()
+        ids = [milestones[0].id, legacy]
+    finally:
+        db.close()
+
+    try:
+        for done, milestone_id in enumerate(ids, 1):
+            resp = client.post(f"/api/learning/milestones/{milestone_id}/complete", headers=_student(world))
+            assert resp.status_code == 200
+            assert resp.json()["roadmap_completion_pct"] == round(100 * done / len(milestones), 1)
+
+        db = SessionLocal()
+        try:
+            assert db.get(RoadmapMilestone, legacy).roadmap_id == roadmap_id
+            assert db.get(LearningRoadmap, roadmap_id).completion_pct == resp.json()["roadmap_completion_pct"]
+            best = max(r.completion_pct or 0 for r in db.query(LearningRoadmap)
+                       .filter_by(user_id=world["student_id"], is_active=True))
+            assert _components(db, world["student_id"])["roadmap_progress"] == best
+        finally:
+            db.close()
+    finally:
+        db = SessionLocal()
+        try:
+            db.delete(db.get(LearningRoadmap, roadmap_id))
+            db.commit()
+            score_calculator.refresh_score(db, world["student_id"], "roadmap_progress")
+            db.commit()
+        finally:
+            db.close()
+
+
+def test_concurrent_first_scores_share_one_row(world):
+    """Two events scoring a user with no components row yet both succeed."""
+    db, other = SessionLocal(), SessionLocal()
+    try:
+        db.query(UserScoreComponents).filter_by(user_id=world["peer_id"]).delete()
+        db.commit()
+        raced = []
+
+        def race(conn, cursor, statement, *args):
+            # The other event creates and commits the row just before this one inserts
+            if statement.startswith("INSERT INTO user_score_components") and not raced:
+                raced.append(statement)
+                score_calculator.refresh_score(other, world["peer_id"], "community")
+                other.commit()
+
+        event.listen(engine, "before_cursor_execute", race)
+        try:
+            score_calculator.refresh_score(db, world["peer_id"], "community")
+            db.commit()
+        finally:
+            event.remove(engine, "before_cursor_execute", race)
+        assert raced and db.query(UserScoreComponents).filter_by(user_id=world["peer_id"]).count() == 1
+        _check_total(db, world["peer_id"])
+    finally:
+        db.close()
+        other.close()
+
+
+def test_accepted_connection_rescores_both_users(client, world):
+    db = SessionLocal()
+    try:
+        newcomer = User(email="newcomer@test.mentixy.in", hashed_password="x", role="student")
+        db.add(newcomer)
+        db.flush()
+        db.add(UserProfile(user_id=newcomer.id, username="newcomer", display_name="Newcomer"))
+        request = UserConnection(requester_id=newcomer.id, receiver_id=world["student_id"], status="pending")
+        db.add(request)
+        db.commit()
+        newcomer_id, request_id = newcomer.id, request.id
+        student_before = _components(db, world["student_id"])
+        assert _components(db, newcomer_id) is None  # never scored
+    finally:
+        db.close()
+
+    resp = client.post(f"/api/network/connect/{request_id}/respond?accept=true", headers=_student(world))
+    assert resp.status_code == 200
+
+    db = SessionLocal()
+    try:
+        student = _components(db, world["student_id"])
+        assert student == {**student_before, "community": min(100, student_before["community"] + 5)}
+        assert _components(db, newcomer_id)["community"] == 5  # first score: every component computed
+        for user_id in (world["student_id"], newcomer_id):
+            _check_total(db, user_id)
+    finally:
+        db.close()
@@ -0,0 +1,153 @@
+"""
+score_calculator — set-based nightly recompute agrees with the per-user score, in a fixed number of queries.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, func
+
+import job_queue
+import score_calculator
+from database import SessionLocal, engine
+from models import (
+    BackgroundJob, SkillsTaxonomy, UserAptitudeProfile, UserCodingStats, UserProfile,
+    UserScoreComponents, UserSkillVerification,
+)
+
+
+def _admin(world):
+    return {"Authorization": f"Bearer {world['tokens']['admin']}"}
+
+
+def _give_inputs(world):
+    """Active skills, coding stats and aptitude for the student and one peer."""
+    db = SessionLocal()
+    try:
+        later = datetime.now(timezone.utc) + timedelta(days=60)
+        for user_id, percentile in ((world["student_id"], 72.5), (world["peer_id"], None)):
+            # Written behind the score's back, as no event would: only the batch sees it
+            verified = db.query(UserSkillVerification.skill_id).filter_by(user_id=user_id)
+            skill = db.query(SkillsTaxonomy).filter(SkillsTaxonomy.id.not_in(verified)).first()
+            db.add(UserSkillVerification(user_id=user_id, skill_id=skill.id, verified_score=70,
+                                         verified_percentile=percentile, expires_at=later))
+            if not db.get(UserCodingStats, user_id):
+                db.add(UserCodingStats(user_id=user_id, current_streak_days=9, problems_solved_total=31))
+        if not db.get(UserAptitudeProfile, world["student_id"]):
+            db.add(UserAptitudeProfile(user_id=world["student_id"], overall_percentile=81.0))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _scores(db) -> dict:
+    return dict(db.query(UserProfile.user_id, UserProfile.mentixy_score))
+
+
+def test_batch_scores_match_the_per_user_calculation(world):
+    _give_inputs(world)
+    db = SessionLocal()
+    try:
+        after, scored, changed = None, 0, 0
+        while True:
+            after, n, c = score_calculator.recompute_chunk(db, after, limit=4)
+            if not n:
+                break
+            scored, changed = scored + n, changed + c
+        assert scored == db.query(func.count(UserProfile.user_id)).scalar() and changed > 0
+        batch = _scores(db)
+        stored = db.get(UserScoreComponents, world["student_id"])
+
+        for user_id, score in batch.items():
+            result = score_calculator.calculate_mentixy_score(user_id, db)
+            assert (result["mentixy_score"], result["delta"]) == (score, 0), user_id
+            if user_id == world["student_id"]:
+                assert {name: round(getattr(stored, name), 1) for name in score_calculator.COMPONENTS} == \
+                    {name: part["raw"] for name, part in result["breakdown"].items()}
+                assert result["breakdown"]["verified_skills"]["raw"] > 0
+
+        assert score_calculator.recompute_chunk(db, None, limit=1000)[2] == 0  # nothing changed since
+    finally:
+        db.close()
+
+
+def test_queries_per_chunk_do_not_grow_with_the_chunk():
+    statements = []
+    listener = lambda *args: statements.append(1)  # noqa: E731
+    db = SessionLocal()
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        counts = []
+        for limit in (2, 50):
+            statements.clear()
+            score_calculator.recompute_chunk(db, None, limit)
+            counts.append(len(statements))
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+        db.close()
+    assert counts[0] == counts[1] <= 10
+
+
+def test_overlapping_chunks_over_the_same_range():
+    """A second run (or a score event) creating component rows after this chunk
+    read them as missing must not fail the chunk."""
+    db, other = SessionLocal(), SessionLocal()
+    db.query(UserScoreComponents).delete()
+    db.commit()
+    overlapped = []
+
+    def overlap(conn, cursor, statement, *args):
+        if statement.startswith("INSERT INTO user_score_components") and not overlapped:
+            overlapped.append(None)   # before the nested chunk's own insert comes through here
+            overlapped[0] = score_calculator.recompute_chunk(other, None, 1000)
+
+    event.listen(engine, "before_cursor_execute", overlap)
+    try:
+        after, n, _ = score_calculator.recompute_chunk(db, None, 1000)
+    finally:
+        event.remove(engine, "before_cursor_execute", overlap)
+    try:
+        profiles = db.query(func.count(UserProfile.user_id)).scalar()
+        assert overlapped and overlapped[0][1] == n == profiles
+        assert db.query(func.count(UserScoreComponents.user_id)).scalar() == profiles
+    finally:
+        db.close()
+        other.close()
+
+
+def test_admin_recompute_job_reports_progress(client, world):
+    db = SessionLocal()
+    try:
+        db.query(UserProfile).filter_by(user_id=world["peer_id"]).update({"mentixy_score": 0})
+        db.commit()
+    finally:
+        db.close()
+
+    resp = client.post("/api/admin/scores/recompute", params={"chunk_size": 5}, headers=_admin(world))
+    assert resp.status_code == 202
+    asyncio.run(job_queue.drain())
+    job = client.get(resp.json()["status_url"], headers=_admin(world)).json()
+    assert job["status"] == "succeeded" and job["progress"] == 100
+    assert job["result"]["changed"] >= 1 and job["result"]["chunk_size"] == 5
+
+    db = SessionLocal()
+    try:
+        assert db.get(UserProfile, world["peer_id"]).mentixy_score > 0
+    finally:
+        db.close()
+
+
+def test_nightly_run_is_kept_queued_once():
+    at = score_calculator.next_recompute(datetime(2026, 3, 1, 22, 0, tzinfo=timezone.utc))
+    assert at == datetime(2026, 3, 2, 21, 30, tzinfo=timezone.utc)
+    assert score_calculator.next_recompute(datetime(2026, 3, 1, 9, 0, tzinfo=timezone.utc)).day == 1
+
+    assert job_queue.schedule_recurring() >= 1
+    assert job_queue.schedule_recurring() == 0
+    db = SessionLocal()
+    try:
+        queued = db.query(BackgroundJob).filter_by(kind="score_recompute", status="queued").all()
+        assert len(queued) == 1 and queued[0].id.startswith("score_recompute@")
+        assert queued[0].run_after.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc)
+    finally:
+        db.close()
+    assert job_queue.claim("test-worker", 10, queued[0].id) == []  # not due yet
@@ -0,0 +1,159 @@
+"""
+/api/search — ranking, facets, pagination and the incremental indexer.
+"""
+GROUP_KEYS = ["users", "careers", "problems", "skills", "jobs", "companies", "posts"]
+
+
+def _auth(world):
+    return {"Authorization": f"Bearer {world['tokens']['student']}"}
+
+
+def _search(client, **params):
+    resp = client.get("/api/search", params=params)
+    assert resp.status_code == 200, resp.text[:300]
+    return resp.json()
+
+
+def test_grouped_results_and_facets(client, world):
+    body = _search(client, q="vellore")
+    for key in GROUP_KEYS:
+        assert key in body
+    assert body["facets"]["user"] >= 10
+    assert body["total"] == sum(body["facets"].values())
+    assert 0 < len(body["users"]) <= 5
+    assert {"username", "display_name", "avatar_url"} <= set(body["users"][0])
+    scores = [hit["score"] for hit in body["results"]]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_prefix_matches(client, world):
+    body = _search(client, q="vello")
+    assert body["facets"]["user"] >= 10
+
+
+def test_type_filter_and_pagination(client, world):
+    first = _search(client, q="vellore", type="user", limit=4, page=1)
+    second = _search(client, q="vellore", type="user", limit=4, page=2)
+    assert first["total"] == second["total"] == first["facets"]["user"]
+    assert all(hit["type"] == "user" for hit in first["results"] + second["results"])
+    assert "users" not in first
+    ids = [hit["id"] for hit in first["results"]] + [hit["id"] for hit in second["results"]]
+    assert len(ids) == 8 and len(set(ids)) == 8
+
+
+def test_no_match_and_bad_type(client, world):
+    body = _search(client, q="qqxxzzyy")
+    assert body["total"] == 0 and body["results"] == []
+    assert _search(client, q="+++")["total"] == 0
+    assert client.get("/api/search", params={"q": "x", "type": "banana"}).status_code == 422
+
+
+def test_index_follows_inserts_updates_and_deletes(client, world):
+    resp = client.post("/api/community/posts", headers=_auth(world),
+                       json={"title": "Zorblax interview notes", "content": "Three rounds, mostly graphs"})
+    assert resp.status_code == 200, resp.text[:300]
+    post_id = resp.json()["post"]["id"]
+
+    hits = _search(client, q="zorblax", type="post")["results"]
+    assert [h["id"] for h in hits] == [post_id]
+
+    resp = client.patch("/api/auth/profile", headers=_auth(world), json={"tagline": "Quokkaverse builder"})
+    assert resp.status_code == 200, resp.text[:300]
+    hits = _search(client, q="quokkaverse", type="user")["results"]
+    assert [h["username"] for h in hits] == [world["username"]]
+
+    assert client.delete(f"/api/community/posts/{post_id}", headers=_auth(world)).status_code == 200
+    assert _search(client, q="zorblax")["total"] == 0
+
+
+# ─── /api/search/suggest ───
+
+def _suggest(client, **params):
+    resp = client.get("/api/search/suggest", params=params)
+    assert resp.status_code == 200, resp.text[:300]
+    return resp.json()["suggestions"]
+
+
+def test_suggest_exact_username_first(client, world):
+    got = _suggest(client, q=world["username"], types="user")
+    assert got[0]["username"] == world["username"]
+    assert all(s["type"] == "user" for s in got)
+    assert client.get("/api/search/suggest", params={"q": "a", "types": "post"}).status_code == 422
+
+
+def test_cold_suggest_loads_off_the_event_loop(client, world, monkeypatch):
+    import asyncio
+    import autocomplete
+    from sqlalchemy import event
+    from database import engine
+
+    on_loop = []
+
+    def record(conn, cursor, statement, *args):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        on_loop.append(statement.split()[0])
+
+    monkeypatch.setattr(autocomplete.index, "loaded_at", 0.0)   # as in a fresh process
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        got = _suggest(client, q=world["username"], types="user")
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert got[0]["username"] == world["username"] and autocomplete.index.loaded_at
+    assert on_loop == []
+
+
+def test_suggest_follows_writes(client, world):
+    resp = client.patch("/api/auth/profile", headers=_auth(world), json={"display_name": "Wombatina Kapoor"})
+    assert resp.status_code == 200, resp.text[:300]
+    for q in ("wombati", "kapo", "WOMBATINA K"):
+        assert [s["username"] for s in _suggest(client, q=q, types="user")] == [world["username"]], q
+
+
+def test_prefix_index_ranking_and_speed():
+    import time
+    from autocomplete import PrefixIndex
+
+    idx = PrefixIndex()
+    rows = [("user", f"u{i}", f"User{i} Sharma", {"username": f"user{i}"}, 1 + (i % 1000) / 2000)
+            for i in range(50_000)]
+    rows += [("skill", "s1", "Python", {"slug": "python"}, 1.3), ("career", "c1", "Python Developer", {"slug": "py-dev"}, 1.3)]
+    idx.load(lambda: rows)
+
+    assert [s["label"] for s in idx.complete("python", 2)] == ["Python", "Python Developer"]
+    assert idx.complete("p", 1)[0]["label"] == "Python"
+    assert idx.complete("sh", 3, ["user"])[0]["username"] == "user999"
+
+    idx.remove("skill", "s1")
+    idx.upsert("user", "u999", "Renamed Person", {"username": "user999"}, 1.4995)
+    assert idx.complete("python", 2)[0]["label"] == "Python Developer"
+    assert "user999" not in [s["username"] for s in idx.complete("user999 sh", 5)]
+    assert idx.complete("renamed", 1)[0]["username"] == "user999"
+
+    queries = ["s", "sh", "sha", "sharma", "user1", "user12", "user123", "py", "python d", "ren"]
+    started = time.perf_counter()
+    for _ in range(100):
+        for q in queries:
+            idx.complete(q, 8)
+    per_query_ms = (time.perf_counter() - started) * 1000 / (100 * len(queries))
+    assert per_query_ms < 1, f"{per_query_ms:.3f} ms per completion"
+
+
+def test_prefix_index_replays_writes_made_during_a_load():
+    from autocomplete import PrefixIndex
+
+    idx = PrefixIndex()
+    idx.load(lambda: [("skill", "s1", "Python", {"slug": "python"}, 1.0)])
+
+    def fetch():
+        # Commits between the snapshot query and the swap
+        idx.upsert("skill", "s2", "Rust", {"slug": "rust"}, 1.0)
+        idx.remove("skill", "s1")
+        return [("skill", "s1", "Python", {"slug": "python"}, 1.0)]
+
+    idx.load(fetch)
+    assert [s["label"] for s in idx.complete("rust", 5)] == ["Rust"]
+    assert idx.complete("python", 5) == []
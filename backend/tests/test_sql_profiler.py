@@ -0,0 +1,55 @@
+"""
+sql_profiler — the X-Profile-SQL header is honored only where forcing is allowed;
+failed statements don't leave timings behind.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+import sql_profiler
+from database import engine
+
+
+async def _app(scope, receive, send):
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def _response_headers(middleware) -> dict:
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/probe", "headers": [(b"x-profile-sql", b"1")]}
+    asyncio.run(middleware(scope, None, send))
+    return dict(sent[0]["headers"])
+
+
+def test_force_header_needs_the_allow_flag():
+    sql_profiler.registry.reset()
+    try:
+        headers = _response_headers(sql_profiler.SQLProfilerMiddleware(_app, sample_rate=0, allow_force=False))
+        assert b"x-sql-count" not in headers and b"server-timing" not in headers
+        assert sql_profiler.registry.snapshot() == []  # not profiled at all
+
+        headers = _response_headers(sql_profiler.SQLProfilerMiddleware(_app, sample_rate=0, allow_force=True))
+        assert int(headers[b"x-sql-count"]) >= 1
+        assert [r["endpoint"] for r in sql_profiler.registry.snapshot()] == ["GET /probe"]
+    finally:
+        sql_profiler.registry.reset()
+
+
+def test_failed_statement_leaves_no_start_time():
+    with engine.connect() as conn, sql_profiler.capture() as stats:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM no_such_table"))
+        conn.rollback()
+        assert not conn.info.get(sql_profiler._START_KEY)
+        conn.execute(text("SELECT 1"))
+        assert not conn.info.get(sql_profiler._START_KEY)
+    assert stats.count == 1
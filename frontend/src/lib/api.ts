@@ -69,6 +69,29 @@ async function request<T = any>(endpoint: string, options: RequestInit = {}): Pr
     return res.json();
 }
 
+/**
+ * Long-running AI work (roadmap generation, resume review) runs as a
+ * background job: the POST returns 202 + job_id, then we poll the
+ * job until it finishes and resolve with its result — callers see the same
+ * response shape as before. (The websocket also pushes `job_update` events.)
+ * Endpoints that can answer immediately (local resume ATS) return the result
+ * directly, which is passed through.
+ */
+async function runJob<T = any>(endpoint: string, body: unknown, timeoutMs = 120_000): Promise<T> {
+    const job = await request(endpoint, { method: 'POST', body: JSON.stringify(body) });
+    if (!job?.job_id || !job?.status_url) return job as T;
+    const deadline = Date.now() + timeoutMs;
+    let delay = 500;
+    while (Date.now() < deadline) {
+        const state = await request(`/queue/jobs/${job.job_id}`);
+        if (state.status === 'succeeded') return state.result as T;
+        if (state.status === 'failed') throw new ApiError(state.error || 'Job failed', 500);
+        await new Promise((resolve) => setTimeout(resolve, delay));
+        delay = Math.min(delay * 1.5, 3000);
+    }
+    throw new ApiError('Still working on it — check back in a minute.', 504);
+}
+
 export const api = {
     // ═══════════ AUTH ═══════════
     signup: (data: { email: string; password: string; display_name: string; username: string }) =>
@@ -157,6 +180,11 @@ export const api = {
         return request(`/jobs${q}`);
     },
 
+    getMatchedJobs: (params?: Record<string, string>) => {
+        const q = params ? '?' + new URLSearchParams(params).toString() : '';
+        return request(`/jobs/matched${q}`);
+    },
+
     getJobDetail: (id: string) => request(`/jobs/${id}`),
 
     applyJob: (job_id: string) =>
@@ -276,8 +304,8 @@ export const api = {
     aiSkillGap: (data: { current_skills: string[]; target_career: string }) =>
         request('/ai/skill-gap', { method: 'POST', body: JSON.stringify(data) }),
 
-    aiResumeReview: (data: { resume_data: Record<string, any>; target_role: string }) =>
-        request('/ai/resume-review', { method: 'POST', body: JSON.stringify(data) }),
+    aiResumeReview: (data: { resume_data: Record<string, any>; target_role: string }, enrich = false) =>
+        runJob(`/ai/resume-review${enrich ? '?enrich=true' : ''}`, data),
 
     aiCodeReview: (data: { code: string; language: string; problem_title?: string }) =>
         request('/ai/code-review', { method: 'POST', body: JSON.stringify(data) }),
@@ -286,7 +314,7 @@ export const api = {
         request('/ai/job-match', { method: 'POST', body: JSON.stringify({ job_id }) }),
 
     aiGenerateRoadmap: (data: { target_career: string; current_skills?: string[]; hours_per_week?: number }) =>
-        request('/ai/generate-roadmap', { method: 'POST', body: JSON.stringify(data) }),
+        runJob('/ai/generate-roadmap', data),
 
     aiInterviewPrep: (data: { company: string; role: string; round_type?: string }) =>
         request('/ai/interview-prep', { method: 'POST', body: JSON.stringify(data) }),